@@ -1,13 +1,19 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Callable, Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 import os
-from sqlalchemy.orm import Session
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
 from models import User
 from database import get_db
+from cache import create_cache_backend
 
 # Configuration
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production-min-32-chars!")
@@ -15,6 +21,17 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 REFRESH_TOKEN_EXPIRE_DAYS = 7
 
+# Password hashing pool: bcrypt costs ~250ms of CPU, so it never runs on the event loop
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")  # "thread" or "process"
+
+# Authenticated-user cache
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+# A request that read a user just before a change committed may cache it right after; drop it again this much later
+USER_CACHE_REDROP_SECONDS = float(os.getenv("USER_CACHE_REDROP_SECONDS", "1"))
+
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -32,6 +49,210 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def _timed_call(fn: Callable, *args):
+    """Run fn in a worker and report how long the call itself took"""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+class LatencyStats:
+    """Running latency totals for one pool operation"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.queue_wait_seconds = 0.0
+
+    def record(self, total: float, run: float):
+        self.count += 1
+        self.total_seconds += total
+        self.max_seconds = max(self.max_seconds, total)
+        self.queue_wait_seconds += max(0.0, total - run)
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "avg_ms": (self.total_seconds / self.count * 1000) if self.count else 0.0,
+            "max_ms": self.max_seconds * 1000,
+            "avg_queue_wait_ms": (self.queue_wait_seconds / self.count * 1000) if self.count else 0.0,
+        }
+
+
+class PasswordHasherPool:
+    """
+    Bounded worker pool for bcrypt hashing and verification.
+
+    At most ``workers + max_queue`` calls may be outstanding; beyond that the
+    request is rejected with 503 so a login burst cannot pile up unbounded work.
+    """
+
+    def __init__(self, workers: int, max_queue: int, kind: str = "thread"):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.kind = kind
+        self.in_flight = 0
+        self.rejected = 0
+        self.stats = {"hash": LatencyStats(), "verify": LatencyStats()}
+        self._executor: Optional[Executor] = None
+
+    def _get_executor(self) -> Executor:
+        # Created lazily so importing this module in a worker process doesn't spawn a pool
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="password-hash"
+                )
+        return self._executor
+
+    async def run(self, op: str, fn: Callable, *args):
+        if self.in_flight >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication service is busy, please retry",
+                headers={"Retry-After": "1"},
+            )
+        self.in_flight += 1
+        submitted = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result, run_seconds = await loop.run_in_executor(
+                self._get_executor(), _timed_call, fn, *args
+            )
+        finally:
+            self.in_flight -= 1
+        self.stats[op].record(time.perf_counter() - submitted, run_seconds)
+        return result
+
+    def snapshot(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "rejected": self.rejected,
+            **{op: stats.snapshot() for op, stats in self.stats.items()},
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+password_pool = PasswordHasherPool(
+    PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_QUEUE, PASSWORD_HASH_EXECUTOR
+)
+
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password on the password worker pool"""
+    return await password_pool.run("hash", hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the password worker pool"""
+    return await password_pool.run("verify", verify_password, plain_password, hashed_password)
+
+
+class UserCache:
+    """
+    Snapshot cache of active users keyed by id, used by get_current_user.
+
+    Only the public profile fields are cached (never the password hash).
+    Entries are dropped when a User row is updated or deleted, again once
+    the change has committed, and a last time ``redrop`` seconds later.
+    """
+
+    def __init__(self, backend, ttl: float, redrop: float = USER_CACHE_REDROP_SECONDS):
+        self.backend = backend
+        self.ttl = ttl
+        self.redrop = redrop
+        self.hits = 0
+        self.misses = 0
+        self._redrops = set()  # keeps the scheduled drops referenced until they ran
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return f"user:{user_id}"
+
+    async def get(self, user_id: int) -> Optional[User]:
+        snapshot = await self.backend.get_async(self._key(user_id))
+        if snapshot is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        # Detached instance: attribute access only, never added to a session
+        return User(
+            id=snapshot["id"],
+            name=snapshot["name"],
+            email=snapshot["email"],
+            is_active=snapshot["is_active"],
+            created_at=datetime.fromisoformat(snapshot["created_at"]),
+        )
+
+    async def put(self, user: User):
+        await self.backend.set_async(self._key(user.id), {
+            "id": user.id,
+            "name": user.name,
+            "email": user.email,
+            "is_active": user.is_active,
+            "created_at": user.created_at.isoformat(),
+        }, self.ttl)
+
+    def invalidate(self, user_id: int):
+        # Synchronous: called from the session hooks, on the rare writes to a User row
+        self.backend.delete(self._key(user_id))
+
+    def invalidate_committed(self, user_ids) -> None:
+        """Drop users whose change just committed, then again once requests that read the old row are done"""
+        for user_id in user_ids:
+            self.invalidate(user_id)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # committed outside the app (scripts, migrations): nothing is mid-request
+        for user_id in user_ids:
+            loop.call_later(self.redrop, self._schedule_redrop, user_id)
+
+    def _schedule_redrop(self, user_id: int) -> None:
+        task = asyncio.ensure_future(self.backend.delete_async(self._key(user_id)))
+        self._redrops.add(task)
+        task.add_done_callback(self._redrops.discard)
+
+    def snapshot(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            "evictions": getattr(self.backend, "evictions", 0),
+        }
+
+
+user_cache = UserCache(create_cache_backend(USER_CACHE_MAX_SIZE), USER_CACHE_TTL_SECONDS)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target):
+    # At flush the old row is still the committed one, and a concurrent request can cache it again
+    user_cache.invalidate(target.id)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("changed_user_ids", set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session):
+    user_ids = session.info.pop("changed_user_ids", None)
+    if user_ids:
+        user_cache.invalidate_committed(user_ids)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -70,25 +291,29 @@ def verify_token(token: str) -> dict:
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> User:
     """Dependency to get current authenticated user"""
     token = credentials.credentials
     payload = verify_token(token)
     
-    user_id: int = payload.get("sub")
+    user_id = payload.get("sub")
     if user_id is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials"
         )
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await user_cache.get(int(user_id))
     if user is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
-        )
+        user = (await db.execute(select(User).where(User.id == int(user_id)))).scalars().first()
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found"
+            )
+        if user.is_active:
+            await user_cache.put(user)
     
     if not user.is_active:
         raise HTTPException(
@@ -0,0 +1,103 @@
+"""
+Dashboard analytics: Python-side walk vs SQL aggregation vs counters.
+
+Seeds a scratch SQLite database with N tasks for one user and times the
+legacy approach (load every Task, iterate in Python) against the full-scan
+``aggregate_task_analytics`` and the materialized ``read_task_analytics``.
+Peak Python heap is measured with tracemalloc.
+
+    python -m benchmarks.analytics_aggregation --sizes 1000,100000,1000000
+"""
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.seed import open_scratch_db, seed_user_tasks
+
+from sqlalchemy import select  # noqa: E402
+from models import Task, TaskStatus  # noqa: E402
+from services.task_stats import aggregate_task_analytics, read_task_analytics, rebuild_task_stats  # noqa: E402
+
+
+def legacy_analytics(tasks):
+    """The previous implementation: several Python passes over ORM objects"""
+    now = datetime.now(timezone.utc)
+    total = len(tasks)
+    completed = len([t for t in tasks if t.status == TaskStatus.COMPLETED])
+    pending = len([t for t in tasks if t.status == TaskStatus.PENDING])
+    in_progress = len([t for t in tasks if t.status == TaskStatus.IN_PROGRESS])
+    missed = len([t for t in tasks if t.status == TaskStatus.MISSED])
+    completed_tasks = [t for t in tasks if t.completed_at and t.created_at]
+    avg = None
+    if completed_tasks:
+        avg = sum((t.completed_at - t.created_at).total_seconds() / 3600 for t in completed_tasks) / len(completed_tasks)
+    overdue = len([t for t in tasks if t.is_overdue])
+    upcoming = len([
+        t for t in tasks
+        if t.status in [TaskStatus.PENDING, TaskStatus.IN_PROGRESS]
+        and now < t.deadline < now + timedelta(days=7)
+    ])
+    return dict(total=total, completed=completed, pending=pending, in_progress=in_progress,
+                missed=missed, avg=avg, overdue=overdue, upcoming=upcoming)
+
+
+async def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = await fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed * 1000, peak / 1024 / 1024
+
+
+async def run(size):
+    engine, session_factory = await open_scratch_db()
+    user_id = await seed_user_tasks(engine, size)
+
+    async def legacy():
+        async with session_factory() as db:
+            tasks = (await db.execute(select(Task).where(Task.user_id == user_id))).scalars().all()
+            return legacy_analytics(tasks)
+
+    async def aggregated():
+        async with session_factory() as db:
+            return await aggregate_task_analytics(db, user_id)
+
+    async def materialized():
+        async with session_factory() as db:
+            return await read_task_analytics(db, user_id)
+
+    async with session_factory() as db:
+        await rebuild_task_stats(db, user_id)
+        await db.commit()
+
+    old, old_ms, old_mb = await measure(legacy)
+    new, new_ms, new_mb = await measure(aggregated)
+    mat, mat_ms, mat_mb = await measure(materialized)
+    assert old["total"] == new.total_tasks == mat.total_tasks
+    assert old["overdue"] == new.overdue_count == mat.overdue_count
+    await engine.dispose()
+    print(
+        f"{size:>9} {old_ms:>11.1f} {old_mb:>10.1f} {new_ms:>9.1f} {new_mb:>8.2f}"
+        f" {mat_ms:>10.1f} {mat_mb:>8.2f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="1000,100000,1000000")
+    args = parser.parse_args()
+    print(
+        f"{'tasks':>9} {'legacy ms':>11} {'legacy MB':>10} {'SQL ms':>9} {'SQL MB':>8}"
+        f" {'stats ms':>10} {'stats MB':>8}"
+    )
+    for size in [int(s) for s in args.sizes.split(",")]:
+        asyncio.run(run(size))
+
+
+if __name__ == "__main__":
+    main()
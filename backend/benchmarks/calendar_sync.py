@@ -0,0 +1,102 @@
+"""
+Calendar sync: API calls per cycle vs re-pushing every task.
+
+Seeds one user with N tasks, connects them to ``fake_google.FakeGoogle``
+and runs ``sync_user_calendar`` cycles: the first (full) sync, the next one
+(which lists the events it just pushed), an idle cycle, and a cycle after
+``--changes`` local task edits plus as many edits made in the calendar.
+Each row shows the HTTP requests on the wire, the API calls after unpacking
+batches, and the wall time. The last row pushes every task again with
+``upsert_calendar_events``, which is what keeping the calendar current cost
+before.
+
+    python -m benchmarks.calendar_sync --tasks 10000 --changes 50
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.seed import open_scratch_db, seed_user_tasks
+
+from fake_google import FakeGoogle  # noqa: E402
+from sqlalchemy import select, update  # noqa: E402
+from models import GoogleToken, Task, User  # noqa: E402
+from services import google_integration  # noqa: E402
+from services.calendar_sync import sync_user_calendar  # noqa: E402
+
+
+async def run(size, changes):
+    google = FakeGoogle().start()
+    google_integration.GOOGLE_API_ROOT = f"{google.url}/"
+    google_integration.TOKEN_URI = f"{google.url}/token"
+    google_integration.GOOGLE_CLIENT_ID = google_integration.GOOGLE_CLIENT_ID or "bench-client"
+    google_integration.GOOGLE_CLIENT_SECRET = google_integration.GOOGLE_CLIENT_SECRET or "bench-secret"
+
+    engine, session_factory = await open_scratch_db()
+    user_id = await seed_user_tasks(engine, size)
+    async with session_factory() as db:
+        db.add(GoogleToken(user_id=user_id, access_token="bench-access"))
+        await db.commit()
+
+    async def cycle():
+        async with session_factory() as db:
+            user = await db.get(User, user_id)
+            token = (await db.execute(select(GoogleToken).where(GoogleToken.user_id == user_id))).scalar_one()
+            return await sync_user_calendar(db, user, token)
+
+    async def measured(name, fn):
+        wire, calls = len(google.http_requests), len(google.calls)
+        start = time.perf_counter()
+        result = await fn()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(
+            f"{name:<22} {len(google.http_requests) - wire:>9} {len(google.calls) - calls:>9}"
+            f" {elapsed_ms:>10.1f}  {result}"
+        )
+
+    print(f"{'cycle':<22} {'requests':>9} {'api calls':>9} {'total ms':>10}  result")
+    await measured("first sync", cycle)
+    await measured("echo of first sync", cycle)
+    await measured("idle", cycle)
+
+    rng = random.Random(0)
+    async with engine.begin() as conn:
+        linked = (await conn.execute(
+            select(Task.id, Task.calendar_event_id).where(Task.calendar_event_id.isnot(None))
+        )).all()
+        sample = rng.sample(linked, min(len(linked), changes * 2))
+        await conn.execute(
+            update(Task).where(Task.id.in_([task_id for task_id, _ in sample[:changes]]))
+            .values(title="Edited here", updated_at=datetime.now(timezone.utc))
+        )
+    moved = (datetime.now(timezone.utc) + timedelta(days=3)).isoformat()
+    for _, event_id in sample[changes:]:
+        google.edit_event(event_id, summary="Edited in Calendar", start={"dateTime": moved})
+    await measured(f"{changes}+{changes} edits", cycle)
+
+    async def push_everything():
+        async with session_factory() as db:
+            user = await db.get(User, user_id)
+            token = (await db.execute(select(GoogleToken).where(GoogleToken.user_id == user_id))).scalar_one()
+            tasks = (await db.execute(select(Task).where(Task.user_id == user_id))).scalars().all()
+        results = await asyncio.to_thread(google_integration.upsert_calendar_events, user, tasks, token)
+        return f"{len(results)} upserts"
+
+    await measured("re-push everything", push_everything)
+    await engine.dispose()
+    google.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--changes", type=int, default=50, help="local and remote edits before the last cycle")
+    args = parser.parse_args()
+    asyncio.run(run(args.tasks, args.changes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Benchmarks run against a live server, the same way ``test_endpoints.py`` does:
+start the API (``python main.py``) and point ``BASE_URL`` at it.
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import requests
+
+BASE_URL = os.getenv("BASE_URL", "http://localhost:8000")
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def summarize(label, samples_ms, elapsed_s=None):
+    """Print a one-line latency summary"""
+    line = (
+        f"{label:<28} n={len(samples_ms):<6} "
+        f"p50={percentile(samples_ms, 50):7.1f}ms "
+        f"p95={percentile(samples_ms, 95):7.1f}ms "
+        f"p99={percentile(samples_ms, 99):7.1f}ms "
+        f"mean={statistics.fmean(samples_ms) if samples_ms else 0:7.1f}ms"
+    )
+    if elapsed_s:
+        line += f" rps={len(samples_ms) / elapsed_s:8.1f}"
+    print(line)
+
+
+def register_user(session=None, prefix="bench"):
+    """Register a throwaway user and return (token, credentials)"""
+    http = session or requests
+    creds = {
+        "name": "Benchmark User",
+        "email": f"{prefix}_{datetime.now().timestamp()}@example.com",
+        "password": "benchmarkpassword123",
+    }
+    resp = http.post(f"{BASE_URL}/api/auth/register", json=creds)
+    resp.raise_for_status()
+    return resp.json()["access_token"], creds
+
+
+def seed_tasks(token, count, session=None):
+    """Create ``count`` tasks spread around now; returns their ids"""
+    http = session or requests
+    headers = {"Authorization": f"Bearer {token}"}
+    now = datetime.now(timezone.utc)
+    ids = []
+    for i in range(count):
+        resp = http.post(
+            f"{BASE_URL}/api/tasks/",
+            headers=headers,
+            json={
+                "title": f"Benchmark task {i}",
+                "deadline": (now + timedelta(hours=(i % 480) - 96)).isoformat(),
+                "priority": ["low", "medium", "high", "critical"][i % 4],
+            },
+        )
+        resp.raise_for_status()
+        ids.append(resp.json()["id"])
+    return ids
+
+
+def migrate_database(db_path, env_overrides=None):
+    """Create or upgrade a SQLite database file with ``python main.py migrate``"""
+    subprocess.run(
+        [sys.executable, "main.py", "migrate"],
+        cwd=BACKEND_DIR,
+        env={**os.environ, "DATABASE_URL": f"sqlite:///{db_path}", **(env_overrides or {})},
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+
+
+def start_server(port, env_overrides=None, db_path=None, uvicorn_args=(), startup_timeout=30.0, serve_workers=None):
+    """
+    Start uvicorn, or ``serve.py`` with ``serve_workers`` workers (on a scratch
+    SQLite database unless db_path is given, with rate limits off unless
+    env_overrides turns them on), and wait until it answers; returns
+    (process, base_url)
+    """
+    if db_path is None:
+        db_path = os.path.join(tempfile.mkdtemp(prefix="bench-"), "bench.db")
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{db_path}",
+        "DB_STARTUP_MODE": "migrate",
+        "RATE_LIMIT_ENABLED": "false",
+        **(env_overrides or {}),
+    }
+    if serve_workers:
+        argv = [sys.executable, "serve.py", "--workers", str(serve_workers), "--host", "127.0.0.1"]
+    else:
+        argv = [sys.executable, "-m", "uvicorn", "main:app", *uvicorn_args]
+    proc = subprocess.Popen(
+        [*argv, "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + startup_timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited during startup (code {proc.returncode})")
+        try:
+            requests.get(f"{base_url}/api/health", timeout=0.5)
+            return proc, base_url
+        except requests.ConnectionError:
+            time.sleep(0.02)
+    proc.terminate()
+    raise RuntimeError("server did not start")
@@ -0,0 +1,145 @@
+"""
+Dashboard polling with and without conditional GETs.
+
+Serves a scratch database, gives every client its own user with ``--tasks``
+tasks, and has the clients poll ``GET /api/tasks/``, the dashboard analytics
+and ``/prioritized/all`` in a loop while a writer edits one task of a random
+user ``--writes`` times per second. The first pass ignores ETags; the second
+sends If-None-Match like a browser does. Each row shows requests, 304s,
+response body bytes, latency and the server's CPU time per 1000 requests
+(read from /proc, so Linux only).
+
+    python -m benchmarks.conditional_polling --clients 8 --tasks 500 --duration 15
+"""
+
+import argparse
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import requests
+
+from benchmarks.common import percentile, start_server
+
+POLLED = ["/api/tasks/", "/api/tasks/analytics/dashboard", "/api/tasks/prioritized/all"]
+
+
+def server_cpu_seconds(pid):
+    """User + system CPU time of a process, or None off Linux"""
+    try:
+        with open(f"/proc/{pid}/stat") as stat:
+            fields = stat.read().rsplit(")", 1)[1].split()
+    except OSError:
+        return None
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def setup_users(base_url, clients, tasks):
+    """Register one user per client with ``tasks`` tasks; returns [(session, task_ids)]"""
+    users = []
+    deadline = datetime.now(timezone.utc)
+    for index in range(clients):
+        session = requests.Session()
+        resp = session.post(f"{base_url}/api/auth/register", json={
+            "name": "Poller", "email": f"poller{index}@example.com", "password": "benchmarkpassword123",
+        })
+        resp.raise_for_status()
+        session.headers["Authorization"] = f"Bearer {resp.json()['access_token']}"
+        ids = []
+        for start in range(0, tasks, 1000):
+            resp = session.post(f"{base_url}/api/tasks/bulk", json={"items": [
+                {
+                    "title": f"Polled task {i}",
+                    "deadline": (deadline + timedelta(hours=i % 500 - 100)).isoformat(),
+                    "priority": ["low", "medium", "high", "critical"][i % 4],
+                }
+                for i in range(start, min(tasks, start + 1000))
+            ]})
+            resp.raise_for_status()
+            ids += [result["id"] for result in resp.json()["results"]]
+        users.append((session, ids))
+    return users
+
+
+def run_pass(base_url, users, duration, writes, conditional):
+    stop = threading.Event()
+    lock = threading.Lock()
+    totals = {"requests": 0, "not_modified": 0, "bytes": 0, "latencies": []}
+
+    def poller(session):
+        etags, latencies = {}, []
+        requests_made = not_modified = received = 0
+        while not stop.is_set():
+            for path in POLLED:
+                headers = {"If-None-Match": etags[path]} if conditional and path in etags else {}
+                start = time.perf_counter()
+                resp = session.get(f"{base_url}{path}", headers=headers)
+                latencies.append((time.perf_counter() - start) * 1000)
+                requests_made += 1
+                received += len(resp.content)
+                if resp.status_code == 304:
+                    not_modified += 1
+                elif "ETag" in resp.headers:
+                    etags[path] = resp.headers["ETag"]
+        with lock:
+            totals["requests"] += requests_made
+            totals["not_modified"] += not_modified
+            totals["bytes"] += received
+            totals["latencies"] += latencies
+
+    def writer():
+        rng = random.Random(0)
+        while not stop.wait(1 / writes):
+            session, ids = rng.choice(users)
+            session.put(f"{base_url}/api/tasks/{rng.choice(ids)}", json={"title": f"Edited {rng.random()}"})
+
+    threads = [threading.Thread(target=poller, args=(session,)) for session, _ in users]
+    if writes > 0:
+        threads.append(threading.Thread(target=writer))
+    for t in threads:
+        t.start()
+    time.sleep(duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=8, help="Polling clients, one user each")
+    parser.add_argument("--tasks", type=int, default=500, help="Tasks per user")
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds per pass")
+    parser.add_argument("--writes", type=float, default=1.0, help="Task edits per second across all users")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    proc, base_url = start_server(args.port, env_overrides={
+        "REMINDERS_ENABLED": "false", "CALENDAR_SYNC_ENABLED": "false",
+    })
+    try:
+        users = setup_users(base_url, args.clients, args.tasks)
+        print(
+            f"{'mode':<14} {'requests':>9} {'304s':>7} {'body MB':>9} {'KB/req':>8}"
+            f" {'p50 ms':>8} {'p95 ms':>8} {'cpu ms/1k':>10}"
+        )
+        for name, conditional in (("unconditional", False), ("if-none-match", True)):
+            cpu_before = server_cpu_seconds(proc.pid)
+            totals = run_pass(base_url, users, args.duration, args.writes, conditional)
+            cpu_after = server_cpu_seconds(proc.pid)
+            count = max(totals["requests"], 1)
+            cpu = f"{(cpu_after - cpu_before) * 1e6 / count:10.1f}" if cpu_before is not None else f"{'n/a':>10}"
+            print(
+                f"{name:<14} {totals['requests']:>9} {totals['not_modified']:>7}"
+                f" {totals['bytes'] / 1e6:>9.1f} {totals['bytes'] / count / 1e3:>8.1f}"
+                f" {percentile(totals['latencies'], 50):>8.1f} {percentile(totals['latencies'], 95):>8.1f} {cpu}"
+            )
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+if __name__ == "__main__":
+    main()
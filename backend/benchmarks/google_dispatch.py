@@ -0,0 +1,132 @@
+"""
+Gmail dispatch: client per call vs cached clients vs batch requests.
+
+Sends N reminders for a handful of users to ``fake_google.FakeGoogle``
+(with ``--latency`` seconds added to every request on the wire) three ways:
+building a client for every message as the code used to, reusing the cached
+per-user clients, and ``send_gmail_deadlines`` batching. Also measures how
+long the event loop stalls when the cached calls run inline in a coroutine
+vs through ``run_in_threadpool``.
+
+    python -m benchmarks.google_dispatch --reminders 200 --users 10 --latency 0.03
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import benchmarks.seed  # noqa: F401  (points DATABASE_URL at a scratch file)
+from fake_google import FakeGoogle
+from fastapi.concurrency import run_in_threadpool
+from googleapiclient.discovery import build
+from services import google_integration
+
+
+def make_items(reminders, users):
+    now = datetime.now(timezone.utc)
+    people = [
+        (
+            SimpleNamespace(id=i, name=f"User {i}", email=f"user{i}@example.com"),
+            SimpleNamespace(user_id=i, access_token=f"access-{i}", refresh_token=None, expires_at=None, scope=None),
+        )
+        for i in range(users)
+    ]
+    return [
+        (user, SimpleNamespace(
+            id=n, title=f"Task {n}", description=None, status="pending", deadline=now + timedelta(hours=1),
+        ), token)
+        for n, (user, token) in ((n, people[n % users]) for n in range(reminders))
+    ]
+
+
+def send_uncached(user, task, token):
+    """The previous implementation: a fresh client (discovery parse) for every message"""
+    credentials = google_integration._build_credentials(token, scopes=google_integration.GMAIL_SCOPES)
+    service = build(
+        "gmail", "v1", credentials=credentials, cache_discovery=False,
+        client_options={"api_endpoint": google_integration.GOOGLE_API_ROOT},
+    )
+    return service.users().messages().send(
+        userId="me", body=google_integration._gmail_message(user, task)
+    ).execute().get("id")
+
+
+def timed(google, fn):
+    wire = len(google.http_requests)
+    start = time.perf_counter()
+    results = fn()
+    elapsed = time.perf_counter() - start
+    assert not any(isinstance(result, Exception) for result in results), results
+    return elapsed * 1000, len(google.http_requests) - wire
+
+
+async def loop_stall(send_all):
+    """Longest gap between 1 ms ticks of the event loop while send_all() runs"""
+    worst = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal worst
+        last = time.perf_counter()
+        while not done:
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            worst = max(worst, now - last)
+            last = now
+
+    tick = asyncio.create_task(ticker())
+    await asyncio.sleep(0.01)
+    await send_all()
+    done = True
+    await tick
+    return worst * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--reminders", type=int, default=200)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.03, help="seconds per request on the wire")
+    args = parser.parse_args()
+
+    google = FakeGoogle(latency=args.latency).start()
+    google_integration.GOOGLE_API_ROOT = f"{google.url}/"
+    google_integration.TOKEN_URI = f"{google.url}/token"
+    google_integration.GOOGLE_CLIENT_ID = google_integration.GOOGLE_CLIENT_ID or "bench-client"
+    google_integration.GOOGLE_CLIENT_SECRET = google_integration.GOOGLE_CLIENT_SECRET or "bench-secret"
+    items = make_items(args.reminders, args.users)
+
+    # Warm the client cache so the cached rows measure steady state
+    google_integration.send_gmail_deadlines(items[:args.users])
+
+    rows = [
+        ("client per call", lambda: [send_uncached(*item) for item in items]),
+        ("cached clients", lambda: [google_integration.send_gmail_deadline(*item) for item in items]),
+        ("batched", lambda: google_integration.send_gmail_deadlines(items)),
+    ]
+    print(f"{'dispatch':<16} {'reminders':>9} {'requests':>9} {'total ms':>10} {'ms/reminder':>12}")
+    for name, fn in rows:
+        elapsed_ms, requests = timed(google, fn)
+        print(f"{name:<16} {len(items):>9} {requests:>9} {elapsed_ms:>10.1f} {elapsed_ms / len(items):>12.2f}")
+
+    sample = items[:20]
+
+    async def inline():
+        for item in sample:
+            google_integration.send_gmail_deadline(*item)
+
+    async def threadpool():
+        for item in sample:
+            await run_in_threadpool(google_integration.send_gmail_deadline, *item)
+
+    print()
+    print(f"{'cached calls':<16} {'max event loop stall ms':>24}")
+    for name, send_all in (("inline", inline), ("run_in_threadpool", threadpool)):
+        print(f"{name:<16} {asyncio.run(loop_stall(send_all)):>24.1f}")
+    google.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Read-path latency under concurrent clients.
+
+Spawns reader threads hammering ``GET /api/tasks/{id}`` while writer threads
+create and update tasks, then reports p50/p95/p99 per operation. Run it once
+against the old synchronous-session build and once against the current one to
+compare how much writes stall unrelated reads.
+
+    python -m benchmarks.load_latency --readers 32 --writers 4 --duration 20
+"""
+
+import argparse
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import requests
+
+from benchmarks.common import BASE_URL, register_user, seed_tasks, summarize
+
+
+def _worker(fn, stop, samples, lock):
+    session = requests.Session()
+    local = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        fn(session)
+        local.append((time.perf_counter() - start) * 1000)
+    with lock:
+        samples.extend(local)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--readers", type=int, default=32)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds to run")
+    parser.add_argument("--tasks", type=int, default=200, help="Tasks to seed")
+    args = parser.parse_args()
+
+    token, _ = register_user()
+    headers = {"Authorization": f"Bearer {token}"}
+    task_ids = seed_tasks(token, args.tasks)
+
+    def read(session):
+        session.get(f"{BASE_URL}/api/tasks/{random.choice(task_ids)}", headers=headers)
+
+    def write(session):
+        if random.random() < 0.5:
+            session.put(
+                f"{BASE_URL}/api/tasks/{random.choice(task_ids)}",
+                headers=headers,
+                json={"priority": random.choice(["low", "medium", "high", "critical"])},
+            )
+        else:
+            deadline = datetime.now(timezone.utc) + timedelta(days=random.randint(1, 30))
+            session.post(
+                f"{BASE_URL}/api/tasks/",
+                headers=headers,
+                json={"title": "Load test write", "deadline": deadline.isoformat()},
+            )
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    read_samples, write_samples = [], []
+    threads = [
+        threading.Thread(target=_worker, args=(read, stop, read_samples, lock))
+        for _ in range(args.readers)
+    ] + [
+        threading.Thread(target=_worker, args=(write, stop, write_samples, lock))
+        for _ in range(args.writers)
+    ]
+
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    time.sleep(args.duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    print(f"{args.readers} readers / {args.writers} writers for {elapsed:.1f}s against {BASE_URL}")
+    summarize("GET /api/tasks/{id}", read_samples, elapsed)
+    summarize("POST|PUT /api/tasks", write_samples, elapsed)
+
+
+if __name__ == "__main__":
+    main()
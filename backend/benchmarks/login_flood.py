@@ -0,0 +1,143 @@
+"""
+Read-path latency under a login flood, with and without the rate limits.
+
+Three runs on a fresh server each: readers alone, readers while
+``--attackers`` threads post logins with wrong passwords at ``--flood-rate``
+a second in total (rate limits off), and the same flood with the limits on.
+Every wrong password still costs a bcrypt verification unless the limiter
+answers 429 first. Reports the readers' p50/p99 and the flood's status codes.
+
+The flood runs in its own process at a lower CPU priority, standing in for
+an attacker whose CPU is not the server's; on a small machine the clients
+still take CPU from the server, so compare the runs with each other.
+
+    python -m benchmarks.login_flood --readers 4 --attackers 16 --flood-rate 200 --duration 10
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+import requests
+
+from benchmarks.common import percentile, start_server
+
+RUNS = [("readers only", False, "false"), ("flood, no limits", True, "false"), ("flood, limits", True, "true")]
+
+
+def setup_reader(base_url, tasks):
+    resp = requests.post(f"{base_url}/api/auth/register", json={
+        "name": "Reader", "email": "reader@example.com", "password": "benchmarkpassword123",
+    })
+    resp.raise_for_status()
+    token = resp.json()["access_token"]
+    now = datetime.now(timezone.utc)
+    requests.post(f"{base_url}/api/tasks/bulk", headers={"Authorization": f"Bearer {token}"}, json={
+        "items": [{"title": f"Task {i}", "deadline": (now + timedelta(hours=i)).isoformat()} for i in range(tasks)]
+    }).raise_for_status()
+    return token
+
+
+def flood_process(base_url, args, results):
+    """The attackers: each thread paced to its share of ``--flood-rate``"""
+    os.nice(10)
+    stop = threading.Event()
+    lock = threading.Lock()
+    statuses = Counter()
+    interval = args.attackers / args.flood_rate
+
+    def attacker(seed):
+        # Credential stuffing: a different account on most tries, the reader's now and then
+        rng = random.Random(seed)
+        session = requests.Session()
+        local = Counter()
+        next_at = time.monotonic() + rng.random() * interval
+        while not stop.is_set():
+            time.sleep(max(0.0, next_at - time.monotonic()))
+            next_at += interval
+            email = "reader@example.com" if rng.random() < 0.1 else f"victim{rng.randrange(10 ** 6)}@example.com"
+            local[session.post(f"{base_url}/api/auth/login", json={
+                "email": email, "password": "guessedpassword123",
+            }).status_code] += 1
+        with lock:
+            statuses.update(local)
+
+    threads = [threading.Thread(target=attacker, args=(i,)) for i in range(args.attackers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    results.put(statuses)
+
+
+def run(base_url, token, args, flood):
+    stop = threading.Event()
+    lock = threading.Lock()
+    latencies = []
+
+    def reader():
+        session = requests.Session()
+        session.headers["Authorization"] = f"Bearer {token}"
+        local = []
+        while not stop.is_set():
+            start = time.perf_counter()
+            session.get(f"{base_url}/api/tasks/?limit=50").raise_for_status()
+            local.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(local)
+
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    flooder = context.Process(target=flood_process, args=(base_url, args, results)) if flood else None
+    threads = [threading.Thread(target=reader) for _ in range(args.readers)]
+    started = time.perf_counter()
+    if flooder:
+        flooder.start()
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    statuses = Counter()
+    if flooder:
+        statuses = results.get()
+        flooder.join()
+    return latencies, statuses, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--attackers", type=int, default=16)
+    parser.add_argument("--flood-rate", type=float, default=200.0, help="Login attempts per second, all attackers")
+    parser.add_argument("--tasks", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=8767)
+    args = parser.parse_args()
+
+    print(f"{'run':<18} {'reads/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'logins/s':>9}  login statuses")
+    for label, flood, limits in RUNS:
+        proc, base_url = start_server(args.port, {"RATE_LIMIT_ENABLED": limits, "CALENDAR_SYNC_ENABLED": "false"})
+        try:
+            token = setup_reader(base_url, args.tasks)
+            latencies, statuses, elapsed = run(base_url, token, args, flood)
+        finally:
+            proc.terminate()
+            proc.wait()
+        codes = " ".join(f"{code}={count}" for code, count in sorted(statuses.items())) or "-"
+        print(
+            f"{label:<18} {len(latencies) / elapsed:>8.1f} {percentile(latencies, 50):>8.1f} "
+            f"{percentile(latencies, 99):>8.1f} {sum(statuses.values()) / elapsed:>9.1f}  {codes}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Login throughput across password-hash worker counts.
+
+For each worker count a fresh server is started with PASSWORD_HASH_WORKERS set,
+one user is registered, and concurrent clients log in for a fixed duration.
+Reports logins/second, latency percentiles and how many calls were shed with
+503 by the pool's queue-depth limit.
+
+    python -m benchmarks.login_throughput --workers 1,2,4,8 --clients 32
+"""
+
+import argparse
+import threading
+import time
+
+import requests
+
+from benchmarks.common import percentile, start_server
+
+
+def run_logins(base_url, clients, duration):
+    creds = {"name": "Bench", "email": "login-bench@example.com", "password": "benchmarkpassword123"}
+    requests.post(f"{base_url}/api/auth/register", json=creds).raise_for_status()
+    login = {"email": creds["email"], "password": creds["password"]}
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    latencies, shed = [], [0]
+
+    def client():
+        session = requests.Session()
+        local, rejected = [], 0
+        while not stop.is_set():
+            start = time.perf_counter()
+            resp = session.post(f"{base_url}/api/auth/login", json=login)
+            if resp.status_code == 503:
+                rejected += 1
+            else:
+                local.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(local)
+            shed[0] += rejected
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    time.sleep(duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    return latencies, shed[0], time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", default="1,2,4,8", help="Comma-separated worker counts")
+    parser.add_argument("--executor", default="thread", choices=["thread", "process"])
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=8100)
+    args = parser.parse_args()
+
+    print(f"{'workers':>7} {'logins/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'503s':>6}")
+    for workers in [int(w) for w in args.workers.split(",")]:
+        proc, base_url = start_server(args.port, {
+            "PASSWORD_HASH_WORKERS": str(workers),
+            "PASSWORD_HASH_EXECUTOR": args.executor,
+        })
+        try:
+            latencies, shed, elapsed = run_logins(base_url, args.clients, args.duration)
+        finally:
+            proc.terminate()
+            proc.wait()
+        print(
+            f"{workers:>7} {len(latencies) / elapsed:>9.1f} "
+            f"{percentile(latencies, 50):>8.1f} {percentile(latencies, 99):>8.1f} {shed:>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
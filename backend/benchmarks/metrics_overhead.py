@@ -0,0 +1,163 @@
+"""
+Cost of the request metrics (metrics.py).
+
+First the instrumentation alone, in-process: ``MetricsMiddleware`` around an
+ASGI app that answers straight away, and the cursor hooks around a no-op
+statement, in microseconds per call. Then the whole server: ``--rounds``
+pairs of fresh servers with ``METRICS_ENABLED`` on and off, alternating,
+each read by ``--clients`` threads for ``--duration`` seconds; reports the
+median throughput and latency of each and the overhead. On a small or busy
+machine the runs vary by more than the instrumentation costs, so the last
+line also estimates the overhead from the in-process timings, the
+statements per request and the throughput.
+
+    python -m benchmarks.metrics_overhead --rounds 3 --clients 8 --duration 10
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import requests
+
+from benchmarks.common import percentile, start_server
+
+READS = ["/api/tasks/?limit=50", "/api/tasks/analytics/dashboard", "/api/tasks/{id}"]
+
+
+def micro(iterations):
+    import metrics
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def send(message):
+        pass
+
+    async def per_request(wrapped):
+        scope = {"type": "http", "method": "GET", "path": "/api/tasks/1", "route": SimpleNamespace(path="/api/tasks/{task_id}")}
+        start = time.perf_counter()
+        for _ in range(iterations):
+            await wrapped(dict(scope), None, send)
+        return (time.perf_counter() - start) / iterations * 1e6
+
+    bare = asyncio.run(per_request(app))
+    instrumented = asyncio.run(per_request(metrics.MetricsMiddleware(app, enabled=True)))
+    middleware_us = instrumented - bare
+    print(f"middleware: {middleware_us:.1f} µs per request ({bare:.1f} µs bare app, {instrumented:.1f} µs wrapped)")
+
+    conn = SimpleNamespace(info={})
+    start = time.perf_counter()
+    for _ in range(iterations):
+        metrics._before_cursor_execute(conn, None, "SELECT 1", (), None, False)
+        metrics._after_cursor_execute(conn, None, "SELECT 1", (), None, False)
+    hooks_us = (time.perf_counter() - start) / iterations * 1e6
+    print(f"cursor hooks: {hooks_us:.1f} µs per statement")
+    return middleware_us, hooks_us
+
+
+def queries_per_request(base_url):
+    """Mean SQL statements per task read, from the server's own metrics"""
+    total = count = 0
+    for line in requests.get(f"{base_url}/api/metrics").text.splitlines():
+        if line.startswith("http_request_db_queries_") and 'method="GET",route="/api/tasks' in line:
+            value = float(line.rsplit(" ", 1)[1])
+            if line.startswith("http_request_db_queries_sum"):
+                total += value
+            elif line.startswith("http_request_db_queries_count"):
+                count += value
+    return total / count if count else 0.0
+
+
+def setup(base_url, tasks):
+    resp = requests.post(f"{base_url}/api/auth/register", json={
+        "name": "Metrics", "email": "metrics-bench@example.com", "password": "benchmarkpassword123",
+    })
+    resp.raise_for_status()
+    token = resp.json()["access_token"]
+    now = datetime.now(timezone.utc)
+    created = requests.post(f"{base_url}/api/tasks/bulk", headers={"Authorization": f"Bearer {token}"}, json={
+        "items": [{"title": f"Task {i}", "deadline": (now + timedelta(hours=i - 50)).isoformat()} for i in range(tasks)]
+    })
+    created.raise_for_status()
+    return token, [result["id"] for result in created.json()["results"]]
+
+
+def load(base_url, token, ids, clients, duration):
+    stop = threading.Event()
+    lock = threading.Lock()
+    latencies = []
+
+    def client(seed):
+        rng = random.Random(seed)
+        session = requests.Session()
+        session.headers["Authorization"] = f"Bearer {token}"
+        local = []
+        while not stop.is_set():
+            path = rng.choice(READS).format(id=rng.choice(ids))
+            start = time.perf_counter()
+            session.get(f"{base_url}{path}").raise_for_status()
+            local.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return len(latencies) / (time.perf_counter() - started), percentile(latencies, 50), percentile(latencies, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=100000, help="Calls for the in-process timings")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--tasks", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=8768)
+    args = parser.parse_args()
+
+    middleware_us, hooks_us = micro(args.iterations)
+
+    runs = {"off": [], "on": []}
+    queries = []
+    for _ in range(args.rounds):
+        for mode in ("off", "on"):
+            enabled = "true" if mode == "on" else "false"
+            proc, base_url = start_server(args.port, {"METRICS_ENABLED": enabled, "CALENDAR_SYNC_ENABLED": "false"})
+            try:
+                token, ids = setup(base_url, args.tasks)
+                runs[mode].append(load(base_url, token, ids, args.clients, args.duration))
+                if mode == "on":
+                    queries.append(queries_per_request(base_url))
+            finally:
+                proc.terminate()
+                proc.wait()
+
+    print(f"{'metrics':>7} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}   (median of {args.rounds} runs)")
+    medians = {}
+    for mode, results in runs.items():
+        medians[mode] = [statistics.median(column) for column in zip(*results)]
+        rps, p50, p99 = medians[mode]
+        print(f"{mode:>7} {rps:>8.1f} {p50:>8.2f} {p99:>8.2f}")
+    print(f"overhead: {(1 - medians['on'][0] / medians['off'][0]) * 100:+.1f}% throughput, "
+          f"{(medians['on'][1] / medians['off'][1] - 1) * 100:+.1f}% p50")
+    # Server CPU per request is at most 1 / throughput
+    per_request_us = middleware_us + statistics.median(queries) * hooks_us
+    print(f"estimate: {per_request_us:.1f} µs per request ({statistics.median(queries):.1f} statements), "
+          f"{per_request_us * medians['off'][0] / 1e4:.2f}% of the server's time at {medians['off'][0]:.0f} req/s")
+
+
+if __name__ == "__main__":
+    main()
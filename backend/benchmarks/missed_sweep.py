@@ -0,0 +1,132 @@
+"""
+Missed-task sweep: batched UPDATEs vs one statement over the whole backlog.
+
+Seeds N tasks spread over +/- 60 days (about a quarter are active and
+overdue) and sweeps them with ``MissedSweeper`` at each ``--batches`` size,
+then with a single ``UPDATE ... WHERE status IN (...) AND deadline < now``
+(no counters or events). While a sweep runs, a writer keeps updating
+unrelated tasks on its own connection; its worst latency is how long the
+sweep kept the database locked, and writes that gave up waiting for the
+lock are counted as timeouts.
+
+    python -m benchmarks.missed_sweep --sizes 100000,1000000 --batches 1000,10000
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timezone
+
+from benchmarks.common import percentile
+from benchmarks.seed import open_scratch_db, seed_user_tasks
+
+from sqlalchemy import func, select, update  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+from models import Task, TaskStatus  # noqa: E402
+from services.missed_sweeper import MissedSweeper  # noqa: E402
+from services.reminders import ACTIVE_STATUSES  # noqa: E402
+from services.task_stats import ensure_task_stats  # noqa: E402
+
+
+class TimedSweeper(MissedSweeper):
+    """Records how long each batch transaction took"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.batch_ms = []
+
+    async def _sweep_batch(self, now):
+        start = time.perf_counter()
+        swept = await super()._sweep_batch(now)
+        self.batch_ms.append((time.perf_counter() - start) * 1000)
+        return swept
+
+
+async def run(size, batch_size):
+    engine, session_factory = await open_scratch_db()
+    user_id = await seed_user_tasks(engine, size)
+    async with engine.connect() as conn:
+        future_ids = (await conn.execute(
+            select(Task.id).where(Task.user_id == user_id, Task.deadline > func.datetime("now", "+1 day"))
+            .limit(1000)
+        )).scalars().all()
+
+    async with session_factory() as db:
+        # Build the counters row up front, as an existing user already has one
+        await ensure_task_stats(db, user_id)
+        await db.commit()
+
+    sweeper = TimedSweeper(session_factory, batch_size=batch_size)
+
+    async def single_update():
+        start = time.perf_counter()
+        async with session_factory() as db:
+            result = await db.execute(
+                update(Task).where(Task.status.in_(ACTIVE_STATUSES), Task.deadline < datetime.now(timezone.utc))
+                .values(status=TaskStatus.MISSED, completed_at=Task.deadline)
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+        sweeper.batch_ms.append((time.perf_counter() - start) * 1000)
+        return result.rowcount
+
+    done = asyncio.Event()
+    writes = []
+    timeouts = 0
+
+    async def writer():
+        nonlocal timeouts
+        rng = random.Random(0)
+        while not done.is_set():
+            start = time.perf_counter()
+            try:
+                async with session_factory() as db:
+                    await db.execute(
+                        update(Task).where(Task.id == rng.choice(future_ids)).values(title=f"Edited {rng.random()}")
+                    )
+                    await db.commit()
+            except OperationalError:
+                timeouts += 1  # gave up waiting for the lock
+            writes.append((time.perf_counter() - start) * 1000)
+            await asyncio.sleep(0.005)
+
+    writing = asyncio.create_task(writer())
+    start = time.perf_counter()
+    swept = await (sweeper.sweep() if batch_size else single_update())
+    elapsed = time.perf_counter() - start
+    done.set()
+    await writing
+
+    async with engine.connect() as conn:
+        left = await conn.scalar(select(func.count()).select_from(Task).where(
+            Task.status.in_([TaskStatus.PENDING, TaskStatus.IN_PROGRESS]),
+            Task.deadline < func.datetime("now", "-1 minute"),
+        ))
+    assert left == 0, f"{left} overdue tasks left"
+    await engine.dispose()
+
+    label = str(batch_size) if batch_size else "single"
+    print(
+        f"{size:>9} {label:>7} {swept:>8} {elapsed:>8.2f} {swept / elapsed:>10.0f}"
+        f" {max(sweeper.batch_ms):>12.1f} {len(writes):>7} {timeouts:>8} {percentile(writes, 50):>10.1f} {max(writes):>10.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="100000,1000000")
+    parser.add_argument("--batches", default="1000,10000", help="Sweeper batch sizes")
+    args = parser.parse_args()
+
+    print(
+        f"{'tasks':>9} {'batch':>7} {'missed':>8} {'total s':>8} {'rows/s':>10}"
+        f" {'max batch ms':>12} {'writes':>7} {'timeouts':>8} {'write p50':>10} {'write max':>10}"
+    )
+    for size in [int(s) for s in args.sizes.split(",")]:
+        for batch_size in [int(b) for b in args.batches.split(",")] + [0]:
+            asyncio.run(run(size, batch_size))
+
+
+if __name__ == "__main__":
+    main()
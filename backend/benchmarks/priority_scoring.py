@@ -0,0 +1,67 @@
+"""
+Scalar vs vectorized priority scoring.
+
+Times ``calculate_priority_score`` called once per task against
+``services.priority_scoring`` scoring the same tasks in one NumPy pass (with
+and without the cost of building the columns), and checks the results match.
+Also compares a full rank with the ``top=10`` partial selection.
+
+    python -m benchmarks.priority_scoring --sizes 10000,100000,1000000
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import benchmarks.seed  # noqa: F401  (points DATABASE_URL at a scratch file)
+from models import TaskPriority, TaskStatus
+from routers.tasks import calculate_priority_score
+from services.priority_scoring import encode_tasks, rank_columns, score_columns, top_k_columns
+
+
+def make_tasks(count, now, seed=0):
+    rng = random.Random(seed)
+    priorities, statuses = list(TaskPriority), list(TaskStatus)
+    return [
+        SimpleNamespace(
+            deadline=now + timedelta(hours=rng.uniform(-30 * 24, 30 * 24)),
+            priority=rng.choice(priorities),
+            status=rng.choice(statuses),
+        )
+        for _ in range(count)
+    ]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    args = parser.parse_args()
+
+    print(f"{'tasks':>9} {'scalar ms':>10} {'encode ms':>10} {'score ms':>9} {'rank ms':>8} {'top10 ms':>9} {'speedup':>8}")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        now = datetime.now(timezone.utc)
+        tasks = make_tasks(size, now)
+        reference, scalar_ms = timed(lambda: [calculate_priority_score(t, now) for t in tasks])
+        columns, encode_ms = timed(lambda: encode_tasks(tasks))
+        scores, score_ms = timed(lambda: score_columns(columns, now))
+        ranked, rank_ms = timed(lambda: rank_columns(columns, scores))
+        top, top_ms = timed(lambda: top_k_columns(columns, scores, 10))
+        assert top.tolist() == ranked[:10].tolist(), "top-k selection diverged"
+        assert scores.tolist() == [float(r) for r in reference], "vectorized scores diverged"
+        total_ms = encode_ms + score_ms
+        print(
+            f"{size:>9} {scalar_ms:>10.1f} {encode_ms:>10.1f} {score_ms:>9.1f} "
+            f"{rank_ms:>8.1f} {top_ms:>9.1f} {scalar_ms / total_ms:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Reminder scheduler: sliding window vs holding every pending task.
+
+Seeds N tasks spread over +/- 60 days and compares starting the
+``ReminderScheduler`` window (one indexed range query for the next horizon) with
+loading every pending task into a heap up front. Also times the incremental
+``task_changed`` path the write endpoints use, and a window refill.
+Peak Python heap is measured with tracemalloc.
+
+    python -m benchmarks.reminder_scheduler --sizes 10000,100000,1000000
+"""
+
+import argparse
+import asyncio
+import heapq
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from benchmarks.seed import open_scratch_db, seed_user_tasks
+
+from sqlalchemy import select  # noqa: E402
+from models import Task, TaskStatus  # noqa: E402
+from services.reminders import ACTIVE_STATUSES, ReminderScheduler  # noqa: E402
+
+
+async def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = await fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed * 1000, peak / 1024 / 1024
+
+
+async def run(size, updates):
+    engine, session_factory = await open_scratch_db()
+    await seed_user_tasks(engine, size)
+    scheduler = ReminderScheduler(session_factory)
+
+    async def load_everything():
+        async with session_factory() as db:
+            rows = (await db.execute(
+                select(Task.id, Task.deadline).where(Task.status.in_(ACTIVE_STATUSES))
+            )).all()
+        heap = [(deadline.timestamp(), task_id) for task_id, deadline in rows]
+        heapq.heapify(heap)
+        return len(heap)
+
+    async def start_window():
+        # What start() does before launching the runner, which would queue reminders
+        now = datetime.now(timezone.utc)
+        await scheduler._load_window(now - scheduler.lead, now + scheduler.horizon)
+        return scheduler.snapshot()["scheduled"]
+
+    everything, all_ms, all_mb = await measure(load_everything)
+    windowed, window_ms, window_mb = await measure(start_window)
+
+    # The write endpoints' path: reschedule tasks near now
+    rng = random.Random(0)
+    now = datetime.now(timezone.utc)
+    changed = [
+        SimpleNamespace(
+            id=rng.randint(1, size),
+            deadline=now + timedelta(minutes=rng.uniform(0, 300)),
+            status=TaskStatus.PENDING,
+        )
+        for _ in range(updates)
+    ]
+    start = time.perf_counter()
+    for task in changed:
+        scheduler.task_changed(task)
+    per_change_us = (time.perf_counter() - start) / updates * 1e6
+
+    start = time.perf_counter()
+    await scheduler._load_window(scheduler._window_end, scheduler._window_end + scheduler.horizon)
+    refill_ms = (time.perf_counter() - start) * 1000
+
+    await scheduler.stop()
+    await engine.dispose()
+    print(
+        f"{size:>9} {everything:>9} {all_ms:>9.1f} {all_mb:>8.1f} {windowed:>9} {window_ms:>9.1f}"
+        f" {window_mb:>8.2f} {per_change_us:>9.2f} {refill_ms:>9.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--updates", type=int, default=100000, help="task_changed calls to time")
+    args = parser.parse_args()
+    print(
+        f"{'tasks':>9} {'all rows':>9} {'all ms':>9} {'all MB':>8} {'window':>9} {'start ms':>9}"
+        f" {'start MB':>8} {'change us':>9} {'refill ms':>9}"
+    )
+    for size in [int(s) for s in args.sizes.split(",")]:
+        asyncio.run(run(size, args.updates))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Cold-start time of the API process.
+
+Migrates a scratch SQLite database once, then repeatedly starts uvicorn in the
+default "check" startup mode and measures the time until /api/health answers.
+"migrate" mode is measured too for comparison. Exits non-zero when the p95
+check-mode start exceeds --budget-ms, so it can gate a deploy pipeline.
+
+    python -m benchmarks.startup_time --runs 10 --budget-ms 3000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.common import migrate_database, percentile, start_server
+
+
+def time_starts(port, db_path, mode, runs):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        proc, _ = start_server(port, {"DB_STARTUP_MODE": mode}, db_path=db_path)
+        samples.append((time.perf_counter() - started) * 1000)
+        proc.terminate()
+        proc.wait()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=3000.0)
+    parser.add_argument("--port", type=int, default=8101)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="bench-"), "startup.db")
+    migrate_database(db_path)
+
+    print(f"{'mode':>8} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+    results = {}
+    for mode in ("check", "migrate"):
+        samples = time_starts(args.port, db_path, mode, args.runs)
+        results[mode] = samples
+        print(f"{mode:>8} {percentile(samples, 50):>8.0f} {percentile(samples, 95):>8.0f} {max(samples):>8.0f}")
+
+    p95 = percentile(results["check"], 95)
+    if p95 > args.budget_ms:
+        print(f"✗ check-mode p95 {p95:.0f}ms exceeds the {args.budget_ms:.0f}ms budget")
+        sys.exit(1)
+    print(f"✓ check-mode p95 {p95:.0f}ms within the {args.budget_ms:.0f}ms budget")
+
+
+if __name__ == "__main__":
+    main()
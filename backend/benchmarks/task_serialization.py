@@ -0,0 +1,125 @@
+"""
+Per-task cost of building and encoding a task list response.
+
+Seeds one user with N tasks in a scratch database and produces the body of
+``GET /api/tasks/`` both ways, stage by stage:
+
+- model path (before): load ORM objects, ``task_to_detailed_response`` per
+  task, FastAPI's response_model validation/serialization, ``JSONResponse``
+- fast path (now): load column rows, ``task_rows_to_dicts``, orjson
+  ``TaskJSONResponse``
+
+Times are the best of ``--repeat`` runs, in microseconds per task; the two
+bodies are checked to decode to the same tasks.
+
+    python -m benchmarks.task_serialization --sizes 1000,10000 --repeat 5
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.seed import open_scratch_db, seed_user_tasks
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from sqlalchemy import select  # noqa: E402
+from main import app  # noqa: E402
+from models import Task  # noqa: E402
+from routers.tasks import TASK_COLUMNS, TaskJSONResponse, task_rows_to_dicts, task_to_detailed_response  # noqa: E402
+
+STAGES = ("load", "build", "validate", "encode")
+
+
+def list_route():
+    return next(route for route in app.routes if getattr(route, "path", None) == "/api/tasks/"
+                and "GET" in route.methods)
+
+
+async def model_path(session_factory, user_id, field):
+    times = {}
+    start = time.perf_counter()
+    async with session_factory() as db:
+        tasks = (await db.execute(
+            select(Task).where(Task.user_id == user_id).order_by(Task.deadline, Task.id)
+        )).scalars().all()
+    times["load"] = time.perf_counter()
+    models = [task_to_detailed_response(task) for task in tasks]
+    times["build"] = time.perf_counter()
+    content = await serialize_response(field=field, response_content=models)
+    times["validate"] = time.perf_counter()
+    body = JSONResponse(content).body
+    times["encode"] = time.perf_counter()
+    return body, _stage_times(start, times)
+
+
+async def fast_path(session_factory, user_id):
+    times = {}
+    start = time.perf_counter()
+    async with session_factory() as db:
+        rows = (await db.execute(
+            select(*TASK_COLUMNS).where(Task.user_id == user_id).order_by(Task.deadline, Task.id)
+        )).all()
+    times["load"] = time.perf_counter()
+    items = task_rows_to_dicts(rows)
+    times["build"] = time.perf_counter()
+    times["validate"] = time.perf_counter()  # nothing to re-validate
+    body = TaskJSONResponse(items).body
+    times["encode"] = time.perf_counter()
+    return body, _stage_times(start, times)
+
+
+def _stage_times(start, marks):
+    stages, previous = {}, start
+    for stage in STAGES:
+        stages[stage] = marks[stage] - previous
+        previous = marks[stage]
+    return stages
+
+
+def _comparable(body):
+    # Derived fields drift between the two runs; compare everything else
+    drifting = {"time_remaining", "hours_until_deadline"}
+    return [{k: v for k, v in item.items() if k not in drifting} for item in json.loads(body)]
+
+
+async def run(sizes, repeat):
+    field = list_route().response_field
+    print(f"{'tasks':>7} {'path':<6} " + " ".join(f"{s + ' us':>11}" for s in STAGES) + f" {'total us':>9} {'speedup':>8}")
+    for size in sizes:
+        engine, session_factory = await open_scratch_db()
+        user_id = await seed_user_tasks(engine, size)
+        best = {}
+        bodies = {}
+        for name, fn in (("model", lambda: model_path(session_factory, user_id, field)),
+                         ("fast", lambda: fast_path(session_factory, user_id))):
+            for _ in range(repeat):
+                body, stages = await fn()
+                if name not in best or sum(stages.values()) < sum(best[name].values()):
+                    best[name] = stages
+            bodies[name] = body
+        assert _comparable(bodies["model"]) == _comparable(bodies["fast"]), "fast path body diverged"
+
+        model_total = sum(best["model"].values())
+        for name in ("model", "fast"):
+            stages = best[name]
+            total = sum(stages.values())
+            print(
+                f"{size:>7} {name:<6} "
+                + " ".join(f"{stages[s] * 1e6 / size:>11.2f}" for s in STAGES)
+                + f" {total * 1e6 / size:>9.2f} {model_total / total:>7.1f}x"
+            )
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="1000,10000")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per path; the fastest is reported")
+    args = parser.parse_args()
+    asyncio.run(run([int(s) for s in args.sizes.split(",")], args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Export/import of a large task list: time and peak server RSS.
+
+Seeds a migrated scratch SQLite database with N tasks for one user, then for
+each phase starts a fresh server and reports wall time, throughput and the
+server's memory from /proc (so Linux only): anonymous memory before the
+request, its sampled peak, and peak RSS including mmapped database pages:
+
+- export: stream ``GET /api/tasks/export`` to a temp file
+- import: upload that file to ``POST /api/tasks/import`` as a second user
+- list (``--with-list``): the unpaged ``GET /api/tasks/`` for comparison
+
+    python -m benchmarks.task_transfer --size 1000000 --format ndjson
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import uuid
+
+import requests
+
+from benchmarks.common import migrate_database, start_server
+
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="bench-"), "transfer.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+from sqlalchemy.ext.asyncio import create_async_engine  # noqa: E402
+
+from auth import create_access_token  # noqa: E402
+from benchmarks.seed import seed_user_tasks  # noqa: E402
+
+
+def _memory_kb(pid, field):
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return 0
+
+
+def _multipart_chunks(path, filename, boundary, chunk_size=1 << 20):
+    """Stream a single-file multipart body without reading the file into memory"""
+    yield (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        "Content-Type: application/octet-stream\r\n\r\n"
+    ).encode()
+    with open(path, "rb") as upload:
+        while chunk := upload.read(chunk_size):
+            yield chunk
+    yield f"\r\n--{boundary}--\r\n".encode()
+
+
+def run_phase(label, port, request, rows):
+    proc, base_url = start_server(port, {"DB_STARTUP_MODE": "check"}, db_path=DB_PATH)
+    # VmHWM includes file pages touched through SQLite's mmap; sample RssAnon
+    # as well to see the heap alone
+    peak_anon, stop = [0], threading.Event()
+
+    def sample():
+        while not stop.wait(0.05):
+            peak_anon[0] = max(peak_anon[0], _memory_kb(proc.pid, "RssAnon"))
+
+    sampler = threading.Thread(target=sample)
+    try:
+        baseline = _memory_kb(proc.pid, "RssAnon")
+        sampler.start()
+        started = time.perf_counter()
+        request(base_url)
+        elapsed = time.perf_counter() - started
+        peak = _memory_kb(proc.pid, "VmHWM")
+    finally:
+        stop.set()
+        sampler.join()
+        proc.terminate()
+        proc.wait()
+    print(
+        f"{label:<8} {elapsed:>8.1f} {rows / elapsed:>10.0f} "
+        f"{baseline / 1024:>9.0f} {peak_anon[0] / 1024:>9.0f} {peak / 1024:>9.0f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--format", default="ndjson", choices=["ndjson", "csv"])
+    parser.add_argument("--with-list", action="store_true", help="Also time the unpaged GET /api/tasks/")
+    parser.add_argument("--port", type=int, default=8103)
+    args = parser.parse_args()
+
+    migrate_database(DB_PATH)
+
+    async def seed():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{DB_PATH}")
+        source = await seed_user_tasks(engine, args.size, email="export@example.com")
+        target = await seed_user_tasks(engine, 0, email="import@example.com")
+        await engine.dispose()
+        return source, target
+
+    source_id, target_id = asyncio.run(seed())
+    source_auth = {"Authorization": f"Bearer {create_access_token({'sub': str(source_id)})}"}
+    target_auth = {"Authorization": f"Bearer {create_access_token({'sub': str(target_id)})}"}
+    export_path = os.path.join(os.path.dirname(DB_PATH), f"tasks.{args.format}")
+
+    def export(base_url):
+        with requests.get(
+            f"{base_url}/api/tasks/export", params={"format": args.format}, headers=source_auth, stream=True
+        ) as resp:
+            resp.raise_for_status()
+            with open(export_path, "wb") as out:
+                for chunk in resp.iter_content(1 << 16):
+                    out.write(chunk)
+
+    def upload(base_url):
+        boundary = uuid.uuid4().hex
+        resp = requests.post(
+            f"{base_url}/api/tasks/import",
+            params={"format": args.format},
+            headers={**target_auth, "Content-Type": f"multipart/form-data; boundary={boundary}"},
+            data=_multipart_chunks(export_path, f"tasks.{args.format}", boundary),
+        )
+        resp.raise_for_status()
+        result = resp.json()
+        assert result["imported"] == args.size, result
+
+    def list_all(base_url):
+        requests.get(f"{base_url}/api/tasks/", headers=source_auth).raise_for_status()
+
+    print(f"{args.size} tasks, {args.format}")
+    print(f"{'phase':<8} {'seconds':>8} {'rows/s':>10} {'anon MB':>9} {'peak anon':>9} {'peak RSS':>9}")
+    run_phase("export", args.port, export, args.size)
+    print(f"{'':<8} file size {os.path.getsize(export_path) / 1024 / 1024:.0f} MB")
+    run_phase("import", args.port, upload, args.size)
+    if args.with_list:
+        run_phase("list", args.port, list_all, args.size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Task endpoint throughput by serve.py worker count.
+
+For each ``--workers`` count a fresh ``serve.py`` is started on a scratch
+database (``CACHE_BACKEND=sqlite``, so the user cache is shared), ``--users``
+users get ``--tasks`` tasks each, and ``--load-procs`` client processes with
+``--clients`` threads each read a page of tasks and the dashboard analytics
+for ``--duration`` seconds. The client processes compete with the server for
+CPU, so run it on a machine with cores to spare; the header shows how many
+there are.
+
+    python -m benchmarks.worker_scaling --workers 1,2,4 --load-procs 4 --clients 8 --duration 15
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import signal
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import requests
+
+from benchmarks.common import percentile, start_server
+
+READS = ["/api/tasks/?limit=50", "/api/tasks/analytics/dashboard"]
+
+
+def setup_users(base_url, users, tasks):
+    """Register the users and give each ``tasks`` tasks; returns their tokens"""
+    tokens = []
+    now = datetime.now(timezone.utc)
+    for index in range(users):
+        resp = requests.post(f"{base_url}/api/auth/register", json={
+            "name": "Scaling", "email": f"scaling{index}@example.com", "password": "benchmarkpassword123",
+        })
+        resp.raise_for_status()
+        token = resp.json()["access_token"]
+        for start in range(0, tasks, 1000):
+            requests.post(f"{base_url}/api/tasks/bulk", headers={"Authorization": f"Bearer {token}"}, json={
+                "items": [
+                    {"title": f"Task {i}", "deadline": (now + timedelta(hours=i % 500 - 100)).isoformat()}
+                    for i in range(start, min(tasks, start + 1000))
+                ]
+            }).raise_for_status()
+        tokens.append(token)
+    return tokens
+
+
+def load_process(base_url, tokens, clients, duration, results):
+    """One client process: ``clients`` threads reading until the time is up"""
+    stop = threading.Event()
+    lock = threading.Lock()
+    latencies, errors = [], [0]
+
+    def client(seed):
+        rng = random.Random(seed)
+        session = requests.Session()
+        session.headers["Authorization"] = f"Bearer {rng.choice(tokens)}"
+        local, failed = [], 0
+        while not stop.is_set():
+            start = time.perf_counter()
+            resp = session.get(f"{base_url}{rng.choice(READS)}")
+            if resp.status_code == 200:
+                local.append((time.perf_counter() - start) * 1000)
+            else:
+                failed += 1
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client, args=(os.getpid() * 100 + i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    results.put((latencies, errors[0]))
+
+
+def run(workers, args):
+    scratch = tempfile.mkdtemp(prefix="worker-scaling-")
+    proc, base_url = start_server(
+        args.port,
+        db_path=os.path.join(scratch, "bench.db"),
+        serve_workers=workers,
+        env_overrides={
+            "CACHE_BACKEND": "sqlite",
+            "CACHE_SQLITE_PATH": os.path.join(scratch, "cache.db"),
+            "CALENDAR_SYNC_ENABLED": "false",
+        },
+    )
+    try:
+        tokens = setup_users(base_url, args.users, args.tasks)
+        context = multiprocessing.get_context("fork")
+        results = context.Queue()
+        loaders = [
+            context.Process(target=load_process, args=(base_url, tokens, args.clients, args.duration, results))
+            for _ in range(args.load_procs)
+        ]
+        started = time.perf_counter()
+        for loader in loaders:
+            loader.start()
+        outcomes = [results.get() for _ in loaders]
+        elapsed = time.perf_counter() - started
+        for loader in loaders:
+            loader.join()
+    finally:
+        # serve.py drains and stops its workers on SIGTERM; time it
+        stop_started = time.perf_counter()
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(60)
+        stop_s = time.perf_counter() - stop_started
+
+    latencies = [ms for samples, _ in outcomes for ms in samples]
+    errors = sum(failed for _, failed in outcomes)
+    return len(latencies) / elapsed, percentile(latencies, 50), percentile(latencies, 99), errors, stop_s
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated serve.py worker counts")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--tasks", type=int, default=500, help="Tasks per user")
+    parser.add_argument("--load-procs", type=int, default=4, help="Client processes")
+    parser.add_argument("--clients", type=int, default=8, help="Threads per client process")
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs, {args.load_procs}x{args.clients} clients")
+    print(f"{'workers':>7} {'req/s':>9} {'speedup':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7} {'stop s':>7}")
+    baseline = None
+    for workers in [int(w) for w in args.workers.split(",")]:
+        rps, p50, p99, errors, stop_s = run(workers, args)
+        baseline = baseline or rps
+        print(f"{workers:>7} {rps:>9.1f} {rps / baseline:>7.2f}x {p50:>8.1f} {p99:>8.1f} {errors:>7} {stop_s:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
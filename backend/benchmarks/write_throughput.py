@@ -0,0 +1,105 @@
+"""
+Concurrent write throughput per SQLite profile.
+
+For each SQLITE_PROFILE a fresh database is migrated and served by one or more
+uvicorn worker processes; every client thread registers its own user and then
+alternates task creates and updates for a fixed duration. Reports writes/second,
+latency percentiles and failed writes (``database is locked`` surfaces as 500).
+
+    python -m benchmarks.write_throughput --profiles default,production --clients 16 --server-workers 2
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import requests
+
+from benchmarks.common import migrate_database, percentile, start_server
+
+
+def run_writes(base_url, clients, duration):
+    stop = threading.Event()
+    ready = threading.Barrier(clients + 1)  # start timing once every client has registered
+    lock = threading.Lock()
+    latencies, failures = [], [0]
+
+    def client(index):
+        session = requests.Session()
+        resp = session.post(f"{base_url}/api/auth/register", json={
+            "name": "Writer",
+            "email": f"writer{index}@example.com",
+            "password": "benchmarkpassword123",
+        })
+        resp.raise_for_status()
+        session.headers["Authorization"] = f"Bearer {resp.json()['access_token']}"
+        ready.wait()
+
+        local, failed, task_ids = [], 0, []
+        while not stop.is_set():
+            start = time.perf_counter()
+            if task_ids and random.random() < 0.5:
+                resp = session.put(f"{base_url}/api/tasks/{random.choice(task_ids)}", json={
+                    "priority": random.choice(["low", "medium", "high", "critical"]),
+                })
+            else:
+                resp = session.post(f"{base_url}/api/tasks/", json={
+                    "title": "Write benchmark task",
+                    "deadline": (datetime.now(timezone.utc) + timedelta(days=random.randint(1, 30))).isoformat(),
+                })
+                if resp.ok:
+                    task_ids.append(resp.json()["id"])
+            if resp.ok:
+                local.append((time.perf_counter() - start) * 1000)
+            else:
+                failed += 1
+        with lock:
+            latencies.extend(local)
+            failures[0] += failed
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for t in threads:
+        t.start()
+    ready.wait()
+    started = time.perf_counter()
+    time.sleep(duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    return latencies, failures[0], time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--profiles", default="default,production", help="Comma-separated SQLITE_PROFILE values")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--server-workers", type=int, default=2, help="uvicorn worker processes")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=8102)
+    args = parser.parse_args()
+
+    print(f"{'profile':>10} {'writes/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'failed':>7}")
+    for profile in args.profiles.split(","):
+        env = {"SQLITE_PROFILE": profile, "DB_STARTUP_MODE": "check"}
+        db_path = os.path.join(tempfile.mkdtemp(prefix="bench-"), "writes.db")
+        migrate_database(db_path, env)
+        proc, base_url = start_server(
+            args.port, env, db_path=db_path, uvicorn_args=("--workers", str(args.server_workers))
+        )
+        try:
+            latencies, failed, elapsed = run_writes(base_url, args.clients, args.duration)
+        finally:
+            proc.terminate()
+            proc.wait()
+        print(
+            f"{profile:>10} {len(latencies) / elapsed:>9.1f} "
+            f"{percentile(latencies, 50):>8.1f} {percentile(latencies, 99):>8.1f} {failed:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
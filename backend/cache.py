@@ -0,0 +1,255 @@
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+# Cache configuration
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")  # "memory", "sqlite" or "redis"
+CACHE_URL = os.getenv("CACHE_URL", "redis://localhost:6379/0")
+CACHE_SQLITE_PATH = os.getenv("CACHE_SQLITE_PATH", "./deadlinesync-cache.db")
+
+
+class CacheBackend:
+    """Minimal key/value interface shared by the in-process, SQLite and Redis caches"""
+
+    # The shared backends do file or network I/O; async callers use the *_async
+    # methods, which run it in the threadpool instead of on the event loop
+    blocking = True
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def take_token(self, key: str, rate: float, burst: float, now: Optional[float] = None) -> float:
+        """
+        Spend one token from the bucket at ``key`` (``burst`` tokens refilled at
+        ``rate`` per second); returns 0.0, or the seconds until a token is free.
+        Buckets expire once they would be full again.
+        """
+        raise NotImplementedError
+
+    async def get_async(self, key: str) -> Optional[Any]:
+        if not self.blocking:
+            return self.get(key)
+        return await run_in_threadpool(self.get, key)
+
+    async def set_async(self, key: str, value: Any, ttl: float) -> None:
+        if not self.blocking:
+            return self.set(key, value, ttl)
+        await run_in_threadpool(self.set, key, value, ttl)
+
+    async def delete_async(self, key: str) -> None:
+        if not self.blocking:
+            return self.delete(key)
+        await run_in_threadpool(self.delete, key)
+
+    async def take_token_async(self, key: str, rate: float, burst: float, now: Optional[float] = None) -> float:
+        if not self.blocking:
+            return self.take_token(key, rate, burst, now)
+        return await run_in_threadpool(self.take_token, key, rate, burst, now)
+
+
+def _refill(state: Optional[list], rate: float, burst: float, now: float):
+    """Token bucket step shared by the backends; returns (new state, wait)"""
+    tokens, updated = state if state is not None else (burst, now)
+    tokens = min(burst, tokens + max(0.0, now - updated) * rate)
+    wait = 0.0
+    if tokens >= 1:
+        tokens -= 1
+    else:
+        wait = (1 - tokens) / rate
+    return [tokens, now], wait
+
+
+def _bucket_ttl(rate: float, burst: float) -> float:
+    # After this long the bucket is full again, the same as having no entry
+    return burst / rate + 1
+
+
+class MemoryCache(CacheBackend):
+    """Bounded LRU cache with per-entry expiry, local to one process"""
+
+    blocking = False  # a dict behind a lock: cheaper inline than a thread hop
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self.evictions = 0
+        self._data: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def take_token(self, key: str, rate: float, burst: float, now: Optional[float] = None) -> float:
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._data.get(key)
+            state = entry[1] if entry is not None and entry[0] >= time.monotonic() else None
+            state, wait = _refill(state, rate, burst, now)
+            self._store(key, state, _bucket_ttl(rate, burst))
+        return wait
+
+    def _store(self, key: str, value: Any, ttl: float) -> None:
+        # Caller holds the lock
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class RedisCache(CacheBackend):
+    """
+    Cache shared between workers through a Redis-compatible server.
+
+    Intended for a server on the same host (Redis, Valkey, KeyDB...). Calls
+    are short synchronous round-trips, which async callers make through the
+    threadpool (``get_async``...). Values must be JSON-serializable.
+    """
+
+    def __init__(self, url: str = CACHE_URL, prefix: str = "deadlinesync:"):
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package") from exc
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url, socket_timeout=0.25)
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self._client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self._client.set(self.prefix + key, json.dumps(value), px=int(ttl * 1000))
+
+    def delete(self, key: str) -> None:
+        self._client.delete(self.prefix + key)
+
+    # Same step as _refill, run atomically on the server
+    TAKE_TOKEN_SCRIPT = """
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+    local rate, burst, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+    local tokens = tonumber(state[1]) or burst
+    local updated = tonumber(state[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+    local wait = 0
+    if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+    redis.call('PEXPIRE', KEYS[1], ARGV[4])
+    return tostring(wait)
+    """
+
+    def take_token(self, key: str, rate: float, burst: float, now: Optional[float] = None) -> float:
+        now = time.time() if now is None else now
+        ttl_ms = math.ceil(_bucket_ttl(rate, burst) * 1000)
+        return float(self._client.eval(self.TAKE_TOKEN_SCRIPT, 1, self.prefix + key, rate, burst, now, ttl_ms))
+
+
+class SQLiteCache(CacheBackend):
+    """
+    Cache shared between workers on one host through a local SQLite file.
+
+    A stand-in for Redis when there is none: every worker opens the same
+    file (WAL, no fsync), each thread keeps its own connection, and
+    ``take_token`` runs in an IMMEDIATE transaction so concurrent workers
+    never spend the same token. Expired rows are ignored on read and purged
+    every ``purge_every`` writes. Values must be JSON-serializable.
+    """
+
+    def __init__(self, path: str = CACHE_SQLITE_PATH, purge_every: int = 1000):
+        self.path = path
+        self.purge_every = purge_every
+        self._writes = 0
+        self._local = threading.local()
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        # A forked worker must not reuse the connection its parent opened
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, key: str) -> Optional[Any]:
+        row = self._connect().execute(
+            "SELECT value FROM cache WHERE key = ? AND expires_at >= ?", (key, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self._write(self._connect(), key, value, ttl)
+
+    def delete(self, key: str) -> None:
+        self._connect().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def take_token(self, key: str, rate: float, burst: float, now: Optional[float] = None) -> float:
+        now = time.time() if now is None else now
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT value FROM cache WHERE key = ? AND expires_at >= ?", (key, now)
+            ).fetchone()
+            state, wait = _refill(json.loads(row[0]) if row is not None else None, rate, burst, now)
+            self._write(conn, key, state, _bucket_ttl(rate, burst))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+    def _write(self, conn: sqlite3.Connection, key: str, value: Any, ttl: float) -> None:
+        now = time.time()
+        conn.execute(
+            "INSERT INTO cache (key, value, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at",
+            (key, json.dumps(value), now + ttl),
+        )
+        self._writes += 1
+        if self._writes % self.purge_every == 0:
+            conn.execute("DELETE FROM cache WHERE expires_at < ?", (now,))
+
+
+def create_cache_backend(max_size: int = 10000) -> CacheBackend:
+    """Build the backend selected by CACHE_BACKEND"""
+    if CACHE_BACKEND == "redis":
+        return RedisCache(CACHE_URL)
+    if CACHE_BACKEND == "sqlite":
+        return SQLiteCache(CACHE_SQLITE_PATH)
+    return MemoryCache(max_size=max_size)
@@ -1,33 +1,192 @@
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
-from models import Base
+from typing import AsyncIterator, Optional
+from sqlalchemy import event, inspect, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 # Database URL - using SQLite for simplicity, can switch to PostgreSQL
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./deadline_manager.db")
 
+
+def to_async_url(url: str) -> str:
+    """Map a plain database URL onto its asyncio driver"""
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith("postgres://"):
+        return url.replace("postgres://", "postgresql+asyncpg://", 1)
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    return url
+
+
+ASYNC_DATABASE_URL = to_async_url(DATABASE_URL)
+
+# "check": verify the schema revision on boot and refuse to start if it is behind
+# "migrate": upgrade to the latest revision on boot (convenient for local development)
+DB_STARTUP_MODE = os.getenv("DB_STARTUP_MODE", "check")
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini")
+
+# "production": WAL journal, relaxed fsync, memory-mapped reads and a connection pool
+# "default": SQLite's stock settings with a fresh connection per session
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "production")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", "8"))
+
+# Client/server databases (PostgreSQL)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+
+def _sqlite_pragmas():
+    """PRAGMA statements run on every new SQLite connection for SQLITE_PROFILE"""
+    if SQLITE_PROFILE != "production":
+        return []
+    return [
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}",
+        f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    return url.rstrip("/") in ("sqlite:", "sqlite://") or ":memory:" in url or "mode=memory" in url
+
+
 # For SQLite, we need check_same_thread=False
 if DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(
-        DATABASE_URL,
-        connect_args={"check_same_thread": False},
-        echo=False  # Set to True for SQL query logging
+    sqlite_options = {}
+    if SQLITE_PROFILE == "production" and not _is_memory_sqlite(DATABASE_URL):
+        # Keep connections (and their page cache) open instead of reconnecting per session;
+        # WAL lets the pooled readers run alongside the single writer
+        sqlite_options = {
+            "poolclass": AsyncAdaptedQueuePool,
+            "pool_size": SQLITE_POOL_SIZE,
+            "max_overflow": 0,
+            "pool_timeout": DB_POOL_TIMEOUT,
+        }
+    engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000},
+        echo=False,  # Set to True for SQL query logging
+        **sqlite_options,
     )
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in _sqlite_pragmas():
+            cursor.execute(pragma)
+        cursor.close()
 else:
-    engine = create_engine(DATABASE_URL, echo=False)
+    engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        echo=False,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# expire_on_commit=False keeps loaded attributes usable after commit without
+# an implicit (and, under asyncio, illegal) lazy refresh.
+SessionLocal = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
 
 
-def init_db():
-    """Initialize database tables"""
-    Base.metadata.create_all(bind=engine)
+class SchemaOutOfDateError(RuntimeError):
+    """The database is behind the migrations shipped with this build"""
 
 
-def get_db() -> Session:
-    """Dependency for getting database session"""
-    db = SessionLocal()
+def _alembic_config():
+    from alembic.config import Config
+
+    config = Config(ALEMBIC_INI)
+    config.attributes["configure_logger"] = False
+    return config
+
+
+def _legacy_revision(connection) -> Optional[str]:
+    """Revision matching a database created by create_all before migrations existed"""
+    inspector = inspect(connection)
+    tables = inspector.get_table_names()
+    if "alembic_version" in tables or "users" not in tables:
+        return None
+    if any(ix["name"] == "ix_tasks_user_deadline" for ix in inspector.get_indexes("tasks")):
+        return "0003"
+    return "0002" if "user_task_stats" in tables else "0001"
+
+
+def _upgrade(connection, config):
+    from alembic import command
+
+    config.attributes["connection"] = connection
+    legacy = _legacy_revision(connection)
+    if legacy:
+        command.stamp(config, legacy)
+    command.upgrade(config, "head")
+
+
+async def run_migrations():
+    """Upgrade the database to the latest Alembic revision"""
+    config = _alembic_config()
+    async with engine.begin() as conn:
+        await conn.run_sync(_upgrade, config)
+    # Start the app (or exit the migrate command) without connections that ran DDL
+    await engine.dispose()
+
+
+async def check_schema_revision():
+    """
+    Compare the stored Alembic revision with the newest one in migrations/.
+
+    Only reads ``alembic_version`` (no reflection), so it stays cheap on large
+    schemas. Raises SchemaOutOfDateError if the database is behind; a revision
+    this build does not know about (a newer deploy already migrated) is allowed.
+    """
+    from alembic.script import ScriptDirectory
+
+    scripts = ScriptDirectory.from_config(_alembic_config())
+    head = scripts.get_current_head()
     try:
+        async with engine.connect() as conn:
+            current = (await conn.execute(text("SELECT version_num FROM alembic_version"))).scalar()
+    except DBAPIError:
+        current = None
+
+    if current == head:
+        return
+    if current is None:
+        raise SchemaOutOfDateError(
+            "Database schema is not versioned; run `python main.py migrate`"
+        )
+    known = {rev.revision for rev in scripts.walk_revisions()}
+    if current in known:
+        raise SchemaOutOfDateError(
+            f"Database is at revision {current}, this build expects {head}; "
+            "run `python main.py migrate`"
+        )
+    print(f"⚠️  Database revision {current} is newer than this build ({head})")
+
+
+async def init_db():
+    """Prepare the database on startup according to DB_STARTUP_MODE"""
+    if DB_STARTUP_MODE == "migrate":
+        await run_migrations()
+    # After a migration this is also the fresh pool's first connection: SQLAlchemy runs
+    # its first-connect hook under a lock, which deadlocks if background tasks race for it
+    await check_schema_revision()
+
+
+async def get_db() -> AsyncIterator[AsyncSession]:
+    """Dependency for getting database session"""
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
@@ -0,0 +1,218 @@
+"""
+Local stand-in for the Google endpoints the backend calls.
+
+Serves Gmail ``messages.send``, Calendar ``events.insert``/``update``, their
+``batch/...`` endpoints (multipart/mixed, unpacked part by part) and the
+OAuth token endpoint, on 127.0.0.1 in a background thread. Point the app at
+it with ``GOOGLE_API_ROOT=<url>/`` and ``GOOGLE_TOKEN_URI=<url>/token``.
+
+    google = FakeGoogle(latency=0.05).start()
+    ...
+    google.stop()
+
+``http_requests`` records what arrived on the wire and ``calls`` every API
+call after unpacking batches. Access tokens in ``expired`` get 401 (until the
+client refreshes them); tokens in ``forbidden`` get 403. Statuses appended to
+``fail_next`` are returned, in order, by the next API calls.
+
+Calendar events are kept in ``events`` (one calendar shared by all users)
+and ``events.list`` supports paging and sync tokens: a listing with a
+``syncToken`` returns only events changed since, deleted ones as
+``cancelled``. ``edit_event`` / ``delete_event`` change events as if a user
+did it in Google Calendar, and ``expire_sync_tokens`` makes the current
+tokens answer 410 Gone.
+"""
+
+import itertools
+import json
+import re
+import threading
+import time
+import urllib.parse
+from datetime import datetime, timezone
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+_STATUS_TEXT = {
+    200: "OK", 401: "Unauthorized", 403: "Forbidden", 404: "Not Found", 410: "Gone",
+    503: "Service Unavailable",
+}
+_EVENT_PATH = re.compile(r"^/calendar/v3/calendars/([^/]+)/events(?:/([^/]+))?$")
+
+
+class FakeGoogle:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency  # seconds added to every request on the wire
+        self.http_requests: List[Tuple[str, str]] = []
+        self.calls: List[Tuple[str, str, Optional[str]]] = []
+        self.expired = set()
+        self.forbidden = set()
+        self.fail_next: List[int] = []
+        self.refreshes = 0
+        self.events: Dict[str, dict] = {}
+        self._ids = itertools.count(1)
+        self._changes = 0  # sequence number of the last event change
+        self._oldest_sync = 0  # sync tokens before this answer 410
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeGoogle":
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _serve(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                status, content_type, payload = fake.handle(self.command, self.path, dict(self.headers), body)
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST = do_PUT = _serve
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    # --- Changes made "in Google Calendar" ---
+
+    def edit_event(self, event_id: str, **fields) -> dict:
+        with self._lock:
+            return self._store(dict(self.events[event_id], **fields))
+
+    def delete_event(self, event_id: str) -> dict:
+        return self.edit_event(event_id, status="cancelled")
+
+    def expire_sync_tokens(self) -> None:
+        with self._lock:
+            self._oldest_sync = self._changes + 1
+
+    def _store(self, event: dict) -> dict:
+        # Callers hold self._lock
+        self._changes += 1
+        event["updated"] = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+        event["_change"] = self._changes
+        self.events[event["id"]] = event
+        return event
+
+    # --- Request handling ---
+
+    def handle(self, method: str, path: str, headers: Dict[str, str], body: bytes) -> Tuple[int, str, bytes]:
+        """One request on the wire -> (status, content type, body)"""
+        with self._lock:
+            self.http_requests.append((method, path))
+        if self.latency:
+            time.sleep(self.latency)
+        if path.startswith("/batch/"):
+            return self._batch(headers, body)
+        status, payload = self._call(method, path, headers, body)
+        return status, "application/json", json.dumps(payload).encode()
+
+    def _call(self, method: str, path: str, headers: Dict[str, str], body: bytes) -> Tuple[int, dict]:
+        path, _, query = path.partition("?")
+        if path == "/token":
+            return self._refresh(body)
+
+        auth = {k.lower(): v for k, v in headers.items()}.get("authorization", "")
+        access_token = auth[len("Bearer "):] if auth.startswith("Bearer ") else None
+        with self._lock:
+            self.calls.append((method, path, access_token))
+            injected = self.fail_next.pop(0) if self.fail_next else None
+        if injected:
+            return injected, {"error": {"code": injected, "message": "Injected failure"}}
+        if access_token is None or access_token in self.expired:
+            return 401, {"error": {"code": 401, "message": "Invalid Credentials"}}
+        if access_token in self.forbidden:
+            return 403, {"error": {"code": 403, "message": "Insufficient Permission"}}
+
+        if method == "POST" and path == "/gmail/v1/users/me/messages/send":
+            return 200, {"id": f"msg-{next(self._ids)}", "labelIds": ["SENT"]}
+        event = _EVENT_PATH.match(path)
+        if event and method == "GET" and event.group(2) is None:
+            return self._list_events(urllib.parse.parse_qs(query))
+        if event and method == "POST" and event.group(2) is None:
+            with self._lock:
+                stored = self._store(dict(json.loads(body), id=f"evt-{next(self._ids)}", status="confirmed"))
+            return 200, _public(stored)
+        if event and method == "PUT" and event.group(2) in self.events:
+            with self._lock:
+                stored = self._store(dict(json.loads(body), id=event.group(2), status="confirmed"))
+            return 200, _public(stored)
+        return 404, {"error": {"code": 404, "message": "Not Found"}}
+
+    def _list_events(self, params: Dict[str, List[str]]) -> Tuple[int, dict]:
+        page_size = int(params.get("maxResults", ["250"])[0])
+        with self._lock:
+            if "pageToken" in params:
+                since, upto, offset = (int(part) for part in params["pageToken"][0].split(":"))
+            else:
+                since, upto, offset = 0, self._changes, 0
+                if "syncToken" in params:
+                    since = int(params["syncToken"][0].split("-")[1])
+                    if since < self._oldest_sync:
+                        return 410, {"error": {"code": 410, "message": "Sync token is no longer valid"}}
+            changed = sorted(
+                (event for event in self.events.values() if since < event["_change"] <= upto),
+                key=lambda event: event["_change"],
+            )
+        if not since:
+            changed = [event for event in changed if event["status"] != "cancelled"]
+        page = changed[offset:offset + page_size]
+        response = {"kind": "calendar#events", "items": [_public(event) for event in page]}
+        if offset + page_size < len(changed):
+            response["nextPageToken"] = f"{since}:{upto}:{offset + page_size}"
+        else:
+            response["nextSyncToken"] = f"sync-{upto}"
+        return 200, response
+
+    def _refresh(self, body: bytes) -> Tuple[int, dict]:
+        form = urllib.parse.parse_qs(body.decode())
+        if form.get("grant_type") != ["refresh_token"]:
+            return 400, {"error": "unsupported_grant_type"}
+        with self._lock:
+            self.refreshes += 1
+            access_token = f"refreshed-{self.refreshes}"
+        return 200, {"access_token": access_token, "expires_in": 3600, "token_type": "Bearer"}
+
+    def _batch(self, headers: Dict[str, str], body: bytes) -> Tuple[int, str, bytes]:
+        content_type = {k.lower(): v for k, v in headers.items()}["content-type"]
+        message = BytesParser().parsebytes(f"Content-Type: {content_type}\r\n\r\n".encode() + body)
+        boundary = "batch_fake_google"
+        parts = []
+        for part in message.get_payload():
+            request = part.get_payload(decode=False)
+            head, _, part_body = re.split(r"(\r?\n\r?\n)", request, maxsplit=1)
+            request_line, *header_lines = head.splitlines()
+            part_method, part_path, _ = request_line.split(" ", 2)
+            part_headers = dict(line.split(": ", 1) for line in header_lines if ": " in line)
+            status, payload = self._call(part_method, part_path, part_headers, part_body.encode())
+            content_id = part["Content-ID"].strip("<>")
+            parts.append(
+                f"--{boundary}\r\nContent-Type: application/http\r\n"
+                f"Content-ID: <response-{content_id}>\r\n\r\n"
+                f"HTTP/1.1 {status} {_STATUS_TEXT.get(status, 'Error')}\r\n"
+                f"Content-Type: application/json; charset=UTF-8\r\n\r\n{json.dumps(payload)}\r\n"
+            )
+        payload = "".join(parts) + f"--{boundary}--\r\n"
+        return 200, f"multipart/mixed; boundary={boundary}", payload.encode()
+
+
+def _public(event: dict) -> dict:
+    return {key: value for key, value in event.items() if not key.startswith("_")}
@@ -0,0 +1,239 @@
+"""
+Local stand-in for the Redis commands the backend sends.
+
+Speaks RESP2 on 127.0.0.1 in a background thread, enough for the
+``redis`` task-event broker and the cache: ``XADD`` (with ``MAXLEN``),
+``XRANGE``, ``PUBLISH`` / ``SUBSCRIBE`` / ``UNSUBSCRIBE``, ``GET`` /
+``SET`` (``PX``) / ``DEL``, ``PING`` and ``CLIENT``. Point a client at
+``url``.
+
+    fake = FakeRedis().start()
+    ...
+    fake.stop()
+
+``commands`` records every command name that arrived. ``stop`` also closes
+open connections, so clients see the server go away.
+"""
+
+import socketserver
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+StreamId = Tuple[int, int]
+
+
+class RedisError(Exception):
+    pass
+
+
+def _encode(value) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, RedisError):
+        return f"-ERR {value}\r\n".encode()
+    if isinstance(value, bool):
+        value = int(value)
+    if isinstance(value, int):
+        return f":{value}\r\n".encode()
+    if isinstance(value, str):  # status reply
+        return f"+{value}\r\n".encode()
+    if isinstance(value, bytes):
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+    return b"*%d\r\n" % len(value) + b"".join(_encode(item) for item in value)
+
+
+def _stream_id(raw: bytes, upper: bool) -> StreamId:
+    if raw == b"-":
+        return (0, 0)
+    if raw == b"+":
+        return (2 ** 64, 2 ** 64)
+    try:
+        ms, _, seq = raw.decode().partition("-")
+        return (int(ms), int(seq) if seq else (2 ** 64 if upper else 0))
+    except ValueError:
+        raise RedisError("Invalid stream ID specified as stream command argument")
+
+
+class FakeRedis:
+    def __init__(self):
+        self.commands: List[str] = []
+        self.streams: Dict[bytes, List[Tuple[StreamId, List[bytes]]]] = {}
+        self.values: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self._channels: Dict[bytes, Set["_Connection"]] = {}
+        self._connections: Set["_Connection"] = set()
+        self._lock = threading.Lock()
+        self._server: Optional[socketserver.ThreadingTCPServer] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"redis://{host}:{port}/0"
+
+    def start(self) -> "FakeRedis":
+        fake = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                connection = _Connection(self.request, self.wfile)
+                with fake._lock:
+                    fake._connections.add(connection)
+                try:
+                    while True:
+                        args = self._read_command()
+                        if args is None:
+                            return
+                        connection.send(fake.execute(connection, args))
+                except (ConnectionError, OSError, ValueError):
+                    pass
+                finally:
+                    with fake._lock:
+                        fake._connections.discard(connection)
+                        for subscribers in fake._channels.values():
+                            subscribers.discard(connection)
+
+            def _read_command(self) -> Optional[List[bytes]]:
+                line = self.rfile.readline()
+                if not line:
+                    return None
+                if not line.startswith(b"*"):
+                    return line.split()  # inline command
+                args = []
+                for _ in range(int(line[1:])):
+                    length = int(self.rfile.readline()[1:])
+                    args.append(self.rfile.read(length + 2)[:-2])
+                return args
+
+        self._server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        with self._lock:
+            connections = list(self._connections)
+        for connection in connections:
+            connection.close()
+
+    # --- Commands ---
+
+    def execute(self, connection: "_Connection", args: List[bytes]):
+        name = args[0].decode().upper()
+        self.commands.append(name)
+        handler = getattr(self, f"_cmd_{name.lower()}", None)
+        if handler is None:
+            return RedisError(f"unknown command '{name}'")
+        try:
+            with self._lock:
+                return handler(connection, *args[1:])
+        except RedisError as exc:
+            return exc
+        except (TypeError, ValueError, IndexError):
+            return RedisError(f"wrong arguments for '{name}' command")
+
+    def _cmd_ping(self, connection, *args):
+        if connection.channels:
+            return [b"pong", args[0] if args else b""]
+        return args[0] if args else "PONG"
+
+    def _cmd_client(self, connection, *args):
+        return "OK"
+
+    def _cmd_get(self, connection, key):
+        value, expires_at = self.values.get(key, (None, None))
+        if expires_at is not None and expires_at < time.time():
+            del self.values[key]
+            return None
+        return value
+
+    def _cmd_set(self, connection, key, value, *options):
+        expires_at = None
+        if options and options[0].upper() == b"PX":
+            expires_at = time.time() + int(options[1]) / 1000
+        self.values[key] = (value, expires_at)
+        return "OK"
+
+    def _cmd_del(self, connection, *keys):
+        return sum(1 for key in keys if self.values.pop(key, None) is not None or self.streams.pop(key, None))
+
+    def _cmd_xadd(self, connection, key, *args):
+        maxlen, index = None, 0
+        while args[index].upper() in (b"MAXLEN", b"NOMKSTREAM"):
+            if args[index].upper() == b"MAXLEN":
+                index += 1
+                if args[index] in (b"~", b"="):
+                    index += 1
+                maxlen = int(args[index])
+            index += 1
+        raw_id, fields = args[index], list(args[index + 1:])
+        entries = self.streams.setdefault(key, [])
+        last = entries[-1][0] if entries else (0, 0)
+        if raw_id == b"*":
+            ms = max(int(time.time() * 1000), last[0])
+            entry_id = (ms, last[1] + 1 if ms == last[0] else 0)
+        else:
+            entry_id = _stream_id(raw_id, upper=False)
+            if entry_id <= last:
+                raise RedisError("The ID specified in XADD is equal or smaller than the target stream top item")
+        entries.append((entry_id, fields))
+        if maxlen is not None:
+            del entries[:max(0, len(entries) - maxlen)]
+        return f"{entry_id[0]}-{entry_id[1]}".encode()
+
+    def _cmd_xrange(self, connection, key, start, end, *options):
+        low, high = _stream_id(start, upper=False), _stream_id(end, upper=True)
+        count = int(options[1]) if options and options[0].upper() == b"COUNT" else None
+        found = [
+            [f"{entry_id[0]}-{entry_id[1]}".encode(), fields]
+            for entry_id, fields in self.streams.get(key, []) if low <= entry_id <= high
+        ]
+        return found[:count] if count is not None else found
+
+    def _cmd_publish(self, connection, channel, message):
+        subscribers = list(self._channels.get(channel, ()))
+        for subscriber in subscribers:
+            subscriber.send([b"message", channel, message])
+        return len(subscribers)
+
+    def _cmd_subscribe(self, connection, *channels):
+        replies = []
+        for channel in channels:
+            self._channels.setdefault(channel, set()).add(connection)
+            connection.channels.add(channel)
+            replies.append([b"subscribe", channel, len(connection.channels)])
+        return _Replies(replies)
+
+    def _cmd_unsubscribe(self, connection, *channels):
+        replies = []
+        for channel in channels or list(connection.channels) or [None]:
+            if channel is not None:
+                self._channels.get(channel, set()).discard(connection)
+                connection.channels.discard(channel)
+            replies.append([b"unsubscribe", channel, len(connection.channels)])
+        return _Replies(replies)
+
+
+class _Replies(list):
+    """Several replies to one command (one per channel of SUBSCRIBE)"""
+
+
+class _Connection:
+    def __init__(self, sock, wfile):
+        self.channels: Set[bytes] = set()
+        self._sock = sock
+        self._wfile = wfile
+        self._write = threading.Lock()  # PUBLISH on another connection writes here too
+
+    def send(self, reply) -> None:
+        payload = b"".join(_encode(item) for item in reply) if isinstance(reply, _Replies) else _encode(reply)
+        with self._write:
+            self._wfile.write(payload)
+            self._wfile.flush()
+
+    def close(self) -> None:
+        try:
+            self._sock.shutdown(2)
+        except OSError:
+            pass
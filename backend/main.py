@@ -1,19 +1,55 @@
-from fastapi import FastAPI
+import os
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from database import init_db
+from database import engine, init_db
+from auth import password_pool, user_cache
+from metrics import CONTENT_TYPE, MetricsMiddleware, registry
+from query_profiler import QueryProfileMiddleware, query_budget, query_profiler
+from rate_limiting import RateLimitMiddleware, request_limits
 from routers import auth, tasks
+from services.calendar_sync import CALENDAR_SYNC_ENABLED, calendar_syncer
+from services.missed_sweeper import MISSED_SWEEP_ENABLED, missed_sweeper
+from services.outbox import OUTBOX_ENABLED, notification_outbox
+from services.reminders import REMINDERS_ENABLED, reminder_scheduler
+from services.task_events import task_events
+
+# Reminders, calendar sync and the missed-task sweep need one process running them;
+# serve.py keeps them on its first worker only
+BACKGROUND_JOBS_ENABLED = os.getenv("BACKGROUND_JOBS_ENABLED", "true").lower() in ("1", "true", "yes")
 
 # Lifespan event
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    print("🚀 Initializing database...")
-    init_db()
-    print("✅ Database initialized")
+    print("🚀 Checking database schema...")
+    await init_db()
+    print("✅ Database ready")
+    await task_events.start()
+    if OUTBOX_ENABLED:
+        await notification_outbox.start()
+        print(f"📬 Notification outbox started ({notification_outbox.workers} workers)")
+    if BACKGROUND_JOBS_ENABLED and REMINDERS_ENABLED:
+        await reminder_scheduler.start()
+        print(f"⏰ Reminder scheduler started ({reminder_scheduler.snapshot()['scheduled']} due soon)")
+    if BACKGROUND_JOBS_ENABLED and CALENDAR_SYNC_ENABLED:
+        await calendar_syncer.start()
+        print(f"📅 Calendar sync every {calendar_syncer.interval.total_seconds():.0f}s")
+    if BACKGROUND_JOBS_ENABLED and MISSED_SWEEP_ENABLED:
+        await missed_sweeper.start()
+        print(f"🧹 Missed-task sweep every {missed_sweeper.interval.total_seconds():.0f}s")
     yield
     # Shutdown
     print("🛑 Shutting down...")
+    await missed_sweeper.stop()
+    await calendar_syncer.stop()
+    await reminder_scheduler.stop()
+    await notification_outbox.stop()
+    await task_events.stop()
+    password_pool.shutdown()
+    await engine.dispose()
+    if query_profiler.mode == "report":
+        print(f"📊 SQL statements per endpoint (QUERY_PROFILE={query_profiler.mode}):\n{query_profiler.report()}")
 
 
 # Create FastAPI app
@@ -26,6 +62,12 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Innermost: counts only the statements of requests that reach an endpoint (QUERY_PROFILE)
+app.add_middleware(QueryProfileMiddleware)
+
+# Rate limits run inside CORS, so 429 responses still carry the CORS headers
+app.add_middleware(RateLimitMiddleware)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -38,15 +80,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["*"],
+    expose_headers=["*", "X-Next-Cursor", "Retry-After"],
 )
 
+# Outermost, so the timings include the other middleware and every response is counted
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(tasks.router)
 
 
 @app.get("/", tags=["Health"])
+@query_budget(0)
 async def root():
     """API health check"""
     return {
@@ -58,12 +104,42 @@ async def root():
 
 
 @app.get("/api/health", tags=["Health"])
+@query_budget(0)
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "service": "deadline-manager-api"}
+    return {
+        "status": "healthy",
+        "service": "deadline-manager-api",
+        "pid": os.getpid(),
+        "background_jobs": BACKGROUND_JOBS_ENABLED,
+        "user_cache": user_cache.snapshot(),
+        "rate_limits": request_limits.snapshot(),
+        "reminders": reminder_scheduler.snapshot(),
+        "outbox": notification_outbox.snapshot(),
+        "calendar_sync": calendar_syncer.snapshot(),
+        "missed_sweeper": missed_sweeper.snapshot(),
+        "task_events": task_events.snapshot(),
+    }
+
+
+@app.get("/api/metrics", tags=["Health"], include_in_schema=False)
+@query_budget(0)
+async def metrics():
+    """Request, database and Google API metrics in the Prometheus text format"""
+    return Response(registry.render(), media_type=CONTENT_TYPE)
 
 
 if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:2] == ["migrate"]:
+        # Apply migrations out of band, e.g. as a release step before rolling out new pods
+        import asyncio
+        from database import run_migrations
+        asyncio.run(run_migrations())
+        print("✅ Database migrated")
+        sys.exit(0)
+
     import uvicorn
     uvicorn.run(
         "main:app",
@@ -0,0 +1,244 @@
+"""
+Request-level metrics, served at ``/api/metrics`` in the Prometheus text format.
+
+``MetricsMiddleware`` times every HTTP request and counts it by method, route
+template (``/api/tasks/{task_id}``, so ids do not become labels) and status,
+and keeps a gauge of the requests in flight. SQLAlchemy cursor events on the
+app engine time every statement; the ones run for a request are also added
+to that request's totals through a context variable, giving the queries and
+database time per request by route. ``google_call`` times the Gmail, Calendar
+and OAuth calls in ``services/google_integration.py``.
+
+Metrics are kept in this process. Behind ``serve.py`` a scrape reaches one
+worker, told apart by the ``process_id`` gauge; scrape each worker's port or
+run one worker per container to see them all. ``METRICS_ENABLED=false``
+turns the middleware and the database hooks off.
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from database import engine
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if value == int(value) else repr(value)
+
+
+class Metric:
+    """A named family of series keyed by label values; thread-safe"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._series: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            series = sorted(self._series.items())
+        for labels, value in series:
+            lines.extend(self._render_series(labels, value))
+        return lines
+
+    def _render_series(self, labels, value) -> List[str]:
+        return [f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._series[labels] = self._series.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float, *labels: str) -> None:
+        with self._lock:
+            self._series[labels] = value
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._series[labels] = self._series.get(labels, 0) + amount
+
+    def dec(self, *labels: str) -> None:
+        self.inc(*labels, amount=-1)
+
+
+class Histogram(Metric):
+    """Per-bucket counts (made cumulative when rendered), sum and count"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)  # == len(buckets) for +Inf
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def _render_series(self, labels, value) -> List[str]:
+        counts, total = value
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            le = 'le="+Inf"' if bound == float("inf") else f'le="{_number(bound)}"'
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+        lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+        lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[Metric] = []
+
+    def add(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self.metrics for line in metric.render()) + "\n"
+
+
+registry = Registry()
+process_id = registry.add(Gauge("process_id", "PID of the worker process that answered this scrape"))
+process_id.set(os.getpid())
+http_requests = registry.add(Counter(
+    "http_requests_total", "HTTP requests by route template and status", ("method", "route", "status")
+))
+http_duration = registry.add(Histogram(
+    "http_request_duration_seconds", "Time from request start to the end of the response body", ("method", "route")
+))
+http_in_flight = registry.add(Gauge("http_requests_in_flight", "HTTP requests being handled, streams included"))
+request_queries = registry.add(Histogram(
+    "http_request_db_queries", "SQL statements run per request", ("method", "route"), buckets=QUERY_COUNT_BUCKETS
+))
+request_db_time = registry.add(Histogram(
+    "http_request_db_seconds", "Time spent in SQL statements per request", ("method", "route")
+))
+db_queries = registry.add(Histogram(
+    "db_query_duration_seconds", "SQL statement time, requests and background jobs alike"
+))
+google_calls = registry.add(Histogram(
+    "google_api_call_duration_seconds", "Gmail, Calendar and OAuth call latency", ("api", "call", "outcome")
+))
+
+# [statements, seconds] of the request being handled, if any
+_request_db: ContextVar[Optional[list]] = ContextVar("request_db", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    db_queries.observe(elapsed)
+    totals = _request_db.get()
+    if totals is not None:
+        totals[0] += 1
+        totals[1] += elapsed
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute; drop its start time
+    starts = exception_context.connection.info.get("query_start") if exception_context.connection else None
+    if starts:
+        starts.pop()
+
+
+if METRICS_ENABLED:
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine.sync_engine, "handle_error", _handle_error)
+
+
+@contextmanager
+def google_call(api: str, call: str):
+    """Time a blocking Google API call; the outcome label is "ok" or the exception's class"""
+    outcome = "ok"
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as exc:
+        outcome = type(exc).__name__
+        raise
+    finally:
+        google_calls.observe(time.perf_counter() - start, api, call, outcome)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status, in-flight count and SQL use per route"""
+
+    def __init__(self, app: ASGIApp, enabled: bool = METRICS_ENABLED):
+        self.app = app
+        self.enabled = enabled
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.enabled:
+            return await self.app(scope, receive, send)
+
+        status = [500]
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        totals = [0, 0.0]
+        token = _request_db.set(totals)
+        http_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_in_flight.dec()
+            _request_db.reset(token)
+            # The router records the matched route in the scope; unmatched and rejected requests share one label
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "other"
+            method = scope["method"]
+            http_requests.inc(method, path, str(status[0]))
+            http_duration.observe(elapsed, method, path)
+            request_queries.observe(totals[0], method, path)
+            request_db_time.observe(totals[1], method, path)
@@ -0,0 +1,104 @@
+"""initial schema
+
+Matches the tables previously created by Base.metadata.create_all.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+task_status = sa.Enum('PENDING', 'IN_PROGRESS', 'COMPLETED', 'MISSED', name='taskstatus')
+task_priority = sa.Enum('LOW', 'MEDIUM', 'HIGH', 'CRITICAL', name='taskpriority')
+notification_channel = sa.Enum('EMAIL', 'CALENDAR', name='notificationchannel')
+notification_status = sa.Enum('SENT', 'FAILED', name='notificationstatus')
+
+
+def upgrade() -> None:
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('email', sa.String(length=255), nullable=False),
+        sa.Column('hashed_password', sa.String(length=255), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_users_id', 'users', ['id'])
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+
+    op.create_table(
+        'tasks',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(length=255), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('deadline', sa.DateTime(), nullable=False),
+        sa.Column('status', task_status, nullable=False),
+        sa.Column('priority', task_priority, nullable=False),
+        sa.Column('calendar_event_id', sa.String(length=255), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_tasks_id', 'tasks', ['id'])
+    op.create_index('ix_tasks_user_id', 'tasks', ['user_id'])
+    op.create_index('ix_tasks_deadline', 'tasks', ['deadline'])
+    op.create_index('ix_tasks_status', 'tasks', ['status'])
+    op.create_index('ix_tasks_priority', 'tasks', ['priority'])
+
+    op.create_table(
+        'google_tokens',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('access_token', sa.Text(), nullable=False),
+        sa.Column('refresh_token', sa.Text(), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=True),
+        sa.Column('scope', sa.Text(), nullable=True),
+        sa.Column('token_type', sa.String(length=50), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_google_tokens_id', 'google_tokens', ['id'])
+    op.create_index('ix_google_tokens_user_id', 'google_tokens', ['user_id'], unique=True)
+
+    op.create_table(
+        'notifications',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('task_id', sa.Integer(), nullable=False),
+        sa.Column('channel', notification_channel, nullable=False),
+        sa.Column('status', notification_status, nullable=False),
+        sa.Column('sent_at', sa.DateTime(), nullable=False),
+        sa.Column('error_message', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['task_id'], ['tasks.id']),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_notifications_id', 'notifications', ['id'])
+    op.create_index('ix_notifications_user_id', 'notifications', ['user_id'])
+    op.create_index('ix_notifications_task_id', 'notifications', ['task_id'])
+
+
+def downgrade() -> None:
+    op.drop_table('notifications')
+    op.drop_table('google_tokens')
+    op.drop_table('tasks')
+    op.drop_table('users')
+    bind = op.get_bind()
+    for enum in (notification_status, notification_channel, task_priority, task_status):
+        enum.drop(bind, checkfirst=True)
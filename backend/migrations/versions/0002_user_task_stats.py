@@ -0,0 +1,35 @@
+"""user_task_stats counters
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'user_task_stats',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('total_tasks', sa.Integer(), nullable=False),
+        sa.Column('pending_tasks', sa.Integer(), nullable=False),
+        sa.Column('in_progress_tasks', sa.Integer(), nullable=False),
+        sa.Column('completed_tasks', sa.Integer(), nullable=False),
+        sa.Column('missed_tasks', sa.Integer(), nullable=False),
+        sa.Column('completion_hours_sum', sa.Float(), nullable=False),
+        sa.Column('completion_count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id'),
+    )
+    # Rows are created lazily from tasks on first use; see services/task_stats.py
+
+
+def downgrade() -> None:
+    op.drop_table('user_task_stats')
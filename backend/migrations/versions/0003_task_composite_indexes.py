@@ -0,0 +1,36 @@
+"""composite indexes for per-user task queries
+
+Every task listing filters on user_id and then ranges or sorts on deadline
+(optionally with a status filter), and the past-task list sorts on
+coalesce(completed_at, deadline). The (user_id, ...) composites make the
+single-column user_id index redundant.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_tasks_user_deadline', 'tasks', ['user_id', 'deadline'])
+    op.create_index('ix_tasks_user_status_deadline', 'tasks', ['user_id', 'status', 'deadline'])
+    op.create_index(
+        'ix_tasks_user_closed_at', 'tasks',
+        ['user_id', sa.text('coalesce(completed_at, deadline)')],
+    )
+    op.drop_index('ix_tasks_user_id', table_name='tasks')
+
+
+def downgrade() -> None:
+    op.create_index('ix_tasks_user_id', 'tasks', ['user_id'])
+    op.drop_index('ix_tasks_user_closed_at', table_name='tasks')
+    op.drop_index('ix_tasks_user_status_deadline', table_name='tasks')
+    op.drop_index('ix_tasks_user_deadline', table_name='tasks')
@@ -0,0 +1,29 @@
+"""status/deadline index for the reminder scheduler
+
+The scheduler loads reminders due in the next window across all users with
+status IN (pending, in_progress) AND deadline in a range. With only
+single-column indexes SQLite picks the status one and walks every active
+task; (status, deadline) turns it into one range seek per status and makes
+the single-column status index redundant.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 00:00:00
+"""
+from alembic import op
+
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_tasks_status_deadline', 'tasks', ['status', 'deadline'])
+    op.drop_index('ix_tasks_status', table_name='tasks')
+
+
+def downgrade() -> None:
+    op.create_index('ix_tasks_status', 'tasks', ['status'])
+    op.drop_index('ix_tasks_status_deadline', table_name='tasks')
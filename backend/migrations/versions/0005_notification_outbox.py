@@ -0,0 +1,59 @@
+"""notification outbox columns
+
+Notifications are written as PENDING rows and delivered by a background
+worker, so a row now tracks its delivery attempts and when the next one is
+due, and sent_at stays empty until Google accepted it. The
+(status, next_attempt_at) index serves the worker's "due pending rows" scan.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+old_status = sa.Enum('SENT', 'FAILED', name='notificationstatus')
+new_status = sa.Enum('SENT', 'FAILED', 'PENDING', name='notificationstatus')
+
+
+def upgrade() -> None:
+    native_enum = op.get_bind().dialect.name == 'postgresql'
+    if native_enum:
+        op.execute("ALTER TYPE notificationstatus ADD VALUE IF NOT EXISTS 'PENDING'")
+    with op.batch_alter_table('notifications') as batch_op:
+        batch_op.add_column(sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('next_attempt_at', sa.DateTime(), nullable=True))
+        batch_op.alter_column('sent_at', existing_type=sa.DateTime(), nullable=True)
+        if not native_enum:
+            # A VARCHAR sized for the longest name
+            batch_op.alter_column(
+                'status', existing_type=old_status, type_=new_status, existing_nullable=False
+            )
+    op.create_index(
+        'ix_notifications_status_next_attempt', 'notifications', ['status', 'next_attempt_at']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_notifications_status_next_attempt', table_name='notifications')
+    # Undelivered rows cannot be represented without the outbox columns
+    op.execute(
+        "UPDATE notifications SET status = 'FAILED', error_message = 'Not delivered before downgrade' "
+        "WHERE status = 'PENDING'"
+    )
+    op.execute("UPDATE notifications SET sent_at = created_at WHERE sent_at IS NULL")
+    with op.batch_alter_table('notifications') as batch_op:
+        if op.get_bind().dialect.name != 'postgresql':
+            batch_op.alter_column(
+                'status', existing_type=new_status, type_=old_status, existing_nullable=False
+            )
+        batch_op.alter_column('sent_at', existing_type=sa.DateTime(), nullable=False)
+        batch_op.drop_column('next_attempt_at')
+        batch_op.drop_column('attempts')
@@ -0,0 +1,32 @@
+"""calendar sync state on google_tokens, (user_id, updated_at) task index
+
+The calendar sync keeps Google's nextSyncToken and the time of the last
+push per connected user, and pushes only that user's tasks with updated_at
+after it, which the (user_id, updated_at) index turns into a range seek.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('google_tokens') as batch_op:
+        batch_op.add_column(sa.Column('calendar_sync_token', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('calendar_synced_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_tasks_user_updated_at', 'tasks', ['user_id', 'updated_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tasks_user_updated_at', table_name='tasks')
+    with op.batch_alter_table('google_tokens') as batch_op:
+        batch_op.drop_column('calendar_synced_at')
+        batch_op.drop_column('calendar_sync_token')
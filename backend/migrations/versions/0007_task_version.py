@@ -0,0 +1,28 @@
+"""per-user task version on user_task_stats
+
+Task writes bump ``version`` in the same transaction as the change, and the
+task list, analytics and prioritized endpoints derive their ETag from it, so
+a conditional GET is answered from this one row.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('user_task_stats') as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('user_task_stats') as batch_op:
+        batch_op.drop_column('version')
@@ -1,13 +1,34 @@
 from datetime import datetime, timedelta, timezone
 from typing import Optional
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Enum, Text
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Enum, Text, Float, Index, func
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
+from sqlalchemy.types import TypeDecorator
 import enum
 
 Base = declarative_base()
 
 
+class UTCDateTime(TypeDecorator):
+    """DateTime stored as naive UTC and always returned timezone-aware.
+
+    SQLite (and Postgres ``timestamp without time zone``) hand back naive
+    values, which cannot be compared with ``datetime.now(timezone.utc)``.
+    """
+    impl = DateTime
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+    def process_result_value(self, value, dialect):
+        if value is not None and value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value
+
+
 class TaskStatus(str, enum.Enum):
     PENDING = "pending"
     IN_PROGRESS = "in_progress"
@@ -30,8 +51,8 @@ class User(Base):
     email = Column(String(255), unique=True, index=True, nullable=False)
     hashed_password = Column(String(255), nullable=False)
     is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
-    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    created_at = Column(UTCDateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    updated_at = Column(UTCDateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
     # Relationships
     tasks = relationship("Task", back_populates="owner", cascade="all, delete-orphan")
@@ -44,16 +65,16 @@ class Task(Base):
     __tablename__ = "tasks"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     title = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
-    deadline = Column(DateTime, nullable=False, index=True)
-    status = Column(Enum(TaskStatus), default=TaskStatus.PENDING, nullable=False, index=True)
+    deadline = Column(UTCDateTime, nullable=False, index=True)
+    status = Column(Enum(TaskStatus), default=TaskStatus.PENDING, nullable=False)
     priority = Column(Enum(TaskPriority), default=TaskPriority.MEDIUM, nullable=False, index=True)
     calendar_event_id = Column(String(255), nullable=True)
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
-    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
-    completed_at = Column(DateTime, nullable=True)
+    created_at = Column(UTCDateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    updated_at = Column(UTCDateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    completed_at = Column(UTCDateTime, nullable=True)
 
     # Relationships
     owner = relationship("User", back_populates="tasks")
@@ -85,6 +106,31 @@ class Task(Base):
             return -1  # Overdue
 
 
+# Composite indexes for the per-user listings (see migrations/versions/0003)
+Index("ix_tasks_user_deadline", Task.user_id, Task.deadline)
+Index("ix_tasks_user_status_deadline", Task.user_id, Task.status, Task.deadline)
+Index("ix_tasks_user_closed_at", Task.user_id, func.coalesce(Task.completed_at, Task.deadline))
+# Cross-user deadline windows by status, e.g. the reminder scheduler (see 0004)
+Index("ix_tasks_status_deadline", Task.status, Task.deadline)
+# Tasks changed since a user's last calendar sync (see 0006)
+Index("ix_tasks_user_updated_at", Task.user_id, Task.updated_at)
+
+
+class UserTaskStats(Base):
+    """Per-user task counters maintained incrementally by the task write paths"""
+    __tablename__ = "user_task_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    total_tasks = Column(Integer, nullable=False, default=0)
+    pending_tasks = Column(Integer, nullable=False, default=0)
+    in_progress_tasks = Column(Integer, nullable=False, default=0)
+    completed_tasks = Column(Integer, nullable=False, default=0)
+    missed_tasks = Column(Integer, nullable=False, default=0)
+    completion_hours_sum = Column(Float, nullable=False, default=0.0)
+    completion_count = Column(Integer, nullable=False, default=0)
+    version = Column(Integer, nullable=False, default=0, server_default="0")  # bumped by every task write
+
+
 class GoogleToken(Base):
     __tablename__ = "google_tokens"
 
@@ -92,11 +138,13 @@ class GoogleToken(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, unique=True, index=True)
     access_token = Column(Text, nullable=False)
     refresh_token = Column(Text, nullable=True)
-    expires_at = Column(DateTime, nullable=True)
+    expires_at = Column(UTCDateTime, nullable=True)
     scope = Column(Text, nullable=True)
     token_type = Column(String(50), nullable=True)
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
-    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    calendar_sync_token = Column(Text, nullable=True)  # Google's nextSyncToken from the last sync
+    calendar_synced_at = Column(UTCDateTime, nullable=True)  # tasks updated after this are pushed
+    created_at = Column(UTCDateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    updated_at = Column(UTCDateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
     user = relationship("User")
 
@@ -109,6 +157,7 @@ class NotificationChannel(str, enum.Enum):
 class NotificationStatus(str, enum.Enum):
     SENT = "sent"
     FAILED = "failed"
+    PENDING = "pending"  # queued in the outbox, see services/outbox.py
 
 
 class Notification(Base):
@@ -118,10 +167,16 @@ class Notification(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     task_id = Column(Integer, ForeignKey("tasks.id"), nullable=False, index=True)
     channel = Column(Enum(NotificationChannel), nullable=False)
-    status = Column(Enum(NotificationStatus), nullable=False, default=NotificationStatus.SENT)
-    sent_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    status = Column(Enum(NotificationStatus), nullable=False, default=NotificationStatus.PENDING)
+    sent_at = Column(UTCDateTime, nullable=True)  # set once Google accepted it
     error_message = Column(Text, nullable=True)
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    next_attempt_at = Column(UTCDateTime, nullable=True)
+    created_at = Column(UTCDateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
 
     user = relationship("User")
     task = relationship("Task")
+
+
+# Outbox scan for due PENDING rows (see migration 0005)
+Index("ix_notifications_status_next_attempt", Notification.status, Notification.next_attempt_at)
@@ -0,0 +1,242 @@
+"""
+Per-request SQL profiling for development and the test suite.
+
+Endpoints declare how many SQL statements one call may run with
+``@query_budget(n)``. With ``QUERY_PROFILE`` set, every request's
+statements are counted and checked against its endpoint's budget:
+
+- ``report`` (dev mode): overruns, statements slower than ``SLOW_QUERY_MS``
+  (with their EXPLAIN) and statements repeated ``N_PLUS_ONE_THRESHOLD`` times
+  or more in one request (the N+1 shape) are printed as they happen, and a
+  per-endpoint report when the app shuts down.
+- ``strict`` (tests): the same, but a request over its budget raises
+  ``QueryBudgetExceeded`` once it has finished, which fails the test that
+  sent it.
+- ``off`` (default): nothing is hooked in.
+
+Statements outside requests (background jobs) are only checked for
+slowness. ``profile_block(label)`` counts them under a label of their own.
+"""
+
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from database import engine
+
+QUERY_PROFILE = os.getenv("QUERY_PROFILE", "off").lower()  # off | report | strict
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+
+EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+
+class QueryBudgetExceeded(AssertionError):
+    """An endpoint ran more SQL statements than its declared budget"""
+
+
+def query_budget(max_statements: Optional[int]):
+    """Declare the most SQL statements one call of the decorated endpoint may run
+
+    ``None`` declares an endpoint whose count grows with its input (imports,
+    syncs): it is profiled and reported but has no limit.
+    """
+    def decorate(endpoint):
+        endpoint.query_budget = max_statements
+        return endpoint
+    return decorate
+
+
+class _Block:
+    """Statements run by one request or profiled block"""
+
+    __slots__ = ("label", "budget", "count", "seconds", "statements")
+
+    def __init__(self, label: str, budget: Optional[int] = None):
+        self.label = label
+        self.budget = budget
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Counter = Counter()
+
+
+class EndpointStats:
+    __slots__ = ("requests", "statements", "max_statements", "seconds", "budget", "over_budget", "slow", "repeated")
+
+    def __init__(self):
+        self.requests = self.statements = self.max_statements = self.over_budget = self.slow = self.repeated = 0
+        self.seconds = 0.0
+        self.budget: Optional[int] = None
+
+
+class QueryProfiler:
+    def __init__(self, mode: str = QUERY_PROFILE, slow_ms: float = SLOW_QUERY_MS,
+                 repeat_threshold: int = N_PLUS_ONE_THRESHOLD):
+        self.mode = mode
+        self.slow_ms = slow_ms
+        self.repeat_threshold = repeat_threshold
+        self.endpoints: Dict[str, EndpointStats] = {}
+        self.violations: List[str] = []
+        # The request or block being profiled; one variable per profiler so two never count the same block
+        self.current: ContextVar[Optional[_Block]] = ContextVar("query_profile_block", default=None)
+        self._installed = False
+        if mode != "off":
+            self.install()
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    def install(self) -> None:
+        """Hook the cursor events of the app engine (once)"""
+        if not self._installed:
+            event.listen(engine.sync_engine, "before_cursor_execute", self._before_cursor_execute)
+            event.listen(engine.sync_engine, "after_cursor_execute", self._after_cursor_execute)
+            event.listen(engine.sync_engine, "handle_error", self._handle_error)
+            self._installed = True
+
+    def uninstall(self) -> None:
+        if self._installed:
+            event.remove(engine.sync_engine, "before_cursor_execute", self._before_cursor_execute)
+            event.remove(engine.sync_engine, "after_cursor_execute", self._after_cursor_execute)
+            event.remove(engine.sync_engine, "handle_error", self._handle_error)
+            self._installed = False
+
+    def reset(self) -> None:
+        self.endpoints.clear()
+        self.violations.clear()
+
+    # Cursor events
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("profile_start", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["profile_start"].pop()
+        if not self.enabled or conn.info.get("profile_explaining"):
+            return
+        block = self.current.get()
+        if block is not None:
+            block.count += 1
+            block.seconds += elapsed
+            block.statements[statement] += 1
+        if elapsed * 1000 >= self.slow_ms:
+            if block is not None:
+                self._stats(block.label).slow += 1
+            label = block.label if block is not None else "background"
+            print(f"🐢 Slow query ({elapsed * 1000:.1f} ms) in {label}: {' '.join(statement.split())}")
+            if not executemany:
+                for line in self._explain(conn, statement, parameters):
+                    print(f"    {line}")
+
+    def _handle_error(self, exception_context):
+        starts = exception_context.connection.info.get("profile_start") if exception_context.connection else None
+        if starts:
+            starts.pop()
+
+    def _explain(self, conn, statement: str, parameters) -> List[str]:
+        if not statement.lstrip().upper().startswith(EXPLAINABLE):
+            return []
+        prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+        conn.info["profile_explaining"] = True
+        try:
+            cursor = conn.connection.dbapi_connection.cursor()
+            try:
+                cursor.execute(prefix + statement, parameters)
+                return [" ".join(str(column) for column in row) for row in cursor.fetchall()]
+            finally:
+                cursor.close()
+        except Exception as exc:  # a failed EXPLAIN must never fail the request
+            return [f"(EXPLAIN failed: {exc})"]
+        finally:
+            conn.info["profile_explaining"] = False
+
+    # Blocks and requests
+    def _stats(self, label: str) -> EndpointStats:
+        stats = self.endpoints.get(label)
+        if stats is None:
+            stats = self.endpoints[label] = EndpointStats()
+        return stats
+
+    @contextmanager
+    def block(self, label: str, budget: Optional[int] = None):
+        """Count the statements run inside as one call of ``label``"""
+        current = _Block(label, budget)
+        token = self.current.set(current)
+        try:
+            yield current
+        finally:
+            self.current.reset(token)
+            self._finish(current)
+
+    def _finish(self, block: _Block) -> None:
+        stats = self._stats(block.label)
+        stats.requests += 1
+        stats.statements += block.count
+        stats.max_statements = max(stats.max_statements, block.count)
+        stats.seconds += block.seconds
+        stats.budget = block.budget
+        repeated = [(n, statement) for statement, n in block.statements.items() if n >= self.repeat_threshold]
+        for n, statement in repeated:
+            stats.repeated += 1
+            print(f"🔁 Possible N+1 in {block.label}: {n}x {' '.join(statement.split())[:200]}")
+        if block.budget is not None and block.count > block.budget:
+            stats.over_budget += 1
+            message = f"{block.label} ran {block.count} SQL statements, over its budget of {block.budget}"
+            self.violations.append(message)
+            print(f"⚠️  {message}")
+            if self.mode == "strict":
+                raise QueryBudgetExceeded(message)
+
+    def report(self) -> str:
+        """Per-endpoint table: calls, statements per call, SQL time, budget and findings"""
+        lines = [
+            f"{'endpoint':<44} {'calls':>6} {'avg':>6} {'max':>5} {'budget':>6} {'sql ms':>8} "
+            f"{'over':>5} {'slow':>5} {'n+1':>4}"
+        ]
+        for label, stats in sorted(self.endpoints.items(), key=lambda item: -item[1].statements):
+            budget = "-" if stats.budget is None else str(stats.budget)
+            lines.append(
+                f"{label[:44]:<44} {stats.requests:>6} {stats.statements / stats.requests:>6.1f} "
+                f"{stats.max_statements:>5} {budget:>6} {stats.seconds * 1000:>8.1f} "
+                f"{stats.over_budget:>5} {stats.slow:>5} {stats.repeated:>4}"
+            )
+        return "\n".join(lines)
+
+
+query_profiler = QueryProfiler()
+
+
+def profile_block(label: str, budget: Optional[int] = None):
+    return query_profiler.block(label, budget)
+
+
+class QueryProfileMiddleware:
+    """Counts each request's statements against the budget its endpoint declares"""
+
+    def __init__(self, app: ASGIApp, profiler: Optional[QueryProfiler] = None):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        profiler = self.profiler or query_profiler
+        if scope["type"] != "http" or not profiler.enabled:
+            return await self.app(scope, receive, send)
+
+        block = _Block(f"{scope['method']} {scope['path']}")
+        token = profiler.current.set(block)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.current.reset(token)
+            # The route is only known once the router has matched it
+            route = scope.get("route")
+            if route is not None:
+                block.label = f"{scope['method']} {route.path}"
+                block.budget = getattr(getattr(route, "endpoint", None), "query_budget", None)
+        profiler._finish(block)
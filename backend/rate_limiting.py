@@ -0,0 +1,149 @@
+"""
+Token-bucket rate limits for the auth endpoints and task writes.
+
+``RateLimitMiddleware`` checks each request against the buckets in
+``request_limits`` before the app sees it:
+
+- ``POST /api/auth/register|login|refresh``: a bucket per client IP, and
+  for register and login one per email as well, so a credential-stuffing
+  run is stopped before it costs a bcrypt call, whether it comes from one
+  address or targets one account from many.
+- ``POST|PUT|PATCH|DELETE /api/tasks/...``: a bucket per user, taken from the
+  bearer token (requests without a valid token are left to the endpoint's
+  401).
+
+A request over a limit gets ``429`` with ``Retry-After`` (whole seconds until
+a token frees up). Buckets are ``TokenBuckets`` in this process, which drop
+idle keys on their own; with ``CACHE_BACKEND=sqlite|redis`` they are shared
+by all workers instead, and taken in the threadpool. The client IP is
+uvicorn's, which already honours ``X-Forwarded-For`` from the proxies in
+``FORWARDED_ALLOW_IPS``.
+
+``RATE_LIMIT_ENABLED`` is read once, when this module is imported; to turn
+the limits on or off in a running process (in-process tests, say), set
+``request_limits.enabled`` or pass ``RateLimitMiddleware(limits=...)``.
+"""
+
+import json
+import math
+import os
+from typing import Optional
+
+from jose import JWTError, jwt
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from auth import ALGORITHM, SECRET_KEY
+from services.rate_limit import create_token_buckets
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+AUTH_IP_RATE = float(os.getenv("AUTH_IP_RATE", "1"))  # tokens per second
+AUTH_IP_BURST = float(os.getenv("AUTH_IP_BURST", "20"))
+AUTH_EMAIL_RATE = float(os.getenv("AUTH_EMAIL_RATE", "0.1"))
+AUTH_EMAIL_BURST = float(os.getenv("AUTH_EMAIL_BURST", "5"))
+TASK_WRITE_RATE = float(os.getenv("TASK_WRITE_RATE", "10"))
+TASK_WRITE_BURST = float(os.getenv("TASK_WRITE_BURST", "50"))
+
+AUTH_PATHS = {"/api/auth/register", "/api/auth/login", "/api/auth/refresh"}
+EMAIL_PATHS = {"/api/auth/register", "/api/auth/login"}
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+MAX_AUTH_BODY = 64 * 1024  # larger auth bodies are not parsed for an email
+
+
+class RequestLimits:
+    """The limiter's buckets and how many requests each one turned away"""
+
+    def __init__(self, enabled: bool = RATE_LIMIT_ENABLED):
+        self.enabled = enabled
+        self.auth_ip = create_token_buckets(AUTH_IP_RATE, AUTH_IP_BURST, prefix="limit:ip:")
+        self.auth_email = create_token_buckets(AUTH_EMAIL_RATE, AUTH_EMAIL_BURST, prefix="limit:email:")
+        self.task_writes = create_token_buckets(TASK_WRITE_RATE, TASK_WRITE_BURST, prefix="limit:user:")
+        self.limited = {"auth_ip": 0, "auth_email": 0, "task_writes": 0}
+
+    async def take(self, name: str, key) -> float:
+        wait = await getattr(self, name).take_async(key)
+        if wait:
+            self.limited[name] += 1
+        return wait
+
+    def snapshot(self) -> dict:
+        return {"enabled": self.enabled, "limited": dict(self.limited)}
+
+
+request_limits = RequestLimits()
+
+
+def _bearer_user_id(scope: Scope) -> Optional[str]:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer":
+                return None
+            try:
+                return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+            except JWTError:
+                return None
+    return None
+
+
+async def _read_body(receive: Receive):
+    """Read the whole request body; returns it with a receive that replays it to the app"""
+    messages, body = [], b""
+    while True:
+        message = await receive()
+        messages.append(message)
+        if message["type"] != "http.request":
+            break  # client went away
+        body += message.get("body", b"")
+        if not message.get("more_body") or len(body) > MAX_AUTH_BODY:
+            break
+
+    async def replay():
+        return messages.pop(0) if messages else await receive()
+
+    return body, replay
+
+
+def _email(body: bytes) -> Optional[str]:
+    try:
+        email = json.loads(body).get("email")
+    except (ValueError, AttributeError):
+        return None
+    return email.strip().lower() if isinstance(email, str) else None
+
+
+class RateLimitMiddleware:
+    """ASGI middleware answering 429 + Retry-After to requests over their bucket"""
+
+    def __init__(self, app: ASGIApp, limits: Optional[RequestLimits] = None):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        limits = self.limits or request_limits
+        if scope["type"] != "http" or not limits.enabled or scope["method"] not in WRITE_METHODS:
+            return await self.app(scope, receive, send)
+
+        path = scope["path"]
+        wait = 0.0
+        if path in AUTH_PATHS:
+            client = scope.get("client")
+            wait = await limits.take("auth_ip", client[0] if client else "unknown")
+            if not wait and path in EMAIL_PATHS:
+                body, receive = await _read_body(receive)
+                email = _email(body)
+                if email:
+                    wait = await limits.take("auth_email", email)
+        elif path.startswith("/api/tasks"):
+            user_id = _bearer_user_id(scope)
+            if user_id is not None:
+                wait = await limits.take("task_writes", user_id)
+
+        if wait:
+            response = JSONResponse(
+                {"detail": "Too many requests, retry later"},
+                status_code=429,
+                headers={"Retry-After": str(max(1, math.ceil(wait)))},
+            )
+            return await response(scope, receive, send)
+        await self.app(scope, receive, send)
@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from models import User
 from schemas import UserCreate, UserLogin, UserResponse, TokenResponse
 from database import get_db
+from query_profiler import query_budget
 from auth import (
-    hash_password, verify_password, create_access_token,
+    hash_password_async, verify_password_async, create_access_token,
     create_refresh_token, verify_token, get_current_user
 )
 
@@ -12,14 +14,17 @@ router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 
 
 @router.post("/register", response_model=TokenResponse, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+@query_budget(3)
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     """
     Register a new user with email and password.
     
     Returns access token and refresh token upon successful registration.
     """
     # Check if user already exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = (
+        await db.execute(select(User).where(User.email == user_data.email))
+    ).scalars().first()
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -27,7 +32,7 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Create new user
-    hashed_password = hash_password(user_data.password)
+    hashed_password = await hash_password_async(user_data.password)
     new_user = User(
         name=user_data.name,
         email=user_data.email,
@@ -35,12 +40,12 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     
     # Create tokens
-    access_token = create_access_token(data={"sub": new_user.id})
-    refresh_token = create_refresh_token(data={"sub": new_user.id})
+    access_token = create_access_token(data={"sub": str(new_user.id)})
+    refresh_token = create_refresh_token(data={"sub": str(new_user.id)})
     
     return {
         "access_token": access_token,
@@ -50,15 +55,18 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=TokenResponse)
-async def login(credentials: UserLogin, db: Session = Depends(get_db)):
+@query_budget(1)
+async def login(credentials: UserLogin, db: AsyncSession = Depends(get_db)):
     """
     Login with email and password.
     
     Returns access token and user information upon successful login.
     """
-    user = db.query(User).filter(User.email == credentials.email).first()
+    user = (
+        await db.execute(select(User).where(User.email == credentials.email))
+    ).scalars().first()
     
-    if not user or not verify_password(credentials.password, user.hashed_password):
+    if not user or not await verify_password_async(credentials.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
@@ -71,8 +79,8 @@ async def login(credentials: UserLogin, db: Session = Depends(get_db)):
         )
     
     # Create tokens
-    access_token = create_access_token(data={"sub": user.id})
-    refresh_token = create_refresh_token(data={"sub": user.id})
+    access_token = create_access_token(data={"sub": str(user.id)})
+    refresh_token = create_refresh_token(data={"sub": str(user.id)})
     
     return {
         "access_token": access_token,
@@ -82,7 +90,8 @@ async def login(credentials: UserLogin, db: Session = Depends(get_db)):
 
 
 @router.post("/refresh")
-async def refresh_token(refresh_token_str: str, db: Session = Depends(get_db)):
+@query_budget(1)
+async def refresh_token(refresh_token_str: str, db: AsyncSession = Depends(get_db)):
     """
     Refresh access token using refresh token.
     """
@@ -94,8 +103,8 @@ async def refresh_token(refresh_token_str: str, db: Session = Depends(get_db)):
             detail="Invalid token type"
         )
     
-    user_id: int = payload.get("sub")
-    user = db.query(User).filter(User.id == user_id).first()
+    user_id = payload.get("sub")
+    user = await db.get(User, int(user_id)) if user_id is not None else None
     
     if not user or not user.is_active:
         raise HTTPException(
@@ -104,7 +113,7 @@ async def refresh_token(refresh_token_str: str, db: Session = Depends(get_db)):
         )
     
     # Create new access token
-    access_token = create_access_token(data={"sub": user.id})
+    access_token = create_access_token(data={"sub": str(user.id)})
     
     return {
         "access_token": access_token,
@@ -113,6 +122,7 @@ async def refresh_token(refresh_token_str: str, db: Session = Depends(get_db)):
 
 
 @router.get("/me", response_model=UserResponse)
+@query_budget(1)
 async def get_current_user_info(current_user: User = Depends(get_current_user)):
     """
     Get current logged-in user information.
@@ -121,6 +131,7 @@ async def get_current_user_info(current_user: User = Depends(get_current_user)):
 
 
 @router.post("/logout")
+@query_budget(1)
 async def logout(current_user: User = Depends(get_current_user)):
     """
     Logout endpoint (client should discard tokens).
@@ -1,8 +1,18 @@
+import base64
+import json
+import os
+import time
+import zlib
 from datetime import datetime, timezone, timedelta
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from typing import List, Optional, Sequence
+
+import orjson
+from fastapi import APIRouter, Depends, File, Header, HTTPException, status, Query, Request, Response, UploadFile
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from googleapiclient.errors import HttpError
+from pydantic import ValidationError
+from sqlalchemy import and_, delete, func, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from models import (
     User,
     Task,
@@ -11,20 +21,64 @@ from models import (
     GoogleToken,
     Notification,
     NotificationChannel,
-    NotificationStatus,
 )
 from schemas import (
     TaskCreate, TaskUpdate, TaskResponse, TaskDetailedResponse,
-    TaskAnalytics, PrioritizedTasksResponse, GoogleTokenUpsert, NotificationResponse,
+    TaskAnalytics, PrioritizedTasksResponse, GoogleTokenUpsert, NotificationResponse, NotificationDetail,
+    CalendarSyncResponse,
+    TaskBulkCreate, TaskBulkUpdate, TaskBulkUpdateItem, TaskBulkDelete, TaskBulkCalendar,
+    TaskBulkItemResult, TaskBulkResponse, TaskImportResult,
 )
-from database import get_db
+from database import SessionLocal, get_db
+from query_profiler import query_budget
 from auth import get_current_user
-from services.google_integration import send_gmail_deadline, upsert_calendar_event
+from services.calendar_sync import sync_user_calendar
+from services.outbox import notification_outbox, queue_notification, queue_notifications
+from services.task_stats import (
+    TaskStatsSnapshot, apply_task_change, apply_task_changes, read_task_analytics, read_task_version,
+)
+from services.reminders import reminder_scheduler
+from services.task_events import stream_task_events, task_events, task_payload
+from services.task_transfer import (
+    MEDIA_TYPES, TransferFormat, import_task_file, stream_task_export, validation_message,
+)
+from services.priority_scoring import (
+    encode_columns, encode_tasks, rank_columns, score_columns, top_k_columns,
+)
 
 router = APIRouter(prefix="/api/tasks", tags=["Tasks"])
 
+# Pagination
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+MAX_PAGE_SIZE = 500
+
+# Conditional GET: ETags last this long even without task writes, because
+# time_remaining, scores and overdue counts drift with the clock
+TASK_ETAG_WINDOW_SECONDS = float(os.getenv("TASK_ETAG_WINDOW_SECONDS", "60"))
+TASK_CACHE_CONTROL = "private, no-cache"  # browsers keep the body but revalidate each time
+CACHE_HEADERS = ("ETag", "Cache-Control", "Vary")
+
+# Response fields computed from deadline/status/priority rather than stored
+DERIVED_FIELDS = {"time_remaining", "is_overdue", "hours_until_deadline", "priority_score", "urgency_level"}
+
+# Stored columns of a full task response, in TaskDetailedResponse field order
+TASK_COLUMNS = [c for c in Task.__table__.columns if c.name in TaskDetailedResponse.model_fields]
+
+
+class TaskJSONResponse(ORJSONResponse):
+    """
+    orjson encoding for task dicts, byte-compatible with the response models'
+    JSON (enums as values, UTC datetimes ending in "Z").
+
+    Endpoints that return it keep their ``response_model`` for the OpenAPI
+    schema; FastAPI does not re-validate a returned Response.
+    """
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+
 
-def calculate_priority_score(task: Task) -> float:
+def calculate_priority_score(task: Task, now: Optional[datetime] = None) -> float:
     """
     Calculate priority score for a task (0-100).
     
@@ -32,8 +86,12 @@ def calculate_priority_score(task: Task) -> float:
     - Time remaining (more urgent = higher score)
     - Task priority level
     - Status
+    
+    This is the per-task reference; services.priority_scoring scores many
+    tasks at once with identical results.
     """
-    now = datetime.now(timezone.utc)
+    if now is None:
+        now = datetime.now(timezone.utc)
     base_priority = {
         TaskPriority.LOW: 20,
         TaskPriority.MEDIUM: 50,
@@ -51,7 +109,7 @@ def calculate_priority_score(task: Task) -> float:
         score *= 0.05
     
     # Boost score based on urgency (time remaining)
-    time_remaining = task.time_remaining
+    time_remaining = task.deadline - now if task.deadline > now else None
     if time_remaining:
         hours_left = time_remaining.total_seconds() / 3600
         if hours_left < 1:  # Less than 1 hour
@@ -79,9 +137,10 @@ def get_urgency_level(score: float) -> str:
         return "LOW"
 
 
-def task_to_detailed_response(task: Task) -> TaskDetailedResponse:
+def task_to_detailed_response(task: Task, score: Optional[float] = None) -> TaskDetailedResponse:
     """Convert Task model to detailed response with calculations"""
-    score = calculate_priority_score(task)
+    if score is None:
+        score = calculate_priority_score(task)
     return TaskDetailedResponse(
         id=task.id,
         user_id=task.user_id,
@@ -102,11 +161,220 @@ def task_to_detailed_response(task: Task) -> TaskDetailedResponse:
     )
 
 
+def task_rows_to_dicts(
+    rows: Sequence, scores: Optional[Sequence[float]] = None, now: Optional[datetime] = None
+) -> List[dict]:
+    """
+    Full task response dicts straight from ``select(*TASK_COLUMNS)`` rows.
+
+    Same values as ``task_to_detailed_response``, without an ORM object and a
+    validated model per task; scores are computed in one NumPy pass against a
+    single ``now`` unless given.
+    """
+    now = now or datetime.now(timezone.utc)
+    if scores is None:
+        scores = score_columns(encode_tasks(rows), now).tolist()
+    items = []
+    for row, score in zip(rows, scores):
+        item = row._asdict()
+        remaining = item["deadline"] - now
+        if remaining > timedelta(0):
+            item["time_remaining"] = item["hours_until_deadline"] = remaining.total_seconds() / 3600
+        else:
+            item["time_remaining"], item["hours_until_deadline"] = 0.0, -1.0
+        item["is_overdue"] = remaining < timedelta(0) and item["status"] != TaskStatus.COMPLETED
+        item["priority_score"] = score
+        item["urgency_level"] = get_urgency_level(score)
+        items.append(item)
+    return items
+
+
+def _encode_cursor(deadline: datetime, task_id: int) -> str:
+    raw = json.dumps([deadline.isoformat(), task_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: Optional[str]) -> Optional[tuple[datetime, int]]:
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        deadline_iso, task_id = json.loads(raw)
+        return datetime.fromisoformat(deadline_iso), int(task_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def _parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Validate a comma-separated ``fields=`` projection against the response schema"""
+    if not fields:
+        return None
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in TaskDetailedResponse.model_fields]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}"
+        )
+    return requested
+
+
+def _project_task(task: Task, fields: List[str]) -> dict:
+    """Build a response dict holding only the requested fields"""
+    item = {}
+    score = None
+    for field in fields:
+        if field not in DERIVED_FIELDS:
+            item[field] = getattr(task, field)
+        elif field in ("priority_score", "urgency_level"):
+            if score is None:
+                score = calculate_priority_score(task)
+            item[field] = score if field == "priority_score" else get_urgency_level(score)
+        elif field == "time_remaining":
+            item[field] = task.hours_until_deadline if task.time_remaining else 0
+        else:
+            item[field] = getattr(task, field)
+    return item
+
+
+async def _fetch_task_page(
+    db: AsyncSession,
+    filters: list,
+    *,
+    after: Optional[tuple[datetime, int]],
+    limit: Optional[int],
+    fields: Optional[List[str]],
+    descending: bool = False,
+):
+    """
+    Run a task listing with keyset pagination on (deadline, id).
+
+    ``after`` is the decoded cursor (``_decode_cursor``), validated by the
+    caller before any other work. Only the columns needed for ``fields``
+    are selected when a projection is given. Returns the page items and the
+    cursor for the next page, if any.
+    """
+    if fields is None:
+        query = select(*TASK_COLUMNS)
+    else:
+        needed = {"id", "deadline"} | {f for f in fields if f not in DERIVED_FIELDS}
+        if DERIVED_FIELDS.intersection(fields):
+            needed |= {"status", "priority"}
+        query = select(*[c for c in Task.__table__.columns if c.name in needed])
+
+    query = query.where(*filters)
+    if after is not None:
+        after_deadline, after_id = after
+        if descending:
+            query = query.where(or_(
+                Task.deadline < after_deadline,
+                and_(Task.deadline == after_deadline, Task.id < after_id),
+            ))
+        else:
+            query = query.where(or_(
+                Task.deadline > after_deadline,
+                and_(Task.deadline == after_deadline, Task.id > after_id),
+            ))
+    if descending:
+        query = query.order_by(Task.deadline.desc(), Task.id.desc())
+    else:
+        query = query.order_by(Task.deadline.asc(), Task.id.asc())
+    if limit:
+        query = query.limit(limit + 1)
+
+    result = await db.execute(query)
+    if fields is None:
+        tasks = result.all()
+    else:
+        # Transient instances so the Task properties work on the projected columns
+        tasks = [Task(**row._mapping) for row in result.all()]
+
+    next_cursor = None
+    if limit and len(tasks) > limit:
+        tasks = tasks[:limit]
+        next_cursor = _encode_cursor(tasks[-1].deadline, tasks[-1].id)
+
+    if fields is None:
+        return task_rows_to_dicts(tasks), next_cursor
+    return [_project_task(t, fields) for t in tasks], next_cursor
+
+
+def _cache_headers(response: Response) -> dict:
+    """The ETag headers set on FastAPI's sub-response, for endpoints returning their own Response"""
+    return {name: response.headers[name] for name in CACHE_HEADERS if name in response.headers}
+
+
+def _page_response(items: list, next_cursor: Optional[str], response: Response) -> TaskJSONResponse:
+    """Encode a page of task dicts, keeping the cache headers and adding the next-page cursor"""
+    headers = _cache_headers(response)
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    return TaskJSONResponse(items, headers=headers)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against our ETag"""
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag.removeprefix("W/") in candidates
+
+
+async def _not_modified(
+    request: Request, response: Response, db: AsyncSession, user_id: int
+) -> Optional[Response]:
+    """
+    Tag the response with a weak ETag from the user's task version; if the
+    client already has it, return the 304 to send instead.
+
+    The version is one primary-key read on user_task_stats, so a matching
+    poll never touches the tasks table. The ETag also covers the query
+    string and the current TASK_ETAG_WINDOW_SECONDS window.
+    """
+    version = await read_task_version(db, user_id)
+    window = int(time.time() // TASK_ETAG_WINDOW_SECONDS)
+    query = zlib.crc32(request.url.query.encode())
+    etag = f'W/"{user_id}.{version}.{window}.{query:x}"'
+    headers = {"ETag": etag, "Cache-Control": TASK_CACHE_CONTROL, "Vary": "Authorization"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+def _apply_task_update(task: Task, task_update: TaskUpdate, now: datetime) -> None:
+    """Copy the provided fields of ``task_update`` onto ``task``"""
+    if task_update.title is not None:
+        task.title = task_update.title
+    if task_update.description is not None:
+        task.description = task_update.description
+    if task_update.deadline is not None:
+        task.deadline = task_update.deadline
+    if task_update.priority is not None:
+        task.priority = task_update.priority
+    if task_update.status is not None:
+        task.status = task_update.status
+        # Set completed_at when task is marked complete
+        if task_update.status == TaskStatus.COMPLETED:
+            task.completed_at = now
+        elif task_update.status == TaskStatus.MISSED:
+            task.completed_at = now
+
+    task.updated_at = now
+
+
+def _bulk_response(results: List[TaskBulkItemResult]) -> TaskBulkResponse:
+    results.sort(key=lambda result: result.index)
+    succeeded = sum(1 for result in results if result.status < 400)
+    return TaskBulkResponse(succeeded=succeeded, failed=len(results) - succeeded, results=results)
+
+
 @router.post("/", response_model=TaskDetailedResponse, status_code=status.HTTP_201_CREATED)
+@query_budget(7)
 async def create_task(
     task_data: TaskCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Create a new task for the current user.
@@ -123,53 +391,327 @@ async def create_task(
     )
     
     db.add(new_task)
-    db.commit()
-    db.refresh(new_task)
+    await apply_task_change(db, current_user.id, None, TaskStatsSnapshot.of(new_task))
+    await db.commit()
+    await db.refresh(new_task)
+    reminder_scheduler.task_changed(new_task)
+    await task_events.publish(current_user.id, "created", task_payload(new_task))
     
     return task_to_detailed_response(new_task)
 
 
+# --- Bulk operations ---
+# Declared before the /{task_id} routes so "bulk" is not parsed as a task id.
+
+
+@router.post("/bulk", response_model=TaskBulkResponse)
+@query_budget(6)
+async def bulk_create_tasks(
+    payload: TaskBulkCreate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Create up to MAX_BULK_ITEMS tasks in one transaction.
+
+    Each item is validated against TaskCreate on its own; invalid items are
+    reported with status 422 and the rest are inserted with a single
+    multi-row INSERT ... RETURNING.
+    """
+    results, rows, row_indexes = [], [], []
+    now = datetime.now(timezone.utc)
+    for index, item in enumerate(payload.items):
+        try:
+            task_data = TaskCreate.model_validate(item)
+        except ValidationError as exc:
+            results.append(TaskBulkItemResult(index=index, status=422, error=validation_message(exc)))
+            continue
+        rows.append({
+            "user_id": current_user.id,
+            "title": task_data.title,
+            "description": task_data.description,
+            "deadline": task_data.deadline,
+            "priority": task_data.priority,
+            "status": TaskStatus.PENDING,
+            "created_at": now,
+            "updated_at": now,
+        })
+        row_indexes.append(index)
+
+    if rows:
+        created = TaskStatsSnapshot(TaskStatus.PENDING, None)
+        await apply_task_changes(db, current_user.id, [(None, created)] * len(rows))
+        # One multi-row INSERT ... RETURNING on the Core table: the ORM bulk path
+        # splits the batch whenever the pattern of NULL columns changes between
+        # rows, and sort_by_parameter_order falls back to one INSERT per row on
+        # SQLite. RETURNING order is unspecified, but ids are allocated in VALUES
+        # order, so sorting by id lines tasks up with rows.
+        returned = await db.execute(insert(Task.__table__).returning(*Task.__table__.c), rows)
+        tasks = sorted((Task(**row._mapping) for row in returned), key=lambda task: task.id)
+        await db.commit()
+        for index, task in zip(row_indexes, tasks):
+            reminder_scheduler.task_changed(task)
+            await task_events.publish(current_user.id, "created", task_payload(task))
+            results.append(TaskBulkItemResult(
+                index=index, status=201, id=task.id, task=task_to_detailed_response(task)
+            ))
+
+    return _bulk_response(results)
+
+
+@router.patch("/bulk", response_model=TaskBulkResponse)
+@query_budget(5)
+async def bulk_update_tasks(
+    payload: TaskBulkUpdate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Update up to MAX_BULK_ITEMS tasks in one transaction.
+
+    Items are TaskUpdate objects with an ``id``; the tasks are loaded with one
+    query and written back together on commit. Unknown ids get status 404.
+    """
+    results, updates = [], []
+    for index, item in enumerate(payload.items):
+        try:
+            updates.append((index, TaskBulkUpdateItem.model_validate(item)))
+        except ValidationError as exc:
+            results.append(TaskBulkItemResult(index=index, status=422, error=validation_message(exc)))
+
+    if updates:
+        task_ids = {task_update.id for _, task_update in updates}
+        tasks = {
+            task.id: task
+            for task in (await db.execute(
+                select(Task).where(Task.user_id == current_user.id, Task.id.in_(task_ids))
+            )).scalars()
+        }
+        now = datetime.now(timezone.utc)
+        changes, updated = [], []
+        for index, task_update in updates:
+            task = tasks.get(task_update.id)
+            if task is None:
+                results.append(TaskBulkItemResult(
+                    index=index, status=404, id=task_update.id, error="Task not found"
+                ))
+                continue
+            before = TaskStatsSnapshot.of(task)
+            _apply_task_update(task, task_update, now)
+            changes.append((before, TaskStatsSnapshot.of(task)))
+            updated.append((index, task))
+
+        if updated:
+            # Only bump the version (and so the ETags) when a task actually changed
+            await apply_task_changes(db, current_user.id, changes)
+            await db.commit()
+        for index, task in updated:
+            reminder_scheduler.task_changed(task)
+            await task_events.publish(current_user.id, "updated", task_payload(task))
+            results.append(TaskBulkItemResult(
+                index=index, status=200, id=task.id, task=task_to_detailed_response(task)
+            ))
+
+    return _bulk_response(results)
+
+
+@router.delete("/bulk", response_model=TaskBulkResponse)
+@query_budget(5)
+async def bulk_delete_tasks(
+    payload: TaskBulkDelete,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Delete up to MAX_BULK_ITEMS tasks with a single DELETE; unknown ids get status 404"""
+    tasks = {
+        task.id: task
+        for task in (await db.execute(
+            select(Task).where(Task.user_id == current_user.id, Task.id.in_(set(payload.ids)))
+        )).scalars()
+    }
+    results, changes, deleted = [], [], set()
+    for index, task_id in enumerate(payload.ids):
+        if task_id not in tasks or task_id in deleted:
+            results.append(TaskBulkItemResult(index=index, status=404, id=task_id, error="Task not found"))
+            continue
+        deleted.add(task_id)
+        changes.append((TaskStatsSnapshot.of(tasks[task_id]), None))
+        results.append(TaskBulkItemResult(index=index, status=204, id=task_id))
+
+    if deleted:
+        await apply_task_changes(db, current_user.id, changes)
+        await db.execute(
+            delete(Task).where(Task.user_id == current_user.id, Task.id.in_(deleted))
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        for task_id in deleted:
+            reminder_scheduler.task_removed(task_id)
+            await task_events.publish(current_user.id, "deleted", {"id": task_id})
+
+    return _bulk_response(results)
+
+
+@router.post("/bulk/calendar", response_model=TaskBulkResponse)
+@query_budget(5)
+async def bulk_upsert_task_calendar(
+    payload: TaskBulkCalendar,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Queue Google Calendar upserts for up to MAX_BULK_ITEMS tasks.
+
+    Queued tasks get status 202; the outbox sends them as Calendar batch
+    requests (GOOGLE_BATCH_SIZE per HTTP request).
+    """
+    await _get_google_token(current_user, db)
+    found = set((await db.execute(
+        select(Task.id).where(Task.user_id == current_user.id, Task.id.in_(set(payload.ids)))
+    )).scalars())
+    results, queued = [], []
+    for index, task_id in enumerate(payload.ids):
+        if task_id not in found:
+            results.append(TaskBulkItemResult(index=index, status=404, id=task_id, error="Task not found"))
+            continue
+        queued.append(task_id)
+        results.append(TaskBulkItemResult(index=index, status=202, id=task_id))
+    if queued:
+        await queue_notifications(db, current_user.id, queued, NotificationChannel.CALENDAR)
+        await db.commit()
+        notification_outbox.wake()
+    return _bulk_response(results)
+
+
+# --- Export / import ---
+
+
+@router.get("/export")
+@query_budget(2)
+async def export_tasks(
+    export_format: TransferFormat = Query(TransferFormat.NDJSON, alias="format"),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Download all of the user's tasks as NDJSON (default) or CSV.
+
+    Rows are streamed from a server-side cursor, so memory use does not grow
+    with the number of tasks.
+    """
+    filename = f"tasks-{datetime.now(timezone.utc):%Y%m%d}.{export_format.value}"
+    return StreamingResponse(
+        stream_task_export(SessionLocal, current_user.id, export_format),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.post("/import", response_model=TaskImportResult)
+# One batch of IMPORT_BATCH_SIZE rows costs a few statements; the count grows with the file
+@query_budget(None)
+async def import_tasks(
+    file: UploadFile = File(..., description="NDJSON or CSV file in the export format"),
+    import_format: Optional[TransferFormat] = Query(
+        None, alias="format", description="Defaults to csv for *.csv uploads, else ndjson"
+    ),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Import tasks from a file produced by /export (or written by hand).
+
+    The file is parsed incrementally and inserted in batches; invalid rows
+    are skipped and reported with their line numbers.
+    """
+    if import_format is None:
+        is_csv = (file.filename or "").lower().endswith(".csv")
+        import_format = TransferFormat.CSV if is_csv else TransferFormat.NDJSON
+    result = await import_task_file(db, current_user.id, file.file, import_format)
+    if result.imported:
+        await reminder_scheduler.refresh()
+        await task_events.publish(current_user.id, "reset", None)
+    return result
+
+
+@router.get("/stream")
+@query_budget(1)
+async def stream_task_changes(
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Server-sent events with the user's task changes, instead of polling the list.
+
+    Events are ``created`` / ``updated`` (data: the task's columns),
+    ``deleted`` (data: ``{"id"}``) and ``reset`` (reload the list). Send the
+    last received id as ``Last-Event-ID`` when reconnecting to get the
+    events missed in between. A comment line is sent every
+    TASK_STREAM_HEARTBEAT_SECONDS while idle.
+    """
+    # The stream outlives the request's dependencies; do not hold a pooled connection
+    await db.close()
+    return StreamingResponse(
+        stream_task_events(task_events, current_user.id, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/upcoming", response_model=List[TaskDetailedResponse])
+@query_budget(2)
 async def get_upcoming_tasks(
+    response: Response,
     days: int = Query(30, ge=1, le=365, description="Days ahead to include"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     now = datetime.now(timezone.utc)
     cutoff = now + timedelta(days=days)
-    tasks = (
-        db.query(Task)
-        .filter(Task.user_id == current_user.id)
-        .filter(Task.deadline >= now)
-        .filter(Task.deadline <= cutoff)
-        .order_by(Task.deadline.asc())
-        .all()
+    projection = _parse_fields(fields)
+    items, next_cursor = await _fetch_task_page(
+        db,
+        [Task.user_id == current_user.id, Task.deadline >= now, Task.deadline <= cutoff],
+        after=_decode_cursor(cursor), limit=limit, fields=projection,
     )
-    return [task_to_detailed_response(t) for t in tasks]
+    return _page_response(items, next_cursor, response)
 
 
 @router.get("/past", response_model=List[TaskDetailedResponse])
+@query_budget(2)
 async def get_past_tasks(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     now = datetime.now(timezone.utc)
-    tasks = (
-        db.query(Task)
-        .filter(Task.user_id == current_user.id)
-        .filter(Task.deadline < now)
-        .order_by(Task.deadline.desc())
-        .all()
+    projection = _parse_fields(fields)
+    items, next_cursor = await _fetch_task_page(
+        db,
+        [Task.user_id == current_user.id, Task.deadline < now],
+        after=_decode_cursor(cursor), limit=limit, fields=projection, descending=True,
     )
-    return [task_to_detailed_response(t) for t in tasks]
+    return _page_response(items, next_cursor, response)
 
 
 @router.get("/", response_model=List[TaskDetailedResponse])
+@query_budget(3)
 async def get_all_tasks(
+    request: Request,
+    response: Response,
     status_filter: TaskStatus = Query(None, description="Filter by status"),
     priority_filter: TaskPriority = Query(None, description="Filter by priority"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get all tasks for the current user.
@@ -177,28 +719,42 @@ async def get_all_tasks(
     Optional filters:
     - status: pending, in_progress, completed, missed
     - priority: low, medium, high, critical
+    
+    Pagination: pass `limit` to page through results ordered by deadline;
+    the cursor for the next page is returned in the `X-Next-Cursor` header.
+    `fields` restricts both the selected columns and the returned keys.
+    Supports conditional requests (ETag / If-None-Match).
     """
-    query = db.query(Task).filter(Task.user_id == current_user.id)
+    # A malformed request gets its 400 even when the ETag would match
+    projection = _parse_fields(fields)
+    after = _decode_cursor(cursor)
+    not_modified = await _not_modified(request, response, db, current_user.id)
+    if not_modified is not None:
+        return not_modified
+    filters = [Task.user_id == current_user.id]
     
     if status_filter:
-        query = query.filter(Task.status == status_filter)
+        filters.append(Task.status == status_filter)
     if priority_filter:
-        query = query.filter(Task.priority == priority_filter)
+        filters.append(Task.priority == priority_filter)
     
-    tasks = query.order_by(Task.deadline).all()
-    return [task_to_detailed_response(task) for task in tasks]
+    items, next_cursor = await _fetch_task_page(
+        db, filters, after=after, limit=limit, fields=projection
+    )
+    return _page_response(items, next_cursor, response)
 
 
 @router.get("/{task_id}", response_model=TaskDetailedResponse)
+@query_budget(2)
 async def get_task(
     task_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get a specific task by ID (only accessible to owner)"""
-    task = db.query(Task).filter(
-        and_(Task.id == task_id, Task.user_id == current_user.id)
-    ).first()
+    task = (await db.execute(
+        select(Task).where(and_(Task.id == task_id, Task.user_id == current_user.id))
+    )).scalars().first()
     
     if not task:
         raise HTTPException(
@@ -210,20 +766,21 @@ async def get_task(
 
 
 @router.put("/{task_id}", response_model=TaskDetailedResponse)
+@query_budget(6)
 async def update_task(
     task_id: int,
     task_update: TaskUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Update a task (only accessible to owner).
     
     If status is changed to 'completed', completed_at is automatically set.
     """
-    task = db.query(Task).filter(
-        and_(Task.id == task_id, Task.user_id == current_user.id)
-    ).first()
+    task = (await db.execute(
+        select(Task).where(and_(Task.id == task_id, Task.user_id == current_user.id))
+    )).scalars().first()
     
     if not task:
         raise HTTPException(
@@ -231,40 +788,28 @@ async def update_task(
             detail="Task not found"
         )
     
-    # Update fields
-    if task_update.title is not None:
-        task.title = task_update.title
-    if task_update.description is not None:
-        task.description = task_update.description
-    if task_update.deadline is not None:
-        task.deadline = task_update.deadline
-    if task_update.priority is not None:
-        task.priority = task_update.priority
-    if task_update.status is not None:
-        task.status = task_update.status
-        # Set completed_at when task is marked complete
-        if task_update.status == TaskStatus.COMPLETED:
-            task.completed_at = datetime.now(timezone.utc)
-        elif task_update.status == TaskStatus.MISSED:
-            task.completed_at = datetime.now(timezone.utc)
-    
-    task.updated_at = datetime.now(timezone.utc)
-    db.commit()
-    db.refresh(task)
+    before = TaskStatsSnapshot.of(task)
+    _apply_task_update(task, task_update, datetime.now(timezone.utc))
+    await apply_task_change(db, current_user.id, before, TaskStatsSnapshot.of(task))
+    await db.commit()
+    await db.refresh(task)
+    reminder_scheduler.task_changed(task)
+    await task_events.publish(current_user.id, "updated", task_payload(task))
     
     return task_to_detailed_response(task)
 
 
 @router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
+@query_budget(5)
 async def delete_task(
     task_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete a task (only accessible to owner)"""
-    task = db.query(Task).filter(
-        and_(Task.id == task_id, Task.user_id == current_user.id)
-    ).first()
+    task = (await db.execute(
+        select(Task).where(and_(Task.id == task_id, Task.user_id == current_user.id))
+    )).scalars().first()
     
     if not task:
         raise HTTPException(
@@ -272,8 +817,11 @@ async def delete_task(
             detail="Task not found"
         )
     
-    db.delete(task)
-    db.commit()
+    await apply_task_change(db, current_user.id, TaskStatsSnapshot.of(task), None)
+    await db.delete(task)
+    await db.commit()
+    reminder_scheduler.task_removed(task_id)
+    await task_events.publish(current_user.id, "deleted", {"id": task_id})
     return None
 
 
@@ -281,12 +829,15 @@ async def delete_task(
 
 
 @router.post("/google/tokens", response_model=GoogleTokenUpsert)
+@query_budget(3)
 async def upsert_google_tokens(
     payload: GoogleTokenUpsert,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    token = db.query(GoogleToken).filter(GoogleToken.user_id == current_user.id).first()
+    token = (await db.execute(
+        select(GoogleToken).where(GoogleToken.user_id == current_user.id)
+    )).scalars().first()
     if token:
         token.access_token = payload.access_token
         token.refresh_token = payload.refresh_token
@@ -303,123 +854,137 @@ async def upsert_google_tokens(
             token_type=payload.token_type,
         )
         db.add(token)
-    db.commit()
+    await db.commit()
     return payload
 
 
-def _get_task_for_user(task_id: int, user: User, db: Session) -> Task:
-    task = db.query(Task).filter(and_(Task.id == task_id, Task.user_id == user.id)).first()
+async def _get_task_for_user(task_id: int, user: User, db: AsyncSession) -> Task:
+    task = (await db.execute(
+        select(Task).where(and_(Task.id == task_id, Task.user_id == user.id))
+    )).scalars().first()
     if not task:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
     return task
 
 
-def _get_google_token(user: User, db: Session) -> GoogleToken:
-    token = db.query(GoogleToken).filter(GoogleToken.user_id == user.id).first()
+async def _get_google_token(user: User, db: AsyncSession) -> GoogleToken:
+    token = (await db.execute(
+        select(GoogleToken).where(GoogleToken.user_id == user.id)
+    )).scalars().first()
     if not token:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Google token not found for user")
     return token
 
 
-@router.post("/{task_id}/notify/email", response_model=NotificationResponse)
+@router.post(
+    "/{task_id}/notify/email", response_model=NotificationResponse, status_code=status.HTTP_202_ACCEPTED
+)
+@query_budget(4)
 async def notify_via_email(
     task_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    task = _get_task_for_user(task_id, current_user, db)
-    token = _get_google_token(current_user, db)
-    message_id = send_gmail_deadline(current_user, task, token)
-    notification = Notification(
-        user_id=current_user.id,
-        task_id=task.id,
-        channel=NotificationChannel.EMAIL,
-        status=NotificationStatus.SENT,
-        error_message=None,
-    )
-    db.add(notification)
-    db.commit()
-    return NotificationResponse(channel="email", status="sent", message_id=message_id)
+    """Queue a deadline reminder email; the outbox sends it (see GET /{task_id}/notifications)"""
+    task = await _get_task_for_user(task_id, current_user, db)
+    await _get_google_token(current_user, db)
+    notification = queue_notification(db, current_user.id, task.id, NotificationChannel.EMAIL)
+    await db.commit()
+    notification_outbox.wake()
+    return NotificationResponse(channel="email", status="pending", notification_id=notification.id)
 
 
-@router.post("/{task_id}/calendar", response_model=NotificationResponse)
+@router.post(
+    "/{task_id}/calendar", response_model=NotificationResponse, status_code=status.HTTP_202_ACCEPTED
+)
+@query_budget(4)
 async def upsert_task_calendar(
     task_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    task = _get_task_for_user(task_id, current_user, db)
-    token = _get_google_token(current_user, db)
-    event_id = upsert_calendar_event(current_user, task, token, task.calendar_event_id)
-    task.calendar_event_id = event_id
-    notification = Notification(
-        user_id=current_user.id,
-        task_id=task.id,
-        channel=NotificationChannel.CALENDAR,
-        status=NotificationStatus.SENT,
-        error_message=None,
+    """Queue creating or updating the task's Google Calendar event"""
+    task = await _get_task_for_user(task_id, current_user, db)
+    await _get_google_token(current_user, db)
+    notification = queue_notification(db, current_user.id, task.id, NotificationChannel.CALENDAR)
+    await db.commit()
+    notification_outbox.wake()
+    return NotificationResponse(
+        channel="calendar", status="pending", notification_id=notification.id,
+        calendar_event_id=task.calendar_event_id,
     )
-    db.add(notification)
-    db.commit()
-    return NotificationResponse(channel="calendar", status="sent", calendar_event_id=event_id)
+
+
+@router.post("/google/calendar/sync", response_model=CalendarSyncResponse)
+# Grows with the changed events (MATCH_CHUNK_SIZE per lookup) and the tasks pushed
+@query_budget(None)
+async def sync_google_calendar(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Sync tasks with the user's primary Google Calendar now.
+
+    Pulls events changed since the last sync and pushes tasks updated since
+    then (see services/calendar_sync.py); the background syncer does the same
+    every CALENDAR_SYNC_INTERVAL_SECONDS.
+    """
+    token = await _get_google_token(current_user, db)
+    try:
+        result = await sync_user_calendar(db, current_user, token)
+    except HttpError as exc:
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"Google Calendar sync failed: {exc}")
+    return CalendarSyncResponse(**result._asdict())
+
+
+@router.get("/{task_id}/notifications", response_model=List[NotificationDetail])
+@query_budget(3)
+async def list_task_notifications(
+    task_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Delivery state of the task's notifications, newest first"""
+    task = await _get_task_for_user(task_id, current_user, db)
+    return (await db.execute(
+        select(Notification).where(Notification.task_id == task.id)
+        .order_by(Notification.id.desc())
+    )).scalars().all()
 
 
 @router.get("/analytics/dashboard", response_model=TaskAnalytics)
+@query_budget(5)
 async def get_task_analytics(
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get comprehensive task analytics for the current user.
     
     Includes completion rate, overdue count, and average completion time.
+    Counts come from the materialized user_task_stats row; only overdue and
+    upcoming are computed live. Supports conditional requests (ETag / If-None-Match).
     """
-    tasks = db.query(Task).filter(Task.user_id == current_user.id).all()
-    
-    total = len(tasks)
-    completed = len([t for t in tasks if t.status == TaskStatus.COMPLETED])
-    pending = len([t for t in tasks if t.status == TaskStatus.PENDING])
-    in_progress = len([t for t in tasks if t.status == TaskStatus.IN_PROGRESS])
-    missed = len([t for t in tasks if t.status == TaskStatus.MISSED])
-    
-    completion_rate = (completed / total * 100) if total > 0 else 0
-    
-    # Calculate average completion time
-    completed_tasks = [t for t in tasks if t.completed_at and t.created_at]
-    avg_completion_hours = None
-    if completed_tasks:
-        total_hours = sum(
-            (t.completed_at - t.created_at).total_seconds() / 3600
-            for t in completed_tasks
-        )
-        avg_completion_hours = total_hours / len(completed_tasks)
-    
-    now = datetime.now(timezone.utc)
-    overdue = len([t for t in tasks if t.is_overdue])
-    upcoming = len([
-        t for t in tasks
-        if t.status in [TaskStatus.PENDING, TaskStatus.IN_PROGRESS]
-        and t.deadline < now + timedelta(days=7)
-        and t.deadline > now
-    ])
-    
-    return TaskAnalytics(
-        total_tasks=total,
-        completed_tasks=completed,
-        pending_tasks=pending,
-        missed_tasks=missed,
-        in_progress_tasks=in_progress,
-        completion_rate=completion_rate,
-        average_completion_time=avg_completion_hours,
-        overdue_count=overdue,
-        upcoming_count=upcoming
-    )
+    not_modified = await _not_modified(request, response, db, current_user.id)
+    if not_modified is not None:
+        return not_modified
+    analytics = await read_task_analytics(db, current_user.id)
+    await db.commit()  # persists the counters row if it was just created
+    return analytics
 
 
 @router.get("/prioritized/all", response_model=PrioritizedTasksResponse)
+@query_budget(5)
 async def get_prioritized_tasks(
+    request: Request,
+    response: Response,
+    top: Optional[int] = Query(
+        None, ge=1, le=MAX_PAGE_SIZE, description="Only return the N most urgent active tasks"
+    ),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get all tasks organized by priority and deadline.
@@ -428,35 +993,68 @@ async def get_prioritized_tasks(
     - recommended_next_task: The most urgent task to work on
     - upcoming_tasks: All pending/in-progress tasks sorted by urgency
     - past_tasks: Completed and missed tasks
+    
+    With `top=N` only the N best active tasks (and at most N past tasks) are
+    returned; active tasks are scored from their deadline/priority/status
+    columns and only the winners are loaded in full.
+
+    Supports conditional requests (ETag / If-None-Match).
     """
+    not_modified = await _not_modified(request, response, db, current_user.id)
+    if not_modified is not None:
+        return not_modified
     now = datetime.now(timezone.utc)
-    tasks = db.query(Task).filter(Task.user_id == current_user.id).all()
-    
-    # Separate active and past tasks
-    active_tasks = [
-        t for t in tasks
-        if t.status in [TaskStatus.PENDING, TaskStatus.IN_PROGRESS]
-    ]
-    past_tasks = [
-        t for t in tasks
-        if t.status in [TaskStatus.COMPLETED, TaskStatus.MISSED]
+    active_filters = [
+        Task.user_id == current_user.id,
+        Task.status.in_([TaskStatus.PENDING, TaskStatus.IN_PROGRESS]),
     ]
     
-    # Sort active tasks by priority score (highest first)
-    active_tasks.sort(
-        key=lambda t: (calculate_priority_score(t), -t.deadline.timestamp()),
-        reverse=True
+    if top is None:
+        # Score every active task in one pass, then sort by score (highest first)
+        active_tasks = (await db.execute(select(*TASK_COLUMNS).where(*active_filters))).all()
+        active_columns = encode_tasks(active_tasks)
+        active_scores = score_columns(active_columns, now)
+        ranked = [
+            (active_tasks[i], active_scores[i])
+            for i in rank_columns(active_columns, active_scores)
+        ]
+    else:
+        rows = (await db.execute(
+            select(Task.id, Task.deadline, Task.priority, Task.status).where(*active_filters)
+        )).all()
+        active_columns = encode_columns(
+            [r.deadline for r in rows], [r.priority for r in rows], [r.status for r in rows]
+        )
+        active_scores = score_columns(active_columns, now)
+        best = top_k_columns(active_columns, active_scores, top)
+        best_ids = [rows[i].id for i in best]
+        loaded = {
+            t.id: t for t in (await db.execute(
+                select(*TASK_COLUMNS).where(Task.id.in_(best_ids))
+            )).all()
+        }
+        ranked = [
+            (loaded[rows[i].id], active_scores[i]) for i in best if rows[i].id in loaded
+        ]
+    upcoming = task_rows_to_dicts(
+        [task for task, _ in ranked], [float(score) for _, score in ranked], now
     )
     
-    # Sort past tasks by completion date (newest first)
-    past_tasks.sort(key=lambda t: t.completed_at or t.deadline, reverse=True)
-    
-    recommended = None
-    if active_tasks:
-        recommended = task_to_detailed_response(active_tasks[0])
+    # Most recently completed/missed first, limited in SQL
+    past_limit = min(top, 50) if top else 50
+    past_tasks = (await db.execute(
+        select(*TASK_COLUMNS)
+        .where(
+            Task.user_id == current_user.id,
+            Task.status.in_([TaskStatus.COMPLETED, TaskStatus.MISSED]),
+        )
+        .order_by(func.coalesce(Task.completed_at, Task.deadline).desc())
+        .limit(past_limit)
+    )).all()
     
-    return PrioritizedTasksResponse(
-        recommended_next_task=recommended,
-        upcoming_tasks=[task_to_detailed_response(t) for t in active_tasks],
-        past_tasks=[task_to_detailed_response(t) for t in past_tasks[:50]]  # Limit to 50
-    )
+    # Same keys as PrioritizedTasksResponse, encoded without re-validating every task
+    return TaskJSONResponse({
+        "recommended_next_task": upcoming[0] if upcoming else None,
+        "upcoming_tasks": upcoming,
+        "past_tasks": task_rows_to_dicts(past_tasks, now=now),
+    }, headers=_cache_headers(response))
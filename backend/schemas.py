@@ -1,7 +1,7 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional, List
-from models import TaskStatus, TaskPriority
+from typing import Any, Dict, Optional, List
+from models import NotificationChannel, NotificationStatus, TaskStatus, TaskPriority
 
 
 # User Schemas
@@ -104,6 +104,87 @@ class TaskDetailedResponse(TaskResponse):
     urgency_level: str = Field(description="CRITICAL, HIGH, MEDIUM, LOW")
 
 
+# Bulk Task Schemas
+MAX_BULK_ITEMS = 1000
+
+
+class TaskBulkCreate(BaseModel):
+    """Items are validated one by one against TaskCreate so a bad row only fails itself"""
+    items: List[Dict[str, Any]] = Field(..., min_length=1, max_length=MAX_BULK_ITEMS)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "items": [
+                    {"title": "Essay draft", "deadline": "2026-02-10T17:00:00Z", "priority": "high"},
+                    {"title": "Midterm", "deadline": "2026-03-02T09:00:00Z"}
+                ]
+            }
+        }
+
+
+class TaskBulkUpdateItem(TaskUpdate):
+    id: int
+
+
+class TaskBulkUpdate(BaseModel):
+    """Items are validated one by one against TaskBulkUpdateItem (TaskUpdate plus ``id``)"""
+    items: List[Dict[str, Any]] = Field(..., min_length=1, max_length=MAX_BULK_ITEMS)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "items": [
+                    {"id": 12, "status": "completed"},
+                    {"id": 13, "priority": "critical"}
+                ]
+            }
+        }
+
+
+class TaskBulkDelete(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=MAX_BULK_ITEMS)
+
+
+class TaskBulkCalendar(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=MAX_BULK_ITEMS)
+
+
+class TaskBulkItemResult(BaseModel):
+    index: int = Field(description="Position of the item in the request")
+    status: int = Field(description="HTTP status for this item (201, 200, 202, 204, 404 or 422)")
+    id: Optional[int] = None
+    task: Optional[TaskDetailedResponse] = None
+    error: Optional[str] = None
+
+
+class TaskBulkResponse(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[TaskBulkItemResult]
+
+
+# Import Schemas
+class TaskImportRow(TaskCreate):
+    """One exported task; ids and calendar links are not carried over"""
+    status: TaskStatus = TaskStatus.PENDING
+    created_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+
+
+class TaskImportError(BaseModel):
+    line: int
+    error: str
+
+
+class TaskImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: List[TaskImportError] = Field(
+        default_factory=list, description="First rejected rows (capped)"
+    )
+
+
 class GoogleTokenUpsert(BaseModel):
     access_token: str
     refresh_token: Optional[str] = None
@@ -115,10 +196,34 @@ class GoogleTokenUpsert(BaseModel):
 class NotificationResponse(BaseModel):
     channel: str
     status: str
+    notification_id: Optional[int] = None
     message_id: Optional[str] = None
     calendar_event_id: Optional[str] = None
 
 
+class CalendarSyncResponse(BaseModel):
+    full_sync: bool = Field(..., description="No usable sync token; every calendar event was listed")
+    pulled: int = Field(..., description="Calendar events changed since the last sync")
+    applied: int = Field(..., description="Tasks updated or unlinked from those events")
+    pushed: int = Field(..., description="Events created or updated from changed tasks")
+    failed: int = Field(..., description="Pushes Google rejected; retried on the next sync")
+
+
+class NotificationDetail(BaseModel):
+    id: int
+    task_id: int
+    channel: NotificationChannel
+    status: NotificationStatus
+    attempts: int
+    error_message: Optional[str] = None
+    next_attempt_at: Optional[datetime] = None
+    sent_at: Optional[datetime] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
 
 # Authentication Schemas
 class TokenResponse(BaseModel):
@@ -0,0 +1,181 @@
+"""
+Production entry point: N pre-forked uvicorn workers sharing one socket.
+
+    python serve.py --workers 4 --port 8000        (or WEB_CONCURRENCY=4 python serve.py)
+
+The supervisor imports the app once, prepares the database (DB_STARTUP_MODE)
+and binds the socket, then forks the workers. They start from that warm copy
+instead of re-importing everything like ``uvicorn --workers`` does, and a
+worker that dies is replaced.
+
+Only worker 0 runs the reminder scheduler, calendar sync and missed-task
+sweep; the notification outbox runs everywhere, since rows are claimed with
+a lease. With more than one worker the reminder window is reloaded every
+``REMINDER_RESYNC_SECONDS`` (default 60 here) to pick up writes handled by
+the other workers. Caches and rate limits are per process unless
+``CACHE_BACKEND=sqlite`` (a file next to the app) or ``redis``; task streams
+need ``TASK_EVENTS_BACKEND=redis`` to see changes made on another worker.
+
+SIGTERM or SIGINT stops the workers gracefully: they stop accepting
+connections, end open task streams, let in-flight requests finish for up to
+``--graceful-timeout`` seconds, then stop the background jobs (the outbox
+delivers what it already claimed) and close their pools. Workers still
+running after that are killed.
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import sys
+import time
+
+WORKER_STARTUP_SECONDS = 5.0  # a worker dying sooner than this is not restarted
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1))))
+    parser.add_argument("--graceful-timeout", type=float, default=float(os.getenv("GRACEFUL_TIMEOUT", "30")))
+    parser.add_argument("--log-level", default=os.getenv("LOG_LEVEL", "info"))
+    return parser.parse_args(argv)
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(index: int, sock: socket.socket, args) -> None:
+    """Body of a forked worker; never returns"""
+    import uvicorn
+
+    import main
+    from services.task_events import task_events
+
+    class WorkerServer(uvicorn.Server):
+        def handle_exit(self, sig, frame):
+            # Streams never finish on their own; end them so the drain only waits on real requests
+            task_events.close_streams()
+            super().handle_exit(sig, frame)
+
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, signal.SIG_DFL)
+    main.BACKGROUND_JOBS_ENABLED = main.BACKGROUND_JOBS_ENABLED and index == 0
+    config = uvicorn.Config(
+        main.app,
+        log_level=args.log_level,
+        timeout_graceful_shutdown=args.graceful_timeout,
+    )
+    server = WorkerServer(config)
+    server.run(sockets=[sock])
+    os._exit(0 if server.started else 3)
+
+
+class Supervisor:
+    """Forks the workers, replaces the ones that die and shuts them all down on a signal"""
+
+    def __init__(self, sock: socket.socket, args):
+        self.sock = sock
+        self.args = args
+        self.workers = {}  # pid -> (index, started at)
+        self.stopping = False
+
+    def spawn(self, index: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            try:
+                run_worker(index, self.sock, self.args)
+            finally:
+                os._exit(1)
+        self.workers[pid] = (index, time.monotonic())
+
+    def stop(self, signum, frame) -> None:
+        self.stopping = True
+
+    def run(self) -> int:
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for index in range(self.args.workers):
+            self.spawn(index)
+        print(f"🚀 Serving on {self.args.host}:{self.args.port} with {self.args.workers} workers (pid {os.getpid()})")
+
+        exit_code = 0
+        while not self.stopping:
+            pid, status = self._reap()
+            if pid is None:
+                time.sleep(0.2)
+                continue
+            index, started_at = self.workers.pop(pid)
+            if time.monotonic() - started_at < WORKER_STARTUP_SECONDS:
+                print(f"❌ Worker {index} exited during startup (status {status}); shutting down")
+                exit_code = 1
+                break
+            print(f"⚠️  Worker {index} (pid {pid}) exited with status {status}; restarting it")
+            self.spawn(index)
+
+        self.shutdown()
+        return exit_code
+
+    def shutdown(self) -> None:
+        print("🛑 Stopping workers...")
+        for pid in self.workers:
+            os.kill(pid, signal.SIGTERM)
+        # Room for the request drain plus the app's own shutdown
+        deadline = time.monotonic() + self.args.graceful_timeout + 15
+        while self.workers and time.monotonic() < deadline:
+            pid, _ = self._reap()
+            if pid is None:
+                time.sleep(0.1)
+            else:
+                self.workers.pop(pid, None)
+        for pid in self.workers:
+            print(f"⚠️  Worker pid {pid} did not stop in time; killing it")
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        self.workers.clear()
+
+    def _reap(self):
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            return None, None
+        return (pid, os.waitstatus_to_exitcode(status)) if pid else (None, None)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.workers > 1:
+        os.environ.setdefault("REMINDER_RESYNC_SECONDS", "60")
+
+    # Preload: workers inherit the imported app instead of importing it again
+    import main as app_module  # noqa: F401
+    import database
+    from database import engine, init_db
+    from services.task_events import TASK_EVENTS_BACKEND
+    from cache import CACHE_BACKEND
+
+    async def prepare():
+        await init_db()
+        await engine.dispose()  # workers must not share the supervisor's connections
+
+    asyncio.run(prepare())
+    database.DB_STARTUP_MODE = "check"  # migrated once here; the workers only verify
+    if args.workers > 1 and CACHE_BACKEND == "memory":
+        print("⚠️  CACHE_BACKEND=memory: user cache and rate limits are per worker")
+    if args.workers > 1 and TASK_EVENTS_BACKEND == "memory":
+        print("⚠️  TASK_EVENTS_BACKEND=memory: task streams only see changes made by their own worker")
+
+    return Supervisor(bind_socket(args.host, args.port), args).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+"""
+Incremental two-way sync between tasks and the user's Google Calendar.
+
+One cycle for a user (``sync_user_calendar``):
+
+1. Pull: list the events changed since the stored ``calendar_sync_token``
+   (every event on the first sync, or after Google expires the token with
+   410 Gone). Events we created carry their task id (``event_task_id``);
+   the rest are matched on ``Task.calendar_event_id``. If the event changed
+   after the task did, its summary, description and start time are copied
+   onto the task; a cancelled event unlinks its task.
+2. Push: tasks updated since ``calendar_synced_at`` are created or updated
+   in Calendar batch requests, except the ones the pull just overwrote. New
+   events are only created for pending and in-progress tasks.
+
+A cycle with nothing to do is one ``events.list`` call; each change costs
+one batch part. Our own pushes come back in the next pull, where they match
+the task and change nothing. ``CalendarSyncer`` runs a cycle for every
+connected user each ``CALENDAR_SYNC_INTERVAL_SECONDS``.
+"""
+
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import bindparam, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from database import SessionLocal
+from models import GoogleToken, Task, User
+from services.google_integration import (
+    SyncTokenExpired, event_task_id, list_calendar_changes, sync_refreshed_token, upsert_calendar_events,
+)
+from services.reminders import ACTIVE_STATUSES, reminder_scheduler
+from services.task_stats import bump_task_version
+from services.task_events import task_events, task_payload
+
+CALENDAR_SYNC_ENABLED = os.getenv("CALENDAR_SYNC_ENABLED", "true").lower() in ("1", "true", "yes")
+CALENDAR_SYNC_INTERVAL_SECONDS = float(os.getenv("CALENDAR_SYNC_INTERVAL_SECONDS", "300"))
+
+MATCH_CHUNK_SIZE = 500
+
+_user_locks: Dict[int, asyncio.Lock] = {}  # one cycle per user at a time, or events get created twice
+
+
+class CalendarSyncResult(NamedTuple):
+    full_sync: bool  # no usable sync token, every event was listed
+    pulled: int      # changed events listed
+    applied: int     # tasks updated or unlinked from those events
+    pushed: int      # events created or updated
+    failed: int      # pushes Google rejected; retried next cycle
+
+
+def _parse_time(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+async def _match_tasks(db: AsyncSession, user_id: int, events: List[dict]) -> List[Tuple[dict, Task]]:
+    """Pair changed events with the user's tasks; events of other tasks or apps are dropped"""
+    by_task_id: Dict[int, dict] = {}
+    by_event_id: Dict[str, dict] = {}
+    for event in events:
+        task_id = event_task_id(event)
+        # Deleted events come back as little more than id and status
+        if task_id is None or event.get("status") == "cancelled":
+            by_event_id[event["id"]] = event
+        else:
+            by_task_id[task_id] = event
+
+    matches = []
+    for column, wanted, key in (
+        (Task.id, by_task_id, lambda task: task.id),
+        (Task.calendar_event_id, by_event_id, lambda task: task.calendar_event_id),
+    ):
+        keys = list(wanted)
+        for start in range(0, len(keys), MATCH_CHUNK_SIZE):
+            tasks = (await db.execute(
+                select(Task).where(Task.user_id == user_id, column.in_(keys[start:start + MATCH_CHUNK_SIZE]))
+            )).scalars()
+            matches.extend((wanted[key(task)], task) for task in tasks)
+    return matches
+
+
+def _apply_event(task: Task, event: dict) -> bool:
+    """Copy a remote change onto ``task``; True if the event decided the task's state"""
+    if event.get("status") == "cancelled":
+        if task.calendar_event_id != event["id"]:
+            return False
+        task.calendar_event_id = None
+        return True
+
+    task.calendar_event_id = event["id"]
+    if task.updated_at and _parse_time(event["updated"]) <= task.updated_at:
+        return False  # the task changed since; the push below overwrites the event
+    changes = {
+        "title": (event.get("summary") or task.title)[:255],
+        "description": event.get("description") or None,
+    }
+    start = event.get("start", {}).get("dateTime")
+    if start:  # all-day events have only a date; keep the deadline
+        changes["deadline"] = _parse_time(start)
+    changed = False
+    for name, value in changes.items():
+        if getattr(task, name) != value:
+            setattr(task, name, value)
+            changed = True
+    return changed
+
+
+async def sync_user_calendar(db: AsyncSession, user: User, token: GoogleToken) -> CalendarSyncResult:
+    """Run one pull/push cycle for ``user`` and commit it together with the new sync state"""
+    async with _user_locks.setdefault(user.id, asyncio.Lock()):
+        full_sync = token.calendar_sync_token is None
+        try:
+            events, next_sync_token = await run_in_threadpool(
+                list_calendar_changes, token, token.calendar_sync_token
+            )
+        except SyncTokenExpired:
+            full_sync = True
+            events, next_sync_token = await run_in_threadpool(list_calendar_changes, token, None)
+
+        overwritten = {}
+        rescheduled = []
+        for event, task in await _match_tasks(db, user.id, events):
+            deadline = task.deadline
+            if _apply_event(task, event):
+                overwritten[task.id] = task
+                if task.deadline != deadline:
+                    rescheduled.append(task)
+        await db.flush()
+        cutoff = datetime.now(timezone.utc)
+
+        query = select(Task).where(
+            Task.user_id == user.id,
+            or_(Task.calendar_event_id.isnot(None), Task.status.in_(ACTIVE_STATUSES)),
+        )
+        if token.calendar_synced_at is not None:
+            query = query.where(Task.updated_at > token.calendar_synced_at)
+        tasks = [task for task in (await db.execute(query)).scalars() if task.id not in overwritten]
+
+        results = await run_in_threadpool(upsert_calendar_events, user, tasks, token) if tasks else []
+        linked, failed = [], []
+        for task, result in zip(tasks, results):
+            if isinstance(result, Exception):
+                failed.append(task)
+            elif result != task.calendar_event_id:
+                linked.append({"task_id": task.id, "event_id": result})
+        if linked:
+            # Linking an event is not a task change: keep updated_at so the next cycle skips it
+            table = Task.__table__
+            await db.execute(
+                update(table).where(table.c.id == bindparam("task_id"))
+                .values(calendar_event_id=bindparam("event_id"), updated_at=table.c.updated_at),
+                linked,
+            )
+
+        if overwritten or linked:
+            await bump_task_version(db, user.id)
+        token.calendar_sync_token = next_sync_token
+        token.calendar_synced_at = cutoff
+        if failed:
+            token.calendar_synced_at = min(task.updated_at for task in failed) - timedelta(microseconds=1)
+        sync_refreshed_token(token)
+        await db.commit()
+
+    for task in rescheduled:
+        reminder_scheduler.task_changed(task)
+    for task in overwritten.values():
+        await task_events.publish(user.id, "updated", task_payload(task))
+    return CalendarSyncResult(full_sync, len(events), len(overwritten), len(tasks) - len(failed), len(failed))
+
+
+class CalendarSyncer:
+    """Syncs every active user with a Google token, one after another, each interval"""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        interval: timedelta = timedelta(seconds=CALENDAR_SYNC_INTERVAL_SECONDS),
+    ):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.cycles = 0
+        self.synced = 0
+        self.failed = 0
+        self._runner: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._runner = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            self._runner.cancel()
+            try:
+                await self._runner
+            except asyncio.CancelledError:
+                pass
+            self._runner = None
+
+    def snapshot(self) -> dict:
+        return {"cycles": self.cycles, "synced": self.synced, "failed": self.failed}
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval.total_seconds())
+            try:
+                await self.sync_all()
+            except Exception as exc:
+                print(f"⚠️  Calendar sync cycle failed: {exc}")
+
+    async def sync_all(self) -> None:
+        async with self.session_factory() as db:
+            user_ids = (await db.execute(
+                select(GoogleToken.user_id).join(User, User.id == GoogleToken.user_id)
+                .where(User.is_active.is_(True))
+            )).scalars().all()
+        for user_id in user_ids:
+            try:
+                async with self.session_factory() as db:
+                    user, token = (await db.execute(
+                        select(User, GoogleToken).join(GoogleToken, GoogleToken.user_id == User.id)
+                        .where(User.id == user_id)
+                    )).one()
+                    await sync_user_calendar(db, user, token)
+                self.synced += 1
+            except Exception as exc:
+                self.failed += 1
+                print(f"⚠️  Calendar sync for user {user_id} failed: {exc}")
+        self.cycles += 1
+
+
+calendar_syncer = CalendarSyncer(SessionLocal)
@@ -1,21 +1,84 @@
+"""
+Gmail and Calendar calls on behalf of users who connected Google.
+
+Everything here is blocking HTTP (httplib2), so callers run it in the
+threadpool, never on the event loop. API clients are cached per user and
+API in a bounded LRU: building one parses the discovery document, which
+costs more than the call itself. A cached client is rebuilt when the stored
+token changes, and ``sync_refreshed_token`` copies an access token the
+client refreshed by itself back onto the ``GoogleToken`` row.
+
+``send_gmail_deadlines`` and ``upsert_calendar_events`` pack up to
+``GOOGLE_BATCH_SIZE`` calls into one batch HTTP request. Each part carries
+its own user's credentials, so a batch can mix users. Calendar events carry
+the task id as a private extended property, so ``list_calendar_changes``
+(incremental listing with a sync token) can map them back to tasks.
+
+Every call is timed into the ``google_api_call_duration_seconds`` metric by
+API, call (a batch counts as one) and outcome.
+
+``GOOGLE_API_ROOT`` and ``GOOGLE_TOKEN_URI`` point the clients at another
+server (see ``fake_google.py``, used by the tests and benchmarks).
+"""
+
+import base64
 import os
-from datetime import datetime
-from typing import Optional
+import threading
+from datetime import timezone
 from email.mime.text import MIMEText
-import base64
+from typing import Callable, List, NamedTuple, Optional, Sequence, Tuple, Union
 
+import httplib2
+from fastapi import HTTPException, status
 from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp, Request
 from googleapiclient.discovery import build
-from fastapi import HTTPException, status
+from googleapiclient.errors import HttpError
+from googleapiclient.http import BatchHttpRequest
 
+from cache import MemoryCache
+from metrics import google_call
 from models import GoogleToken, Task, User
 
 GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
 GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
-TOKEN_URI = "https://oauth2.googleapis.com/token"
+GOOGLE_API_ROOT = os.getenv("GOOGLE_API_ROOT")  # e.g. a local fake server; unset for Google
+TOKEN_URI = os.getenv("GOOGLE_TOKEN_URI", "https://oauth2.googleapis.com/token")
 GMAIL_SCOPES = ["https://www.googleapis.com/auth/gmail.send"]
 CALENDAR_SCOPES = ["https://www.googleapis.com/auth/calendar.events"]
 
+GOOGLE_HTTP_TIMEOUT = float(os.getenv("GOOGLE_HTTP_TIMEOUT", "30"))
+GOOGLE_BATCH_SIZE = int(os.getenv("GOOGLE_BATCH_SIZE", "50"))  # Gmail advises at most 50 per batch
+GOOGLE_CLIENT_CACHE_SIZE = int(os.getenv("GOOGLE_CLIENT_CACHE_SIZE", "1000"))
+GOOGLE_CLIENT_CACHE_TTL_SECONDS = float(os.getenv("GOOGLE_CLIENT_CACHE_TTL_SECONDS", "3600"))
+CALENDAR_PAGE_SIZE = int(os.getenv("CALENDAR_PAGE_SIZE", "2500"))  # the maximum events.list allows
+TASK_ID_PROPERTY = "deadlineManagerTaskId"
+
+# name -> (version, production root URL, service path, batch path)
+_APIS = {
+    "gmail": ("v1", "https://gmail.googleapis.com/", "", "batch/gmail/v1"),
+    "calendar": ("v3", "https://www.googleapis.com/", "calendar/v3/", "batch/calendar/v3"),
+}
+
+BatchResult = Union[str, Exception]
+
+
+class SyncTokenExpired(Exception):
+    """Google answered 410 Gone: the sync token is no longer valid, do a full sync"""
+
+
+class GoogleClient(NamedTuple):
+    """A built API client together with the credentials it signs requests with"""
+    service: object
+    credentials: Credentials
+    lock: threading.Lock  # httplib2 connections are not thread-safe
+    source: Tuple[str, Optional[str]]  # (access_token, refresh_token) it was built from
+
+
+_clients = MemoryCache(GOOGLE_CLIENT_CACHE_SIZE)
+_transport = threading.local()
+client_stats = {"hits": 0, "builds": 0}
+
 
 def _ensure_client_config():
     if not GOOGLE_CLIENT_ID or not GOOGLE_CLIENT_SECRET:
@@ -27,6 +90,10 @@ def _ensure_client_config():
 
 def _build_credentials(token: GoogleToken, scopes: Optional[list[str]] = None) -> Credentials:
     _ensure_client_config()
+    expiry = None
+    if token.expires_at is not None:
+        # google-auth compares expiry against a naive UTC datetime
+        expiry = token.expires_at.astimezone(timezone.utc).replace(tzinfo=None)
     return Credentials(
         token=token.access_token,
         refresh_token=token.refresh_token,
@@ -34,13 +101,115 @@ def _build_credentials(token: GoogleToken, scopes: Optional[list[str]] = None) -
         client_id=GOOGLE_CLIENT_ID,
         client_secret=GOOGLE_CLIENT_SECRET,
         scopes=scopes or (token.scope.split() if token.scope else None),
+        expiry=expiry,
     )
 
 
-def send_gmail_deadline(user: User, task: Task, token: GoogleToken) -> str:
-    creds = _build_credentials(token, scopes=GMAIL_SCOPES)
-    service = build("gmail", "v1", credentials=creds)
+def _client_key(api: str, user_id: int) -> str:
+    return f"{api}:{user_id}"
+
+
+def get_client(token: GoogleToken, api: str, scopes: list[str]) -> GoogleClient:
+    """Cached API client for the token's user, rebuilt if the stored token changed"""
+    key = _client_key(api, token.user_id)
+    client = _clients.get(key)
+    if client is not None and (
+        client.source == (token.access_token, token.refresh_token)
+        or client.credentials.token == token.access_token  # the row caught up with our refresh
+    ):
+        client_stats["hits"] += 1
+        return client
+
+    credentials = _build_credentials(token, scopes)
+    version, _, service_path, _ = _APIS[api]
+    client_options = {"api_endpoint": GOOGLE_API_ROOT + service_path} if GOOGLE_API_ROOT else None
+    service = build(
+        api, version,
+        http=AuthorizedHttp(credentials, http=httplib2.Http(timeout=GOOGLE_HTTP_TIMEOUT)),
+        client_options=client_options,
+        cache_discovery=False,
+        static_discovery=True,
+    )
+    client = GoogleClient(service, credentials, threading.Lock(), (token.access_token, token.refresh_token))
+    _clients.set(key, client, GOOGLE_CLIENT_CACHE_TTL_SECONDS)
+    client_stats["builds"] += 1
+    return client
+
+
+def sync_refreshed_token(token: GoogleToken) -> bool:
+    """
+    Copy an access token refreshed by a cached client onto ``token``.
+
+    Returns True if the row changed; the caller commits it with the rest of
+    its transaction so the next process does not refresh again.
+    """
+    changed = False
+    for api in _APIS:
+        client = _clients.get(_client_key(api, token.user_id))
+        if client is None or client.source[1] != token.refresh_token:
+            continue
+        credentials = client.credentials
+        if credentials.token and credentials.token != token.access_token:
+            token.access_token = credentials.token
+            token.expires_at = credentials.expiry.replace(tzinfo=timezone.utc) if credentials.expiry else None
+            changed = True
+    return changed
+
+
+def _batch_http() -> httplib2.Http:
+    # Batches are signed per part, so the envelope only needs a plain connection per thread
+    http = getattr(_transport, "http", None)
+    if http is None:
+        http = _transport.http = httplib2.Http(timeout=GOOGLE_HTTP_TIMEOUT)
+    return http
+
 
+def _batch_uri(api: str) -> str:
+    _, root, _, batch_path = _APIS[api]
+    return (GOOGLE_API_ROOT or root) + batch_path
+
+
+def _execute_batches(
+    api: str, scopes: list[str], calls: Sequence[Tuple[GoogleToken, Callable]]
+) -> List[BatchResult]:
+    """
+    Run ``(token, make_request(service))`` calls in batches of GOOGLE_BATCH_SIZE.
+
+    Returns the created resource id, or the exception, for each call in order.
+    A call that fails only fails itself, unless the whole batch request does.
+    """
+    results: List[BatchResult] = [None] * len(calls)
+
+    def collect(request_id, response, exception):
+        results[int(request_id)] = exception if exception is not None else response.get("id")
+
+    for start in range(0, len(calls), GOOGLE_BATCH_SIZE):
+        batch = BatchHttpRequest(callback=collect, batch_uri=_batch_uri(api))
+        pending = []
+        for index in range(start, min(start + GOOGLE_BATCH_SIZE, len(calls))):
+            token, make_request = calls[index]
+            try:
+                client = get_client(token, api, scopes)
+                if not client.credentials.valid and client.credentials.refresh_token:
+                    with client.lock, google_call("oauth", "token.refresh"):
+                        client.credentials.refresh(Request(httplib2.Http(timeout=GOOGLE_HTTP_TIMEOUT)))
+                batch.add(make_request(client.service), request_id=str(index))
+                pending.append(index)
+            except Exception as exc:
+                results[index] = exc
+        if not pending:
+            continue
+        try:
+            with google_call(api, "batch"):
+                batch.execute(http=_batch_http())
+        except Exception as exc:
+            for index in pending:
+                if results[index] is None:
+                    results[index] = exc
+    return results
+
+
+def _gmail_message(user: User, task: Task) -> dict:
     subject = f"Deadline Reminder: {task.title}"
     deadline_str = task.deadline.strftime("%Y-%m-%d %H:%M UTC")
     body = f"Hello {user.name},\n\nThis is a reminder for your deadline: {task.title}\nDue: {deadline_str}\nStatus: {task.status}\n\nDescription:\n{task.description or 'No description'}\n\n-- Deadline Manager"
@@ -51,28 +220,91 @@ def send_gmail_deadline(user: User, task: Task, token: GoogleToken) -> str:
     msg["subject"] = subject
 
     raw = base64.urlsafe_b64encode(msg.as_bytes()).decode()
-    message = {"raw": raw}
-    sent = service.users().messages().send(userId="me", body=message).execute()
-    return sent.get("id")
-
+    return {"raw": raw}
 
-def upsert_calendar_event(user: User, task: Task, token: GoogleToken, event_id: Optional[str] = None) -> str:
-    creds = _build_credentials(token, scopes=CALENDAR_SCOPES)
-    service = build("calendar", "v3", credentials=creds)
 
+def _calendar_event(task: Task) -> dict:
     start_iso = task.deadline.isoformat()
     end_iso = (task.deadline + (task.deadline - task.deadline.replace(minute=0, second=0, microsecond=0))).isoformat()
-
-    event_body = {
+    return {
         "summary": task.title,
         "description": task.description or "",
         "start": {"dateTime": start_iso, "timeZone": "UTC"},
         "end": {"dateTime": end_iso, "timeZone": "UTC"},
         "reminders": {"useDefault": True},
+        "extendedProperties": {"private": {TASK_ID_PROPERTY: str(task.id)}},
     }
 
+
+def event_task_id(event: dict) -> Optional[int]:
+    """The task id stored on an event we created, if any"""
+    value = event.get("extendedProperties", {}).get("private", {}).get(TASK_ID_PROPERTY)
+    return int(value) if value and value.isdigit() else None
+
+
+def _calendar_request(service, task: Task, event_id: Optional[str]):
     if event_id:
-        updated = service.events().update(calendarId="primary", eventId=event_id, body=event_body).execute()
-        return updated.get("id")
-    created = service.events().insert(calendarId="primary", body=event_body).execute()
-    return created.get("id")
+        return service.events().update(calendarId="primary", eventId=event_id, body=_calendar_event(task))
+    return service.events().insert(calendarId="primary", body=_calendar_event(task))
+
+
+def send_gmail_deadline(user: User, task: Task, token: GoogleToken) -> str:
+    client = get_client(token, "gmail", GMAIL_SCOPES)
+    with client.lock, google_call("gmail", "messages.send"):
+        sent = client.service.users().messages().send(userId="me", body=_gmail_message(user, task)).execute()
+    return sent.get("id")
+
+
+def send_gmail_deadlines(items: Sequence[Tuple[User, Task, GoogleToken]]) -> List[BatchResult]:
+    """Send many reminders, for any mix of users, as batch requests"""
+    return _execute_batches("gmail", GMAIL_SCOPES, [
+        (token, lambda service, user=user, task=task: service.users().messages().send(
+            userId="me", body=_gmail_message(user, task)
+        ))
+        for user, task, token in items
+    ])
+
+
+def upsert_calendar_event(user: User, task: Task, token: GoogleToken, event_id: Optional[str] = None) -> str:
+    client = get_client(token, "calendar", CALENDAR_SCOPES)
+    with client.lock, google_call("calendar", "events.update" if event_id else "events.insert"):
+        event = _calendar_request(client.service, task, event_id).execute()
+    return event.get("id")
+
+
+def upsert_calendar_events(user: User, tasks: Sequence[Task], token: GoogleToken) -> List[BatchResult]:
+    """Create or update the calendar event of each task as batch requests"""
+    return _execute_batches("calendar", CALENDAR_SCOPES, [
+        (token, lambda service, task=task: _calendar_request(service, task, task.calendar_event_id))
+        for task in tasks
+    ])
+
+
+def list_calendar_changes(token: GoogleToken, sync_token: Optional[str]) -> Tuple[List[dict], str]:
+    """
+    Events of the primary calendar changed since ``sync_token`` (all of them
+    if None), deleted ones with status "cancelled", and the next sync token.
+
+    Raises SyncTokenExpired if Google no longer accepts ``sync_token``.
+    """
+    client = get_client(token, "calendar", CALENDAR_SCOPES)
+    events: List[dict] = []
+    page_token = None
+    with client.lock:
+        while True:
+            params = {"calendarId": "primary", "maxResults": CALENDAR_PAGE_SIZE}
+            if page_token:
+                params["pageToken"] = page_token
+            elif sync_token:
+                params["syncToken"] = sync_token
+            try:
+                with google_call("calendar", "events.list"):
+                    page = client.service.events().list(**params).execute()
+            except HttpError as exc:
+                if exc.resp.status == 410:
+                    raise SyncTokenExpired() from exc
+                raise
+            events.extend(page.get("items", []))
+            page_token = page.get("nextPageToken")
+            if not page_token:
+                return events, page["nextSyncToken"]
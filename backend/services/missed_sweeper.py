@@ -0,0 +1,151 @@
+"""
+Periodic sweep of overdue tasks to MISSED.
+
+Every ``MISSED_SWEEP_INTERVAL_SECONDS`` the sweeper marks pending and
+in-progress tasks whose deadline has passed as MISSED, with ``completed_at``
+set to the deadline. It works in batches of ``MISSED_SWEEP_BATCH_SIZE``,
+one short transaction each, so writers are never held up behind a long
+lock. Each batch is:
+
+- a range read on the ``(status, deadline)`` index for the ids of the
+  overdue rows, then the rows themselves by id under a lock: ``FOR UPDATE
+  SKIP LOCKED`` on PostgreSQL, ``BEGIN IMMEDIATE`` on SQLite (pysqlite would
+  otherwise start the transaction only at the first write and leave the
+  read unprotected). The range read runs before the lock, so writers get
+  in between batches
+- one set-based ``UPDATE tasks SET status = 'MISSED', completed_at = deadline``,
+  guarded by the same overdue condition and returning the ids it changed
+- ``apply_task_changes`` per user for exactly those rows, so the counters
+  and the task version (ETags) move in the same commit
+
+After commit, the tasks are published as ``updated`` task events and
+dropped from the reminder scheduler.
+"""
+
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+from sqlalchemy import select, text, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from database import SessionLocal
+from models import Task, TaskStatus
+from services.reminders import ACTIVE_STATUSES, reminder_scheduler
+from services.task_events import TASK_FIELDS, task_events, task_payload
+from services.task_stats import TaskStatsSnapshot, apply_task_changes, ensure_task_stats
+
+MISSED_SWEEP_ENABLED = os.getenv("MISSED_SWEEP_ENABLED", "true").lower() in ("1", "true", "yes")
+MISSED_SWEEP_INTERVAL_SECONDS = float(os.getenv("MISSED_SWEEP_INTERVAL_SECONDS", "60"))
+MISSED_SWEEP_BATCH_SIZE = int(os.getenv("MISSED_SWEEP_BATCH_SIZE", "1000"))
+# Between batches, so writers waiting on SQLite's busy handler (which polls every 100 ms) get the lock
+MISSED_SWEEP_PAUSE_SECONDS = float(os.getenv("MISSED_SWEEP_PAUSE_SECONDS", "0.1"))
+
+
+class MissedSweeper:
+    """Moves overdue active tasks to MISSED in bounded batches each interval"""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        interval: timedelta = timedelta(seconds=MISSED_SWEEP_INTERVAL_SECONDS),
+        batch_size: int = MISSED_SWEEP_BATCH_SIZE,
+        pause: float = MISSED_SWEEP_PAUSE_SECONDS,
+    ):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.batch_size = batch_size
+        self.pause = pause
+        self.sweeps = 0
+        self.missed = 0
+        self._runner: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._runner = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            self._runner.cancel()
+            try:
+                await self._runner
+            except asyncio.CancelledError:
+                pass
+            self._runner = None
+
+    def snapshot(self) -> dict:
+        return {"sweeps": self.sweeps, "missed": self.missed}
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval.total_seconds())
+            try:
+                await self.sweep()
+            except Exception as exc:
+                print(f"⚠️  Missed-task sweep failed: {exc}")
+
+    async def sweep(self, now: Optional[datetime] = None) -> int:
+        """Mark every task overdue at ``now`` as MISSED; returns how many were marked"""
+        now = now or datetime.now(timezone.utc)
+        total = 0
+        while True:
+            swept = await self._sweep_batch(now)
+            total += swept
+            if swept < self.batch_size:
+                break
+            await asyncio.sleep(self.pause)  # let writers in between batches
+        self.sweeps += 1
+        self.missed += total
+        return total
+
+    async def _sweep_batch(self, now: datetime) -> int:
+        overdue = (Task.status.in_(ACTIVE_STATUSES), Task.deadline < now)
+        async with self.session_factory() as db:
+            ids = (await db.execute(
+                select(Task.id).where(*overdue).limit(self.batch_size)
+            )).scalars().all()
+            if not ids:
+                return 0
+            if db.bind.dialect.name == "sqlite":
+                # pysqlite opens the transaction only at the first write, which would leave the
+                # read below unprotected; take the write lock now that the batch is found
+                await db.execute(text("BEGIN IMMEDIATE"))
+            rows = (await db.execute(
+                select(*[getattr(Task, field) for field in TASK_FIELDS]).where(Task.id.in_(ids), *overdue)
+                .with_for_update(skip_locked=True)
+            )).all()
+            if not rows:
+                return 0
+
+            # A missing counters row is built from the tasks as they are now, so before they change
+            for user_id in {row.user_id for row in rows}:
+                await ensure_task_stats(db, user_id)
+            # Guarded again, so a task completed since the read is never marked missed
+            swept = set((await db.execute(
+                update(Task).where(Task.id.in_([row.id for row in rows]), *overdue)
+                .values(status=TaskStatus.MISSED, completed_at=Task.deadline, updated_at=now)
+                .returning(Task.id)
+                .execution_options(synchronize_session=False)
+            )).scalars())
+            rows = [row for row in rows if row.id in swept]
+
+            missed = {"status": TaskStatus.MISSED, "updated_at": now}
+            tasks = [SimpleNamespace(**{**row._mapping, **missed, "completed_at": row.deadline}) for row in rows]
+            changes: Dict[int, List[tuple]] = {}
+            for row, task in zip(rows, tasks):
+                changes.setdefault(row.user_id, []).append((
+                    TaskStatsSnapshot.from_values(row.status, row.created_at, row.completed_at),
+                    TaskStatsSnapshot.of(task),
+                ))
+            for user_id, user_changes in changes.items():
+                await apply_task_changes(db, user_id, user_changes)
+            await db.commit()
+
+        for task in tasks:
+            reminder_scheduler.task_changed(task)
+            await task_events.publish(task.user_id, "updated", task_payload(task))
+        return len(rows)
+
+
+missed_sweeper = MissedSweeper(SessionLocal)
@@ -0,0 +1,388 @@
+"""
+Transactional outbox for Gmail and Calendar notifications.
+
+Endpoints and the reminder scheduler only add a PENDING ``Notification``
+(``queue_notification``, or ``queue_notifications`` for many tasks) in
+their own transaction and call ``notification_outbox.wake()`` after commit,
+so no request waits on Google.
+
+``NotificationOutbox`` claims due rows by pushing ``next_attempt_at`` past
+a lease in the same UPDATE, hands them to ``OUTBOX_WORKERS`` worker tasks,
+which send them through the batch helpers in ``services.google_integration``,
+and records SENT or FAILED with the error. Transient errors (429, 5xx,
+network, missing client config) are retried with exponential backoff and
+jitter until ``OUTBOX_MAX_ATTEMPTS``; anything else fails at once. A batch
+that fails as a whole (an unexpected error in the delivery code) counts an
+attempt on each of its rows the same way. Each user's sends pass a token
+bucket (``OUTBOX_USER_RATE`` per second, bursts of ``OUTBOX_USER_BURST``);
+a row over the limit is put back until a token frees up without counting
+an attempt; with ``CACHE_BACKEND=sqlite|redis`` the buckets are shared by
+all workers. Rows claimed by a process that died are picked up again when
+their lease runs out. On shutdown, ``stop`` stops claiming and gives the
+rows already claimed ``OUTBOX_DRAIN_SECONDS`` to be delivered; the loops
+then get the same time to exit, and a delivery cut short is left to its
+lease rather than counted as a failed attempt.
+"""
+
+import asyncio
+import os
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from google.auth.exceptions import RefreshError
+from googleapiclient.errors import HttpError
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from database import SessionLocal
+from models import GoogleToken, Notification, NotificationChannel, NotificationStatus, Task, User
+from services.google_integration import (
+    GOOGLE_BATCH_SIZE, send_gmail_deadlines, sync_refreshed_token, upsert_calendar_events,
+)
+from services.rate_limit import create_token_buckets
+from services.task_stats import bump_task_version
+
+OUTBOX_ENABLED = os.getenv("OUTBOX_ENABLED", "true").lower() in ("1", "true", "yes")
+OUTBOX_WORKERS = int(os.getenv("OUTBOX_WORKERS", "4"))
+OUTBOX_CLAIM_SIZE = int(os.getenv("OUTBOX_CLAIM_SIZE", "200"))
+OUTBOX_LEASE_SECONDS = float(os.getenv("OUTBOX_LEASE_SECONDS", "300"))
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "30"))  # rows queued by other processes
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "6"))
+OUTBOX_BACKOFF_SECONDS = float(os.getenv("OUTBOX_BACKOFF_SECONDS", "30"))
+OUTBOX_BACKOFF_MAX_SECONDS = float(os.getenv("OUTBOX_BACKOFF_MAX_SECONDS", "3600"))
+OUTBOX_USER_RATE = float(os.getenv("OUTBOX_USER_RATE", "1"))
+OUTBOX_USER_BURST = float(os.getenv("OUTBOX_USER_BURST", "10"))
+OUTBOX_DRAIN_SECONDS = float(os.getenv("OUTBOX_DRAIN_SECONDS", "10"))
+
+
+def queue_notification(db: AsyncSession, user_id: int, task_id: int, channel: NotificationChannel) -> Notification:
+    """Add a PENDING notification to the session; it is sent once the caller commits"""
+    notification = Notification(
+        user_id=user_id,
+        task_id=task_id,
+        channel=channel,
+        status=NotificationStatus.PENDING,
+        next_attempt_at=datetime.now(timezone.utc),
+    )
+    db.add(notification)
+    return notification
+
+
+async def queue_notifications(
+    db: AsyncSession, user_id: int, task_ids: List[int], channel: NotificationChannel
+) -> None:
+    """Insert PENDING notifications for many tasks in one executemany (the ORM flushes one INSERT per row)"""
+    now = datetime.now(timezone.utc)
+    await db.execute(insert(Notification.__table__), [
+        {
+            "user_id": user_id,
+            "task_id": task_id,
+            "channel": channel,
+            "status": NotificationStatus.PENDING,
+            "next_attempt_at": now,
+        }
+        for task_id in task_ids
+    ])
+
+
+def _describe(exc: Exception) -> str:
+    # HTTPException (e.g. missing Google client config) carries its message in .detail
+    return str(getattr(exc, "detail", None) or exc or type(exc).__name__)
+
+
+def _is_transient(exc: Exception) -> bool:
+    if isinstance(exc, HttpError):
+        return exc.resp.status in (408, 429) or exc.resp.status >= 500
+    if isinstance(exc, HTTPException):
+        return exc.status_code >= 500
+    if isinstance(exc, (RefreshError, LookupError)):
+        return False  # revoked grant, or the task/token is gone
+    return True  # connection errors and timeouts
+
+
+class NotificationOutbox:
+    """Claims due PENDING notifications and delivers them from a pool of workers"""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        workers: int = OUTBOX_WORKERS,
+        claim_size: int = OUTBOX_CLAIM_SIZE,
+        lease: timedelta = timedelta(seconds=OUTBOX_LEASE_SECONDS),
+        poll: timedelta = timedelta(seconds=OUTBOX_POLL_SECONDS),
+        max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+        backoff: timedelta = timedelta(seconds=OUTBOX_BACKOFF_SECONDS),
+        backoff_max: timedelta = timedelta(seconds=OUTBOX_BACKOFF_MAX_SECONDS),
+        user_rate: float = OUTBOX_USER_RATE,
+        user_burst: float = OUTBOX_USER_BURST,
+    ):
+        self.session_factory = session_factory
+        self.workers = workers
+        self.claim_size = claim_size
+        self.lease = lease
+        self.poll = poll
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.limiter = create_token_buckets(user_rate, user_burst, prefix="outbox:user:")
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.throttled = 0
+        self._wakeup = asyncio.Event()
+        self._jobs: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        # Cancelling a task inside a database call can surface as a driver error rather than
+        # CancelledError, so the loops check these before handling a failure as a real one
+        self._stopping = False
+        self._closing = False
+
+    # --- Lifecycle ---
+
+    async def start(self) -> None:
+        # asyncio primitives bind to the loop that first waits on them
+        self._wakeup = asyncio.Event()
+        self._jobs = asyncio.Queue(maxsize=self.workers * 2)
+        self._stopping = self._closing = False
+        self._tasks = [asyncio.create_task(self._poll())]
+        self._tasks += [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self, drain: float = OUTBOX_DRAIN_SECONDS) -> None:
+        if self._tasks:
+            self._stopping = True
+            self._tasks[0].cancel()  # no more claims
+            try:
+                # Rows already claimed would otherwise wait out their lease
+                await asyncio.wait_for(self._jobs.join(), timeout=drain)
+            except asyncio.TimeoutError:
+                print(f"⚠️  Outbox stopped with {self._jobs.qsize()} claimed batches undelivered")
+        self._closing = True
+        for task in self._tasks:
+            task.cancel()
+        try:
+            await asyncio.wait_for(asyncio.gather(*self._tasks, return_exceptions=True), timeout=drain)
+        except asyncio.TimeoutError:
+            print("⚠️  Outbox tasks did not stop in time")
+        self._tasks = []
+        self._jobs = None
+
+    def wake(self) -> None:
+        """Look for due rows now, e.g. right after a request committed a new one"""
+        self._wakeup.set()
+
+    def snapshot(self) -> dict:
+        return {
+            "queued_jobs": self._jobs.qsize() if self._jobs is not None else 0,
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "throttled": self.throttled,
+        }
+
+    # --- Claiming ---
+
+    async def _poll(self) -> None:
+        while not self._stopping:
+            try:
+                claimed = await self._claim()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                if self._stopping:
+                    return
+                print(f"⚠️  Outbox claim failed, retrying: {exc}")
+                await asyncio.sleep(5)
+                continue
+            if len(claimed) == self.claim_size:
+                continue  # more are due right now
+
+            self._wakeup.clear()
+            try:
+                timeout = await self._next_due_in()
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                if self._stopping:
+                    return
+                print(f"⚠️  Outbox poll failed: {exc}")
+                await asyncio.sleep(5)
+
+    async def _next_due_in(self) -> float:
+        async with self.session_factory() as db:
+            next_due = await db.scalar(
+                select(func.min(Notification.next_attempt_at))
+                .where(Notification.status == NotificationStatus.PENDING)
+            )
+        if next_due is None:
+            return self.poll.total_seconds()
+        wait = (next_due - datetime.now(timezone.utc)).total_seconds()
+        return min(max(wait, 0.0), self.poll.total_seconds())
+
+    async def _claim(self) -> List[Tuple[int, int, NotificationChannel]]:
+        """Lease up to claim_size due rows, defer the rate-limited ones, queue the rest"""
+        now = datetime.now(timezone.utc)
+        due = (
+            Notification.status == NotificationStatus.PENDING,
+            Notification.next_attempt_at <= now,
+        )
+        async with self.session_factory() as db:
+            ids = (await db.execute(
+                select(Notification.id).where(*due)
+                .order_by(Notification.next_attempt_at).limit(self.claim_size)
+            )).scalars().all()
+            if not ids:
+                return []
+            claimed = (await db.execute(
+                update(Notification)
+                .where(Notification.id.in_(ids), *due)
+                .values(next_attempt_at=now + self.lease)
+                .returning(Notification.id, Notification.user_id, Notification.channel)
+                .execution_options(synchronize_session=False)
+            )).all()
+
+            deferred: Dict[int, Tuple[float, List[int]]] = {}
+            ready: Dict[Tuple[NotificationChannel, Optional[int]], List[int]] = {}
+            for notification_id, user_id, channel in claimed:
+                wait = await self.limiter.take_async(user_id)
+                if wait:
+                    # Later rows of the same user are re-checked when the first token frees up
+                    deferred.setdefault(user_id, (wait, []))[1].append(notification_id)
+                    continue
+                # Calendar batches are per user (one token); Gmail batches can mix users
+                key = (channel, user_id if channel == NotificationChannel.CALENDAR else None)
+                ready.setdefault(key, []).append(notification_id)
+            for wait, notification_ids in deferred.values():
+                self.throttled += len(notification_ids)
+                await db.execute(
+                    update(Notification).where(Notification.id.in_(notification_ids))
+                    .values(next_attempt_at=now + timedelta(seconds=wait))
+                    .execution_options(synchronize_session=False)
+                )
+            await db.commit()
+
+        for (channel, _), notification_ids in ready.items():
+            for start in range(0, len(notification_ids), GOOGLE_BATCH_SIZE):
+                await self._jobs.put((channel, notification_ids[start:start + GOOGLE_BATCH_SIZE]))
+        return claimed
+
+    # --- Delivery ---
+
+    async def _work(self) -> None:
+        while not self._closing:
+            channel, notification_ids = await self._jobs.get()
+            try:
+                await self._deliver(channel, notification_ids)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                if self._closing:
+                    return  # cancelled mid-delivery; the lease expires and the rows are retried
+                print(f"⚠️  Outbox delivery of {len(notification_ids)} notifications failed: {exc}")
+                await self._record_batch_failure(notification_ids, exc)
+            finally:
+                self._jobs.task_done()
+
+    async def _record_batch_failure(self, notification_ids: List[int], exc: Exception) -> None:
+        """Count an attempt on every row of a batch that failed as a whole, so a poison batch ends FAILED"""
+        try:
+            async with self.session_factory() as db:
+                rows = (await db.execute(
+                    select(Notification).where(
+                        Notification.id.in_(notification_ids),
+                        Notification.status == NotificationStatus.PENDING,
+                    )
+                )).scalars().all()
+                now = datetime.now(timezone.utc)
+                retrying = [notification for notification in rows if not self._record(notification, exc, now)]
+                await db.commit()
+        except asyncio.CancelledError:
+            raise
+        except Exception as record_exc:  # the lease expires and the rows are retried
+            print(f"⚠️  Outbox could not record the failed batch: {record_exc}")
+            return
+        if retrying:
+            self.wake()
+
+    async def _deliver(self, channel: NotificationChannel, notification_ids: List[int]) -> None:
+        async with self.session_factory() as db:
+            rows = (await db.execute(
+                select(Notification, User, Task, GoogleToken)
+                .join(User, User.id == Notification.user_id)
+                .outerjoin(Task, Task.id == Notification.task_id)
+                .outerjoin(GoogleToken, GoogleToken.user_id == Notification.user_id)
+                .where(Notification.id.in_(notification_ids))
+            )).all()
+
+            outcomes: Dict[int, object] = {}
+            sendable = []
+            for notification, user, task, token in rows:
+                if task is None:
+                    outcomes[notification.id] = LookupError("Task not found")
+                elif token is None:
+                    outcomes[notification.id] = LookupError("Google token not found for user")
+                else:
+                    sendable.append((notification, user, task, token))
+
+            if sendable and channel == NotificationChannel.EMAIL:
+                results = await run_in_threadpool(
+                    send_gmail_deadlines, [(user, task, token) for _, user, task, token in sendable]
+                )
+            elif sendable:
+                _, user, _, token = sendable[0]
+                results = await run_in_threadpool(
+                    upsert_calendar_events, user, [task for _, _, task, _ in sendable], token
+                )
+            else:
+                results = []
+            relinked = set()
+            for (notification, _, task, _), result in zip(sendable, results):
+                outcomes[notification.id] = result
+                if channel == NotificationChannel.CALENDAR and not isinstance(result, Exception):
+                    if task.calendar_event_id != result:
+                        task.calendar_event_id = result
+                        relinked.add(task.user_id)
+            for user_id in relinked:
+                await bump_task_version(db, user_id)
+
+            now = datetime.now(timezone.utc)
+            retrying = [
+                notification for notification, *_ in rows
+                if not self._record(notification, outcomes[notification.id], now)
+            ]
+            for token in {id(token): token for *_, token in sendable}.values():
+                sync_refreshed_token(token)
+            await db.commit()
+        if retrying:
+            self.wake()  # the poller is sleeping towards the lease expiry of these rows
+
+    def _record(self, notification: Notification, outcome, now: datetime) -> bool:
+        """Apply one delivery outcome; returns False if the row goes back in the queue"""
+        notification.attempts += 1
+        if not isinstance(outcome, Exception):
+            notification.status = NotificationStatus.SENT
+            notification.sent_at = now
+            notification.next_attempt_at = None
+            notification.error_message = None
+            self.sent += 1
+            return True
+
+        notification.error_message = _describe(outcome)
+        if _is_transient(outcome) and notification.attempts < self.max_attempts:
+            delay = min(self.backoff * 2 ** (notification.attempts - 1), self.backoff_max)
+            notification.next_attempt_at = now + delay * random.uniform(0.5, 1.0)
+            self.retried += 1
+            return False
+        notification.status = NotificationStatus.FAILED
+        notification.next_attempt_at = None
+        self.failed += 1
+        print(f"⚠️  Notification {notification.id} failed: {notification.error_message}")
+        return True
+
+
+notification_outbox = NotificationOutbox(SessionLocal)
@@ -0,0 +1,107 @@
+"""
+Batch priority scoring.
+
+Scores whole columns of tasks at once with NumPy against a single captured
+``now``. The rules mirror ``routers.tasks.calculate_priority_score`` exactly
+(same multiplications in the same order), which remains the per-task
+reference implementation.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, NamedTuple
+
+import numpy as np
+
+from models import TaskPriority, TaskStatus
+
+PRIORITY_CODES = {priority: code for code, priority in enumerate(TaskPriority)}
+STATUS_CODES = {task_status: code for code, task_status in enumerate(TaskStatus)}
+
+# Base score per priority code, in PRIORITY_CODES order
+_BASE_SCORES = np.array([
+    {
+        TaskPriority.LOW: 20,
+        TaskPriority.MEDIUM: 50,
+        TaskPriority.HIGH: 75,
+        TaskPriority.CRITICAL: 100,
+    }[priority]
+    for priority in TaskPriority
+], dtype=np.float64)
+
+_COMPLETED = STATUS_CODES[TaskStatus.COMPLETED]
+_MISSED = STATUS_CODES[TaskStatus.MISSED]
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+_HOUR_US = 3_600_000_000
+
+
+class TaskColumns(NamedTuple):
+    """Columnar view of the fields the score depends on"""
+    deadline_us: np.ndarray  # int64 microseconds since the epoch (UTC)
+    priority: np.ndarray     # int8 codes from PRIORITY_CODES
+    status: np.ndarray       # int8 codes from STATUS_CODES
+
+
+def to_epoch_us(moment: datetime) -> int:
+    return (moment - _EPOCH) // _MICROSECOND
+
+
+def encode_columns(deadlines: Iterable[datetime], priorities: Iterable, statuses: Iterable) -> TaskColumns:
+    """Build TaskColumns from parallel sequences (e.g. selected SQL columns)"""
+    medium = PRIORITY_CODES[TaskPriority.MEDIUM]
+    return TaskColumns(
+        deadline_us=np.fromiter((to_epoch_us(d) for d in deadlines), dtype=np.int64),
+        priority=np.fromiter((PRIORITY_CODES.get(p, medium) for p in priorities), dtype=np.int8),
+        status=np.fromiter((STATUS_CODES[s] for s in statuses), dtype=np.int8),
+    )
+
+
+def encode_tasks(tasks) -> TaskColumns:
+    """Build TaskColumns from Task objects"""
+    return encode_columns(
+        [t.deadline for t in tasks], [t.priority for t in tasks], [t.status for t in tasks]
+    )
+
+
+def score_columns(columns: TaskColumns, now: datetime) -> np.ndarray:
+    """Priority score (0-100) for every task, as float64"""
+    remaining_us = columns.deadline_us - to_epoch_us(now)
+    completed = columns.status == _COMPLETED
+
+    score = _BASE_SCORES[columns.priority]
+    score = score * np.where(completed, 0.1, np.where(columns.status == _MISSED, 0.05, 1.0))
+
+    urgency = np.select(
+        [
+            (remaining_us <= 0) & completed,
+            remaining_us <= 0,
+            remaining_us < _HOUR_US,
+            remaining_us < 24 * _HOUR_US,
+            remaining_us < 7 * 24 * _HOUR_US,
+        ],
+        [0.1, 2.0, 2.0, 1.5, 1.2],
+        default=1.0,
+    )
+    return np.minimum(score * urgency, 100.0)
+
+
+def rank_columns(columns: TaskColumns, scores: np.ndarray) -> np.ndarray:
+    """Indices ordering tasks by score (highest first), then earliest deadline"""
+    return np.lexsort((columns.deadline_us, -scores))
+
+
+def top_k_columns(columns: TaskColumns, scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the ``k`` best tasks in rank order, without sorting all of them.
+
+    A linear-time partition finds the k-th best score; only tasks scoring at
+    least that much (ties included, so the deadline tiebreak stays exact)
+    are sorted.
+    """
+    if k >= len(scores):
+        return rank_columns(columns, scores)
+    threshold = np.partition(-scores, k - 1)[k - 1]
+    candidates = np.flatnonzero(-scores <= threshold)
+    order = np.lexsort((columns.deadline_us[candidates], -scores[candidates]))
+    return candidates[order[:k]]
@@ -0,0 +1,88 @@
+"""
+Keyed token buckets.
+
+Each key (e.g. a user id) gets a bucket of ``burst`` tokens refilled at
+``rate`` tokens per second. ``take`` either spends a token or says how long
+until one is available, so callers can defer work instead of dropping it.
+Buckets live in a bounded LRU; an evicted key simply starts again full. Keys
+idle long enough to be full again are dropped as well, oldest first, so a
+flood of one-off keys (IPs, emails) does not stay in memory; every ``take``
+is O(1) amortized.
+
+``TokenBuckets`` is local to one process. With several workers, the limit
+would be multiplied by the worker count, so ``create_token_buckets`` returns
+``SharedTokenBuckets`` instead when ``CACHE_BACKEND`` names a shared store
+(``sqlite`` or ``redis``); the bucket state then lives in that store.
+Async callers use ``take_async``, which runs the shared store's I/O in the
+threadpool (the in-process buckets are cheap enough to take inline).
+"""
+
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+from cache import CACHE_BACKEND, CacheBackend, create_cache_backend
+
+
+class TokenBuckets:
+    """Per-key token buckets; not thread-safe, use from one event loop"""
+
+    def __init__(self, rate: float, burst: float, max_keys: int = 100000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[Hashable, Tuple[float, float]]" = OrderedDict()
+
+    def take(self, key: Hashable, now: Optional[float] = None) -> float:
+        """Spend one token for ``key``; returns 0.0, or the seconds until a token is free"""
+        now = time.monotonic() if now is None else now
+        tokens, updated = self._buckets.get(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / self.rate
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        # Least recently used first; a bucket idle this long is full, the same as no entry
+        idle = self.burst / self.rate
+        while True:
+            _, updated = next(iter(self._buckets.values()))
+            if now - updated < idle:
+                break  # stops at the latest key at the latest, which was just updated
+            self._buckets.popitem(last=False)
+        return wait
+
+    async def take_async(self, key: Hashable, now: Optional[float] = None) -> float:
+        return self.take(key, now)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class SharedTokenBuckets:
+    """Token buckets kept in a cache backend, so every worker spends from the same ones"""
+
+    def __init__(self, backend: CacheBackend, rate: float, burst: float, prefix: str = "bucket:"):
+        self.backend = backend
+        self.rate = rate
+        self.burst = burst
+        self.prefix = prefix
+
+    def take(self, key: Hashable, now: Optional[float] = None) -> float:
+        """Spend one token for ``key``; ``now`` is wall-clock time, shared between processes"""
+        return self.backend.take_token(f"{self.prefix}{key}", self.rate, self.burst, now)
+
+    async def take_async(self, key: Hashable, now: Optional[float] = None) -> float:
+        """``take`` without blocking the event loop on the store"""
+        return await self.backend.take_token_async(f"{self.prefix}{key}", self.rate, self.burst, now)
+
+
+def create_token_buckets(rate: float, burst: float, prefix: str = "bucket:"):
+    """Per-process buckets, or buckets in the shared store selected by CACHE_BACKEND"""
+    if CACHE_BACKEND in ("sqlite", "redis"):
+        return SharedTokenBuckets(create_cache_backend(), rate, burst, prefix)
+    return TokenBuckets(rate, burst)
@@ -0,0 +1,237 @@
+"""
+In-process deadline reminder scheduler.
+
+A reminder fires ``REMINDER_LEAD_MINUTES`` before a pending or in-progress
+task's deadline and is sent through Gmail. Only reminders due
+within the next ``REMINDER_HORIZON_MINUTES`` are held in memory, in a min-heap
+keyed by fire time; the window is extended with a range query on the
+``(status, deadline)`` index, so the table is never rescanned and a million
+pending tasks cost nothing until they come close.
+
+The task write paths call ``task_changed`` / ``task_removed`` after commit to
+keep the heap current. Writes handled by other processes never reach this
+heap, so with several workers (``serve.py``) the window is also reloaded
+every ``REMINDER_RESYNC_SECONDS``. Heap entries are invalidated lazily: ``_scheduled``
+holds the live fire time per task and stale entries are dropped when popped.
+Due reminders are queued as PENDING email notifications for the outbox
+(``services/outbox.py``), which sends them in Gmail batches with retries.
+A pending or sent email ``Notification`` created at or after the fire time
+marks a reminder as handled, so restarts and manual sends do not produce
+duplicates.
+"""
+
+import asyncio
+import heapq
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from database import SessionLocal
+from models import (
+    GoogleToken, Notification, NotificationChannel, NotificationStatus, Task, TaskStatus, User,
+)
+from services.outbox import notification_outbox, queue_notification
+
+REMINDERS_ENABLED = os.getenv("REMINDERS_ENABLED", "true").lower() in ("1", "true", "yes")
+REMINDER_LEAD_MINUTES = float(os.getenv("REMINDER_LEAD_MINUTES", "60"))
+REMINDER_HORIZON_MINUTES = float(os.getenv("REMINDER_HORIZON_MINUTES", "360"))
+REMINDER_RESYNC_SECONDS = float(os.getenv("REMINDER_RESYNC_SECONDS", "0"))  # 0: only this process writes
+
+ACTIVE_STATUSES = (TaskStatus.PENDING, TaskStatus.IN_PROGRESS)
+QUEUE_CHUNK_SIZE = 500
+
+
+class ReminderScheduler:
+    """Min-heap of upcoming reminders over a sliding window of the tasks table"""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        lead: timedelta = timedelta(minutes=REMINDER_LEAD_MINUTES),
+        horizon: timedelta = timedelta(minutes=REMINDER_HORIZON_MINUTES),
+        outbox=notification_outbox,
+        resync: timedelta = timedelta(seconds=REMINDER_RESYNC_SECONDS),
+    ):
+        self.session_factory = session_factory
+        self.lead = lead
+        self.horizon = horizon
+        self.resync = resync
+        self.outbox = outbox
+        self.queued = 0
+        self.skipped = 0
+        self._heap: List[Tuple[float, int]] = []
+        self._scheduled: Dict[int, float] = {}
+        self._window_end: Optional[datetime] = None
+        self._wakeup = asyncio.Event()
+        self._runner: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    # --- Lifecycle ---
+
+    async def start(self) -> None:
+        now = datetime.now(timezone.utc)
+        # asyncio primitives bind to the loop that first waits on them
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        await self._load_window(now - self.lead, now + self.horizon)
+        self._runner = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            # On Python 3.11 wait_for can swallow the cancel (zero timeout, or a wakeup at the same
+            # moment); the flag and the wakeup still end the loop
+            self._stopping = True
+            self._wakeup.set()
+            self._runner.cancel()
+            try:
+                await self._runner
+            except asyncio.CancelledError:
+                pass
+            self._runner = None
+        self._heap.clear()
+        self._scheduled.clear()
+        self._window_end = None
+
+    # --- Incremental updates from the write paths ---
+
+    def task_changed(self, task: Task) -> None:
+        """(Re)schedule ``task`` after it was created or updated"""
+        if self._window_end is None:
+            return
+        fire_at = task.deadline - self.lead
+        if task.status not in ACTIVE_STATUSES or fire_at > self._window_end:
+            # Beyond the window: picked up by the range query when it gets close
+            self._scheduled.pop(task.id, None)
+            return
+        self._push(task.id, fire_at)
+
+    def task_removed(self, task_id: int) -> None:
+        self._scheduled.pop(task_id, None)
+
+    async def refresh(self) -> None:
+        """Reload the current window, e.g. after rows were inserted without ids"""
+        if self._window_end is not None:
+            await self._load_window(datetime.now(timezone.utc) - self.lead, self._window_end)
+
+    def snapshot(self) -> dict:
+        return {
+            "scheduled": len(self._scheduled),
+            "window_end": self._window_end.isoformat() if self._window_end else None,
+            "queued": self.queued,
+            "skipped": self.skipped,
+        }
+
+    # --- Internals ---
+
+    def _push(self, task_id: int, fire_at: datetime) -> None:
+        timestamp = fire_at.timestamp()
+        if self._scheduled.get(task_id) == timestamp:
+            return
+        self._scheduled[task_id] = timestamp
+        heapq.heappush(self._heap, (timestamp, task_id))
+        if self._heap[0] == (timestamp, task_id):
+            self._wakeup.set()
+
+    async def _load_window(self, start: datetime, end: datetime) -> None:
+        """Schedule active tasks whose reminder falls in (start, end]"""
+        now = datetime.now(timezone.utc)
+        async with self.session_factory() as db:
+            rows = (await db.execute(
+                select(Task.id, Task.deadline).where(
+                    Task.deadline > max(start + self.lead, now),
+                    Task.deadline <= end + self.lead,
+                    Task.status.in_(ACTIVE_STATUSES),
+                )
+            )).all()
+        for task_id, deadline in rows:
+            self._push(task_id, deadline - self.lead)
+        self._window_end = end
+
+    async def _run(self) -> None:
+        next_resync = datetime.now(timezone.utc) + self.resync
+        while not self._stopping:
+            now = datetime.now(timezone.utc)
+            if self._window_end - now < self.horizon / 2:
+                try:
+                    await self._load_window(self._window_end, now + self.horizon)
+                except Exception as exc:
+                    print(f"⚠️  Reminder window refill failed, retrying: {exc}")
+                    await asyncio.sleep(5)
+                    continue
+            if self.resync and now >= next_resync:
+                next_resync = now + self.resync
+                try:
+                    await self.refresh()
+                except Exception as exc:
+                    print(f"⚠️  Reminder window resync failed: {exc}")
+
+            due = []
+            while self._heap and self._heap[0][0] <= now.timestamp():
+                timestamp, task_id = heapq.heappop(self._heap)
+                if self._scheduled.get(task_id) == timestamp:
+                    del self._scheduled[task_id]
+                    due.append((task_id, datetime.fromtimestamp(timestamp, timezone.utc)))
+            for start in range(0, len(due), QUEUE_CHUNK_SIZE):
+                chunk = due[start:start + QUEUE_CHUNK_SIZE]
+                try:
+                    await self._queue_reminders(dict(chunk))
+                except Exception as exc:  # keep the scheduler alive whatever one chunk does
+                    self.skipped += len(chunk)
+                    print(f"⚠️  Queueing {len(chunk)} reminders failed: {exc}")
+
+            next_refill = (self._window_end - self.horizon / 2 - now).total_seconds()
+            if self.resync:
+                next_refill = min(next_refill, (next_resync - now).total_seconds())
+            next_fire = self._heap[0][0] - now.timestamp() if self._heap else next_refill
+            if self._stopping:
+                return
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.0, min(next_fire, next_refill)))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _queue_reminders(self, fire_times: Dict[int, datetime]) -> None:
+        """Queue the reminders for ``{task_id: fire_at}`` that are still wanted"""
+        async with self.session_factory() as db:
+            rows = (await db.execute(
+                select(Task.id, Task.user_id, Task.deadline, Task.status)
+                .join(User, User.id == Task.user_id)
+                .join(GoogleToken, GoogleToken.user_id == Task.user_id)
+                .where(Task.id.in_(fire_times), User.is_active.is_(True))
+            )).all()
+            last_queued = dict((await db.execute(
+                select(Notification.task_id, func.max(Notification.created_at))
+                .where(
+                    Notification.task_id.in_(fire_times),
+                    Notification.channel == NotificationChannel.EMAIL,
+                    Notification.status.in_([NotificationStatus.PENDING, NotificationStatus.SENT]),
+                )
+                .group_by(Notification.task_id)
+            )).all())
+
+            queued = 0
+            for task_id, user_id, deadline, task_status in rows:
+                fire_at = deadline - self.lead
+                queued_at = last_queued.get(task_id)
+                if (
+                    task_status not in ACTIVE_STATUSES
+                    # Deadline moved later and this process has not seen it yet
+                    or fire_at > fire_times[task_id] + timedelta(seconds=1)
+                    or (queued_at is not None and queued_at >= fire_at)
+                ):
+                    continue
+                queue_notification(db, user_id, task_id, NotificationChannel.EMAIL)
+                queued += 1
+            # Deleted, closed, already handled, or the user never connected Google
+            self.skipped += len(fire_times) - queued
+            if queued:
+                await db.commit()
+                self.queued += queued
+                self.outbox.wake()
+
+
+reminder_scheduler = ReminderScheduler(SessionLocal)
@@ -0,0 +1,342 @@
+"""
+Task change events for ``GET /api/tasks/stream`` (server-sent events).
+
+The task write paths ``await task_events.publish(user_id, kind, data)`` after
+commit; every open stream of that user receives the event. Publishing is
+best-effort: a broker error (e.g. Redis down) is printed and counted as
+``dropped``, and the user's streams in this process get a ``reset``; the
+write that already committed still succeeds. ``kind`` is
+``created`` / ``updated`` (data: the task's columns), ``deleted`` (data:
+``{"id": ...}``) or ``reset`` (reload the list, e.g. after an import).
+
+Each user's last ``TASK_EVENTS_REPLAY`` events are kept so a reconnecting
+client that sends ``Last-Event-ID`` gets what it missed. The memory broker
+only keeps them for users with a stream open, or closed within
+``TASK_EVENTS_REPLAY_SECONDS``: nobody else can come back with an id. If
+that event is no longer kept, or the client reads too slowly and its queue
+overflows, it gets a ``reset`` instead of a gap. ``close_streams`` ends every open
+stream, e.g. when a worker shuts down; clients reconnect with
+``Last-Event-ID`` to another worker.
+
+``TASK_EVENTS_BACKEND`` picks the broker, like ``CACHE_BACKEND``:
+
+- ``memory`` (default): fan-out within one process.
+- ``redis``: events go to a Redis stream per user (replay) and a pub/sub
+  channel that every worker listens on, so several uvicorn workers can
+  serve the same user's streams.
+"""
+
+import asyncio
+import enum
+import itertools
+import json
+import os
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Any, AsyncIterator, Deque, Dict, List, NamedTuple, Optional, Set
+
+from cache import CACHE_URL
+from models import Task
+
+TASK_EVENTS_BACKEND = os.getenv("TASK_EVENTS_BACKEND", "memory")  # "memory" or "redis"
+TASK_EVENTS_URL = os.getenv("TASK_EVENTS_URL", CACHE_URL)
+TASK_EVENTS_REPLAY = int(os.getenv("TASK_EVENTS_REPLAY", "200"))  # kept per user for Last-Event-ID
+TASK_EVENTS_QUEUE_SIZE = int(os.getenv("TASK_EVENTS_QUEUE_SIZE", "1000"))  # per open stream
+TASK_EVENTS_MAX_USERS = int(os.getenv("TASK_EVENTS_MAX_USERS", "1000"))  # memory backend replay buffers
+# Memory backend: how long after a user's last stream closed their events are still kept for a reconnect
+TASK_EVENTS_REPLAY_SECONDS = float(os.getenv("TASK_EVENTS_REPLAY_SECONDS", "300"))
+TASK_STREAM_HEARTBEAT_SECONDS = float(os.getenv("TASK_STREAM_HEARTBEAT_SECONDS", "15"))
+
+TASK_FIELDS = (
+    "id", "user_id", "title", "description", "deadline", "status", "priority",
+    "calendar_event_id", "created_at", "updated_at", "completed_at",
+)
+
+
+class TaskEvent(NamedTuple):
+    id: Optional[str]  # None for resets, which are not replayed
+    kind: str
+    data: Any
+
+
+RESET = TaskEvent(None, "reset", None)
+CLOSE = TaskEvent(None, "close", None)  # ends the stream, never sent
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+def task_payload(task: Task) -> dict:
+    """The task's columns as JSON-ready values; clients merge them into their copy"""
+    return {field: _json_value(getattr(task, field)) for field in TASK_FIELDS}
+
+
+def format_sse(event: TaskEvent) -> str:
+    lines = [f"id: {event.id}"] if event.id is not None else []
+    lines += [f"event: {event.kind}", f"data: {json.dumps(event.data)}"]
+    return "\n".join(lines) + "\n\n"
+
+
+class Subscription:
+    """One open stream's queue of events"""
+
+    def __init__(self, user_id: int, maxsize: int = TASK_EVENTS_QUEUE_SIZE):
+        self.user_id = user_id
+        self._queue: "asyncio.Queue[TaskEvent]" = asyncio.Queue(maxsize)
+
+    def push(self, event: TaskEvent) -> None:
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # The client is not keeping up: drop what it has not read and make it reload
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._queue.put_nowait(RESET)
+
+    def close(self) -> None:
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        self._queue.put_nowait(CLOSE)
+
+    async def get(self) -> TaskEvent:
+        return await self._queue.get()
+
+
+class TaskEventBroker:
+    """Fans events out to this process's subscriptions; subclasses decide where events travel"""
+
+    def __init__(self):
+        self.published = 0
+        self.dropped = 0
+        self._subscriptions: Dict[int, Set[Subscription]] = {}
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def publish(self, user_id: int, kind: str, data: Any) -> None:
+        """Send an event; best-effort, so a broker error never fails the write that already committed"""
+        try:
+            await self._publish(user_id, kind, data)
+        except Exception as exc:
+            self.dropped += 1
+            print(f"⚠️  Task event {kind} for user {user_id} dropped: {exc}")
+            # This process's streams of the user would miss it; have them reload instead
+            self._deliver(user_id, RESET)
+            return
+        self.published += 1
+
+    async def _publish(self, user_id: int, kind: str, data: Any) -> None:
+        raise NotImplementedError
+
+    async def replay(self, user_id: int, last_event_id: str) -> Optional[List[TaskEvent]]:
+        """Events after ``last_event_id``, or None if it is no longer kept"""
+        raise NotImplementedError
+
+    def subscribe(self, user_id: int) -> Subscription:
+        subscription = Subscription(user_id)
+        self._subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscriptions = self._subscriptions.get(subscription.user_id)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.user_id]
+
+    def close_streams(self) -> None:
+        """End every open stream of this process"""
+        for subscriptions in self._subscriptions.values():
+            for subscription in subscriptions:
+                subscription.close()
+
+    def snapshot(self) -> dict:
+        return {
+            "backend": type(self).__name__,
+            "streams": sum(len(subscriptions) for subscriptions in self._subscriptions.values()),
+            "published": self.published,
+            "dropped": self.dropped,
+        }
+
+    def _deliver(self, user_id: int, event: TaskEvent) -> None:
+        for subscription in self._subscriptions.get(user_id, ()):
+            subscription.push(event)
+
+
+class MemoryBroker(TaskEventBroker):
+    """Events and replay buffers local to one process"""
+
+    def __init__(self, replay: int = TASK_EVENTS_REPLAY, max_users: int = TASK_EVENTS_MAX_USERS,
+                 replay_seconds: float = TASK_EVENTS_REPLAY_SECONDS):
+        super().__init__()
+        self.replay_size = replay
+        self.max_users = max_users
+        self.replay_seconds = replay_seconds
+        # Ids from an earlier process never match, so those clients get a reset
+        self._boot = int(time.time() * 1000)
+        self._seq = itertools.count(1)
+        self._recent: "OrderedDict[int, Deque[TaskEvent]]" = OrderedDict()
+        self._last_closed: "OrderedDict[int, float]" = OrderedDict()  # user -> when their last stream closed
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        super().unsubscribe(subscription)
+        if subscription.user_id not in self._subscriptions:
+            self._last_closed[subscription.user_id] = time.monotonic()
+            self._last_closed.move_to_end(subscription.user_id)
+            while len(self._last_closed) > self.max_users:
+                self._last_closed.popitem(last=False)
+
+    def _may_reconnect(self, user_id: int) -> bool:
+        if user_id in self._subscriptions:
+            return True
+        closed = self._last_closed.get(user_id)
+        if closed is not None and time.monotonic() - closed < self.replay_seconds:
+            return True
+        self._last_closed.pop(user_id, None)
+        return False
+
+    async def _publish(self, user_id: int, kind: str, data: Any) -> None:
+        event = TaskEvent(f"{self._boot}-{next(self._seq)}", kind, data)
+        if self._may_reconnect(user_id):
+            recent = self._recent.get(user_id)
+            if recent is None:
+                recent = self._recent[user_id] = deque(maxlen=self.replay_size)
+            self._recent.move_to_end(user_id)
+            while len(self._recent) > self.max_users:
+                self._recent.popitem(last=False)
+            recent.append(event)
+        else:
+            self._recent.pop(user_id, None)  # no stream to resume; a later one starts with a reset
+        self._deliver(user_id, event)
+
+    async def replay(self, user_id: int, last_event_id: str) -> Optional[List[TaskEvent]]:
+        recent = list(self._recent.get(user_id, ()))
+        for index, event in enumerate(recent):
+            if event.id == last_event_id:
+                return recent[index + 1:]
+        return None
+
+
+class RedisBroker(TaskEventBroker):
+    """
+    Events shared by all workers through a Redis-compatible server (5.0+).
+
+    ``publish`` appends to the user's stream (trimmed to about
+    TASK_EVENTS_REPLAY entries) and announces the event on one pub/sub
+    channel; each worker runs a single listener that fans it out locally.
+    """
+
+    def __init__(self, url: str = TASK_EVENTS_URL, prefix: str = "deadlinesync:task-events:",
+                 replay: int = TASK_EVENTS_REPLAY):
+        super().__init__()
+        try:
+            import redis.asyncio as redis
+        except ImportError as exc:
+            raise RuntimeError("TASK_EVENTS_BACKEND=redis requires the 'redis' package") from exc
+        self.prefix = prefix
+        self.replay_size = replay
+        self._client = redis.Redis.from_url(url)
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(self.prefix + "channel")
+        self._listener = asyncio.create_task(self._listen(pubsub))
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        await self._client.close()
+
+    async def _publish(self, user_id: int, kind: str, data: Any) -> None:
+        payload = json.dumps(data)
+        event_id = await self._client.xadd(
+            f"{self.prefix}{user_id}", {"kind": kind, "data": payload},
+            maxlen=self.replay_size, approximate=True,
+        )
+        await self._client.publish(self.prefix + "channel", json.dumps({
+            "user_id": user_id, "id": event_id.decode(), "kind": kind, "data": payload,
+        }))
+
+    async def replay(self, user_id: int, last_event_id: str) -> Optional[List[TaskEvent]]:
+        key = f"{self.prefix}{user_id}"
+        try:
+            if not await self._client.xrange(key, min=last_event_id, max=last_event_id):
+                return None
+        except Exception:
+            return None  # not a stream id, e.g. from the memory backend
+        entries = await self._client.xrange(key, min=last_event_id, max="+", count=self.replay_size + 1)
+        return [
+            TaskEvent(entry_id.decode(), fields[b"kind"].decode(), json.loads(fields[b"data"]))
+            for entry_id, fields in entries[1:]
+        ]
+
+    async def _listen(self, pubsub) -> None:
+        while True:
+            try:
+                async for message in pubsub.listen():
+                    event = json.loads(message["data"])
+                    self._deliver(event["user_id"], TaskEvent(event["id"], event["kind"], json.loads(event["data"])))
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                # Connected streams may have missed events; tell them to reload
+                print(f"⚠️  Task event listener lost Redis, reconnecting: {exc}")
+                for subscriptions in self._subscriptions.values():
+                    for subscription in subscriptions:
+                        subscription.push(RESET)
+                await asyncio.sleep(1)
+
+
+async def stream_task_events(
+    broker: TaskEventBroker, user_id: int, last_event_id: Optional[str],
+    heartbeat: Optional[float] = None,
+) -> AsyncIterator[str]:
+    """SSE body: missed events after ``last_event_id``, then live events and heartbeats"""
+    heartbeat = heartbeat or TASK_STREAM_HEARTBEAT_SECONDS
+    # Subscribe before replaying so nothing published in between is lost
+    subscription = broker.subscribe(user_id)
+    try:
+        yield "retry: 3000\n: connected\n\n"
+        replayed: Set[str] = set()
+        if last_event_id:
+            missed = await broker.replay(user_id, last_event_id)
+            for event in missed if missed is not None else [RESET]:
+                replayed.add(event.id)
+                yield format_sse(event)
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield ": heartbeat\n\n"  # keeps proxies from closing an idle stream
+                continue
+            if event is CLOSE:
+                return
+            if event.id is None or event.id not in replayed:
+                yield format_sse(event)
+    finally:
+        broker.unsubscribe(subscription)
+
+
+def create_task_event_broker() -> TaskEventBroker:
+    """Build the broker selected by TASK_EVENTS_BACKEND"""
+    if TASK_EVENTS_BACKEND == "redis":
+        return RedisBroker(TASK_EVENTS_URL)
+    return MemoryBroker()
+
+
+task_events = create_task_event_broker()
@@ -0,0 +1,289 @@
+"""
+Materialized per-user task analytics.
+
+``user_task_stats`` holds status counts and completion-time totals for each
+user. The task write paths call ``apply_task_change`` inside their own
+transaction so the counters move together with the rows; ``rebuild_task_stats``
+recomputes them from ``tasks`` and doubles as the repair job:
+
+    python -m services.task_stats [--user-id ID]
+
+The row's ``version`` is bumped by every task write, including ones that
+leave the counters alone (``bump_task_version``), so ``read_task_version``
+tells whether anything about the user's tasks changed without reading them.
+"""
+
+import argparse
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, NamedTuple, Optional, Tuple
+
+from sqlalchemy import and_, bindparam, delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Task, TaskStatus, UserTaskStats
+from schemas import TaskAnalytics
+
+STATUS_COLUMNS = {
+    TaskStatus.PENDING: "pending_tasks",
+    TaskStatus.IN_PROGRESS: "in_progress_tasks",
+    TaskStatus.COMPLETED: "completed_tasks",
+    TaskStatus.MISSED: "missed_tasks",
+}
+
+
+class TaskStatsSnapshot(NamedTuple):
+    """The parts of a task that contribute to the counters"""
+    status: TaskStatus
+    completion_hours: Optional[float]
+
+    @classmethod
+    def of(cls, task: Task) -> "TaskStatsSnapshot":
+        return cls.from_values(task.status, task.created_at, task.completed_at)
+
+    @classmethod
+    def from_values(
+        cls, status: TaskStatus, created_at: Optional[datetime], completed_at: Optional[datetime]
+    ) -> "TaskStatsSnapshot":
+        hours = None
+        if completed_at and created_at:
+            hours = (completed_at - created_at).total_seconds() / 3600
+        return cls(status, hours)
+
+
+def hours_between(start, end, dialect_name: str):
+    """SQL expression for (end - start) in hours on the given dialect"""
+    if dialect_name == "sqlite":
+        return (func.julianday(end) - func.julianday(start)) * 24
+    return func.extract("epoch", end - start) / 3600
+
+
+def _counter_columns(dialect_name: str) -> list:
+    """Aggregate expressions over ``tasks`` matching the UserTaskStats columns"""
+    hours = hours_between(Task.created_at, Task.completed_at, dialect_name)
+    return [
+        func.count(Task.id).label("total_tasks"),
+        *[
+            func.count(Task.id).filter(Task.status == task_status).label(column)
+            for task_status, column in STATUS_COLUMNS.items()
+        ],
+        func.coalesce(
+            func.sum(hours).filter(Task.completed_at.isnot(None)), 0.0
+        ).label("completion_hours_sum"),
+        func.count(Task.completed_at).label("completion_count"),
+    ]
+
+
+def _insert_ignore(dialect_name: str):
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    return dialect_insert(UserTaskStats).on_conflict_do_nothing(index_elements=["user_id"])
+
+
+async def ensure_task_stats(db: AsyncSession, user_id: int) -> None:
+    """
+    Create the user's counters row from ``tasks`` if it does not exist yet.
+
+    Must run before the pending task change is flushed, so the baseline does
+    not already include it (sessions are created with autoflush=False).
+    """
+    exists = await db.scalar(select(UserTaskStats.user_id).where(UserTaskStats.user_id == user_id))
+    if exists is not None:
+        return
+    dialect_name = db.bind.dialect.name
+    row = (await db.execute(
+        select(*_counter_columns(dialect_name)).where(Task.user_id == user_id)
+    )).one()
+    await db.execute(_insert_ignore(dialect_name).values(user_id=user_id, **row._asdict()))
+
+
+async def apply_task_change(
+    db: AsyncSession,
+    user_id: int,
+    before: Optional[TaskStatsSnapshot],
+    after: Optional[TaskStatsSnapshot],
+) -> None:
+    """
+    Move the user's counters from ``before`` to ``after`` in the current transaction.
+
+    Pass ``before=None`` for a new task and ``after=None`` for a deleted one.
+    Deltas are applied with ``SET col = col + delta`` so concurrent writers
+    never overwrite each other.
+    """
+    await apply_task_changes(db, user_id, [(before, after)])
+
+
+async def apply_task_changes(
+    db: AsyncSession,
+    user_id: int,
+    changes: Iterable[Tuple[Optional[TaskStatsSnapshot], Optional[TaskStatsSnapshot]]],
+) -> None:
+    """Apply many ``(before, after)`` changes for one user as a single counters UPDATE, bumping its version"""
+    deltas = {}
+    for before, after in changes:
+        for snapshot, sign in ((before, -1), (after, 1)):
+            if snapshot is None:
+                continue
+            deltas["total_tasks"] = deltas.get("total_tasks", 0) + sign
+            column = STATUS_COLUMNS[snapshot.status]
+            deltas[column] = deltas.get(column, 0) + sign
+            if snapshot.completion_hours is not None:
+                deltas["completion_count"] = deltas.get("completion_count", 0) + sign
+                deltas["completion_hours_sum"] = (
+                    deltas.get("completion_hours_sum", 0.0) + sign * snapshot.completion_hours
+                )
+    deltas = {column: delta for column, delta in deltas.items() if delta}
+    deltas["version"] = 1
+
+    await ensure_task_stats(db, user_id)
+    await db.execute(
+        update(UserTaskStats)
+        .where(UserTaskStats.user_id == user_id)
+        .values({column: getattr(UserTaskStats, column) + delta for column, delta in deltas.items()})
+    )
+
+
+async def bump_task_version(db: AsyncSession, user_id: int) -> None:
+    """Record a task change that does not move the counters (title, deadline, calendar link...)"""
+    await apply_task_changes(db, user_id, [])
+
+
+async def read_task_version(db: AsyncSession, user_id: int) -> int:
+    """The user's task version; 0 until the counters row exists"""
+    version = await db.scalar(select(UserTaskStats.version).where(UserTaskStats.user_id == user_id))
+    return version or 0
+
+
+async def rebuild_task_stats(db: AsyncSession, user_id: Optional[int] = None) -> None:
+    """Recompute counters from ``tasks`` for one user, or for everyone"""
+    versions = select(UserTaskStats.user_id, UserTaskStats.version)
+    clear = delete(UserTaskStats)
+    source = select(Task.user_id, *_counter_columns(db.bind.dialect.name)).group_by(Task.user_id)
+    if user_id is not None:
+        versions = versions.where(UserTaskStats.user_id == user_id)
+        clear = clear.where(UserTaskStats.user_id == user_id)
+        source = source.where(Task.user_id == user_id)
+    versions = (await db.execute(versions)).all()
+    await db.execute(clear)
+    columns = ["user_id", "total_tasks", *STATUS_COLUMNS.values(), "completion_hours_sum", "completion_count"]
+    await db.execute(insert(UserTaskStats).from_select(columns, source))
+    if versions:
+        # Users with no tasks left keep a zeroed row, or their version would start over
+        await db.execute(_insert_ignore(db.bind.dialect.name), [{"user_id": uid} for uid, _ in versions])
+        # Carry versions over (and bump them, the analytics may have changed) so old ETags never match
+        await db.execute(
+            update(UserTaskStats.__table__)
+            .where(UserTaskStats.__table__.c.user_id == bindparam("uid"))
+            .values(version=bindparam("new_version")),
+            [{"uid": uid, "new_version": version + 1} for uid, version in versions],
+        )
+
+
+async def read_task_analytics(db: AsyncSession, user_id: int) -> TaskAnalytics:
+    """
+    Dashboard analytics from the counters row plus live counts of the
+    time-relative figures. Those only read active (pending / in progress)
+    tasks and missed tasks due in the future, as ranges of the
+    ``(user_id, status, deadline)`` index; missed tasks, overdue by the time
+    the sweeper marks them, come from the counters row.
+    """
+    await ensure_task_stats(db, user_id)
+    stats = (await db.execute(
+        select(UserTaskStats).where(UserTaskStats.user_id == user_id)
+        .execution_options(populate_existing=True)
+    )).scalars().one()
+
+    now = datetime.now(timezone.utc)
+    week_ahead = now + timedelta(days=7)
+    active = Task.status.in_([TaskStatus.PENDING, TaskStatus.IN_PROGRESS])
+
+    def count(*where):
+        return select(func.count(Task.id)).where(Task.user_id == user_id, *where).scalar_subquery()
+
+    live = (await db.execute(
+        select(
+            count(active, Task.deadline < now).label("active_overdue"),
+            count(active, Task.deadline > now, Task.deadline < week_ahead).label("upcoming"),
+            # Missed by hand before the deadline: not overdue yet
+            count(Task.status == TaskStatus.MISSED, Task.deadline >= now).label("missed_not_due"),
+        )
+    )).one()
+
+    total = stats.total_tasks
+    return TaskAnalytics(
+        total_tasks=total,
+        completed_tasks=stats.completed_tasks,
+        pending_tasks=stats.pending_tasks,
+        missed_tasks=stats.missed_tasks,
+        in_progress_tasks=stats.in_progress_tasks,
+        completion_rate=(stats.completed_tasks / total * 100) if total > 0 else 0,
+        average_completion_time=(
+            stats.completion_hours_sum / stats.completion_count if stats.completion_count else None
+        ),
+        overdue_count=live.active_overdue + stats.missed_tasks - live.missed_not_due,
+        upcoming_count=live.upcoming,
+    )
+
+
+async def aggregate_task_analytics(db: AsyncSession, user_id: int) -> TaskAnalytics:
+    """
+    Full-scan equivalent of ``read_task_analytics`` in a single aggregate query.
+
+    Does not depend on the counters row, so it serves as the reference the
+    materialized figures are checked against.
+    """
+    now = datetime.now(timezone.utc)
+    week_ahead = now + timedelta(days=7)
+    hours_to_complete = hours_between(Task.created_at, Task.completed_at, db.bind.dialect.name)
+    active = Task.status.in_([TaskStatus.PENDING, TaskStatus.IN_PROGRESS])
+
+    row = (await db.execute(
+        select(
+            func.count(Task.id).label("total"),
+            func.count(Task.id).filter(Task.status == TaskStatus.COMPLETED).label("completed"),
+            func.count(Task.id).filter(Task.status == TaskStatus.PENDING).label("pending"),
+            func.count(Task.id).filter(Task.status == TaskStatus.IN_PROGRESS).label("in_progress"),
+            func.count(Task.id).filter(Task.status == TaskStatus.MISSED).label("missed"),
+            func.avg(hours_to_complete).filter(Task.completed_at.isnot(None)).label("avg_hours"),
+            func.count(Task.id).filter(
+                and_(Task.deadline < now, Task.status != TaskStatus.COMPLETED)
+            ).label("overdue"),
+            func.count(Task.id).filter(
+                and_(active, Task.deadline > now, Task.deadline < week_ahead)
+            ).label("upcoming"),
+        ).where(Task.user_id == user_id)
+    )).one()
+
+    total = row.total
+    completion_rate = (row.completed / total * 100) if total > 0 else 0
+
+    return TaskAnalytics(
+        total_tasks=total,
+        completed_tasks=row.completed,
+        pending_tasks=row.pending,
+        missed_tasks=row.missed,
+        in_progress_tasks=row.in_progress,
+        completion_rate=completion_rate,
+        average_completion_time=float(row.avg_hours) if row.avg_hours is not None else None,
+        overdue_count=row.overdue,
+        upcoming_count=row.upcoming
+    )
+
+
+async def _repair(user_id: Optional[int]) -> None:
+    from database import SessionLocal, engine
+
+    async with SessionLocal() as db:
+        await rebuild_task_stats(db, user_id)
+        await db.commit()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild user_task_stats from the tasks table")
+    parser.add_argument("--user-id", type=int, default=None, help="Only rebuild this user")
+    args = parser.parse_args()
+    asyncio.run(_repair(args.user_id))
+    print("✅ user_task_stats rebuilt")
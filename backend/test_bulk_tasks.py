@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Bulk task endpoints (POST / PATCH / DELETE /api/tasks/bulk and /bulk/calendar).
+
+Drives the app in-process against a scratch SQLite database built from the
+Alembic migrations, and checks the per-item results (201, 200, 202, 204, 404,
+422) in request order, the MAX_BULK_ITEMS limit on every endpoint, that
+other users' tasks are out of reach, and that each request moves the
+analytics counters and bumps the task version once, or not at all when no
+item succeeded.
+
+Run with: python test_bulk_tasks.py   (or: python -m pytest test_bulk_tasks.py)
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+
+# Use a scratch database unless another in-process test module already picked one
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='bulk-tasks-')}/bulk.db"
+os.environ["REMINDERS_ENABLED"] = "false"
+os.environ["CALENDAR_SYNC_ENABLED"] = "false"
+
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import func, select  # noqa: E402
+
+from database import SessionLocal  # noqa: E402
+from main import app  # noqa: E402
+from models import GoogleToken, Notification, NotificationChannel  # noqa: E402
+from schemas import MAX_BULK_ITEMS  # noqa: E402
+from services.task_stats import aggregate_task_analytics, read_task_version  # noqa: E402
+
+# Colors for terminal output
+GREEN = '\033[92m'
+RED = '\033[91m'
+END = '\033[0m'
+
+DEADLINE = (datetime.now(timezone.utc) + timedelta(days=2)).isoformat()
+
+
+def register(client, email):
+    resp = client.post("/api/auth/register", json={
+        "name": "Bulk", "email": email, "password": "bulkpassword123"
+    })
+    return {"Authorization": f"Bearer {resp.json()['access_token']}"}, resp.json()["user"]["id"]
+
+
+def version(client, user_id):
+    async def read():
+        async with SessionLocal() as db:
+            return await read_task_version(db, user_id)
+
+    return client.portal.call(read)
+
+
+def analytics_match(client, h, user_id):
+    """The dashboard (from the counters) equals the full scan"""
+    async def reference():
+        async with SessionLocal() as db:
+            return await aggregate_task_analytics(db, user_id)
+
+    analytics = client.get("/api/tasks/analytics/dashboard", headers=h).json()
+    expected = client.portal.call(reference).model_dump()
+    return all(
+        abs(analytics[key] - value) < 1e-6 if isinstance(value, float) else analytics[key] == value
+        for key, value in expected.items()
+    )
+
+
+def statuses(resp):
+    assert resp.status_code == 200, resp.text
+    body = resp.json()
+    assert [result["index"] for result in body["results"]] == list(range(len(body["results"])))
+    assert body["succeeded"] + body["failed"] == len(body["results"])
+    return [result["status"] for result in body["results"]]
+
+
+def bulk_delete(client, h, ids):
+    return client.request("DELETE", "/api/tasks/bulk", headers=h, json={"ids": ids})
+
+
+def test_per_item_results_counters_and_versions():
+    command.upgrade(Config(os.path.join(BACKEND_DIR, "alembic.ini")), "head")
+    with TestClient(app) as client:
+        h, user_id = register(client, "bulk-items@example.com")
+        other_h, _ = register(client, "bulk-other@example.com")
+        foreign = client.post("/api/tasks/", headers=other_h, json={"title": "Not yours", "deadline": DEADLINE}).json()["id"]
+
+        start = version(client, user_id)
+        resp = client.post("/api/tasks/bulk", headers=h, json={"items": [
+            {"title": "First", "deadline": DEADLINE, "priority": "high"},
+            {"title": "", "deadline": DEADLINE},
+            {"title": "No deadline"},
+            {"title": "Second", "deadline": DEADLINE, "description": "with a description"},
+            {"title": "Bad priority", "deadline": DEADLINE, "priority": "urgent"},
+            {"title": "Third", "deadline": DEADLINE},
+        ]})
+        assert statuses(resp) == [201, 422, 422, 201, 422, 201]
+        body = resp.json()
+        assert (body["succeeded"], body["failed"]) == (3, 3)
+        first, second, third = [result["id"] for result in body["results"] if result["status"] == 201]
+        assert body["results"][0]["task"]["priority"] == "high" and body["results"][3]["task"]["title"] == "Second"
+        assert body["results"][1]["error"].startswith("title:") and body["results"][2]["error"].startswith("deadline:")
+        assert version(client, user_id) == start + 1
+        assert analytics_match(client, h, user_id)
+
+        resp = client.patch("/api/tasks/bulk", headers=h, json={"items": [
+            {"id": first, "status": "completed"},
+            {"id": 999999, "status": "completed"},
+            {"id": second, "status": "bogus"},
+            {"status": "completed"},
+            {"id": foreign, "title": "Taken"},
+            {"id": second, "status": "in_progress", "title": "Second, started"},
+        ]})
+        assert statuses(resp) == [200, 404, 422, 422, 404, 200]
+        results = resp.json()["results"]
+        assert results[0]["task"]["status"] == "completed" and results[0]["task"]["completed_at"]
+        assert results[5]["task"]["title"] == "Second, started"
+        assert version(client, user_id) == start + 2
+        assert analytics_match(client, h, user_id)
+        assert client.get(f"/api/tasks/{foreign}", headers=other_h).json()["title"] == "Not yours"
+
+        resp = bulk_delete(client, h, [third, 999999, third, foreign, first])
+        assert statuses(resp) == [204, 404, 404, 404, 204]
+        assert version(client, user_id) == start + 3
+        assert analytics_match(client, h, user_id)
+        assert [task["id"] for task in client.get("/api/tasks/", headers=h).json()] == [second]
+        assert client.get(f"/api/tasks/{foreign}", headers=other_h).status_code == 200
+
+        # Requests where every item fails change nothing, not even the version
+        assert statuses(client.post("/api/tasks/bulk", headers=h, json={"items": [{"title": ""}]})) == [422]
+        assert statuses(client.patch("/api/tasks/bulk", headers=h, json={"items": [{"id": foreign, "title": "x"}]})) == [404]
+        assert statuses(bulk_delete(client, h, [999999])) == [404]
+        assert version(client, user_id) == start + 3
+
+
+def test_calendar_upserts_are_queued_per_item():
+    command.upgrade(Config(os.path.join(BACKEND_DIR, "alembic.ini")), "head")
+    with TestClient(app) as client:
+        h, user_id = register(client, "bulk-calendar@example.com")
+        ids = [result["id"] for result in client.post("/api/tasks/bulk", headers=h, json={"items": [
+            {"title": f"Event {i}", "deadline": DEADLINE} for i in range(2)
+        ]}).json()["results"]]
+
+        async def connect():
+            async with SessionLocal() as db:
+                db.add(GoogleToken(user_id=user_id, access_token="token"))
+                await db.commit()
+
+        async def queued():
+            async with SessionLocal() as db:
+                return await db.scalar(select(func.count(Notification.id)).where(
+                    Notification.user_id == user_id, Notification.channel == NotificationChannel.CALENDAR
+                ))
+
+        client.portal.call(connect)
+        resp = client.post("/api/tasks/bulk/calendar", headers=h, json={"ids": [ids[0], 999999, ids[1]]})
+        assert statuses(resp) == [202, 404, 202]
+        assert client.portal.call(queued) == 2
+
+
+def test_requests_over_max_bulk_items_are_rejected_whole():
+    command.upgrade(Config(os.path.join(BACKEND_DIR, "alembic.ini")), "head")
+    with TestClient(app) as client:
+        h, user_id = register(client, "bulk-limit@example.com")
+        start = version(client, user_id)
+
+        too_many = [{"title": f"Task {i}", "deadline": DEADLINE} for i in range(MAX_BULK_ITEMS + 1)]
+        assert client.post("/api/tasks/bulk", headers=h, json={"items": too_many}).status_code == 422
+        assert client.post("/api/tasks/bulk", headers=h, json={"items": []}).status_code == 422
+        assert version(client, user_id) == start
+        assert client.get("/api/tasks/", headers=h).json() == []
+
+        resp = client.post("/api/tasks/bulk", headers=h, json={"items": too_many[:MAX_BULK_ITEMS]})
+        assert resp.json()["succeeded"] == MAX_BULK_ITEMS
+        ids = [result["id"] for result in resp.json()["results"]]
+        assert version(client, user_id) == start + 1
+
+        for method, path, body in [
+            ("PATCH", "/api/tasks/bulk", {"items": [{"id": task_id, "status": "completed"} for task_id in ids + [1]]}),
+            ("DELETE", "/api/tasks/bulk", {"ids": ids + [1]}),
+            ("POST", "/api/tasks/bulk/calendar", {"ids": ids + [1]}),
+        ]:
+            assert client.request(method, path, headers=h, json=body).status_code == 422, (method, path)
+        assert version(client, user_id) == start + 1
+
+        resp = client.patch("/api/tasks/bulk", headers=h, json={"items": [
+            {"id": task_id, "status": "completed"} for task_id in ids
+        ]})
+        assert resp.json()["succeeded"] == MAX_BULK_ITEMS
+        assert version(client, user_id) == start + 2
+        assert analytics_match(client, h, user_id)
+        assert client.get("/api/tasks/analytics/dashboard", headers=h).json()["completed_tasks"] == MAX_BULK_ITEMS
+
+        assert bulk_delete(client, h, ids).json()["succeeded"] == MAX_BULK_ITEMS
+        assert version(client, user_id) == start + 3
+        assert analytics_match(client, h, user_id)
+
+
+if __name__ == "__main__":
+    failures = 0
+    for name, test in list(globals().items()):
+        if not name.startswith("test_"):
+            continue
+        try:
+            test()
+            print(f"{GREEN}✓{END} {name}")
+        except AssertionError as exc:
+            failures += 1
+            print(f"{RED}✗{END} {name}: {exc}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Conditional GET (ETag / If-None-Match) on the polled task endpoints.
+
+Drives the app in-process against a scratch SQLite database built from the
+Alembic migrations, and checks that a matching poll gets 304 without a
+query on the tasks table, and that task writes change the ETag.
+
+Run with: python test_conditional_get.py   (or: python -m pytest test_conditional_get.py)
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+
+# Use a scratch database unless another in-process test module already picked one
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='conditional-get-')}/etag.db"
+os.environ["REMINDERS_ENABLED"] = "false"
+os.environ["CALENDAR_SYNC_ENABLED"] = "false"
+
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from database import engine  # noqa: E402
+from main import app  # noqa: E402
+
+# Colors for terminal output
+GREEN = '\033[92m'
+RED = '\033[91m'
+END = '\033[0m'
+
+POLLED = ["/api/tasks/", "/api/tasks/analytics/dashboard", "/api/tasks/prioritized/all"]
+TOMORROW = (datetime.now(timezone.utc) + timedelta(days=1)).isoformat()
+
+statements = []
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _capture(conn, cursor, statement, parameters, context, executemany):
+    statements.append(" ".join(statement.split()))
+
+
+def login(client, email):
+    resp = client.post("/api/auth/register", json={
+        "name": "Etag User", "email": email, "password": "etagpassword123"
+    })
+    return {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+
+def test_unchanged_tasks_get_304_without_reading_them():
+    command.upgrade(Config(os.path.join(BACKEND_DIR, "alembic.ini")), "head")
+    with TestClient(app) as client:
+        h = login(client, "etag@example.com")
+        client.post("/api/tasks/", headers=h, json={"title": "Polled", "deadline": TOMORROW})
+
+        for path in POLLED:
+            first = client.get(path, headers=h)
+            assert first.status_code == 200 and first.headers["etag"].startswith('W/"')
+            assert first.headers["cache-control"] == "private, no-cache"
+
+            del statements[:]
+            again = client.get(path, headers={**h, "If-None-Match": first.headers["etag"]})
+            assert again.status_code == 304, path
+            assert again.content == b"" and again.headers["etag"] == first.headers["etag"]
+            assert not [s for s in statements if " tasks" in s], f"{path} read the tasks table"
+
+        # Query strings and users get their own ETags
+        listed = client.get("/api/tasks/", headers=h).headers["etag"]
+        assert client.get("/api/tasks/?limit=1", headers=h).headers["etag"] != listed
+        other = login(client, "etag-other@example.com")
+        assert client.get("/api/tasks/", headers={**other, "If-None-Match": listed}).status_code == 200
+
+
+def test_task_writes_change_the_etag():
+    command.upgrade(Config(os.path.join(BACKEND_DIR, "alembic.ini")), "head")
+    with TestClient(app) as client:
+        h = login(client, "etag-writes@example.com")
+        task = client.post("/api/tasks/", headers=h, json={"title": "Before", "deadline": TOMORROW}).json()
+        etags = {path: client.get(path, headers=h).headers["etag"] for path in POLLED}
+
+        # A title edit leaves the counters alone but still bumps the version
+        client.put(f"/api/tasks/{task['id']}", headers=h, json={"title": "After"})
+        for path, etag in etags.items():
+            resp = client.get(path, headers={**h, "If-None-Match": etag})
+            assert resp.status_code == 200 and resp.headers["etag"] != etag, path
+        assert client.get("/api/tasks/", headers=h).json()[0]["title"] == "After"
+
+        etag = client.get("/api/tasks/", headers=h).headers["etag"]
+        client.delete(f"/api/tasks/{task['id']}", headers=h)
+        assert client.get("/api/tasks/", headers={**h, "If-None-Match": etag}).json() == []
+
+
+if __name__ == "__main__":
+    failures = 0
+    for name, test in list(globals().items()):
+        if not name.startswith("test_"):
+            continue
+        try:
+            test()
+            print(f"{GREEN}✓{END} {name}")
+        except AssertionError as exc:
+            failures += 1
+            print(f"{RED}✗{END} {name}: {exc}")
+    sys.exit(1 if failures else 0)
@@ -187,6 +187,39 @@ def test_analytics(token):
         print_error(f"Analytics failed: {response.status_code} - {response.text}")
         return None
 
+def test_bulk_tasks(token):
+    """Test bulk create, update and delete"""
+    print_info("Testing bulk task endpoints...")
+    headers = {"Authorization": f"Bearer {token}"}
+    deadline = (datetime.now() + timedelta(days=3)).isoformat()
+    items = [{"title": f"Bulk task {i}", "deadline": deadline} for i in range(20)]
+    items.append({"title": "", "deadline": deadline})  # invalid on purpose
+
+    response = requests.post(f"{BASE_URL}/api/tasks/bulk", json={"items": items}, headers=headers)
+    if response.status_code != 200:
+        print_error(f"Bulk create failed: {response.status_code} - {response.text}")
+        return None
+    data = response.json()
+    ids = [result["id"] for result in data["results"] if result["status"] == 201]
+    print_success(f"Bulk created {data['succeeded']} tasks, {data['failed']} rejected")
+
+    response = requests.patch(
+        f"{BASE_URL}/api/tasks/bulk",
+        json={"items": [{"id": task_id, "status": "completed"} for task_id in ids[:10]]},
+        headers=headers
+    )
+    if response.status_code != 200:
+        print_error(f"Bulk update failed: {response.status_code} - {response.text}")
+        return None
+    print_success(f"Bulk updated {response.json()['succeeded']} tasks")
+
+    response = requests.delete(f"{BASE_URL}/api/tasks/bulk", json={"ids": ids}, headers=headers)
+    if response.status_code != 200:
+        print_error(f"Bulk delete failed: {response.status_code} - {response.text}")
+        return None
+    print_success(f"Bulk deleted {response.json()['succeeded']} tasks")
+    return data
+
 def run_all_tests():
     """Run all API tests"""
     print("\n" + "="*60)
@@ -242,6 +275,11 @@ def run_all_tests():
     
     print("\n" + "-"*60 + "\n")
     
+    # Test bulk endpoints
+    test_bulk_tasks(token)
+    
+    print("\n" + "-"*60 + "\n")
+    
     # Test analytics
     test_analytics(token)
     
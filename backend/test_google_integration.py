@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Gmail/Calendar integration checks against a local fake Google server.
+
+Starts ``fake_google.FakeGoogle`` and points the Google clients at it, then
+checks client caching, batching, token refresh, the notification
+endpoints with their outbox and the two-way calendar sync (in-process, on a
+scratch SQLite database built from the Alembic migrations). No network access or real Google credentials
+are needed.
+
+Run with: python test_google_integration.py   (or: python -m pytest test_google_integration.py)
+"""
+
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+
+from fake_google import FakeGoogle  # noqa: E402
+
+# Use a scratch database unless another in-process test module already picked one
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='google-integration-')}/google.db"
+os.environ["REMINDERS_ENABLED"] = "false"
+os.environ["CALENDAR_SYNC_ENABLED"] = "false"
+
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from cache import SQLiteCache  # noqa: E402
+from database import engine  # noqa: E402
+from main import app  # noqa: E402
+from services import google_integration, outbox  # noqa: E402
+from services.outbox import notification_outbox  # noqa: E402
+from services.rate_limit import SharedTokenBuckets, TokenBuckets  # noqa: E402
+
+DB_PATH = engine.url.database
+
+# Read at call time, so this works even if the module was imported earlier
+google = FakeGoogle().start()
+google_integration.GOOGLE_API_ROOT = f"{google.url}/"
+google_integration.TOKEN_URI = f"{google.url}/token"
+google_integration.GOOGLE_CLIENT_ID = "fake-client-id"
+google_integration.GOOGLE_CLIENT_SECRET = "fake-client-secret"
+
+# Colors for terminal output
+GREEN = '\033[92m'
+RED = '\033[91m'
+END = '\033[0m'
+
+NOW = datetime.now(timezone.utc)
+
+
+def make_user(user_id):
+    user = SimpleNamespace(id=user_id, name=f"User {user_id}", email=f"user{user_id}@example.com")
+    token = SimpleNamespace(
+        user_id=user_id, access_token=f"access-{user_id}", refresh_token=f"refresh-{user_id}",
+        expires_at=None, scope=None,
+    )
+    return user, token
+
+
+def make_task(task_id):
+    return SimpleNamespace(
+        id=task_id, title=f"Task {task_id}", description=None, status="pending",
+        deadline=NOW + timedelta(hours=task_id), calendar_event_id=None,
+    )
+
+
+def test_clients_are_cached_until_the_token_changes():
+    user, token = make_user(101)
+    builds = google_integration.client_stats["builds"]
+    google_integration.send_gmail_deadline(user, make_task(1), token)
+    google_integration.send_gmail_deadline(user, make_task(2), token)
+    assert google_integration.client_stats["builds"] == builds + 1
+
+    token.access_token = "reconnected"
+    google_integration.send_gmail_deadline(user, make_task(3), token)
+    assert google_integration.client_stats["builds"] == builds + 2
+    assert google.calls[-1][2] == "reconnected"
+
+
+def test_reminders_for_many_users_go_out_in_one_batch_request():
+    users = [make_user(200 + i) for i in range(5)]
+    google.forbidden.add("access-203")
+    items = [(user, make_task(i), token) for i, (user, token) in enumerate(users * 4)]
+    wire = len(google.http_requests)
+
+    results = google_integration.send_gmail_deadlines(items)
+
+    assert len(google.http_requests) - wire == 1
+    assert google.http_requests[-1] == ("POST", "/batch/gmail/v1")
+    failed = [i for i, result in enumerate(results) if isinstance(result, Exception)]
+    assert failed == [3, 8, 13, 18]  # only user 203's calls
+    assert all(str(result).startswith("msg-") for i, result in enumerate(results) if i not in failed)
+
+
+def test_batches_split_at_the_batch_size():
+    user, token = make_user(300)
+    tasks = [make_task(i) for i in range(google_integration.GOOGLE_BATCH_SIZE + 1)]
+    wire = len(google.http_requests)
+    results = google_integration.upsert_calendar_events(user, tasks, token)
+    assert len(google.http_requests) - wire == 2
+    assert all(str(result).startswith("evt-") for result in results)
+
+
+def test_expired_token_is_refreshed_and_synced_back():
+    user, token = make_user(400)
+    google.expired.add("access-400")
+    refreshes = google.refreshes
+
+    results = google_integration.send_gmail_deadlines([(user, make_task(1), token)])
+
+    assert str(results[0]).startswith("msg-")
+    assert google.refreshes == refreshes + 1
+    assert google_integration.sync_refreshed_token(token)
+    assert token.access_token == f"refreshed-{google.refreshes}"
+    assert token.expires_at > NOW
+    # The row now matches the refreshed client, so it is reused rather than rebuilt
+    builds = google_integration.client_stats["builds"]
+    google_integration.send_gmail_deadline(user, make_task(2), token)
+    assert google_integration.client_stats["builds"] == builds
+
+
+def wait_for_notifications(client, h, task_id, done, timeout=10.0):
+    """Poll the task's notifications until ``done(notifications)`` holds"""
+    deadline = time.monotonic() + timeout
+    while True:
+        notifications = client.get(f"/api/tasks/{task_id}/notifications", headers=h).json()
+        if done(notifications):
+            return notifications
+        assert time.monotonic() < deadline, f"outbox did not finish: {notifications}"
+        time.sleep(0.02)
+
+
+def all_sent(notifications):
+    return notifications and all(n["status"] == "sent" for n in notifications)
+
+
+def test_notification_endpoints_go_through_the_outbox():
+    command.upgrade(Config(os.path.join(BACKEND_DIR, "alembic.ini")), "head")
+    notification_outbox.backoff = timedelta(milliseconds=50)
+    with TestClient(app) as client:
+        token = client.post("/api/auth/register", json={
+            "name": "Google User", "email": "google@example.com", "password": "googlepassword123"
+        }).json()["access_token"]
+        h = {"Authorization": f"Bearer {token}"}
+        client.post("/api/tasks/google/tokens", headers=h, json={
+            "access_token": "stale-token", "refresh_token": "refresh-e2e",
+        })
+        google.expired.add("stale-token")
+        ids = [
+            client.post("/api/tasks/", headers=h, json={
+                "title": f"Synced {i}", "deadline": (NOW + timedelta(days=i + 1)).isoformat(),
+            }).json()["id"]
+            for i in range(6)
+        ]
+
+        # The request only queues; the refresh and send happen in the outbox
+        resp = client.post(f"/api/tasks/{ids[0]}/notify/email", headers=h)
+        assert resp.status_code == 202 and resp.json()["status"] == "pending"
+        wait_for_notifications(client, h, ids[0], all_sent)
+
+        wire = len(google.http_requests)
+        resp = client.post("/api/tasks/bulk/calendar", headers=h, json={"ids": ids[:3] + [999999]})
+        body = resp.json()
+        assert resp.status_code == 200 and body["succeeded"] == 3 and body["failed"] == 1
+        assert [result["status"] for result in body["results"]] == [202, 202, 202, 404]
+        for task_id in ids[:3]:
+            wait_for_notifications(client, h, task_id, lambda n: any(x["channel"] == "calendar" and x["status"] == "sent" for x in n))
+        assert google.http_requests[wire:] == [("POST", "/batch/calendar/v3")]
+        tasks = {task["id"]: task for task in client.get("/api/tasks/", headers=h).json()}
+        assert all(tasks[task_id]["calendar_event_id"].startswith("evt-") for task_id in ids[:3])
+
+        # A transient error is retried with backoff
+        google.fail_next.append(503)
+        client.post(f"/api/tasks/{ids[3]}/notify/email", headers=h)
+        sent = wait_for_notifications(client, h, ids[3], all_sent)
+        assert sent[0]["attempts"] == 2
+
+        # Over the per-user rate the rows wait for a token instead of failing
+        notification_outbox.limiter = TokenBuckets(rate=20, burst=1)
+        throttled = notification_outbox.throttled
+        for _ in range(3):
+            client.post(f"/api/tasks/{ids[4]}/notify/email", headers=h)
+        assert len(wait_for_notifications(client, h, ids[4], all_sent)) == 3
+        assert notification_outbox.throttled > throttled
+
+        # Shared buckets (CACHE_BACKEND=sqlite|redis) are taken in the threadpool, not on the event loop
+        cache = SQLiteCache(os.path.join(tempfile.mkdtemp(prefix="outbox-buckets-"), "cache.db"))
+        take_token, threads = cache.take_token, []
+        cache.take_token = lambda *args: threads.append(threading.current_thread()) or take_token(*args)
+        notification_outbox.limiter = SharedTokenBuckets(cache, rate=20, burst=1, prefix="outbox:user:")
+        throttled = notification_outbox.throttled
+        for _ in range(3):
+            client.post(f"/api/tasks/{ids[4]}/notify/email", headers=h)
+        assert len(wait_for_notifications(client, h, ids[4], all_sent)) == 6
+        assert notification_outbox.throttled > throttled
+        assert threads and client.portal.call(threading.current_thread) not in threads
+
+        # A permanent error fails at once and keeps the message
+        with sqlite3.connect(DB_PATH) as conn:
+            current = conn.execute(
+                "SELECT access_token FROM google_tokens JOIN users ON users.id = user_id "
+                "WHERE email = 'google@example.com'"
+            ).fetchone()[0]
+        google.forbidden.add(current)
+        client.post(f"/api/tasks/{ids[5]}/notify/email", headers=h)
+        failed = wait_for_notifications(client, h, ids[5], lambda n: n and n[0]["status"] == "failed")
+        assert failed[0]["attempts"] == 1 and "Insufficient Permission" in failed[0]["error_message"]
+
+    # The access token refreshed during the first send was stored on the row
+    assert current.startswith("refreshed-")
+
+
+
+def test_a_batch_that_fails_as_a_whole_counts_its_attempts():
+    command.upgrade(Config(os.path.join(BACKEND_DIR, "alembic.ini")), "head")
+    saved = (outbox.send_gmail_deadlines, notification_outbox.max_attempts, notification_outbox.backoff)
+
+    def poison(messages):
+        raise TypeError("unexpected payload")
+
+    outbox.send_gmail_deadlines = poison
+    notification_outbox.max_attempts = 3
+    notification_outbox.backoff = timedelta(milliseconds=50)
+    try:
+        with TestClient(app) as client:
+            token = client.post("/api/auth/register", json={
+                "name": "Poison", "email": "poison@example.com", "password": "googlepassword123"
+            }).json()["access_token"]
+            h = {"Authorization": f"Bearer {token}"}
+            client.post("/api/tasks/google/tokens", headers=h, json={"access_token": "poison-token"})
+            task_id = client.post("/api/tasks/", headers=h, json={
+                "title": "Poison", "deadline": (NOW + timedelta(days=1)).isoformat(),
+            }).json()["id"]
+            client.post(f"/api/tasks/{task_id}/notify/email", headers=h)
+            failed = wait_for_notifications(client, h, task_id, lambda n: n and n[0]["status"] == "failed")
+    finally:
+        outbox.send_gmail_deadlines, notification_outbox.max_attempts, notification_outbox.backoff = saved
+
+    # Retried with backoff like a transient error, then given up instead of being re-leased forever
+    assert failed[0]["attempts"] == 3 and failed[0]["error_message"] == "unexpected payload"
+
+
+def test_outbox_stops_when_cancellation_surfaces_as_a_driver_error():
+    # aiosqlite reports a call cancelled mid-flight as "no active connection", not CancelledError
+    async def driver_call():
+        try:
+            await asyncio.sleep(30)
+        except asyncio.CancelledError:
+            raise sqlite3.OperationalError("no active connection")
+
+    async def run():
+        box = outbox.NotificationOutbox(session_factory=None, workers=1)
+        recorded = []
+
+        async def claim():
+            if not box._jobs.qsize():
+                await box._jobs.put(("gmail", [1]))
+            return []
+
+        async def deliver(channel, notification_ids):
+            await driver_call()
+
+        async def record(notification_ids, exc):
+            recorded.append(notification_ids)
+
+        box._claim, box._next_due_in = claim, driver_call
+        box._deliver, box._record_batch_failure = deliver, record
+        await box.start()
+        await asyncio.sleep(0.1)
+        await asyncio.wait_for(box.stop(drain=0.2), timeout=5)
+        return recorded
+
+    # A delivery cut short by shutdown is left to its lease, not counted as a failed attempt
+    assert asyncio.run(run()) == []
+
+
+def test_calendar_sync_moves_only_what_changed():
+    command.upgrade(Config(os.path.join(BACKEND_DIR, "alembic.ini")), "head")
+    google.events.clear()  # the fake has one calendar; drop other tests' events with clashing task ids
+    with TestClient(app) as client:
+        token = client.post("/api/auth/register", json={
+            "name": "Sync User", "email": "sync@example.com", "password": "syncpassword123"
+        }).json()["access_token"]
+        h = {"Authorization": f"Bearer {token}"}
+        client.post("/api/tasks/google/tokens", headers=h, json={"access_token": "sync-access"})
+        ids = [
+            client.post("/api/tasks/", headers=h, json={
+                "title": f"Sync {i}", "deadline": (NOW + timedelta(days=i + 1)).isoformat(),
+            }).json()["id"]
+            for i in range(5)
+        ]
+        client.put(f"/api/tasks/{ids[4]}", headers=h, json={"status": "completed"})
+
+        def sync():
+            wire = len(google.http_requests)
+            resp = client.post("/api/tasks/google/calendar/sync", headers=h)
+            assert resp.status_code == 200, resp.text
+            return resp.json(), google.http_requests[wire:]
+
+        # First sync lists everything and creates events for the active tasks only
+        result, _ = sync()
+        assert result["full_sync"] and result["pushed"] == 4 and result["failed"] == 0
+        tasks = {task["id"]: task for task in client.get("/api/tasks/", headers=h).json()}
+        assert tasks[ids[4]]["calendar_event_id"] is None
+        events = {task_id: tasks[task_id]["calendar_event_id"] for task_id in ids[:4]}
+        assert all(google.events[event_id]["status"] == "confirmed" for event_id in events.values())
+
+        # Nothing changed: one listing call, our own pushes come back and change nothing
+        result, requests = sync()
+        assert requests == [("GET", requests[0][1])] and requests[0][1].split("?")[0].endswith("/events")
+        assert result == {"full_sync": False, "pulled": 4, "applied": 0, "pushed": 0, "failed": 0}
+
+        # A local edit is pushed; remote edits and deletions are pulled
+        client.put(f"/api/tasks/{ids[0]}", headers=h, json={"title": "Edited here"})
+        moved = (NOW + timedelta(days=9)).replace(microsecond=0)
+        google.edit_event(events[ids[1]], summary="Edited in Calendar", start={"dateTime": moved.isoformat()})
+        google.delete_event(events[ids[2]])
+        result, _ = sync()
+        assert result == {"full_sync": False, "pulled": 2, "applied": 2, "pushed": 1, "failed": 0}
+        assert google.events[events[ids[0]]]["summary"] == "Edited here"
+        tasks = {task["id"]: task for task in client.get("/api/tasks/", headers=h).json()}
+        assert tasks[ids[1]]["title"] == "Edited in Calendar"
+        assert datetime.fromisoformat(tasks[ids[1]]["deadline"].replace("Z", "+00:00")) == moved
+        assert tasks[ids[2]]["calendar_event_id"] is None
+
+        # An expired sync token falls back to a full listing without re-pushing
+        google.expire_sync_tokens()
+        result, _ = sync()
+        assert result["full_sync"] and result["applied"] == 0 and result["pushed"] == 0
+
+
+if __name__ == "__main__":
+    failures = 0
+    for name, test in list(globals().items()):
+        if not name.startswith("test_"):
+            continue
+        try:
+            test()
+            print(f"{GREEN}✓{END} {name}")
+        except AssertionError as exc:
+            failures += 1
+            print(f"{RED}✗{END} {name}: {exc}")
+    google.stop()
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Request, database and Google API metrics at /api/metrics.
+
+Drives the app in-process against a scratch SQLite database built from the
+Alembic migrations (and a local fake Google server for the API timings),
+then reads the Prometheus text back and checks the counts.
+
+Run with: python test_metrics.py   (or: python -m pytest test_metrics.py)
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+
+from fake_google import FakeGoogle  # noqa: E402
+
+# Use a scratch database unless another in-process test module already picked one
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='metrics-')}/metrics.db"
+os.environ["REMINDERS_ENABLED"] = "false"
+os.environ["CALENDAR_SYNC_ENABLED"] = "false"
+
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from database import engine  # noqa: E402
+from main import app  # noqa: E402
+from metrics import Histogram  # noqa: E402
+from services import google_integration  # noqa: E402
+
+# Colors for terminal output
+GREEN = '\033[92m'
+RED = '\033[91m'
+END = '\033[0m'
+
+TOMORROW = (datetime.now(timezone.utc) + timedelta(days=1)).isoformat()
+TASK_ROUTE = 'method="GET",route="/api/tasks/{task_id}"'
+
+statements = []
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _capture(conn, cursor, statement, parameters, context, executemany):
+    statements.append(statement)
+
+
+def samples(client):
+    """The scrape as {'name{labels}': value}"""
+    resp = client.get("/api/metrics")
+    assert resp.status_code == 200 and resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+    return {
+        line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1])
+        for line in resp.text.splitlines() if line and not line.startswith("#")
+    }
+
+
+def login(client, email):
+    resp = client.post("/api/auth/register", json={
+        "name": "Metrics User", "email": email, "password": "metricspassword123"
+    })
+    return {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+
+def test_requests_are_counted_by_route_template():
+    command.upgrade(Config(os.path.join(BACKEND_DIR, "alembic.ini")), "head")
+    with TestClient(app) as client:
+        h = login(client, "metrics@example.com")
+        ids = [
+            client.post("/api/tasks/", headers=h, json={"title": f"Task {i}", "deadline": TOMORROW}).json()["id"]
+            for i in range(2)
+        ]
+        before = samples(client)
+        for task_id in ids:
+            assert client.get(f"/api/tasks/{task_id}", headers=h).status_code == 200
+        assert client.get("/api/tasks/999999", headers=h).status_code == 404
+        assert client.get("/no/such/path").status_code == 404
+        after = samples(client)
+
+    def delta(key):
+        return after.get(key, 0) - before.get(key, 0)
+
+    # Ids are not labels: both tasks land on the template
+    assert delta(f'http_requests_total{{{TASK_ROUTE},status="200"}}') == 2
+    assert delta(f'http_requests_total{{{TASK_ROUTE},status="404"}}') == 1
+    assert delta('http_requests_total{method="GET",route="other",status="404"}') == 1
+    assert delta(f'http_request_duration_seconds_count{{{TASK_ROUTE}}}') == 3
+    assert delta(f'http_request_duration_seconds_bucket{{{TASK_ROUTE},le="+Inf"}}') == 3
+    assert delta(f'http_request_duration_seconds_sum{{{TASK_ROUTE}}}') > 0
+    # The scrape itself is the one request in flight
+    assert after["http_requests_in_flight"] == 1
+    assert after["process_id"] == os.getpid()
+
+
+def test_db_queries_are_counted_per_request():
+    command.upgrade(Config(os.path.join(BACKEND_DIR, "alembic.ini")), "head")
+    with TestClient(app) as client:
+        h = login(client, "metrics-db@example.com")
+        task = client.post("/api/tasks/", headers=h, json={"title": "Counted", "deadline": TOMORROW}).json()
+        before = samples(client)
+        del statements[:]
+        client.get(f"/api/tasks/{task['id']}", headers=h)
+        ran = len(statements)
+        after = samples(client)
+
+    assert ran > 0
+    assert after[f"http_request_db_queries_sum{{{TASK_ROUTE}}}"] - before.get(
+        f"http_request_db_queries_sum{{{TASK_ROUTE}}}", 0) == ran
+    assert after[f"http_request_db_seconds_sum{{{TASK_ROUTE}}}"] > 0
+    # Every statement is also timed on its own, whoever ran it
+    assert after["db_query_duration_seconds_count"] - before["db_query_duration_seconds_count"] >= ran
+    # The scrape runs no SQL
+    scrape = 'http_request_db_queries_sum{method="GET",route="/api/metrics"}'
+    assert after[scrape] == before.get(scrape, 0)
+
+
+def test_google_calls_are_timed_by_outcome():
+    google = FakeGoogle().start()
+    names = ("GOOGLE_API_ROOT", "TOKEN_URI", "GOOGLE_CLIENT_ID", "GOOGLE_CLIENT_SECRET")
+    saved = {name: getattr(google_integration, name) for name in names}
+    for name, value in zip(names, (f"{google.url}/", f"{google.url}/token", "fake-client-id", "fake-client-secret")):
+        setattr(google_integration, name, value)
+    user = SimpleNamespace(id=501, name="Google User", email="google-metrics@example.com")
+    token = SimpleNamespace(user_id=501, access_token="access-501", refresh_token=None, expires_at=None, scope=None)
+    task = SimpleNamespace(
+        id=1, title="Timed", description=None, status="pending",
+        deadline=datetime.now(timezone.utc) + timedelta(hours=1), calendar_event_id=None,
+    )
+    try:
+        google_integration.send_gmail_deadline(user, task, token)
+        google_integration.send_gmail_deadlines([(user, task, token)] * 3)
+        google.fail_next = [400]
+        try:
+            google_integration.upsert_calendar_event(user, task, token)
+        except Exception:
+            pass
+        with TestClient(app) as client:
+            scraped = samples(client)
+    finally:
+        for name, value in saved.items():
+            setattr(google_integration, name, value)
+        google.stop()
+
+    assert scraped['google_api_call_duration_seconds_count{api="gmail",call="messages.send",outcome="ok"}'] >= 1
+    assert scraped['google_api_call_duration_seconds_count{api="gmail",call="batch",outcome="ok"}'] >= 1
+    failed = [key for key in scraped if 'call="events.insert"' in key and 'outcome="ok"' not in key]
+    assert failed, "the failed calendar call was not recorded"
+
+
+def test_histogram_text_format():
+    histogram = Histogram("demo_seconds", "Demo", ("path",), buckets=(0.25, 1))
+    for value in (0.125, 0.25, 0.5, 3):
+        histogram.observe(value, 'a"b\\c')
+    assert histogram.render() == [
+        "# HELP demo_seconds Demo",
+        "# TYPE demo_seconds histogram",
+        'demo_seconds_bucket{path="a\\"b\\\\c",le="0.25"} 2',
+        'demo_seconds_bucket{path="a\\"b\\\\c",le="1"} 3',
+        'demo_seconds_bucket{path="a\\"b\\\\c",le="+Inf"} 4',
+        'demo_seconds_sum{path="a\\"b\\\\c"} 3.875',
+        'demo_seconds_count{path="a\\"b\\\\c"} 4',
+    ]
+
+
+if __name__ == "__main__":
+    failures = 0
+    for name, test in list(globals().items()):
+        if not name.startswith("test_"):
+            continue
+        try:
+            test()
+            print(f"{GREEN}✓{END} {name}")
+        except AssertionError as exc:
+            failures += 1
+            print(f"{RED}✗{END} {name}: {exc}")
+    sys.exit(1 if failures else 0)
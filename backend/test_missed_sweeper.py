@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Sweeping overdue tasks to MISSED (services/missed_sweeper.py).
+
+Drives the app in-process against a scratch SQLite database built from the
+Alembic migrations, runs the sweeper in small batches and checks the tasks,
+the analytics counters, the ETag and the published task events.
+
+Run with: python test_missed_sweeper.py   (or: python -m pytest test_missed_sweeper.py)
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+
+# Use a scratch database unless another in-process test module already picked one
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='missed-sweeper-')}/sweeper.db"
+os.environ["REMINDERS_ENABLED"] = "false"
+os.environ["CALENDAR_SYNC_ENABLED"] = "false"
+os.environ["MISSED_SWEEP_ENABLED"] = "false"
+
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from database import SessionLocal, engine  # noqa: E402
+from main import app  # noqa: E402
+from services.missed_sweeper import MissedSweeper  # noqa: E402
+from services.task_events import task_events  # noqa: E402
+from services.task_stats import aggregate_task_analytics  # noqa: E402
+
+# Colors for terminal output
+GREEN = '\033[92m'
+RED = '\033[91m'
+END = '\033[0m'
+
+
+def test_overdue_tasks_are_marked_missed_in_batches():
+    command.upgrade(Config(os.path.join(BACKEND_DIR, "alembic.ini")), "head")
+    with TestClient(app) as client:
+        resp = client.post("/api/auth/register", json={
+            "name": "Sweeper", "email": "sweeper@example.com", "password": "sweeperpassword123"
+        })
+        user_id = resp.json()["user"]["id"]
+        h = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+        now = datetime.now(timezone.utc)
+        created = client.post("/api/tasks/bulk", headers=h, json={"items": [
+            {"title": f"Overdue {i}", "deadline": (now - timedelta(hours=i + 1)).isoformat()} for i in range(5)
+        ] + [
+            {"title": "Later", "deadline": (now + timedelta(days=1)).isoformat()},
+            {"title": "Done late", "deadline": (now - timedelta(days=1)).isoformat()},
+            {"title": "Given up", "deadline": (now + timedelta(days=2)).isoformat()},
+        ]}).json()
+        ids = [result["id"] for result in created["results"]]
+        client.patch("/api/tasks/bulk", headers=h, json={"items": [
+            {"id": ids[0], "status": "in_progress"}, {"id": ids[6], "status": "completed"},
+            {"id": ids[7], "status": "missed"},
+        ]})
+        etag = client.get("/api/tasks/analytics/dashboard", headers=h).headers["etag"]
+        published = task_events.published
+
+        sweeper = MissedSweeper(SessionLocal, batch_size=2)
+        assert client.portal.call(sweeper.sweep) == 5
+        assert client.portal.call(sweeper.sweep) == 0
+        assert sweeper.snapshot() == {"sweeps": 2, "missed": 5}
+        assert task_events.published - published == 5
+
+        tasks = {task["id"]: task for task in client.get("/api/tasks/", headers=h).json()}
+        for task_id in ids[:5]:
+            assert tasks[task_id]["status"] == "missed"
+            assert tasks[task_id]["completed_at"] == tasks[task_id]["deadline"]
+        assert tasks[ids[5]]["status"] == "pending" and tasks[ids[6]]["status"] == "completed"
+
+        # The materialized counters moved with the rows, and polls see the change
+        resp = client.get("/api/tasks/analytics/dashboard", headers={**h, "If-None-Match": etag})
+        assert resp.status_code == 200
+        analytics = resp.json()
+        assert (analytics["missed_tasks"], analytics["pending_tasks"], analytics["in_progress_tasks"]) == (6, 1, 0)
+
+        async def reference():
+            async with SessionLocal() as db:
+                return await aggregate_task_analytics(db, user_id)
+
+        expected = client.portal.call(reference).model_dump()
+        # Overdue counts the swept tasks but not the one given up before its deadline
+        assert (analytics["overdue_count"], analytics["upcoming_count"]) == (5, 1)
+        for key in (
+            "total_tasks", "completed_tasks", "pending_tasks", "missed_tasks", "in_progress_tasks",
+            "overdue_count", "upcoming_count",
+        ):
+            assert analytics[key] == expected[key], key
+        assert abs(analytics["average_completion_time"] - expected["average_completion_time"]) < 1e-6
+
+
+def race_the_sweep(client, email, new_status):
+    """A user moves an overdue task to ``new_status`` while the sweeper is between its read and its write"""
+    resp = client.post("/api/auth/register", json={"name": "Racer", "email": email, "password": "sweeperpassword123"})
+    user_id = resp.json()["user"]["id"]
+    h = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+    deadline = (datetime.now(timezone.utc) - timedelta(hours=1)).isoformat()
+    task_id = client.post("/api/tasks/", headers=h, json={"title": "Racing", "deadline": deadline}).json()["id"]
+
+    def write():
+        """A writer that reads the task's status inside its own write transaction"""
+        conn = sqlite3.connect(engine.url.database, timeout=10, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            (status,) = conn.execute("SELECT status FROM tasks WHERE id = ?", (task_id,)).fetchone()
+            old, new = f"{status.lower()}_tasks", f"{new_status}_tasks"
+            conn.execute("UPDATE tasks SET status = ? WHERE id = ?", (new_status.upper(), task_id))
+            conn.execute(
+                f"UPDATE user_task_stats SET {old} = {old} - 1, {new} = {new} + 1 WHERE user_id = ?", (user_id,)
+            )
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    writer = threading.Thread(target=write)
+
+    def write_after_the_read(conn, cursor, statement, parameters, context, executemany):
+        # The sweep's read of the batch rows, right before its UPDATE
+        flat = " ".join(statement.split())
+        if flat.startswith("SELECT") and "FROM tasks WHERE tasks.id IN" in flat and not writer.is_alive():
+            writer.start()
+            time.sleep(0.3)  # time for the writer to commit, unless the sweep holds the write lock
+
+    event.listen(engine.sync_engine, "after_cursor_execute", write_after_the_read)
+    try:
+        client.portal.call(MissedSweeper(SessionLocal).sweep)
+    finally:
+        event.remove(engine.sync_engine, "after_cursor_execute", write_after_the_read)
+    writer.join(10)
+
+    async def reference():
+        async with SessionLocal() as db:
+            return await aggregate_task_analytics(db, user_id)
+
+    status = client.get(f"/api/tasks/{task_id}", headers=h).json()["status"]
+    analytics = client.get("/api/tasks/analytics/dashboard", headers=h).json()
+    expected = client.portal.call(reference).model_dump()
+    counts = ("pending_tasks", "in_progress_tasks", "completed_tasks", "missed_tasks")
+    return status, [analytics[key] for key in counts], [expected[key] for key in counts]
+
+
+def test_task_completed_during_a_sweep_is_not_marked_missed():
+    command.upgrade(Config(os.path.join(BACKEND_DIR, "alembic.ini")), "head")
+    with TestClient(app) as client:
+        status, counters, rows = race_the_sweep(client, "sweeper-race@example.com", "completed")
+    # The completion wins and the counters agree with the rows
+    assert status == "completed"
+    assert counters == rows == [0, 0, 1, 0]
+
+
+def test_task_started_during_a_sweep_keeps_the_counters_right():
+    command.upgrade(Config(os.path.join(BACKEND_DIR, "alembic.ini")), "head")
+    with TestClient(app) as client:
+        status, counters, rows = race_the_sweep(client, "sweeper-race-2@example.com", "in_progress")
+    # Still overdue either way; the counters must follow whichever status the row ends with
+    assert counters == rows, f"counters {counters}, rows {rows} (task {status})"
+
+if __name__ == "__main__":
+    failures = 0
+    for name, test in list(globals().items()):
+        if not name.startswith("test_"):
+            continue
+        try:
+            test()
+            print(f"{GREEN}✓{END} {name}")
+        except AssertionError as exc:
+            failures += 1
+            print(f"{RED}✗{END} {name}: {exc}")
+    sys.exit(1 if failures else 0)
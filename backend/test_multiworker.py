@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Multi-worker deployment (serve.py) and the shared SQLite state backend.
+
+The cache test forks processes that spend from the same token bucket in a
+scratch SQLite cache file. The serve test starts ``serve.py`` with two
+workers on a scratch database, checks that only one of them runs the
+background jobs, then sends SIGTERM while requests and a task stream are in
+flight and checks that they finish and the workers shut down cleanly.
+
+Run with: python test_multiworker.py   (or: python -m pytest test_multiworker.py)
+"""
+
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+
+import httpx  # noqa: E402
+
+from cache import MemoryCache, SQLiteCache  # noqa: E402
+from services.rate_limit import SharedTokenBuckets  # noqa: E402
+
+# Colors for terminal output
+GREEN = '\033[92m'
+RED = '\033[91m'
+END = '\033[0m'
+
+
+def _take_tokens(path, count, results):
+    buckets = SharedTokenBuckets(SQLiteCache(path), rate=0.001, burst=20)
+    results.put(sum(1 for _ in range(count) if buckets.take("user:1") == 0.0))
+
+
+def test_sqlite_cache_is_shared_between_processes():
+    path = os.path.join(tempfile.mkdtemp(prefix="shared-cache-"), "cache.db")
+    first, second = SQLiteCache(path), SQLiteCache(path)
+    first.set("user:1", {"name": "Shared"}, ttl=60)
+    assert second.get("user:1") == {"name": "Shared"}
+    second.delete("user:1")
+    assert first.get("user:1") is None
+    first.set("short", 1, ttl=-1)
+    assert second.get("short") is None
+
+    # Four processes, 10 takes each, one bucket of 20: exactly 20 are granted
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    workers = [context.Process(target=_take_tokens, args=(path, 10, results)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(30)
+    assert sum(results.get(timeout=5) for _ in workers) == 20
+    assert SharedTokenBuckets(first, rate=0.001, burst=20).take("user:1") > 0
+    assert SharedTokenBuckets(first, rate=0.001, burst=20).take("user:2") == 0.0
+
+    # The in-process backend follows the same bucket rules
+    memory = MemoryCache()
+    assert [memory.take_token("k", rate=1, burst=2, now=100.0) for _ in range(3)] == [0.0, 0.0, 1.0]
+    assert memory.take_token("k", rate=1, burst=2, now=101.0) == 0.0
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_serve_runs_workers_and_stops_gracefully():
+    scratch = tempfile.mkdtemp(prefix="serve-")
+    port = free_port()
+    log_path = os.path.join(scratch, "serve.log")
+    with open(log_path, "w") as log:
+        proc = subprocess.Popen(
+            [sys.executable, "serve.py", "--workers", "2", "--host", "127.0.0.1", "--port", str(port),
+             "--graceful-timeout", "10", "--log-level", "warning"],
+            cwd=BACKEND_DIR,
+            env={
+                **os.environ,
+                "DATABASE_URL": f"sqlite:///{scratch}/serve.db",
+                "DB_STARTUP_MODE": "migrate",
+                "CACHE_BACKEND": "sqlite",
+                "CACHE_SQLITE_PATH": f"{scratch}/cache.db",
+                "CALENDAR_SYNC_ENABLED": "false",
+                # In-process test modules of the same run switch these off in os.environ
+                "BACKGROUND_JOBS_ENABLED": "true",
+                "REMINDERS_ENABLED": "true",
+                "MISSED_SWEEP_ENABLED": "true",
+                "OUTBOX_ENABLED": "true",
+                "PYTHONUNBUFFERED": "1",
+            },
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        with httpx.Client(base_url=base_url, timeout=10) as client:
+            for _ in range(200):
+                try:
+                    client.get("/api/health")
+                    break
+                except httpx.TransportError:
+                    time.sleep(0.05)
+            resp = client.post("/api/auth/register", json={
+                "name": "Served", "email": "served@example.com", "password": "servedpassword123"
+            })
+            assert resp.status_code == 201, resp.text
+            h = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+            # Logins (bcrypt) in flight and an open task stream when SIGTERM arrives
+            statuses, stream_lines = [], []
+
+            def login():
+                statuses.append(httpx.post(f"{base_url}/api/auth/login", timeout=15, json={
+                    "email": "served@example.com", "password": "servedpassword123"
+                }).status_code)
+
+            def stream():
+                with httpx.stream("GET", f"{base_url}/api/tasks/stream", headers=h, timeout=30) as resp:
+                    stream_lines.extend(resp.iter_lines())
+
+            threads = [threading.Thread(target=stream)] + [threading.Thread(target=login) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            time.sleep(0.3)
+            start = time.monotonic()
+            proc.send_signal(signal.SIGTERM)
+            for thread in threads:
+                thread.join(30)
+            assert proc.wait(30) == 0
+            # The stream was ended by the shutdown, not by the graceful timeout
+            assert time.monotonic() - start < 10
+        assert statuses == [200] * 4, statuses
+        assert ": connected" in stream_lines
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+
+    with open(log_path) as log:
+        output = log.read()
+    assert output.count("📬 Notification outbox started") == 2, output
+    assert output.count("⏰ Reminder scheduler started") == 1, output
+    assert output.count("🧹 Missed-task sweep") == 1, output
+    assert output.count("🛑 Shutting down...") == 2, output
+
+
+if __name__ == "__main__":
+    failures = 0
+    for name, test in list(globals().items()):
+        if not name.startswith("test_"):
+            continue
+        try:
+            test()
+            print(f"{GREEN}✓{END} {name}")
+        except AssertionError as exc:
+            failures += 1
+            print(f"{RED}✗{END} {name}: {exc}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+The vectorized priority scoring must agree with the per-task reference.
+
+Scores a grid of tasks (every priority and status, deadlines in the past,
+at now and on each urgency boundary, plus exact duplicates for ties) with
+``services.priority_scoring`` and with ``calculate_priority_score``, and
+checks the scores are bit-identical, that ``rank_columns`` orders them as a
+stable sort on (score desc, deadline asc) would, and that ``top_k_columns``
+is a prefix of that full rank.
+
+Run with: python test_priority_scoring.py   (or: python -m pytest test_priority_scoring.py)
+"""
+
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+
+# Use a scratch database unless another in-process test module already picked one
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='priority-scoring-')}/scoring.db"
+
+from models import TaskPriority, TaskStatus  # noqa: E402
+from routers.tasks import calculate_priority_score  # noqa: E402
+from services.priority_scoring import encode_tasks, rank_columns, score_columns, top_k_columns  # noqa: E402
+
+# Colors for terminal output
+GREEN = '\033[92m'
+RED = '\033[91m'
+END = '\033[0m'
+
+NOW = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+HOUR = timedelta(hours=1)
+TICK = timedelta(microseconds=1)
+
+# Past deadlines, now, and both sides of the 1 hour / 24 hour / 7 day boundaries
+OFFSETS = [
+    -30 * 24 * HOUR, -HOUR, -TICK, timedelta(0), TICK, HOUR - TICK, HOUR, HOUR + TICK,
+    24 * HOUR - TICK, 24 * HOUR, 7 * 24 * HOUR - TICK, 7 * 24 * HOUR, 30 * 24 * HOUR,
+]
+
+
+def grid():
+    tasks = [
+        SimpleNamespace(deadline=NOW + offset, priority=priority, status=task_status)
+        for offset in OFFSETS for priority in TaskPriority for task_status in TaskStatus
+    ]
+    # Exact duplicates and same-score different-deadline tasks, shuffled, so ties decide the order
+    rng = random.Random(7)
+    tasks += [SimpleNamespace(**vars(task)) for task in rng.sample(tasks, 60)]
+    rng.shuffle(tasks)
+    return tasks
+
+
+def reference_rank(tasks, scores):
+    return sorted(range(len(tasks)), key=lambda i: (-scores[i], tasks[i].deadline))
+
+
+def test_vector_scores_and_ranks_match_the_reference():
+    tasks = grid()
+    reference = [float(calculate_priority_score(task, NOW)) for task in tasks]
+    columns = encode_tasks(tasks)
+    scores = score_columns(columns, NOW)
+
+    mismatched = [
+        (vars(task), expected, actual)
+        for task, expected, actual in zip(tasks, reference, scores.tolist()) if expected != actual
+    ]
+    assert not mismatched, mismatched[:5]
+    # Equal scores on different deadlines and on equal deadlines are both in the grid
+    assert len(set(reference)) < len({(s, t.deadline) for s, t in zip(reference, tasks)}) < len(tasks)
+
+    ranked = rank_columns(columns, scores).tolist()
+    assert ranked == reference_rank(tasks, reference)
+
+    for k in (1, 2, 5, 17, 100, len(tasks) - 1, len(tasks), len(tasks) + 5):
+        assert top_k_columns(columns, scores, k).tolist() == ranked[:k], k
+
+
+def test_random_tasks_match_the_reference():
+    rng = random.Random(11)
+    tasks = [
+        SimpleNamespace(
+            deadline=NOW + timedelta(seconds=rng.randint(-40 * 86400, 40 * 86400)),
+            priority=rng.choice(list(TaskPriority)),
+            status=rng.choice(list(TaskStatus)),
+        )
+        for _ in range(2000)
+    ]
+    reference = [float(calculate_priority_score(task, NOW)) for task in tasks]
+    columns = encode_tasks(tasks)
+    scores = score_columns(columns, NOW)
+    assert scores.tolist() == reference
+    ranked = rank_columns(columns, scores).tolist()
+    assert ranked == reference_rank(tasks, reference)
+    assert top_k_columns(columns, scores, 10).tolist() == ranked[:10]
+
+
+if __name__ == "__main__":
+    failures = 0
+    for name, test in list(globals().items()):
+        if not name.startswith("test_"):
+            continue
+        try:
+            test()
+            print(f"{GREEN}✓{END} {name}")
+        except AssertionError as exc:
+            failures += 1
+            print(f"{RED}✗{END} {name}: {exc}")
+    sys.exit(1 if failures else 0)
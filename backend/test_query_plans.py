@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Query-plan regression checks for the API's database access.
+
+Drives the router endpoints in-process against a scratch SQLite database
+built from the Alembic migrations, captures every SQL statement they issue,
+and runs EXPLAIN QUERY PLAN on each one. A full scan (table or index) or a
+temporary B-tree sort fails the check. The run is profiled in strict mode
+(query_profiler.py): a request over its endpoint's ``@query_budget`` fails
+the test that sent it, and the per-endpoint report is printed.
+
+Rate limiting, the profiler mode, the statement capture and the fake Google
+server are only switched on while this module's tests run (``plan_check``),
+so other test modules in the same pytest run see the app as they left it.
+
+Run with: python test_query_plans.py   (or: python -m pytest test_query_plans.py)
+"""
+
+import io
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+from contextlib import contextmanager, redirect_stdout
+from datetime import datetime, timedelta, timezone
+
+# Point the app at a scratch database before any app module is imported; the engine is
+# created on import, so this is the one setting that cannot wait for a fixture
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+ALEMBIC_INI = os.path.join(BACKEND_DIR, "alembic.ini")
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="query-plans-"), "plans.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+sys.path.insert(0, BACKEND_DIR)
+
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+from fastapi.routing import APIRoute  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+import pytest  # noqa: E402
+from sqlalchemy import event, select  # noqa: E402
+
+from database import SessionLocal, engine  # noqa: E402
+from fake_google import FakeGoogle  # noqa: E402
+from main import app  # noqa: E402
+from models import User  # noqa: E402
+from query_profiler import QueryBudgetExceeded, QueryProfiler, profile_block, query_profiler  # noqa: E402
+from rate_limiting import request_limits  # noqa: E402
+from services import google_integration  # noqa: E402
+from services.missed_sweeper import MissedSweeper  # noqa: E402
+
+# Another in-process test module may have picked the database first (same pytest run)
+DB_PATH = engine.url.database
+
+# Colors for terminal output
+GREEN = '\033[92m'
+RED = '\033[91m'
+BLUE = '\033[94m'
+END = '\033[0m'
+
+# Plan lines that indicate the query is not served by an index
+BAD_PLAN = re.compile(r"^(SCAN (?!CONSTANT ROW)|USE TEMP B-TREE)")
+
+# Plan problems accepted on purpose: {(endpoint, table): reason}
+ALLOWED = {
+    ("setup", "alembic_version"): "startup schema check reads the one-row version table",
+}
+
+captured = []
+current_endpoint = ["setup"]
+
+
+def _capture(conn, cursor, statement, parameters, context, executemany):
+    if not executemany and statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+        captured.append((current_endpoint[0], statement, parameters))
+
+
+@contextmanager
+def plan_check():
+    """Set the app up for the checks, and put everything back afterwards"""
+    google = FakeGoogle().start()
+    profiled = query_profiler.enabled
+    try:
+        with pytest.MonkeyPatch.context() as patch:
+            # The exercise writes faster than a user may (RATE_LIMIT_ENABLED is only read at startup)
+            patch.setattr(request_limits, "enabled", False)
+            # QUERY_PROFILE is only read at startup too
+            patch.setattr(query_profiler, "mode", "strict")
+            # The outbox delivers the notifications the exercise queues; keep them off the network
+            patch.setattr(google_integration, "GOOGLE_API_ROOT", f"{google.url}/")
+            patch.setattr(google_integration, "TOKEN_URI", f"{google.url}/token")
+            patch.setattr(google_integration, "GOOGLE_CLIENT_ID", "fake-client-id")
+            patch.setattr(google_integration, "GOOGLE_CLIENT_SECRET", "fake-client-secret")
+            query_profiler.install()
+            query_profiler.reset()
+            event.listen(engine.sync_engine, "before_cursor_execute", _capture)
+            try:
+                yield
+            finally:
+                event.remove(engine.sync_engine, "before_cursor_execute", _capture)
+                captured.clear()
+                query_profiler.reset()
+                if not profiled:
+                    query_profiler.uninstall()
+    finally:
+        google.stop()
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _plan_check():
+    with plan_check():
+        yield
+
+
+def assert_no_request_went_over_its_budget():
+    # Strict mode already failed the request that did; this catches one swallowed on the way
+    assert not query_profiler.violations, "\n".join(query_profiler.violations)
+
+
+def call(client, method, path, headers=None, **kwargs):
+    current_endpoint[0] = f"{method} {path.split('?')[0]}"
+    return client.request(method, path, headers=headers, **kwargs)
+
+
+def exercise_endpoints(client):
+    """Hit every router endpoint at least once with realistic data"""
+    user = {"name": "Plan Check", "email": "plans@example.com", "password": "planpassword123"}
+    call(client, "POST", "/api/auth/register", json=user)
+    token = call(client, "POST", "/api/auth/login", json={
+        "email": user["email"], "password": user["password"]
+    }).json()["access_token"]
+    refresh = client.post("/api/auth/register", json={
+        "name": "Other", "email": "other@example.com", "password": "planpassword123"
+    }).json()["access_token"]
+    h = {"Authorization": f"Bearer {token}"}
+
+    now = datetime.now(timezone.utc)
+    ids = []
+    for i in range(40):
+        resp = call(client, "POST", "/api/tasks/", headers=h, json={
+            "title": f"Task {i}",
+            "deadline": (now + timedelta(hours=(i - 15) * 12)).isoformat(),
+            "priority": ["low", "medium", "high", "critical"][i % 4],
+        })
+        ids.append(resp.json()["id"])
+    for task_id, new_status in zip(ids[:12], ["completed", "missed", "in_progress"] * 4):
+        call(client, "PUT", f"/api/tasks/{task_id}", headers=h, json={"status": new_status})
+
+    call(client, "GET", "/api/auth/me", headers=h)
+    call(client, "POST", f"/api/auth/refresh?refresh_token_str={refresh}")
+    call(client, "GET", "/api/tasks/", headers=h)
+    call(client, "GET", "/api/tasks/?status_filter=pending", headers=h)
+    call(client, "GET", "/api/tasks/?priority_filter=high", headers=h)
+    call(client, "GET", "/api/tasks/?status_filter=pending&priority_filter=high", headers=h)
+    cursor = call(client, "GET", "/api/tasks/?limit=5", headers=h).headers.get("X-Next-Cursor")
+    call(client, "GET", f"/api/tasks/?limit=5&cursor={cursor}", headers=h)
+    call(client, "GET", "/api/tasks/?limit=5&fields=id,title,priority_score", headers=h)
+    call(client, "GET", "/api/tasks/upcoming?days=30", headers=h)
+    cursor = call(client, "GET", "/api/tasks/past?limit=5", headers=h).headers.get("X-Next-Cursor")
+    call(client, "GET", f"/api/tasks/past?limit=5&cursor={cursor}", headers=h)
+    call(client, "GET", f"/api/tasks/{ids[20]}", headers=h)
+    call(client, "GET", "/api/tasks/analytics/dashboard", headers=h)
+    etag = call(client, "GET", "/api/tasks/prioritized/all", headers=h).headers["etag"]
+    call(client, "GET", "/api/tasks/prioritized/all", headers={**h, "If-None-Match": etag})
+    call(client, "GET", "/api/tasks/prioritized/all", headers=h)
+    call(client, "GET", "/api/tasks/prioritized/all?top=5", headers=h)
+    call(client, "POST", "/api/tasks/google/tokens", headers=h, json={"access_token": "x"})
+    call(client, "POST", f"/api/tasks/{ids[20]}/notify/email", headers=h)
+    call(client, "GET", f"/api/tasks/{ids[20]}/notifications", headers=h)
+    call(client, "DELETE", f"/api/tasks/{ids[21]}", headers=h)
+    bulk = call(client, "POST", "/api/tasks/bulk", headers=h, json={"items": [
+        {"title": f"Bulk {i}", "deadline": (now + timedelta(days=i)).isoformat()} for i in range(5)
+    ]}).json()
+    bulk_ids = [result["id"] for result in bulk["results"]]
+    call(client, "PATCH", "/api/tasks/bulk", headers=h, json={"items": [
+        {"id": task_id, "status": "completed"} for task_id in bulk_ids
+    ]})
+    call(client, "DELETE", "/api/tasks/bulk", headers=h, json={"ids": bulk_ids})
+    call(client, "POST", "/api/tasks/bulk/calendar", headers=h, json={"ids": ids[20:23]})
+    export = call(client, "GET", "/api/tasks/export", headers=h).content
+    call(client, "GET", "/api/tasks/export?format=csv", headers=h)
+    call(client, "POST", "/api/tasks/import", headers=h, files={"file": ("tasks.ndjson", export)})
+
+    current_endpoint[0] = "missed sweep"
+    with profile_block("missed sweep"):
+        client.portal.call(MissedSweeper(SessionLocal, batch_size=5).sweep)
+
+
+def check_plans():
+    """EXPLAIN every captured statement; returns a list of violations"""
+    violations = []
+    seen = set()
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        for endpoint, statement, parameters in captured:
+            if (endpoint, statement) in seen:
+                continue
+            seen.add((endpoint, statement))
+            plan = conn.execute(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+            for _, _, _, detail in plan:
+                if not BAD_PLAN.match(detail):
+                    continue
+                table = detail.split()[-1] if detail.startswith("SCAN") else "sort"
+                if (endpoint, table) in ALLOWED:
+                    continue
+                violations.append((endpoint, detail, " ".join(statement.split())))
+    finally:
+        conn.close()
+    return violations, len(seen)
+
+
+def test_router_queries_use_indexes():
+    captured.clear()
+    query_profiler.reset()
+    current_endpoint[0] = "setup"
+    command.upgrade(Config(ALEMBIC_INI), "head")
+    with TestClient(app) as client:
+        exercise_endpoints(client)
+    assert_no_request_went_over_its_budget()
+    print(query_profiler.report())
+    violations, checked = check_plans()
+    for endpoint, detail, statement in violations:
+        print(f"{RED}✗{END} {endpoint}: {detail}\n    {statement}")
+    assert not violations, f"{len(violations)} of {checked} statements are not index-backed"
+    print(f"{GREEN}✓{END} {checked} distinct statements use indexes")
+
+
+def test_every_endpoint_declares_a_query_budget():
+    missing = [
+        f"{','.join(sorted(route.methods))} {route.path}" for route in app.routes
+        if isinstance(route, APIRoute) and not hasattr(route.endpoint, "query_budget")
+    ]
+    assert not missing, f"no @query_budget on: {', '.join(missing)}"
+    print(f"{GREEN}✓{END} every endpoint declares a query budget")
+
+
+def test_bulk_statements_do_not_grow_with_the_batch():
+    """The N+1 shape: statements per call must not depend on how many items it carries"""
+    command.upgrade(Config(ALEMBIC_INI), "head")
+    query_profiler.reset()
+    now = datetime.now(timezone.utc)
+    counts = exercise_bulk_endpoints(now)
+    assert_no_request_went_over_its_budget()
+    assert counts[2] == counts[50], f"statements per call (create, update, calendar, delete): {counts}"
+    print(f"{GREEN}✓{END} bulk endpoints run {counts[50]} statements for 2 or 50 items")
+
+
+def exercise_bulk_endpoints(now):
+    """Statements of one bulk create, update, calendar upsert and delete, by batch size"""
+
+    def statements(client, method, path, **kwargs):
+        label = f"{method} {path}"
+        before = query_profiler.endpoints[label].statements if label in query_profiler.endpoints else 0
+        assert client.request(method, path, **kwargs).status_code < 300
+        return query_profiler.endpoints[label].statements - before
+
+    with TestClient(app) as client:
+        h = {"Authorization": "Bearer " + client.post("/api/auth/register", json={
+            "name": "Budget Check", "email": "budget@example.com", "password": "planpassword123"
+        }).json()["access_token"]}
+        client.post("/api/tasks/google/tokens", headers=h, json={"access_token": "x"})
+        counts = {}
+        for size in (2, 50):
+            items = [
+                {"title": f"Batch {i}", "deadline": (now + timedelta(days=i + 1)).isoformat()} for i in range(size)
+            ]
+            client.post("/api/tasks/bulk", headers=h, json={"items": items[:1]})  # warm the stats row
+            created = statements(client, "POST", "/api/tasks/bulk", headers=h, json={"items": items})
+            ids = [task["id"] for task in client.get(f"/api/tasks/?limit={size}", headers=h).json()]
+            counts[size] = (
+                created,
+                statements(client, "PATCH", "/api/tasks/bulk", headers=h, json={"items": [
+                    {"id": task_id, "status": "in_progress"} for task_id in ids
+                ]}),
+                statements(client, "POST", "/api/tasks/bulk/calendar", headers=h, json={"ids": ids}),
+                statements(client, "DELETE", "/api/tasks/bulk", headers=h, json={"ids": ids}),
+            )
+    return counts
+
+
+def test_profiler_flags_repeats_slow_statements_and_overruns():
+    profiler = QueryProfiler(mode="strict", slow_ms=0, repeat_threshold=3)
+
+    async def lookups():
+        async with SessionLocal() as db:
+            for user_id in range(4):
+                await db.execute(select(User.id).where(User.id == user_id))
+
+    output = io.StringIO()
+    try:
+        with TestClient(app) as client, redirect_stdout(output):
+            try:
+                with profiler.block("lookups", budget=2):
+                    client.portal.call(lookups)
+            except QueryBudgetExceeded as exc:
+                raised = str(exc)
+            else:
+                raised = None
+    finally:
+        profiler.uninstall()
+
+    printed = output.getvalue()
+    assert raised == "lookups ran 4 SQL statements, over its budget of 2", raised
+    assert "🔁 Possible N+1 in lookups: 4x SELECT users.id FROM users WHERE users.id = ?" in printed, printed
+    assert "🐢 Slow query" in printed and "SEARCH users USING INTEGER PRIMARY KEY" in printed, printed
+    stats = profiler.endpoints["lookups"]
+    assert (stats.requests, stats.max_statements, stats.over_budget, stats.repeated) == (1, 4, 1, 1)
+    print(f"{GREEN}✓{END} profiler reports repeats, slow statements with their plan, and overruns")
+
+
+if __name__ == "__main__":
+    print(f"{BLUE}ℹ{END} Checking query plans on {DB_PATH}")
+    failures = 0
+    with plan_check():
+        for test in (
+            test_router_queries_use_indexes, test_every_endpoint_declares_a_query_budget,
+            test_bulk_statements_do_not_grow_with_the_batch, test_profiler_flags_repeats_slow_statements_and_overruns,
+        ):
+            try:
+                test()
+            except AssertionError as exc:
+                failures += 1
+                print(f"{RED}✗{END} {test.__name__}: {exc}")
+    sys.exit(1 if failures else 0)
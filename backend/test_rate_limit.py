@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Token-bucket rate limits on the auth endpoints and task writes.
+
+Drives the app in-process against a scratch SQLite database built from the
+Alembic migrations. Each test swaps small buckets into ``request_limits`` so
+a handful of requests is enough to run one dry, then checks the 429 and its
+Retry-After, and that reads and other keys are left alone.
+
+Run with: python test_rate_limit.py   (or: python -m pytest test_rate_limit.py)
+"""
+
+import os
+import sys
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+
+# Use a scratch database unless another in-process test module already picked one
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='rate-limit-')}/limits.db"
+os.environ["REMINDERS_ENABLED"] = "false"
+os.environ["CALENDAR_SYNC_ENABLED"] = "false"
+
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from cache import SQLiteCache  # noqa: E402
+from main import app  # noqa: E402
+from rate_limiting import request_limits  # noqa: E402
+from services.rate_limit import SharedTokenBuckets, TokenBuckets  # noqa: E402
+
+# Colors for terminal output
+GREEN = '\033[92m'
+RED = '\033[91m'
+END = '\033[0m'
+
+PASSWORD = "limitpassword123"
+TOMORROW = (datetime.now(timezone.utc) + timedelta(days=1)).isoformat()
+
+
+@contextmanager
+def limits(**buckets):
+    """Serve the app with the named buckets replaced (the others get room to spare)"""
+    command.upgrade(Config(os.path.join(BACKEND_DIR, "alembic.ini")), "head")
+    saved = {name: getattr(request_limits, name) for name in request_limits.limited}
+    enabled = request_limits.enabled
+    request_limits.enabled = True
+    for name in saved:
+        setattr(request_limits, name, buckets.get(name, TokenBuckets(rate=100, burst=1000)))
+    try:
+        with TestClient(app) as client:
+            yield client
+    finally:
+        for name, value in saved.items():
+            setattr(request_limits, name, value)
+        request_limits.enabled = enabled
+
+
+def register(client, email):
+    resp = client.post("/api/auth/register", json={"name": "Limit User", "email": email, "password": PASSWORD})
+    assert resp.status_code == 201, resp.text
+    return {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+
+def test_login_flood_from_one_ip_gets_429():
+    with limits(auth_ip=TokenBuckets(rate=0.1, burst=3)) as client:
+        h = register(client, "flood@example.com")
+        login = {"email": "flood@example.com", "password": PASSWORD}
+        # The body the limiter read for the email still reaches the endpoint
+        assert client.post("/api/auth/login", json=login).status_code == 200
+        assert client.post("/api/auth/login", json=login).status_code == 200
+
+        before = request_limits.limited["auth_ip"]
+        resp = client.post("/api/auth/login", json=login)
+        assert resp.status_code == 429
+        assert resp.json() == {"detail": "Too many requests, retry later"}
+        assert 1 <= int(resp.headers["retry-after"]) <= 10
+        assert client.post("/api/auth/refresh", params={"refresh_token_str": "x"}).status_code == 429
+        assert request_limits.limited["auth_ip"] == before + 2
+
+        # Reads and the user's own task writes are not auth traffic
+        assert client.get("/api/tasks/", headers=h).status_code == 200
+        assert client.post("/api/tasks/", headers=h, json={"title": "Still", "deadline": TOMORROW}).status_code == 201
+        assert client.get("/api/health").json()["rate_limits"]["limited"]["auth_ip"] == before + 2
+
+
+def test_logins_for_one_email_are_limited_whatever_the_casing():
+    with limits(auth_email=TokenBuckets(rate=0.1, burst=2)) as client:
+        register(client, "target@example.com")  # spends the first token
+        wrong = {"email": "target@example.com", "password": "wrongpassword123"}
+        assert client.post("/api/auth/login", json=wrong).status_code == 401
+        assert client.post("/api/auth/login", json={**wrong, "email": " TARGET@example.com"}).status_code == 429
+
+        # Other accounts and unparseable bodies still reach the endpoint
+        assert client.post("/api/auth/login", json={**wrong, "email": "other@example.com"}).status_code == 401
+        assert client.post("/api/auth/login", content=b"not json").status_code == 422
+
+
+def test_task_writes_are_limited_per_user():
+    with limits(task_writes=TokenBuckets(rate=0.1, burst=2)) as client:
+        h = register(client, "writer@example.com")
+        other = register(client, "other-writer@example.com")
+        task = {"title": "Write", "deadline": TOMORROW}
+        assert client.post("/api/tasks/", headers=h, json=task).status_code == 201
+        created = client.post("/api/tasks/", headers=h, json=task).json()
+
+        resp = client.put(f"/api/tasks/{created['id']}", headers=h, json={"title": "Too many"})
+        assert resp.status_code == 429 and "retry-after" in resp.headers
+        assert client.get(f"/api/tasks/{created['id']}", headers=h).json()["title"] == "Write"
+        assert client.post("/api/tasks/", headers=other, json=task).status_code == 201
+        # Without a valid token the endpoint answers, not the limiter
+        assert client.post("/api/tasks/", headers={"Authorization": "Bearer nope"}, json=task).status_code == 401
+
+
+class RecordingCache(SQLiteCache):
+    """SQLite cache noting the thread each take_token ran on"""
+
+    def __init__(self):
+        super().__init__(os.path.join(tempfile.mkdtemp(prefix="rate-limit-cache-"), "cache.db"))
+        self.threads = []
+
+    def take_token(self, *args, **kwargs):
+        self.threads.append(threading.current_thread())
+        return super().take_token(*args, **kwargs)
+
+
+def test_shared_buckets_are_taken_off_the_event_loop():
+    cache = RecordingCache()
+    with limits(
+        task_writes=SharedTokenBuckets(cache, rate=0.1, burst=2, prefix="limit:user:"),
+        auth_ip=SharedTokenBuckets(cache, rate=100, burst=1000, prefix="limit:ip:"),
+    ) as client:
+        loop_thread = client.portal.call(threading.current_thread)
+        h = register(client, "shared-writer@example.com")
+        task = {"title": "Write", "deadline": TOMORROW}
+        assert [client.post("/api/tasks/", headers=h, json=task).status_code for _ in range(3)] == [201, 201, 429]
+    assert len(cache.threads) == 4  # register, then three writes
+    assert loop_thread not in cache.threads
+
+
+def test_idle_buckets_are_dropped():
+    buckets = TokenBuckets(rate=1, burst=2)
+    # A new key every 100 ms: only the ones from the last two seconds (still refilling) are kept
+    for i in range(1000):
+        assert buckets.take(f"ip-{i}", now=i * 0.1) == 0.0
+    assert len(buckets) <= 21
+
+    assert [buckets.take("hot", now=200.0) for _ in range(3)] == [0.0, 0.0, 1.0]
+    assert buckets.take("cold", now=201.0) == 0.0  # hot is not full yet and stays
+    assert buckets.take("hot", now=201.0) == 0.0
+    assert buckets.take("hot", now=201.0) == 1.0
+    buckets.take("late", now=500.0)
+    assert len(buckets) == 1
+
+
+if __name__ == "__main__":
+    failures = 0
+    for name, test in list(globals().items()):
+        if not name.startswith("test_"):
+            continue
+        try:
+            test()
+            print(f"{GREEN}✓{END} {name}")
+        except AssertionError as exc:
+            failures += 1
+            print(f"{RED}✗{END} {name}: {exc}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Deadline reminders (services/reminders.py).
+
+Drives the app in-process against a scratch SQLite database built from the
+Alembic migrations, with the reminder scheduler running on a two-second lead
+and a one-minute horizon and a stand-in outbox. Checks that a reminder is
+queued once when it falls due, that tasks rescheduled or closed (through the
+API or by another process) are skipped, and that a restart does not queue a
+reminder that was already queued.
+
+Run with: python test_reminders.py   (or: python -m pytest test_reminders.py)
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+
+# Use a scratch database unless another in-process test module already picked one
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='reminders-')}/reminders.db"
+os.environ["REMINDERS_ENABLED"] = "false"
+os.environ["CALENDAR_SYNC_ENABLED"] = "false"
+
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import select, update  # noqa: E402
+
+from database import SessionLocal  # noqa: E402
+from main import app  # noqa: E402
+from models import GoogleToken, Notification, NotificationChannel, Task, TaskStatus  # noqa: E402
+from services.reminders import reminder_scheduler  # noqa: E402
+
+# Colors for terminal output
+GREEN = '\033[92m'
+RED = '\033[91m'
+END = '\033[0m'
+
+LEAD = timedelta(seconds=2)
+
+
+class StubOutbox:
+    """Counts wake-ups instead of sending"""
+
+    def __init__(self):
+        self.wakes = 0
+
+    def wake(self):
+        self.wakes += 1
+
+
+@contextmanager
+def running_scheduler(client):
+    """The app's scheduler, started on a short lead and horizon; restored afterwards"""
+    saved = reminder_scheduler.lead, reminder_scheduler.horizon, reminder_scheduler.outbox
+    reminder_scheduler.lead, reminder_scheduler.horizon = LEAD, timedelta(minutes=1)
+    reminder_scheduler.outbox = StubOutbox()
+    client.portal.call(reminder_scheduler.start)
+    try:
+        yield reminder_scheduler
+    finally:
+        client.portal.call(reminder_scheduler.stop)
+        reminder_scheduler.lead, reminder_scheduler.horizon, reminder_scheduler.outbox = saved
+
+
+def register(client, email, google=True):
+    resp = client.post("/api/auth/register", json={
+        "name": "Reminded", "email": email, "password": "reminderpassword123"
+    })
+    user_id = resp.json()["user"]["id"]
+    if google:
+        async def connect():
+            async with SessionLocal() as db:
+                db.add(GoogleToken(user_id=user_id, access_token="token"))
+                await db.commit()
+
+        client.portal.call(connect)
+    return {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+
+def create(client, h, title, deadline):
+    resp = client.post("/api/tasks/", headers=h, json={"title": title, "deadline": deadline.isoformat()})
+    assert resp.status_code == 201, resp.text
+    return resp.json()["id"]
+
+
+def emails(client, task_ids):
+    """{task_id: [created_at, ...]} of the email notifications queued for ``task_ids``"""
+    async def read():
+        async with SessionLocal() as db:
+            return (await db.execute(
+                select(Notification.task_id, Notification.created_at)
+                .where(Notification.task_id.in_(task_ids), Notification.channel == NotificationChannel.EMAIL)
+            )).all()
+
+    found = {task_id: [] for task_id in task_ids}
+    for task_id, created_at in client.portal.call(read):
+        found[task_id].append(created_at)
+    return found
+
+
+def write_elsewhere(client, task_id, **values):
+    """A write from another process: the scheduler in this one never hears of it"""
+    async def write():
+        async with SessionLocal() as db:
+            await db.execute(update(Task).where(Task.id == task_id).values(**values))
+            await db.commit()
+
+    client.portal.call(write)
+
+
+def wait_until(predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.05)
+
+
+def test_a_due_reminder_is_queued_once():
+    command.upgrade(Config(os.path.join(BACKEND_DIR, "alembic.ini")), "head")
+    with TestClient(app) as client, running_scheduler(client) as scheduler:
+        h = register(client, "reminder-once@example.com")
+        no_google = register(client, "reminder-no-google@example.com", google=False)
+        deadline = datetime.now(timezone.utc) + LEAD + timedelta(seconds=1)
+        task_id = create(client, h, "Due soon", deadline)
+        other_id = create(client, no_google, "Nobody to email", deadline)
+        later_id = create(client, h, "Next week", deadline + timedelta(days=7))
+        assert {task_id, other_id} <= set(scheduler._scheduled) and later_id not in scheduler._scheduled
+        assert emails(client, [task_id]) == {task_id: []}
+
+        queued, skipped = scheduler.queued, scheduler.skipped
+        wait_until(lambda: emails(client, [task_id])[task_id])
+        sent = emails(client, [task_id, other_id, later_id])
+        assert len(sent[task_id]) == 1 and sent[task_id][0] >= deadline - LEAD
+        assert sent[other_id] == [] and sent[later_id] == []
+        assert scheduler.queued == queued + 1 and scheduler.skipped >= skipped + 1
+        assert scheduler.outbox.wakes == 1
+
+        time.sleep(1.5)  # nothing more is queued while the deadline approaches
+        assert len(emails(client, [task_id])[task_id]) == 1 and scheduler.queued == queued + 1
+
+
+def test_rescheduled_and_closed_tasks_are_skipped():
+    command.upgrade(Config(os.path.join(BACKEND_DIR, "alembic.ini")), "head")
+    with TestClient(app) as client, running_scheduler(client) as scheduler:
+        h = register(client, "reminder-skips@example.com")
+        deadline = datetime.now(timezone.utc) + LEAD + timedelta(seconds=1)
+        ids = kept, moved, completed, moved_elsewhere, completed_elsewhere = [
+            create(client, h, f"Task {i}", deadline) for i in range(5)
+        ]
+        later = deadline + timedelta(hours=1)
+        assert client.put(f"/api/tasks/{moved}", headers=h, json={"deadline": later.isoformat()}).status_code == 200
+        assert client.put(f"/api/tasks/{completed}", headers=h, json={"status": "completed"}).status_code == 200
+        assert set(ids) & set(scheduler._scheduled) == {kept, moved_elsewhere, completed_elsewhere}
+        write_elsewhere(client, moved_elsewhere, deadline=later)
+        write_elsewhere(client, completed_elsewhere, status=TaskStatus.COMPLETED)
+
+        skipped = scheduler.skipped
+        # All five share a fire time, so they are checked in one go
+        wait_until(lambda: emails(client, [kept])[kept])
+        sent = emails(client, ids)
+        assert {task_id: len(times) for task_id, times in sent.items()} == {
+            kept: 1, moved: 0, completed: 0, moved_elsewhere: 0, completed_elsewhere: 0,
+        }
+        assert scheduler.skipped >= skipped + 2
+
+
+def test_a_restart_does_not_queue_a_reminder_again():
+    command.upgrade(Config(os.path.join(BACKEND_DIR, "alembic.ini")), "head")
+    with TestClient(app) as client:
+        h = register(client, "reminder-restart@example.com")
+        deadline = datetime.now(timezone.utc) + LEAD + timedelta(seconds=1)
+        with running_scheduler(client) as scheduler:
+            task_id = create(client, h, "Across a restart", deadline)
+            wait_until(lambda: emails(client, [task_id])[task_id])
+            queued = scheduler.queued
+
+        # Restarted before the deadline: the reminder is reloaded, already due, and recognized as queued
+        assert datetime.now(timezone.utc) < deadline
+        with running_scheduler(client) as scheduler:
+            skipped = scheduler.skipped
+            assert task_id in scheduler._scheduled
+            wait_until(lambda: task_id not in scheduler._scheduled and scheduler.skipped > skipped)
+            time.sleep(0.2)
+            assert scheduler.queued == queued
+            assert len(emails(client, [task_id])[task_id]) == 1
+
+
+def test_the_runner_ends_once_stopping_even_without_the_cancel():
+    command.upgrade(Config(os.path.join(BACKEND_DIR, "alembic.ini")), "head")
+    with TestClient(app) as client, running_scheduler(client) as scheduler:
+        async def stop_flag_only():
+            # On Python 3.11 wait_for can swallow stop()'s cancel; the flag alone must end the loop
+            runner = scheduler._runner
+            scheduler._stopping = True
+            scheduler._wakeup.set()
+            await asyncio.wait_for(asyncio.shield(runner), timeout=2)
+            return runner.done() and not runner.cancelled()
+
+        assert client.portal.call(stop_flag_only)
+
+
+if __name__ == "__main__":
+    failures = 0
+    for name, test in list(globals().items()):
+        if not name.startswith("test_"):
+            continue
+        try:
+            test()
+            print(f"{GREEN}✓{END} {name}")
+        except AssertionError as exc:
+            failures += 1
+            print(f"{RED}✗{END} {name}: {exc}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Keyset paging and ``fields=`` projection on the task listings.
+
+Drives the listing endpoints in-process against a scratch SQLite database
+built from the Alembic migrations. Walks every page with the
+``X-Next-Cursor`` header and checks that each task comes exactly once in
+(deadline, id) order, ties on the deadline included, descending on
+``/past``; that a bad cursor or unknown field is a 400 even when the ETag
+matches; and that a projection returns the same values as the full listing.
+
+Run with: python test_task_paging.py   (or: python -m pytest test_task_paging.py)
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+
+# Use a scratch database unless another in-process test module already picked one
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='task-paging-')}/paging.db"
+os.environ["REMINDERS_ENABLED"] = "false"
+os.environ["CALENDAR_SYNC_ENABLED"] = "false"
+
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from main import app  # noqa: E402
+
+# Colors for terminal output
+GREEN = '\033[92m'
+RED = '\033[91m'
+END = '\033[0m'
+
+NOW = datetime.now(timezone.utc).replace(microsecond=0)
+
+
+def register(client, email):
+    resp = client.post("/api/auth/register", json={
+        "name": "Pager", "email": email, "password": "pagingpassword123"
+    })
+    return {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+
+def create(client, h, deadlines):
+    resp = client.post("/api/tasks/bulk", headers=h, json={"items": [
+        {"title": f"Task {i}", "deadline": deadline.isoformat()} for i, deadline in enumerate(deadlines)
+    ]})
+    assert resp.status_code == 200, resp.text
+    return [result["id"] for result in resp.json()["results"]]
+
+
+def walk(client, h, path, limit):
+    """Every page of ``path``; returns the page sizes and the tasks in the order served"""
+    sizes, tasks, cursor = [], [], None
+    while True:
+        separator = "&" if "?" in path else "?"
+        url = f"{path}{separator}limit={limit}" + (f"&cursor={cursor}" if cursor else "")
+        resp = client.get(url, headers=h)
+        assert resp.status_code == 200, resp.text
+        sizes.append(len(resp.json()))
+        tasks += resp.json()
+        cursor = resp.headers.get("x-next-cursor")
+        if cursor is None:
+            return sizes, tasks
+
+
+def key(task):
+    return datetime.fromisoformat(task["deadline"].replace("Z", "+00:00")), task["id"]
+
+
+def test_pages_serve_every_task_once_in_deadline_order():
+    command.upgrade(Config(os.path.join(BACKEND_DIR, "alembic.ini")), "head")
+    with TestClient(app) as client:
+        h = register(client, "paging@example.com")
+        # Three tasks per deadline, so page boundaries fall inside runs of equal deadlines
+        upcoming = create(client, h, [NOW + timedelta(days=1 + i // 3) for i in range(13)])
+        past = create(client, h, [NOW - timedelta(days=1 + i // 3) for i in range(7)])
+
+        sizes, tasks = walk(client, h, "/api/tasks/", limit=4)
+        assert sizes == [4, 4, 4, 4, 4]
+        assert [task["id"] for task in tasks] == [task["id"] for task in sorted(tasks, key=key)]
+        assert sorted(task["id"] for task in tasks) == sorted(upcoming + past)
+
+        # The last page can come out exactly full; the next cursor is only sent when more remain
+        sizes, _ = walk(client, h, "/api/tasks/", limit=10)
+        assert sizes == [10, 10]
+
+        sizes, tasks = walk(client, h, "/api/tasks/past", limit=3)
+        assert sizes == [3, 3, 1]
+        assert [task["id"] for task in tasks] == [task["id"] for task in sorted(tasks, key=key, reverse=True)]
+        assert sorted(task["id"] for task in tasks) == sorted(past)
+
+        sizes, tasks = walk(client, h, "/api/tasks/upcoming?days=30", limit=5)
+        assert sizes == [5, 5, 3] and [task["id"] for task in tasks] == upcoming
+
+        # Filters hold across pages
+        client.patch("/api/tasks/bulk", headers=h, json={"items": [
+            {"id": task_id, "status": "completed"} for task_id in upcoming[::2]
+        ]})
+        _, tasks = walk(client, h, "/api/tasks/?status_filter=completed", limit=2)
+        assert [task["id"] for task in tasks] == upcoming[::2]
+
+
+def test_malformed_cursor_or_fields_get_400_even_when_the_etag_matches():
+    command.upgrade(Config(os.path.join(BACKEND_DIR, "alembic.ini")), "head")
+    with TestClient(app) as client:
+        h = register(client, "paging-errors@example.com")
+        create(client, h, [NOW + timedelta(days=1)])
+        for headers in (h, {**h, "If-None-Match": "*"}):
+            for url in ("/api/tasks/?cursor=not-a-cursor", "/api/tasks/?limit=2&cursor=WzFd"):
+                resp = client.get(url, headers=headers)
+                assert resp.status_code == 400 and resp.json()["detail"] == "Invalid cursor", url
+            resp = client.get("/api/tasks/?fields=id,nope", headers=headers)
+            assert resp.status_code == 400 and resp.json()["detail"] == "Unknown fields: nope"
+        for path in ("/api/tasks/past", "/api/tasks/upcoming"):
+            assert client.get(f"{path}?cursor=not-a-cursor", headers=h).status_code == 400
+            assert client.get(f"{path}?fields=nope", headers=h).status_code == 400
+        assert client.get("/api/tasks/", headers={**h, "If-None-Match": "*"}).status_code == 304
+
+
+def test_projection_returns_the_requested_fields_of_the_full_listing():
+    command.upgrade(Config(os.path.join(BACKEND_DIR, "alembic.ini")), "head")
+    with TestClient(app) as client:
+        h = register(client, "paging-fields@example.com")
+        ids = create(client, h, [NOW + timedelta(hours=5 + i * 30) for i in range(4)] + [NOW - timedelta(hours=3)])
+        client.put(f"/api/tasks/{ids[0]}", headers=h, json={"status": "completed"})
+        full = {task["id"]: task for task in client.get("/api/tasks/", headers=h).json()}
+
+        for fields in (["id", "title"], ["id", "priority_score", "urgency_level", "is_overdue"], ["deadline", "status"]):
+            resp = client.get(f"/api/tasks/?fields={','.join(fields)}", headers=h)
+            assert resp.status_code == 200
+            listed = resp.json()
+            assert len(listed) == 5 and all(list(task) == fields for task in listed), listed
+            for task, (task_id, expected) in zip(listed, full.items()):
+                assert task == {field: expected[field] for field in fields}, (task_id, task)
+
+        # Projection and paging together
+        _, tasks = walk(client, h, "/api/tasks/?fields=id", limit=2)
+        assert [task["id"] for task in tasks] == list(full)
+
+
+if __name__ == "__main__":
+    failures = 0
+    for name, test in list(globals().items()):
+        if not name.startswith("test_"):
+            continue
+        try:
+            test()
+            print(f"{GREEN}✓{END} {name}")
+        except AssertionError as exc:
+            failures += 1
+            print(f"{RED}✗{END} {name}: {exc}")
+    sys.exit(1 if failures else 0)
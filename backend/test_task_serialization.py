@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+The orjson fast path for task lists must produce what the response models would.
+
+Drives the listing endpoints in-process against a scratch SQLite database
+built from the Alembic migrations, re-validates every returned task with
+``TaskDetailedResponse`` and compares it with the model's own JSON, and
+checks that the OpenAPI schema still documents the response models.
+
+Run with: python test_task_serialization.py   (or: python -m pytest test_task_serialization.py)
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+
+# Use a scratch database unless another in-process test module already picked one
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='serialization-')}/serialization.db"
+os.environ["REMINDERS_ENABLED"] = "false"
+os.environ["CALENDAR_SYNC_ENABLED"] = "false"
+
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from main import app  # noqa: E402
+from schemas import PrioritizedTasksResponse, TaskDetailedResponse  # noqa: E402
+
+# Colors for terminal output
+GREEN = '\033[92m'
+RED = '\033[91m'
+END = '\033[0m'
+
+
+def assert_matches_model(item):
+    assert item == TaskDetailedResponse.model_validate(item).model_dump(mode="json"), item
+
+
+def test_fast_path_matches_the_response_model():
+    command.upgrade(Config(os.path.join(BACKEND_DIR, "alembic.ini")), "head")
+    with TestClient(app) as client:
+        token = client.post("/api/auth/register", json={
+            "name": "Serializer", "email": "serializer@example.com", "password": "serializerpass123"
+        }).json()["access_token"]
+        h = {"Authorization": f"Bearer {token}"}
+        now = datetime.now(timezone.utc)
+        resp = client.post("/api/tasks/bulk", headers=h, json={"items": [
+            {
+                "title": f"Task {i}",
+                "description": "notes" if i % 2 else None,
+                "deadline": (now + timedelta(hours=i * 7 - 40, microseconds=i)).isoformat(),
+                "priority": ["low", "medium", "high", "critical"][i % 4],
+            }
+            for i in range(16)
+        ]})
+        ids = [result["id"] for result in resp.json()["results"]]
+        client.patch("/api/tasks/bulk", headers=h, json={"items": [
+            {"id": task_id, "status": task_status}
+            for task_id, task_status in zip(ids, ["completed", "missed", "in_progress"])
+        ]})
+
+        listed = client.get("/api/tasks/", headers=h).json()
+        assert len(listed) == 16
+        for item in listed:
+            assert_matches_model(item)
+            assert item["deadline"].endswith("Z")
+        # The per-task model path agrees on every stored and derived field
+        single = client.get(f"/api/tasks/{ids[5]}", headers=h).json()
+        fast = next(item for item in listed if item["id"] == ids[5])
+        assert fast.keys() == single.keys()
+        for key in single:
+            if key in ("time_remaining", "hours_until_deadline"):
+                assert abs(fast[key] - single[key]) < 0.01
+            else:
+                assert fast[key] == single[key], key
+
+        page = client.get("/api/tasks/past?limit=2", headers=h)
+        assert page.headers.get("x-next-cursor") and len(page.json()) == 2
+        prioritized = client.get("/api/tasks/prioritized/all", headers=h).json()
+        assert prioritized == PrioritizedTasksResponse.model_validate(prioritized).model_dump(mode="json")
+        assert prioritized["recommended_next_task"] == prioritized["upcoming_tasks"][0]
+        assert len(client.get("/api/tasks/prioritized/all?top=2", headers=h).json()["upcoming_tasks"]) == 2
+
+
+def test_openapi_still_documents_the_response_models():
+    paths = app.openapi()["paths"]
+    for path, schema in (
+        ("/api/tasks/", {"type": "array", "items": {"$ref": "#/components/schemas/TaskDetailedResponse"}}),
+        ("/api/tasks/prioritized/all", {"$ref": "#/components/schemas/PrioritizedTasksResponse"}),
+    ):
+        documented = paths[path]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+        assert {key: documented[key] for key in schema} == schema, documented
+
+
+if __name__ == "__main__":
+    failures = 0
+    for name, test in list(globals().items()):
+        if not name.startswith("test_"):
+            continue
+        try:
+            test()
+            print(f"{GREEN}✓{END} {name}")
+        except AssertionError as exc:
+            failures += 1
+            print(f"{RED}✗{END} {name}: {exc}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Materialized task counters (services/task_stats.py).
+
+Drives the task endpoints in-process against a scratch SQLite database built
+from the Alembic migrations. After every kind of write (single and bulk
+creates, updates of each status transition, deadline moves, deletes) the
+dashboard, which reads ``user_task_stats``, must equal the full-scan
+``aggregate_task_analytics``, and the counters row kept up by
+``apply_task_changes`` must equal one recomputed by ``rebuild_task_stats``.
+A rebuild also repairs corrupted counters without moving the version back.
+
+Run with: python test_task_stats.py   (or: python -m pytest test_task_stats.py)
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+
+# Use a scratch database unless another in-process test module already picked one
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='task-stats-')}/stats.db"
+os.environ["REMINDERS_ENABLED"] = "false"
+os.environ["CALENDAR_SYNC_ENABLED"] = "false"
+
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import select, update  # noqa: E402
+
+from database import SessionLocal  # noqa: E402
+from main import app  # noqa: E402
+from models import UserTaskStats  # noqa: E402
+from services.task_stats import aggregate_task_analytics, rebuild_task_stats  # noqa: E402
+
+# Colors for terminal output
+GREEN = '\033[92m'
+RED = '\033[91m'
+END = '\033[0m'
+
+NOW = datetime.now(timezone.utc)
+COUNTERS = [
+    "total_tasks", "pending_tasks", "in_progress_tasks", "completed_tasks", "missed_tasks", "completion_count",
+]
+
+
+def register(client, email):
+    resp = client.post("/api/auth/register", json={
+        "name": "Counted", "email": email, "password": "statspassword123"
+    })
+    return {"Authorization": f"Bearer {resp.json()['access_token']}"}, resp.json()["user"]["id"]
+
+
+def counters_row(client, user_id):
+    async def read():
+        async with SessionLocal() as db:
+            return await db.scalar(select(UserTaskStats).where(UserTaskStats.user_id == user_id))
+
+    return client.portal.call(read)
+
+
+def rebuild(client, user_id=None):
+    async def run():
+        async with SessionLocal() as db:
+            await rebuild_task_stats(db, user_id)
+            await db.commit()
+
+    client.portal.call(run)
+
+
+def assert_counters_match(client, h, user_id, step):
+    """The dashboard equals the full scan, and the live counters equal a rebuild of them"""
+    async def reference():
+        async with SessionLocal() as db:
+            return await aggregate_task_analytics(db, user_id)
+
+    analytics = client.get("/api/tasks/analytics/dashboard", headers=h).json()
+    expected = client.portal.call(reference).model_dump()
+    for key, value in expected.items():
+        if isinstance(value, float):
+            assert abs(analytics[key] - value) < 1e-6, (step, key, analytics[key], value)
+        else:
+            assert analytics[key] == value, (step, key, analytics[key], value)
+
+    live = counters_row(client, user_id)
+    if live is None:  # created by the first write
+        return
+    rebuild(client, user_id)
+    rebuilt = counters_row(client, user_id)
+    assert [getattr(live, name) for name in COUNTERS] == [getattr(rebuilt, name) for name in COUNTERS], step
+    assert abs(live.completion_hours_sum - rebuilt.completion_hours_sum) < 1e-6, step
+    assert rebuilt.version == live.version + 1, step
+
+
+def test_counters_follow_every_kind_of_task_write():
+    command.upgrade(Config(os.path.join(BACKEND_DIR, "alembic.ini")), "head")
+    with TestClient(app) as client:
+        h, user_id = register(client, "stats-writes@example.com")
+
+        def create(title, hours):
+            resp = client.post("/api/tasks/", headers=h, json={
+                "title": title, "deadline": (NOW + timedelta(hours=hours)).isoformat()
+            })
+            assert resp.status_code == 201
+            return resp.json()["id"]
+
+        def put(task_id, **fields):
+            assert client.put(f"/api/tasks/{task_id}", headers=h, json=fields).status_code == 200
+
+        # The first write creates the counters row from the tasks table
+        assert_counters_match(client, h, user_id, "empty")
+        a, b = create("Tomorrow", 24), create("Overdue", -5)
+        assert_counters_match(client, h, user_id, "create")
+
+        resp = client.post("/api/tasks/bulk", headers=h, json={"items": [
+            {"title": f"Bulk {i}", "deadline": (NOW + timedelta(hours=10 * i - 30)).isoformat()} for i in range(6)
+        ] + [{"title": "", "deadline": NOW.isoformat()}]})
+        bulk = [result["id"] for result in resp.json()["results"] if result["status"] == 201]
+        assert len(bulk) == 6
+        assert_counters_match(client, h, user_id, "bulk create")
+
+        for step, fields in [
+            ("pending -> in_progress", {"status": "in_progress"}),
+            ("in_progress -> completed", {"status": "completed"}),
+            ("completed -> pending", {"status": "pending"}),
+            ("pending -> missed", {"status": "missed"}),
+            ("missed -> completed", {"status": "completed"}),
+            ("deadline into the past", {"deadline": (NOW - timedelta(days=2)).isoformat()}),
+            ("title only", {"title": "Renamed"}),
+        ]:
+            put(a, **fields)
+            assert_counters_match(client, h, user_id, step)
+        put(b, status="missed", deadline=(NOW + timedelta(days=3)).isoformat())
+        assert_counters_match(client, h, user_id, "missed before the deadline")
+
+        resp = client.patch("/api/tasks/bulk", headers=h, json={"items": [
+            {"id": bulk[0], "status": "completed"}, {"id": bulk[1], "status": "in_progress"},
+            {"id": bulk[2], "status": "missed"}, {"id": bulk[3], "deadline": (NOW + timedelta(days=1)).isoformat()},
+            {"id": 999999, "status": "completed"},
+        ]})
+        assert resp.json()["succeeded"] == 4
+        assert_counters_match(client, h, user_id, "bulk update")
+
+        assert client.delete(f"/api/tasks/{a}", headers=h).status_code == 204
+        assert_counters_match(client, h, user_id, "delete")
+        resp = client.request("DELETE", "/api/tasks/bulk", headers=h, json={"ids": bulk[:3] + [999999]})
+        assert resp.json()["succeeded"] == 3
+        assert_counters_match(client, h, user_id, "bulk delete")
+
+        resp = client.request("DELETE", "/api/tasks/bulk", headers=h, json={"ids": [b] + bulk[3:]})
+        assert resp.json()["succeeded"] == 4
+        assert_counters_match(client, h, user_id, "everything deleted")
+
+
+def test_rebuild_repairs_counters_and_keeps_versions_moving():
+    command.upgrade(Config(os.path.join(BACKEND_DIR, "alembic.ini")), "head")
+    with TestClient(app) as client:
+        h, user_id = register(client, "stats-rebuild@example.com")
+        emptied_h, emptied_id = register(client, "stats-emptied@example.com")
+        resp = client.post("/api/tasks/bulk", headers=h, json={"items": [
+            {"title": f"Task {i}", "deadline": (NOW + timedelta(hours=i - 2)).isoformat()} for i in range(5)
+        ]})
+        ids = [result["id"] for result in resp.json()["results"]]
+        client.patch("/api/tasks/bulk", headers=h, json={"items": [
+            {"id": ids[0], "status": "completed"}, {"id": ids[1], "status": "missed"},
+        ]})
+        task_id = client.post("/api/tasks/", headers=emptied_h, json={
+            "title": "Gone soon", "deadline": (NOW + timedelta(days=1)).isoformat()
+        }).json()["id"]
+        client.delete(f"/api/tasks/{task_id}", headers=emptied_h)
+        versions = {uid: counters_row(client, uid).version for uid in (user_id, emptied_id)}
+        etags = {uid: client.get("/api/tasks/", headers=hh).headers["etag"]
+                 for uid, hh in ((user_id, h), (emptied_id, emptied_h))}
+
+        async def corrupt():
+            async with SessionLocal() as db:
+                await db.execute(
+                    update(UserTaskStats)
+                    .values(total_tasks=42, pending_tasks=-3, completed_tasks=7, completion_hours_sum=-1.5)
+                )
+                await db.commit()
+
+        client.portal.call(corrupt)
+        assert client.get("/api/tasks/analytics/dashboard", headers=h).json()["total_tasks"] == 42
+
+        # Every user, including one who has no tasks left
+        rebuild(client)
+        for uid, hh in ((user_id, h), (emptied_id, emptied_h)):
+            assert counters_row(client, uid).version > versions[uid], uid
+            resp = client.get("/api/tasks/", headers={**hh, "If-None-Match": etags[uid]})
+            assert resp.status_code == 200, uid
+            assert_counters_match(client, hh, uid, f"rebuilt {uid}")
+        assert counters_row(client, emptied_id).total_tasks == 0
+
+
+if __name__ == "__main__":
+    failures = 0
+    for name, test in list(globals().items()):
+        if not name.startswith("test_"):
+            continue
+        try:
+            test()
+            print(f"{GREEN}✓{END} {name}")
+        except AssertionError as exc:
+            failures += 1
+            print(f"{RED}✗{END} {name}: {exc}")
+    sys.exit(1 if failures else 0)
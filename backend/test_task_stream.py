@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Server-sent events stream of task changes (GET /api/tasks/stream).
+
+Each test serves the app with uvicorn in a background thread (the
+in-process TestClient cannot read an endless response) on a scratch SQLite
+database built from the Alembic migrations, and checks the deltas, the
+heartbeat, resuming with Last-Event-ID and writes surviving a broker error.
+
+Run with: python test_task_stream.py   (or: python -m pytest test_task_stream.py)
+"""
+
+import asyncio
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+
+# Use a scratch database unless another in-process test module already picked one
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='task-stream-')}/stream.db"
+os.environ["REMINDERS_ENABLED"] = "false"
+os.environ["CALENDAR_SYNC_ENABLED"] = "false"
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+
+from fake_redis import FakeRedis  # noqa: E402
+from main import app  # noqa: E402
+from services import task_events  # noqa: E402
+
+# Colors for terminal output
+GREEN = '\033[92m'
+RED = '\033[91m'
+END = '\033[0m'
+
+TOMORROW = (datetime.now(timezone.utc) + timedelta(days=1)).isoformat()
+
+
+@contextmanager
+def running_server():
+    command.upgrade(Config(os.path.join(BACKEND_DIR, "alembic.ini")), "head")
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning"))
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{sock.getsockname()[1]}", timeout=10) as client:
+            yield client
+    finally:
+        server.should_exit = True
+        thread.join(10)
+
+
+def login(client, email):
+    resp = client.post("/api/auth/register", json={
+        "name": "Stream User", "email": email, "password": "streampassword123"
+    })
+    return {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+
+class EventReader:
+    """Parses the stream as the test reads it; items are ("comment", text) or (event, id, data)"""
+
+    def __init__(self, client, headers):
+        self._stream = client.stream("GET", "/api/tasks/stream", headers=headers)
+        self.response = self._stream.__enter__()
+        self._lines = self.response.iter_lines()
+
+    def next(self, skip_comments=True):
+        fields = {}
+        for line in self._lines:
+            if line.startswith(":"):
+                if not skip_comments:
+                    return ("comment", line[1:].strip())
+            elif line:
+                name, _, value = line.partition(": ")
+                fields[name] = value
+            elif "event" in fields:
+                return (fields["event"], fields.get("id"), fields["data"])
+            else:
+                fields = {}
+        raise AssertionError("stream ended")
+
+    def close(self):
+        self._stream.__exit__(None, None, None)
+
+
+def test_stream_pushes_the_users_changes():
+    with running_server() as client:
+        h = login(client, "stream@example.com")
+        other = login(client, "other-stream@example.com")
+        reader = EventReader(client, h)
+        assert reader.response.headers["content-type"].startswith("text/event-stream")
+        assert reader.next(skip_comments=False) == ("comment", "connected")
+
+        task = client.post("/api/tasks/", headers=h, json={"title": "Streamed", "deadline": TOMORROW}).json()
+        kind, _, data = reader.next()
+        assert kind == "created" and f'"id": {task["id"]}' in data
+
+        client.post("/api/tasks/", headers=other, json={"title": "Not mine", "deadline": TOMORROW})
+        client.put(f"/api/tasks/{task['id']}", headers=h, json={"title": "Renamed"})
+        kind, _, data = reader.next()
+        assert kind == "updated" and '"title": "Renamed"' in data
+
+        client.delete(f"/api/tasks/{task['id']}", headers=h)
+        kind, _, data = reader.next()
+        assert kind == "deleted" and data == f'{{"id": {task["id"]}}}'
+        reader.close()
+
+
+def test_idle_stream_sends_heartbeats():
+    heartbeat = task_events.TASK_STREAM_HEARTBEAT_SECONDS
+    task_events.TASK_STREAM_HEARTBEAT_SECONDS = 0.1
+    try:
+        with running_server() as client:
+            reader = EventReader(client, login(client, "heartbeat@example.com"))
+            comments = [reader.next(skip_comments=False) for _ in range(3)]
+            assert comments[1:] == [("comment", "heartbeat")] * 2
+            reader.close()
+    finally:
+        task_events.TASK_STREAM_HEARTBEAT_SECONDS = heartbeat
+
+
+def test_reconnect_with_last_event_id_replays_missed_events():
+    with running_server() as client:
+        h = login(client, "resume@example.com")
+        reader = EventReader(client, h)
+        client.post("/api/tasks/", headers=h, json={"title": "Seen", "deadline": TOMORROW})
+        _, last_id, _ = reader.next()
+        reader.close()
+
+        missed = [
+            client.post("/api/tasks/", headers=h, json={"title": f"Missed {i}", "deadline": TOMORROW}).json()["id"]
+            for i in range(2)
+        ]
+        reader = EventReader(client, {**h, "Last-Event-ID": last_id})
+        replayed = [reader.next() for _ in missed]
+        assert [kind for kind, _, _ in replayed] == ["created", "created"]
+        assert all(f'"id": {task_id}' in data for (_, _, data), task_id in zip(replayed, missed))
+        client.post("/api/tasks/", headers=h, json={"title": "Live", "deadline": TOMORROW})
+        assert '"title": "Live"' in reader.next()[2]
+        reader.close()
+
+        # An id the server no longer has (e.g. from before a restart) asks the client to reload
+        reader = EventReader(client, {**h, "Last-Event-ID": "0-1"})
+        assert reader.next()[0] == "reset"
+        reader.close()
+
+        # Closed streams unsubscribe
+        deadline = time.monotonic() + 2
+        while client.get("/api/health").json()["task_events"]["streams"]:
+            assert time.monotonic() < deadline, "closed streams are still subscribed"
+            time.sleep(0.02)
+
+
+def test_broker_errors_do_not_fail_committed_writes():
+    broker = task_events.task_events
+
+    async def broker_down(user_id, kind, data):
+        raise ConnectionError("broker unreachable")
+
+    with running_server() as client:
+        h = login(client, "broker-down@example.com")
+        reader = EventReader(client, h)
+        dropped = broker.dropped
+        broker._publish = broker_down
+        try:
+            resp = client.post("/api/tasks/", headers=h, json={"title": "Kept", "deadline": TOMORROW})
+        finally:
+            del broker._publish
+        assert resp.status_code == 201
+        assert [task["title"] for task in client.get("/api/tasks/", headers=h).json()] == ["Kept"]
+        assert broker.dropped == dropped + 1
+        # The stream missed the event, so it is told to reload
+        assert reader.next()[0] == "reset"
+        reader.close()
+
+
+
+def test_memory_broker_keeps_replay_only_for_users_who_can_resume():
+    async def run():
+        broker = task_events.MemoryBroker(replay=3, replay_seconds=0.1)
+        await broker.publish(1, "created", {"id": 1})
+        assert not broker._recent  # no stream: no one can come back with an id
+
+        subscription = broker.subscribe(1)
+        await broker.publish(1, "created", {"id": 2})
+        assert (await subscription.get()).data == {"id": 2}
+        broker.unsubscribe(subscription)
+        for task_id in (3, 4, 5, 6):  # the client is reconnecting
+            await broker.publish(1, "created", {"id": task_id})
+        assert [event.data["id"] for event in broker._recent[1]] == [4, 5, 6]  # the last 3
+
+        await asyncio.sleep(0.15)
+        await broker.publish(1, "updated", {"id": 6})
+        return broker._recent
+
+    assert asyncio.run(run()) == {}
+
+
+def test_redis_broker_publishes_fans_out_and_replays():
+    fake = FakeRedis().start()
+
+    async def run():
+        broker = task_events.RedisBroker(fake.url, replay=3)
+        await broker.start()
+        try:
+            subscription = broker.subscribe(7)
+            other = broker.subscribe(8)
+            for task_id in (1, 2, 3, 4):
+                await broker.publish(7, "created", {"id": task_id})
+            live = [await asyncio.wait_for(subscription.get(), timeout=5) for _ in range(4)]
+            assert [event.data for event in live] == [{"id": i} for i in (1, 2, 3, 4)]
+            assert other._queue.empty()
+
+            # The stream is trimmed to the last 3: resuming after the 2nd works, after the 1st resets
+            replayed = await broker.replay(7, live[1].id)
+            assert [(event.id, event.kind, event.data) for event in replayed] == [tuple(e) for e in live[2:]]
+            assert await broker.replay(7, live[0].id) is None
+            assert await broker.replay(7, "not-a-stream-id") is None
+            assert broker.published == 4 and broker.dropped == 0
+        finally:
+            await broker.stop()
+
+    try:
+        asyncio.run(run())
+    finally:
+        fake.stop()
+    assert {"XADD", "XRANGE", "PUBLISH", "SUBSCRIBE"} <= set(fake.commands)
+
+if __name__ == "__main__":
+    failures = 0
+    for name, test in list(globals().items()):
+        if not name.startswith("test_"):
+            continue
+        try:
+            test()
+            print(f"{GREEN}✓{END} {name}")
+        except AssertionError as exc:
+            failures += 1
+            print(f"{RED}✗{END} {name}: {exc}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Task export and import (services/task_transfer.py).
+
+Drives /api/tasks/export and /api/tasks/import in-process against a scratch
+SQLite database built from the Alembic migrations, with small batch sizes so
+several batches run. Checks that an NDJSON or CSV export imports back to the
+same tasks, that rejected lines are reported with their line numbers (only
+the first MAX_IMPORT_ERRORS), that completed and missed rows without
+``completed_at`` get the import time, and that the ``user_task_stats``
+counters match ``aggregate_task_analytics`` afterwards.
+
+Run with: python test_task_transfer.py   (or: python -m pytest test_task_transfer.py)
+"""
+
+import csv
+import io
+import json
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+
+# Use a scratch database unless another in-process test module already picked one
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='task-transfer-')}/transfer.db"
+os.environ["REMINDERS_ENABLED"] = "false"
+os.environ["CALENDAR_SYNC_ENABLED"] = "false"
+
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+import services.task_transfer as task_transfer  # noqa: E402
+from database import SessionLocal  # noqa: E402
+from main import app  # noqa: E402
+from services.task_stats import aggregate_task_analytics  # noqa: E402
+
+# Colors for terminal output
+GREEN = '\033[92m'
+RED = '\033[91m'
+END = '\033[0m'
+
+NOW = datetime.now(timezone.utc).replace(microsecond=0)
+
+# Fields an import carries over; ids, calendar links and updated_at are new
+CARRIED = ["title", "description", "deadline", "status", "priority", "created_at", "completed_at"]
+
+
+@contextmanager
+def small_batches():
+    """A migrated database, and batch sizes small enough that every file spans several"""
+    command.upgrade(Config(os.path.join(BACKEND_DIR, "alembic.ini")), "head")
+    sizes = task_transfer.IMPORT_BATCH_SIZE, task_transfer.EXPORT_BATCH_SIZE
+    task_transfer.IMPORT_BATCH_SIZE, task_transfer.EXPORT_BATCH_SIZE = 3, 4
+    try:
+        yield
+    finally:
+        task_transfer.IMPORT_BATCH_SIZE, task_transfer.EXPORT_BATCH_SIZE = sizes
+
+
+def register(client, email):
+    resp = client.post("/api/auth/register", json={
+        "name": "Mover", "email": email, "password": "transferpassword123"
+    })
+    return {"Authorization": f"Bearer {resp.json()['access_token']}"}, resp.json()["user"]["id"]
+
+
+def import_file(client, h, content, filename="tasks.ndjson", **params):
+    resp = client.post(
+        "/api/tasks/import", headers=h, params=params,
+        files={"file": (filename, content.encode(), "application/octet-stream")},
+    )
+    assert resp.status_code == 200, resp.text
+    return resp.json()
+
+
+def export(client, h, fmt):
+    resp = client.get(f"/api/tasks/export?format={fmt}", headers=h)
+    assert resp.status_code == 200, resp.text
+    if fmt == "ndjson":
+        return [json.loads(line) for line in resp.text.splitlines()]
+    return list(csv.DictReader(io.StringIO(resp.text)))
+
+
+def carried(rows):
+    return [{field: row[field] or None for field in CARRIED} for row in rows]
+
+
+def assert_counters_match(client, h, user_id):
+    async def reference():
+        async with SessionLocal() as db:
+            return await aggregate_task_analytics(db, user_id)
+
+    analytics = client.get("/api/tasks/analytics/dashboard", headers=h).json()
+    expected = client.portal.call(reference).model_dump()
+    for key, value in expected.items():
+        if isinstance(value, float):
+            assert abs(analytics[key] - value) < 1e-6, key
+        else:
+            assert analytics[key] == value, key
+
+
+def test_ndjson_and_csv_exports_import_back_to_the_same_tasks():
+    with small_batches(), TestClient(app) as client:
+        h, _ = register(client, "transfer-source@example.com")
+        created = client.post("/api/tasks/bulk", headers=h, json={"items": [
+            {
+                "title": f'Task {i}, "quoted"' if i % 3 == 0 else f"Task {i}",
+                "description": "two\nlines, with a comma" if i % 2 else None,
+                "deadline": (NOW + timedelta(hours=5 * i - 20)).isoformat(),
+                "priority": ["low", "medium", "high", "critical"][i % 4],
+            }
+            for i in range(10)
+        ]}).json()
+        ids = [result["id"] for result in created["results"]]
+        client.patch("/api/tasks/bulk", headers=h, json={"items": [
+            {"id": ids[1], "status": "completed"}, {"id": ids[2], "status": "missed"},
+            {"id": ids[3], "status": "in_progress"},
+        ]})
+
+        for fmt in ("ndjson", "csv"):
+            source = export(client, h, fmt)
+            assert len(source) == 10 and source[0]["id"] is not None
+            content = client.get(f"/api/tasks/export?format={fmt}", headers=h).text
+
+            target_h, target_id = register(client, f"transfer-{fmt}@example.com")
+            # The format comes from the file name when not given
+            result = import_file(client, target_h, content, filename=f"tasks.{fmt}")
+            assert result == {"imported": 10, "failed": 0, "errors": []}
+            assert carried(export(client, target_h, fmt)) == carried(source)
+            assert_counters_match(client, target_h, target_id)
+
+
+def test_rejected_lines_are_reported_by_line_number_up_to_the_cap():
+    deadline = (NOW + timedelta(days=1)).isoformat()
+    with small_batches(), TestClient(app) as client:
+        h, user_id = register(client, "transfer-errors@example.com")
+        lines = [
+            json.dumps({"title": "Fine", "deadline": deadline}),
+            "{not json",
+            "",
+            json.dumps(["a", "list"]),
+            json.dumps({"deadline": deadline}),
+            json.dumps({"title": "Bad status", "deadline": deadline, "status": "someday"}),
+            json.dumps({"title": "Also fine", "deadline": deadline, "priority": "high"}),
+        ]
+        result = import_file(client, h, "\n".join(lines) + "\n")
+        assert (result["imported"], result["failed"]) == (2, 4)
+        assert [error["line"] for error in result["errors"]] == [2, 4, 5, 6]
+        assert result["errors"][0]["error"].startswith("invalid JSON")
+        assert result["errors"][1]["error"] == "expected a JSON object"
+        assert result["errors"][2]["error"].startswith("title:")
+        assert result["errors"][3]["error"].startswith("status:")
+
+        # CSV line numbers count the header
+        result = import_file(client, h, f"title,deadline\nGood,{deadline}\n,{deadline}\nNo date,\n", format="csv")
+        assert (result["imported"], result["failed"]) == (1, 2)
+        assert [error["line"] for error in result["errors"]] == [3, 4]
+
+        # Every bad line is counted, only the first MAX_IMPORT_ERRORS are listed
+        cap = task_transfer.MAX_IMPORT_ERRORS
+        lines = ["{bad"] * (cap + 25) + [json.dumps({"title": "Last", "deadline": deadline})]
+        result = import_file(client, h, "\n".join(lines))
+        assert (result["imported"], result["failed"]) == (1, cap + 25)
+        assert [error["line"] for error in result["errors"]] == list(range(1, cap + 1))
+        assert len(client.get("/api/tasks/", headers=h).json()) == 4
+        assert_counters_match(client, h, user_id)
+
+
+def test_finished_rows_without_completed_at_get_the_import_time():
+    with small_batches(), TestClient(app) as client:
+        h, user_id = register(client, "transfer-completed@example.com")
+        created_at = (NOW - timedelta(days=2)).isoformat()
+        completed_at = (NOW - timedelta(days=1)).isoformat()
+        rows = [
+            {"title": "Done", "status": "completed", "created_at": created_at},
+            {"title": "Missed", "status": "missed", "created_at": created_at},
+            {"title": "Done earlier", "status": "completed", "created_at": created_at, "completed_at": completed_at},
+            {"title": "Open", "status": "pending", "created_at": created_at},
+        ]
+        before = datetime.now(timezone.utc)
+        result = import_file(client, h, "".join(
+            json.dumps({**row, "deadline": (NOW - timedelta(hours=3)).isoformat()}) + "\n" for row in rows
+        ))
+        after = datetime.now(timezone.utc)
+        assert result["imported"] == 4
+
+        tasks = {task["title"]: task for task in export(client, h, "ndjson")}
+
+        def parsed(value):
+            value = datetime.fromisoformat(value)
+            return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+        for title in ("Done", "Missed"):
+            assert before - timedelta(seconds=1) <= parsed(tasks[title]["completed_at"]) <= after, tasks[title]
+        assert parsed(tasks["Done earlier"]["completed_at"]) == parsed(completed_at)
+        assert tasks["Open"]["completed_at"] is None
+        assert all(parsed(task["created_at"]) == parsed(created_at) for task in tasks.values())
+
+        # The counters include the completion times just filled in
+        assert_counters_match(client, h, user_id)
+        analytics = client.get("/api/tasks/analytics/dashboard", headers=h).json()
+        assert (analytics["completed_tasks"], analytics["missed_tasks"], analytics["pending_tasks"]) == (2, 1, 1)
+        assert analytics["average_completion_time"] is not None
+
+
+if __name__ == "__main__":
+    failures = 0
+    for name, test in list(globals().items()):
+        if not name.startswith("test_"):
+            continue
+        try:
+            test()
+            print(f"{GREEN}✓{END} {name}")
+        except AssertionError as exc:
+            failures += 1
+            print(f"{RED}✗{END} {name}: {exc}")
+    sys.exit(1 if failures else 0)
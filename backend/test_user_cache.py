@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Authenticated-user cache in get_current_user.
+
+Drives the app in-process against a scratch SQLite database built from the
+Alembic migrations, and checks that repeat requests skip the users table,
+that an edited, deactivated or deleted user takes effect on the next
+request (even when a concurrent request cached the old row mid-commit), and
+the LRU/TTL eviction of ``MemoryCache``.
+
+Run with: python test_user_cache.py   (or: python -m pytest test_user_cache.py)
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+
+# Use a scratch database unless another in-process test module already picked one
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='user-cache-')}/users.db"
+os.environ["REMINDERS_ENABLED"] = "false"
+os.environ["CALENDAR_SYNC_ENABLED"] = "false"
+
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event, select  # noqa: E402
+
+from auth import user_cache  # noqa: E402
+from cache import MemoryCache  # noqa: E402
+from database import SessionLocal, engine  # noqa: E402
+from main import app  # noqa: E402
+from models import User  # noqa: E402
+
+# Colors for terminal output
+GREEN = '\033[92m'
+RED = '\033[91m'
+END = '\033[0m'
+
+
+def register(client, email):
+    resp = client.post("/api/auth/register", json={
+        "name": "Cached User", "email": email, "password": "cachepassword123"
+    })
+    assert resp.status_code == 201, resp.text
+    h = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+    return h, client.get("/api/auth/me", headers=h).json()["id"]
+
+
+def edit_user(client, user_id, **fields):
+    async def edit():
+        async with SessionLocal() as db:
+            user = await db.get(User, user_id)
+            for name, value in fields.items():
+                setattr(user, name, value)
+            await db.commit()
+
+    client.portal.call(edit)
+
+
+def users_read(client, h):
+    """Statements on the users table issued by one /api/auth/me"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        resp = client.get("/api/auth/me", headers=h)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+    return resp, [s for s in statements if "FROM users" in s]
+
+
+def test_repeat_requests_are_served_from_the_cache():
+    command.upgrade(Config(os.path.join(BACKEND_DIR, "alembic.ini")), "head")
+    with TestClient(app) as client:
+        h, _ = register(client, "cache-hits@example.com")
+        hits, misses = user_cache.hits, user_cache.misses
+        resp, reads = users_read(client, h)
+        assert resp.status_code == 200 and not reads, reads
+        assert (user_cache.hits, user_cache.misses) == (hits + 1, misses)
+        assert client.get("/api/health").json()["user_cache"]["hits"] == user_cache.hits
+
+
+def test_edited_deactivated_and_deleted_users_take_effect_on_the_next_request():
+    command.upgrade(Config(os.path.join(BACKEND_DIR, "alembic.ini")), "head")
+    with TestClient(app) as client:
+        h, user_id = register(client, "cache-edits@example.com")
+
+        edit_user(client, user_id, name="Renamed")
+        resp, reads = users_read(client, h)
+        assert resp.json()["name"] == "Renamed" and reads
+
+        edit_user(client, user_id, is_active=False)
+        resp = client.get("/api/auth/me", headers=h)
+        assert resp.status_code == 403 and resp.json()["detail"] == "Inactive user"
+        assert client.post("/api/tasks/", headers=h, json={"title": "Nope"}).status_code == 403
+
+        h, user_id = register(client, "cache-deleted@example.com")
+
+        async def delete():
+            async with SessionLocal() as db:
+                await db.delete(await db.get(User, user_id))
+                await db.commit()
+
+        client.portal.call(delete)
+        assert client.get("/api/auth/me", headers=h).status_code == 401
+
+
+def test_a_row_cached_mid_commit_is_dropped_again():
+    command.upgrade(Config(os.path.join(BACKEND_DIR, "alembic.ini")), "head")
+    redrop = user_cache.redrop
+    user_cache.redrop = 0.1
+    try:
+        with TestClient(app) as client:
+            h, user_id = register(client, "cache-race@example.com")
+
+            async def deactivate_while_a_request_reads():
+                async with SessionLocal() as reader, SessionLocal() as writer:
+                    # The request loads the committed row, the write commits, then the request caches it
+                    stale = (await reader.execute(select(User).where(User.id == user_id))).scalars().one()
+                    (await writer.get(User, user_id)).is_active = False
+                    await writer.commit()
+                    await user_cache.put(stale)
+
+            client.portal.call(deactivate_while_a_request_reads)
+            time.sleep(0.3)
+            assert client.get("/api/auth/me", headers=h).status_code == 403
+    finally:
+        user_cache.redrop = redrop
+
+
+def test_memory_cache_evicts_least_recently_used_and_expired_entries():
+    cache = MemoryCache(max_size=2)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+    assert cache.get("a") == 1  # b is now the least recently used
+    cache.set("c", 3, ttl=60)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+    assert cache.evictions == 1 and len(cache) == 2
+
+    cache.set("short", 4, ttl=0.05)
+    assert cache.get("short") == 4
+    time.sleep(0.1)
+    assert cache.get("short") is None
+    cache.delete("a")
+    assert cache.get("a") is None
+
+
+if __name__ == "__main__":
+    failures = 0
+    for name, test in list(globals().items()):
+        if not name.startswith("test_"):
+            continue
+        try:
+            test()
+            print(f"{GREEN}✓{END} {name}")
+        except AssertionError as exc:
+            failures += 1
+            print(f"{RED}✗{END} {name}: {exc}")
+    sys.exit(1 if failures else 0)
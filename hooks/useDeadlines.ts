@@ -3,21 +3,24 @@
  * Supports both authenticated (API) and guest (localStorage) modes
  */
 
-import { useState, useEffect, useCallback } from 'react';
+import { useState, useEffect, useCallback, useRef } from 'react';
 import { useAuth } from './useAuth';
 import {
-  getTasks,
+  getTasksPage,
+  getTask,
   createTask,
   updateTask,
   deleteTask,
   getPrioritizedTasks,
   getTaskAnalytics,
+  subscribeToTaskChanges,
   type Task,
   type TaskCreate,
   type TaskUpdate,
   type DetailedTask,
   type TaskAnalytics,
   type PrioritizedTasks,
+  type TaskPage,
 } from '@/lib/api/tasks';
 
 // Local storage deadline interface (guest mode)
@@ -40,6 +43,41 @@ export interface DeadlineWithDetails extends Task {
   is_overdue?: boolean;
 }
 
+// Tasks fetched per request; further pages are loaded on demand with loadMore()
+const PAGE_SIZE = 100;
+
+// Analytics and recommendations are refreshed once a burst of task changes settles
+const SUMMARY_REFRESH_DELAY_MS = 2000;
+
+// Sort key (deadline, id) of the last task fetched; pages come in this order
+interface PageEnd {
+  deadline: number;
+  id: number;
+}
+
+const pageEndOf = (page: TaskPage): PageEnd | null => {
+  const last = page.items[page.items.length - 1];
+  return page.nextCursor && last ? { deadline: Date.parse(last.deadline), id: last.id } : null;
+};
+
+// A task past the last page fetched arrives with a later page; adding it now would show it twice
+const isWithinLoadedPages = (task: Task, end: PageEnd | null) => {
+  if (!end) return true;
+  const deadline = Date.parse(task.deadline);
+  return deadline < end.deadline || (deadline === end.deadline && task.id <= end.id);
+};
+
+// Fetched tasks replace the copies already listed and the rest are appended
+const mergeById = (prev: DeadlineWithDetails[], fetched: DeadlineWithDetails[]) => {
+  const byId = new Map(fetched.map(task => [task.id, task]));
+  const merged = prev.map(d => {
+    const task = byId.get(d.id);
+    byId.delete(d.id);
+    return task ? { ...d, ...task } : d;
+  });
+  return [...merged, ...byId.values()];
+};
+
 export function useDeadlines() {
   const { isAuthenticated, isLoading: authLoading } = useAuth();
   const [deadlines, setDeadlines] = useState<DeadlineWithDetails[]>([]);
@@ -47,6 +85,30 @@ export function useDeadlines() {
   const [prioritized, setPrioritized] = useState<PrioritizedTasks | null>(null);
   const [isLoading, setIsLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
+  const refreshTimer = useRef<ReturnType<typeof setTimeout> | undefined>(undefined);
+  const deadlinesRef = useRef(deadlines);
+  deadlinesRef.current = deadlines;
+  const pageEnd = useRef<PageEnd | null>(null); // null once every page is loaded
+
+  // Re-read analytics and recommendations once a burst of task changes settles; writes call
+  // this themselves, so the summaries stay current even while the task stream is down
+  const refreshSummaries = useCallback(() => {
+    clearTimeout(refreshTimer.current);
+    refreshTimer.current = setTimeout(async () => {
+      try {
+        const [analyticsData, prioritizedData] = await Promise.all([
+          getTaskAnalytics(),
+          getPrioritizedTasks(),
+        ]);
+        setAnalytics(analyticsData);
+        setPrioritized(prioritizedData);
+      } catch (err) {
+        console.error('Error refreshing analytics:', err);
+      }
+    }, SUMMARY_REFRESH_DELAY_MS);
+  }, []);
 
   // Convert local deadline to API task format
   const localToApi = (local: LocalDeadline): DeadlineWithDetails => ({
@@ -86,13 +148,15 @@ export function useDeadlines() {
     try {
       if (isAuthenticated) {
         // Authenticated mode: fetch from API
-        const [tasks, analyticsData, prioritizedData] = await Promise.all([
-          getTasks(),
+        const [page, analyticsData, prioritizedData] = await Promise.all([
+          getTasksPage({ limit: PAGE_SIZE }),
           getTaskAnalytics(),
           getPrioritizedTasks(),
         ]);
 
-        setDeadlines(tasks.map(task => ({ ...task, hasTime: true })));
+        setDeadlines(page.items.map(task => ({ ...task, hasTime: true })));
+        setNextCursor(page.nextCursor);
+        pageEnd.current = pageEndOf(page);
         setAnalytics(analyticsData);
         setPrioritized(prioritizedData);
       } else {
@@ -120,6 +184,25 @@ export function useDeadlines() {
     }
   }, [isAuthenticated, authLoading]);
 
+  // Load the next page of tasks (authenticated mode only)
+  const loadMore = useCallback(async () => {
+    if (!isAuthenticated || !nextCursor || isLoadingMore) return;
+
+    setIsLoadingMore(true);
+    try {
+      const page = await getTasksPage({ limit: PAGE_SIZE, cursor: nextCursor });
+      // Tasks created or moved since the first page may already be listed
+      setDeadlines(prev => mergeById(prev, page.items.map(task => ({ ...task, hasTime: true }))));
+      setNextCursor(page.nextCursor);
+      pageEnd.current = pageEndOf(page);
+    } catch (err) {
+      console.error('Error loading more deadlines:', err);
+      setError(err instanceof Error ? err.message : 'Failed to load deadlines');
+    } finally {
+      setIsLoadingMore(false);
+    }
+  }, [isAuthenticated, nextCursor, isLoadingMore]);
+
   // Save to localStorage (guest mode)
   const saveToLocalStorage = (deadlines: DeadlineWithDetails[]) => {
     const local = deadlines.map(apiToLocal);
@@ -143,7 +226,13 @@ export function useDeadlines() {
           priority: deadline.priority,
           description: deadline.description,
         });
-        setDeadlines(prev => [...prev, { ...newTask, hasTime: deadline.hasTime }]);
+        // The task stream may have delivered it already
+        setDeadlines(prev =>
+          prev.some(d => d.id === newTask.id) || !isWithinLoadedPages(newTask, pageEnd.current)
+            ? prev
+            : [...prev, { ...newTask, hasTime: deadline.hasTime }]
+        );
+        refreshSummaries();
       } else {
         // Guest mode
         const newDeadline: DeadlineWithDetails = {
@@ -162,7 +251,6 @@ export function useDeadlines() {
         setDeadlines(updated);
         saveToLocalStorage(updated);
       }
-      await loadDeadlines(); // Refresh
     } catch (err) {
       throw err;
     }
@@ -175,11 +263,12 @@ export function useDeadlines() {
   ) => {
     try {
       if (isAuthenticated) {
-        // API mode
-        await updateTask(id, updates);
+        // API mode: the response carries the recomputed time_remaining, is_overdue and priority_score
+        const saved = await updateTask(id, updates);
         setDeadlines(prev =>
-          prev.map(d => (d.id === id ? { ...d, ...updates } : d))
+          prev.map(d => (d.id === id ? { ...d, ...saved } : d))
         );
+        refreshSummaries();
       } else {
         // Guest mode
         const updated = deadlines.map(d =>
@@ -188,7 +277,6 @@ export function useDeadlines() {
         setDeadlines(updated);
         saveToLocalStorage(updated);
       }
-      await loadDeadlines(); // Refresh
     } catch (err) {
       throw err;
     }
@@ -208,6 +296,7 @@ export function useDeadlines() {
         // API mode
         await deleteTask(id);
         setDeadlines(prev => prev.filter(d => d.id !== id));
+        refreshSummaries();
       } else {
         // Guest mode
         const updated = deadlines.filter(d => d.id !== id);
@@ -224,6 +313,54 @@ export function useDeadlines() {
     loadDeadlines();
   }, [loadDeadlines]);
 
+  // Apply task changes pushed by the server instead of re-fetching the list
+  useEffect(() => {
+    if (!isAuthenticated || authLoading) return;
+
+    const unsubscribe = subscribeToTaskChanges(change => {
+      if (change.kind === 'reset') {
+        loadDeadlines();
+        return;
+      }
+      if (change.kind === 'updated') {
+        // Events carry the stored columns only; re-read the task when its derived fields may have moved
+        const current = deadlinesRef.current.find(d => d.id === change.task.id);
+        if (
+          current &&
+          (Date.parse(current.deadline) !== Date.parse(change.task.deadline) ||
+            current.status !== change.task.status ||
+            current.priority !== change.task.priority)
+        ) {
+          getTask(change.task.id)
+            .then(task => setDeadlines(prev => prev.map(d => (d.id === task.id ? { ...d, ...task } : d))))
+            .catch(err => console.error('Error refreshing task:', err));
+        }
+      }
+      if (change.kind === 'deleted') {
+        setDeadlines(prev => prev.filter(d => d.id !== change.id));
+      } else {
+        setDeadlines(prev => {
+          const index = prev.findIndex(d => d.id === change.task.id);
+          if (index === -1) {
+            // Tasks on pages not loaded yet arrive with those pages
+            return change.kind === 'created' && isWithinLoadedPages(change.task, pageEnd.current)
+              ? [...prev, { ...change.task, hasTime: true }]
+              : prev;
+          }
+          const next = [...prev];
+          next[index] = { ...prev[index], ...change.task };
+          return next;
+        });
+      }
+      refreshSummaries();
+    });
+
+    return () => {
+      unsubscribe();
+      clearTimeout(refreshTimer.current);
+    };
+  }, [isAuthenticated, authLoading, loadDeadlines, refreshSummaries]);
+
   // Save to localStorage in guest mode whenever deadlines change
   useEffect(() => {
     if (!isAuthenticated && !authLoading) {
@@ -236,6 +373,8 @@ export function useDeadlines() {
     analytics,
     prioritized,
     isLoading,
+    isLoadingMore,
+    hasMore: nextCursor !== null,
     error,
     isAuthenticated,
     addDeadline,
@@ -243,5 +382,6 @@ export function useDeadlines() {
     completeDeadline,
     removeDeadline,
     reload: loadDeadlines,
+    loadMore,
   };
 }
@@ -132,6 +132,41 @@ export async function getTasks(
   return response.json();
 }
 
+export interface TaskPage {
+  items: DetailedTask[];
+  nextCursor: string | null;
+}
+
+/**
+ * Get one page of tasks using keyset pagination.
+ * Pass the previous page's nextCursor to continue; nextCursor is null on the last page.
+ */
+export async function getTasksPage(
+  options: {
+    limit?: number;
+    cursor?: string | null;
+    status?: Task['status'];
+    priority?: Task['priority'];
+  } = {}
+): Promise<TaskPage> {
+  const params = new URLSearchParams();
+  params.append('limit', String(options.limit ?? 100));
+  if (options.cursor) params.append('cursor', options.cursor);
+  if (options.status) params.append('status_filter', options.status);
+  if (options.priority) params.append('priority_filter', options.priority);
+
+  const response = await authenticatedFetch(`${API_URL}/api/tasks/?${params.toString()}`);
+
+  if (!response.ok) {
+    throw new Error('Failed to fetch tasks');
+  }
+
+  return {
+    items: await response.json(),
+    nextCursor: response.headers.get('X-Next-Cursor'),
+  };
+}
+
 /**
  * Get a single task by ID
  */
@@ -148,7 +183,7 @@ export async function getTask(taskId: number): Promise<DetailedTask> {
 /**
  * Create a new task
  */
-export async function createTask(task: TaskCreate): Promise<Task> {
+export async function createTask(task: TaskCreate): Promise<DetailedTask> {
   const response = await authenticatedFetch(`${API_URL}/api/tasks/`, {
     method: 'POST',
     body: JSON.stringify(task),
@@ -165,7 +200,7 @@ export async function createTask(task: TaskCreate): Promise<Task> {
 /**
  * Update an existing task
  */
-export async function updateTask(taskId: number, updates: TaskUpdate): Promise<Task> {
+export async function updateTask(taskId: number, updates: TaskUpdate): Promise<DetailedTask> {
   const response = await authenticatedFetch(`${API_URL}/api/tasks/${taskId}`, {
     method: 'PUT',
     body: JSON.stringify(updates),
@@ -217,3 +252,73 @@ export async function getPrioritizedTasks(): Promise<PrioritizedTasks> {
 
   return response.json();
 }
+
+export type TaskChange =
+  | { kind: 'created' | 'updated'; task: Task }
+  | { kind: 'deleted'; id: number }
+  | { kind: 'reset' };
+
+/**
+ * Follow the user's task changes over server-sent events (GET /api/tasks/stream).
+ * Uses fetch rather than EventSource so the Authorization header can be sent, and
+ * reconnects with Last-Event-ID so changes made while disconnected are replayed.
+ * A 'reset' change means the list must be reloaded. Returns a function that stops it.
+ */
+export function subscribeToTaskChanges(onChange: (change: TaskChange) => void): () => void {
+  const controller = new AbortController();
+  let lastEventId: string | null = null;
+  let retryMs = 3000;
+
+  const dispatch = (block: string) => {
+    const fields: Record<string, string> = {};
+    for (const line of block.split('\n')) {
+      if (!line || line.startsWith(':')) continue; // comments are heartbeats
+      const colon = line.indexOf(':');
+      const name = colon === -1 ? line : line.slice(0, colon);
+      fields[name] = colon === -1 ? '' : line.slice(colon + 1).replace(/^ /, '');
+    }
+    if (fields.retry) retryMs = Number(fields.retry) || retryMs;
+    if (!fields.event) return;
+    if (fields.id) lastEventId = fields.id;
+    const data = JSON.parse(fields.data);
+    if (fields.event === 'deleted') onChange({ kind: 'deleted', id: data.id });
+    else if (fields.event === 'reset') onChange({ kind: 'reset' });
+    else onChange({ kind: fields.event as 'created' | 'updated', task: data });
+  };
+
+  const run = async () => {
+    while (!controller.signal.aborted) {
+      try {
+        const headers: Record<string, string> = { Accept: 'text/event-stream' };
+        if (lastEventId) headers['Last-Event-ID'] = lastEventId;
+        const response = await authenticatedFetch(`${API_URL}/api/tasks/stream`, {
+          headers,
+          signal: controller.signal,
+        });
+        if (!response.ok || !response.body) {
+          throw new Error(`Task stream failed: HTTP ${response.status}`);
+        }
+
+        const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+        let buffer = '';
+        while (true) {
+          const { value, done } = await reader.read();
+          if (done) break;
+          buffer += value;
+          let end;
+          while ((end = buffer.indexOf('\n\n')) !== -1) {
+            dispatch(buffer.slice(0, end));
+            buffer = buffer.slice(end + 2);
+          }
+        }
+      } catch (err) {
+        if (controller.signal.aborted) return;
+        console.error('Task stream disconnected:', err);
+      }
+      await new Promise(resolve => setTimeout(resolve, retryMs));
+    }
+  };
+
+  run();
+  return () => controller.abort();
+}